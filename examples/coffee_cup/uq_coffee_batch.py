@@ -0,0 +1,45 @@
+import uncertainpy as un
+import chaospy as cp                       # To create distributions
+import numpy as np                         # For the time array
+from scipy.integrate import odeint         # To integrate our equation
+
+
+# Create a batch version of the coffee cup model function.
+# kappa and T_env are arrays with one value for each set of parameters,
+# and all the sets of parameters are integrated at the same time.
+def coffee_cup_batch(kappa, T_env):
+    # Initial temperature and time array
+    time = np.linspace(0, 200, 150)            # Minutes
+    T_0 = np.full(len(kappa), 95.)             # Celsius
+
+    # The equation describing the model
+    def f(T, time, kappa, T_env):
+        return -kappa*(T - T_env)
+
+    # Solving the equation by integration, one column for each set of parameters
+    temperature = odeint(f, T_0, time, args=(kappa, T_env))
+
+    # Return time (shared by all sets of parameters) and
+    # the model output with one row for each set of parameters
+    return time, temperature.T
+
+
+# Create a batch model from the coffee_cup_batch function and add labels
+model = un.Model(run=coffee_cup_batch,
+                 batch=True,
+                 labels=["Time (min)", "Temperature (C)"])
+
+# Create the distributions
+kappa_dist = cp.Uniform(0.025, 0.075)
+T_env_dist = cp.Uniform(15, 25)
+
+# Define the parameter dictionary
+parameters = {"kappa": kappa_dist, "T_env": T_env_dist}
+
+# Set up the uncertainty quantification
+UQ = un.UncertaintyQuantification(model=model, parameters=parameters)
+
+# Perform the uncertainty quantification using
+# polynomial chaos with point collocation (by default)
+# We set the seed to easier be able to reproduce the result
+data = UQ.quantify(seed=10)
@@ -23,9 +23,11 @@ be used for many other types of models and features within other fields.
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 from .data import Data, DataFeature
+from .surrogate import Surrogate
 from .distribution import uniform, normal
 from .parameters import Parameter, Parameters
 from .uncertainty import UncertaintyQuantification
+from .core import EvaluationCache, ResultTransport
 
 from .plotting import PlotUncertainty
 from .features import Features, NetworkFeatures, EfelFeatures, GeneralNetworkFeatures
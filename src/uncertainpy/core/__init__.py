@@ -3,19 +3,44 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 """
 This module contains the classes that are responsible for running the model and
 calculate features of the model, both in parallel (``RunModel`` and
-``Parallel``), as well as the class for performing the uncertainty calculations
-(``UncertaintyCalculations``. It also contains the base classes that are
-responsible for setting and updating parameters, models and features across
-classes (``Base`` and ``ParameterBase``).
+``Parallel``), the pool of worker processes used to do so (``WorkerPool``),
+a cache of previous model evaluations (``EvaluationCache``), a checkpoint file
+for resuming interrupted runs (``Checkpoint``), the transport of large results
+from the worker processes (``ResultTransport``), a columnar store of the
+results (``ResultStore``), the profiling of the model evaluations
+(``Profiler``), the statistics of polynomial chaos expansions
+(``PCEStatistics``) and the fitting of them (``PCEFit``), as well as the class for
+performing the uncertainty calculations (``UncertaintyCalculations``. It also
+contains the base classes that are responsible for setting and updating
+parameters, models and features across classes (``Base`` and
+``ParameterBase``).
 """
 
 from .base import Base, ParameterBase
 from .run_model import RunModel
 from .uncertainty_calculations import UncertaintyCalculations
 from .parallel import Parallel
+from .worker_pool import WorkerPool
+from .evaluation_cache import EvaluationCache
+from .checkpoint import Checkpoint
+from .result_transport import ResultTransport, ArrayDescriptor
+from .result_store import ResultStore
+from .profiler import Profiler, Timings
+from .pce_statistics import PCEStatistics
+from .pce_fit import PCEFit
 
 __all__ = ["Parallel",
            "Base",
            "ParameterBase",
            "RunModel",
-           "UncertaintyCalculations"]
\ No newline at end of file
+           "UncertaintyCalculations",
+           "WorkerPool",
+           "EvaluationCache",
+           "Checkpoint",
+           "ResultTransport",
+           "ArrayDescriptor",
+           "ResultStore",
+           "Profiler",
+           "Timings",
+           "PCEStatistics",
+           "PCEFit"]
\ No newline at end of file
@@ -0,0 +1,182 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import pickle
+
+import numpy as np
+
+from ..utils.logger import setup_module_logger, get_logger
+
+
+class Checkpoint(object):
+    """
+    A checkpoint file that the result of each finished model evaluation is
+    appended to, so an interrupted run can be resumed without evaluating the
+    same nodes again.
+
+    Each evaluation is stored together with the uncertain parameters, the index
+    of the node and the node (values of the uncertain parameters) itself.
+    The settings the evaluations are calculated with, such as the feature
+    settings and the time arrays results are resampled onto, are stored at
+    the start of the file, and the evaluations are only reused with the same
+    settings.
+    The evaluations are written one at a time, so at most the evaluations that
+    are running when the run is interrupted are lost.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the checkpoint file.
+    resume : bool, optional
+        If the evaluations in an existing checkpoint file should be reused.
+        If False, any existing checkpoint file is overwritten.
+        Default is False.
+    logger_level : {"info", "debug", "warning", "error", "critical", None}, optional
+        Set the threshold for the logging level. Logging messages less severe
+        than this level is ignored. If None, no logging to file is performed.
+        Default logger level is "info".
+
+    Attributes
+    ----------
+    filename : str
+        Name of the checkpoint file.
+
+    Notes
+    -----
+    A stored evaluation is only reused if both the index and the node are
+    identical to the node that should be evaluated. Resuming therefore requires
+    the same nodes as in the interrupted run, which for the quasi-Monte Carlo
+    method and point collocation means that the same `seed` must be used.
+
+    See Also
+    --------
+    uncertainpy.core.RunModel
+    """
+    def __init__(self, filename, resume=False, logger_level="info"):
+        self.filename = filename
+
+        setup_module_logger(class_instance=self, level=logger_level)
+
+        if not resume:
+            self.clear()
+
+
+    def clear(self):
+        """
+        Remove all evaluations from the checkpoint file.
+        """
+        folder = os.path.dirname(self.filename)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        open(self.filename, "wb").close()
+
+
+    def load(self, uncertain_parameters, settings=None):
+        """
+        Load the evaluations stored for `uncertain_parameters`.
+
+        If the checkpoint file ends with a partially written evaluation, for
+        example because the run was killed while writing, the partially written
+        evaluation is removed from the file.
+
+        Parameters
+        ----------
+        uncertain_parameters : list
+            A list of the names of the uncertain parameters.
+        settings : {None, str}, optional
+            The settings, besides the model parameters, that decide the result
+            of an evaluation, as given by ``RunModel.evaluation_settings``.
+            The settings are stored at the start of the checkpoint file, and if
+            they differ from the stored settings, the checkpoint file is
+            cleared and no evaluations are reused. If None, the stored settings
+            are not checked. Default is None.
+
+        Returns
+        -------
+        evaluations : dict
+            A dictionary with the node index as key, and a tuple of the node and
+            the result, on the same form as returned by Parallel.run but
+            without interpolations, as value.
+        """
+        logger = get_logger(self)
+
+        evaluations = {}
+
+        if not os.path.isfile(self.filename):
+            self.clear()
+
+        uncertain_parameters = list(uncertain_parameters)
+
+        header = None
+
+        with open(self.filename, "rb") as f:
+            position = 0
+            while True:
+                try:
+                    record = pickle.load(f)
+                except EOFError:
+                    break
+                except Exception:
+                    logger.warning("Removing a partially written evaluation from {}".format(self.filename))
+                    break
+
+                if position == 0 and "settings" in record:
+                    header = record
+
+                position = f.tell()
+
+                if "settings" not in record and record["uncertain_parameters"] == uncertain_parameters:
+                    evaluations[record["index"]] = (record["node"], record["result"])
+
+        # Remove any partially written evaluation at the end of the file
+        if position != os.path.getsize(self.filename):
+            with open(self.filename, "ab") as f:
+                f.truncate(position)
+
+        if settings is None:
+            return evaluations
+
+        if position > 0 and (header is None or header["settings"] != settings):
+            logger.warning("The evaluations in {} were calculated with other settings "
+                           "and are not reused".format(self.filename))
+
+            self.clear()
+            position = 0
+            evaluations = {}
+
+        if position == 0:
+            with open(self.filename, "ab") as f:
+                pickle.dump({"settings": settings}, f, protocol=2)
+
+        return evaluations
+
+
+
+    def append(self, uncertain_parameters, index, node, result):
+        """
+        Append a finished evaluation to the checkpoint file.
+
+        Parameters
+        ----------
+        uncertain_parameters : list
+            A list of the names of the uncertain parameters.
+        index : int
+            The index of the node.
+        node : array
+            The values of the uncertain parameters for the evaluation.
+        result : dict
+            The model and feature results of the evaluation, as returned by
+            Parallel.run. Interpolations are not stored.
+        """
+        result = {feature: {"values": result[feature]["values"],
+                            "time": result[feature]["time"]}
+                  for feature in result}
+
+        record = {"uncertain_parameters": list(uncertain_parameters),
+                  "index": index,
+                  "node": np.array(node),
+                  "result": result}
+
+        with open(self.filename, "ab") as f:
+            pickle.dump(record, f, protocol=2)
@@ -0,0 +1,370 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import json
+import hashlib
+import collections
+
+import numpy as np
+
+from ..utils.logger import setup_module_logger, get_logger
+from ..utils.spike_matrix import SpikeMatrix
+
+
+def _default(value):
+    """
+    Convert objects json can not serialize into something it can, used when
+    hashing the model parameters.
+    """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    elif isinstance(value, np.generic):
+        return value.item()
+    else:
+        return repr(value)
+
+
+def _to_array(value):
+    """
+    Convert a model/feature result to an array that can be stored in a npz
+    file. Irregular results are stored as object arrays, and sparse
+    SpikeMatrix results are kept sparse in a 0-dimensional object array.
+    """
+    if isinstance(value, SpikeMatrix):
+        array = np.empty((), dtype=object)
+        array[()] = value
+
+        return array
+
+    try:
+        return np.asarray(value)
+    except ValueError:
+        array = np.empty(len(value), dtype=object)
+        for i, item in enumerate(value):
+            array[i] = item
+
+        return array
+
+
+def _from_array(array):
+    """
+    Convert an array loaded from a npz file back to a model/feature result.
+    """
+    if array.dtype.hasobject and array.ndim == 0:
+        return array[()]
+
+    return array
+
+
+class EvaluationCache(object):
+    """
+    A content-addressed cache of model and feature evaluations.
+
+    Each evaluation is identified by a hash of the model name, the
+    ``model_kwargs`` of the model, the names of the features that are
+    calculated, the complete set of model parameters, the other settings that
+    decide the result (such as feature settings, the interpolation method and
+    the time arrays results are resampled onto) and a user given `version`.
+    The results of the most recently used evaluations are kept in memory, and
+    if `folder` is given, each evaluation is additionally stored as a separate
+    ``.npz`` file in `folder`, so it can be reused across sessions.
+
+    Parameters
+    ----------
+    folder : {None, str}, optional
+        Folder to store the cached evaluations in. If None, evaluations are
+        only cached in memory. Default is None.
+    version : str, optional
+        A user given version of the model (and features). Change the version
+        whenever the implementation of the model changes, so previously cached
+        evaluations are not reused. Default is "".
+    max_items : {int, None}, optional
+        The maximum number of evaluations kept in memory. The least recently
+        used evaluations are removed first. If None, there is no limit.
+        Default is 1000.
+    max_size : {int, None}, optional
+        The maximum total size, in bytes, of the cached evaluations stored in
+        `folder`. The least recently used evaluations are removed first.
+        If None, there is no limit. Default is None.
+    logger_level : {"info", "debug", "warning", "error", "critical", None}, optional
+        Set the threshold for the logging level. Logging messages less severe
+        than this level is ignored. If None, no logging to file is performed.
+        Default logger level is "info".
+
+    Attributes
+    ----------
+    folder : {None, str}
+        Folder the cached evaluations are stored in.
+    version : str
+        The user given version of the model.
+    max_items : {int, None}
+        The maximum number of evaluations kept in memory.
+    max_size : {int, None}
+        The maximum total size, in bytes, of the evaluations stored in `folder`.
+    hits : int
+        The number of evaluations found in the cache.
+    misses : int
+        The number of evaluations not found in the cache.
+
+    Notes
+    -----
+    Interpolations of irregular results are not cached, they are recreated
+    from the cached ``"time"`` and ``"values"`` when needed.
+
+    The size of each file in `folder`, in the order the files were last used,
+    is read once when the cache is created and then kept up to date in
+    memory, so adding an evaluation does not list the folder. Files added to
+    `folder` by other processes are only counted once they are used by this
+    cache.
+
+    See Also
+    --------
+    uncertainpy.core.RunModel
+    """
+    def __init__(self,
+                 folder=None,
+                 version="",
+                 max_items=1000,
+                 max_size=None,
+                 logger_level="info"):
+
+        self.folder = folder
+        self.version = version
+        self.max_items = max_items
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+
+        self._memory = collections.OrderedDict()
+
+        # The size of each file in folder, least recently used first
+        self._files = collections.OrderedDict()
+        self._total_size = 0
+
+        if self.folder is not None:
+            if not os.path.isdir(self.folder):
+                os.makedirs(self.folder)
+
+            self._read_files()
+
+        setup_module_logger(class_instance=self, level=logger_level)
+
+
+    def key(self, model, features, model_parameters, settings=None):
+        """
+        Create the key that identifies an evaluation.
+
+        Parameters
+        ----------
+        model : Model
+            The model that is evaluated.
+        features : Features
+            The features that are calculated.
+        model_parameters : dict
+            All model parameters for the evaluation.
+        settings : {None, str}, optional
+            Other settings that decide the result of the evaluation, such as
+            the feature settings and the time arrays irregular results are
+            resampled onto, as given by ``RunModel.evaluation_settings``.
+            Default is None.
+
+        Returns
+        -------
+        key : str
+            A hex digest that identifies the evaluation.
+        """
+        content = {"model": model.name,
+                   "model_kwargs": model.model_kwargs,
+                   "features": sorted(features.features_to_run),
+                   "parameters": model_parameters,
+                   "settings": settings,
+                   "version": self.version}
+
+        content = json.dumps(content, sort_keys=True, default=_default)
+
+        return hashlib.sha1(content.encode("utf8")).hexdigest()
+
+
+    def _filename(self, key):
+        return os.path.join(self.folder, key + ".npz")
+
+
+    def get(self, key):
+        """
+        Get a cached evaluation.
+
+        Parameters
+        ----------
+        key : str
+            The key of the evaluation.
+
+        Returns
+        -------
+        result : {dict, None}
+            The model and feature results of the evaluation, on the same form
+            as returned by Parallel.run but without interpolations.
+            None if the evaluation is not in the cache.
+        """
+        if key in self._memory:
+            result = self._memory.pop(key)
+            self._memory[key] = result
+
+        elif self.folder is not None and os.path.isfile(self._filename(key)):
+            result = self._load(key)
+            self._add_to_memory(key, result)
+
+            # Mark the file as recently used, also for later sessions
+            os.utime(self._filename(key), None)
+            self._add_file(key)
+
+        else:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        # Copy so interpolations added to the result do not end up in the cache
+        return {feature: dict(result[feature]) for feature in result}
+
+
+    def set(self, key, result):
+        """
+        Add an evaluation to the cache.
+
+        Parameters
+        ----------
+        key : str
+            The key of the evaluation.
+        result : dict
+            The model and feature results of the evaluation, as returned by
+            Parallel.run. Interpolations are not stored.
+        """
+        result = {feature: {"values": result[feature]["values"],
+                            "time": result[feature]["time"]}
+                  for feature in result}
+
+        self._add_to_memory(key, result)
+
+        if self.folder is not None:
+            self._save(key, result)
+            self._add_file(key)
+            self._evict_files()
+
+
+    def _add_to_memory(self, key, result):
+        self._memory[key] = result
+
+        if self.max_items is not None:
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+
+    def _save(self, key, result):
+        names = list(result.keys())
+
+        arrays = {"names": np.array(names)}
+        for i, name in enumerate(names):
+            arrays["values_{}".format(i)] = _to_array(result[name]["values"])
+            arrays["time_{}".format(i)] = _to_array(result[name]["time"])
+
+        # Write to a temporary file first so other processes never read a
+        # partially written file
+        tmp_filename = self._filename(key) + ".tmp"
+        with open(tmp_filename, "wb") as f:
+            np.savez(f, **arrays)
+
+        getattr(os, "replace", os.rename)(tmp_filename, self._filename(key))
+
+
+    def _load(self, key):
+        result = {}
+
+        with np.load(self._filename(key), allow_pickle=True) as arrays:
+            for i, name in enumerate(arrays["names"]):
+                result[str(name)] = {"values": _from_array(arrays["values_{}".format(i)]),
+                                     "time": arrays["time_{}".format(i)]}
+
+        return result
+
+
+    def _read_files(self):
+        files = []
+        for filename in os.listdir(self.folder):
+            if filename.endswith(".npz"):
+                path = os.path.join(self.folder, filename)
+                files.append((os.path.getmtime(path), filename[:-len(".npz")], os.path.getsize(path)))
+
+        # Oldest files first
+        self._files.clear()
+        for mtime, key, size in sorted(files):
+            self._files[key] = size
+
+        self._total_size = sum(self._files.values())
+
+
+    def _add_file(self, key):
+        """
+        Mark the file of `key` as the most recently used, with its current
+        size.
+        """
+        self._total_size -= self._files.pop(key, 0)
+
+        size = os.path.getsize(self._filename(key))
+        self._files[key] = size
+        self._total_size += size
+
+
+    def _evict_files(self):
+        if self.max_size is None:
+            return
+
+        logger = get_logger(self)
+
+        while self._total_size > self.max_size and self._files:
+            key, size = self._files.popitem(last=False)
+            self._total_size -= size
+
+            try:
+                os.remove(self._filename(key))
+            except OSError:
+                # Already removed by another process
+                continue
+
+            logger.debug("Removed {} from the evaluation cache".format(self._filename(key)))
+
+
+    def clear(self):
+        """
+        Remove all cached evaluations, both from memory and from `folder`, and
+        reset the hit and miss counters.
+        """
+        self._memory.clear()
+
+        if self.folder is not None:
+            for filename in os.listdir(self.folder):
+                if filename.endswith(".npz"):
+                    os.remove(os.path.join(self.folder, filename))
+
+            self._files.clear()
+            self._total_size = 0
+
+        self.hits = 0
+        self.misses = 0
+
+
+    def __len__(self):
+        """
+        Get the number of evaluations in the cache.
+
+        Returns
+        -------
+        int
+            The number of evaluations in memory, or stored in `folder` if
+            `folder` is given.
+        """
+        if self.folder is not None:
+            return len([filename for filename in os.listdir(self.folder)
+                        if filename.endswith(".npz")])
+        else:
+            return len(self._memory)
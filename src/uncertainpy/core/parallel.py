@@ -1,15 +1,23 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import time
 import traceback
 import warnings
 import logging
 
+import six
 import numpy as np
 import scipy.interpolate as scpi
 
 from .base import Base
+from ..features import Features
 from ..utils.utility import none_to_nan, contains_nan, is_regular
 from ..utils.logger import get_logger
+from .profiler import Timings
+
+
+# Key of the timings added to the results when profiling
+TIMINGS_KEY = "__timings__"
 
 class Parallel(Base):
     """
@@ -31,11 +39,36 @@ class Parallel(Base):
         Set the threshold for the logging level. Logging messages less severe
         than this level is ignored. If None, no logging to file is performed
         Default logger level is "info".
+    interpolation_method : {"cubic", "linear"}, optional
+        The type of spline used to interpolate irregular results.
+        Default is "cubic".
+    interpolation_time : {None, dict}, optional
+        A dictionary with the model/feature name as key and the time array
+        to resample the irregular results of that model/feature onto as value.
+        If None, or if a model/feature is not in the dictionary,
+        an interpolation object is returned instead. Default is None.
+    transport : {None, ResultTransport}, optional
+        Transport used to send large result arrays back to the main process
+        through scratch files. If None, the results are sent back as usual.
+        Default is None.
+    profile : bool, optional
+        If True, the time spent in each stage of the evaluation, the worker
+        process ID and the peak resident set size of the worker process is
+        recorded, and added to the result as ``"__timings__"``.
+        Default is False.
 
     Attributes
     ----------
     model : uncertainpy.Parallel.model
     features : uncertainpy.Parallel.features
+    interpolation_method : {"cubic", "linear"}
+        The type of spline used to interpolate irregular results.
+    interpolation_time : {None, dict}
+        The time arrays to resample irregular results onto.
+    transport : {None, ResultTransport}
+        Transport used to send large result arrays back to the main process.
+    profile : bool
+        If the time spent in each stage of the evaluation is recorded.
 
     See Also
     --------
@@ -43,6 +76,56 @@ class Parallel(Base):
     uncertainpy.models.Model
     uncertainpy.models.Model.run : Requirements for the model run function.
     """
+    def __init__(self,
+                 model=None,
+                 features=None,
+                 logger_level="info",
+                 interpolation_method="cubic",
+                 interpolation_time=None,
+                 transport=None,
+                 profile=False):
+
+        super(Parallel, self).__init__(model=model,
+                                       features=features,
+                                       logger_level=logger_level)
+
+        self.interpolation_method = interpolation_method
+        self.interpolation_time = interpolation_time
+        self.transport = transport
+        self.profile = profile
+
+
+    @property
+    def interpolation_method(self):
+        """
+        The type of spline used to interpolate irregular results.
+
+        Parameters
+        ----------
+        new_interpolation_method : {"cubic", "linear"}
+            The type of spline used to interpolate irregular results.
+
+        Returns
+        -------
+        interpolation_method : {"cubic", "linear"}
+            The type of spline used to interpolate irregular results.
+
+        Raises
+        ------
+        ValueError
+            If the interpolation method is not "cubic" or "linear".
+        """
+        return self._interpolation_method
+
+
+    @interpolation_method.setter
+    def interpolation_method(self, new_interpolation_method):
+        if new_interpolation_method not in ["cubic", "linear"]:
+            raise ValueError("interpolation_method {} not supported. ".format(new_interpolation_method)
+                             + "Supported interpolation methods are: cubic and linear")
+
+        self._interpolation_method = new_interpolation_method
+
 
     def create_interpolations(self, result):
         """
@@ -84,7 +167,10 @@ class Parallel(Base):
         result : dict
             If an interpolation has been created, those features/model have
             "interpolation" and the corresponding interpolation object added to
-            each features/model dictionary.
+            each features/model dictionary. If a time array to resample onto is
+            given in `interpolation_time` for the feature/model, the
+            ``"values"`` are instead replaced by the interpolated values at,
+            and ``"time"`` by, that time array.
             An example:
 
             .. code-block:: Python
@@ -110,7 +196,12 @@ class Parallel(Base):
         If either model or feature results are irregular, the results must be
         interpolated for Chaospy to be able to create the polynomial
         approximation. For 1D results this is done with scipy:
-        ``InterpolatedUnivariateSpline(time, U, k=3)``.
+        ``InterpolatedUnivariateSpline(time, U, k=3)`` (``k=1`` for linear
+        interpolation).
+
+        Resampling onto the time arrays in `interpolation_time` is performed
+        where the results are calculated, so only arrays of a fixed length,
+        instead of interpolation objects, are sent between processes.
         """
         logger = get_logger(self)
 
@@ -134,7 +225,10 @@ class Parallel(Base):
 
 
                 elif np.ndim(result[feature]["values"]) == 1:
-                    result[feature]["interpolation"] = self.interpolation_1d(result, feature)
+                    if self.interpolation_time is not None and feature in self.interpolation_time:
+                        self.resample_1d(result, feature, self.interpolation_time[feature])
+                    else:
+                        result[feature]["interpolation"] = self.interpolation_1d(result, feature)
 
 
 
@@ -191,7 +285,8 @@ class Parallel(Base):
         Notes
         -----
         The interpolation is performed using scipy:
-        ``InterpolatedUnivariateSpline(time, values, k=3)``.
+        ``InterpolatedUnivariateSpline(time, values, k=3)``, or with ``k=1``
+        if `interpolation_method` is "linear".
         """
         logger = get_logger(self)
 
@@ -212,12 +307,14 @@ class Parallel(Base):
             logger.warning(msg)
 
         else:
+            k = 3 if self.interpolation_method == "cubic" else 1
+
             try:
                 interpolation = scpi.InterpolatedUnivariateSpline(result[feature]["time"],
                                                                   result[feature]["values"],
-                                                                  k=3)
+                                                                  k=k)
             except Exception as error:
-                msg = "{}: unable to interpolate using scipy.interpolate.InterpolatedUnivariateSpline(time, values, k=3)".format(feature)
+                msg = "{}: unable to interpolate using scipy.interpolate.InterpolatedUnivariateSpline(time, values, k={})".format(feature, k)
                 if not error.args:
                     error.args = ("",)
                 error.args = error.args + (msg,)
@@ -226,6 +323,54 @@ class Parallel(Base):
         return interpolation
 
 
+    def resample_1d(self, result, feature, time):
+        """
+        Resample an irregular 1D result onto a given time array.
+
+        Replaces ``result[feature]["values"]`` with the values interpolated at
+        `time`, and ``result[feature]["time"]`` with `time`. If the result
+        contains None or numpy.nan, ``result[feature]["values"]`` is set to
+        numpy.nan.
+
+        Parameters
+        ----------
+        result : dict
+            The model and feature results, on the same form as in
+            ``interpolation_1d``.
+        feature : str
+            Name of a feature or the model.
+        time : array_like
+            The time array to resample the result onto.
+
+        Returns
+        -------
+        result : dict
+            The model and feature results, with the resampled result for
+            `feature`.
+
+        See Also
+        --------
+        uncertainpy.core.Parallel.interpolation_1d
+        """
+        time = np.asarray(time)
+
+        # Skip the interpolation if the result already is on the time array
+        if np.shape(result[feature]["time"]) == time.shape \
+                and np.array_equal(result[feature]["time"], time):
+            return result
+
+        interpolation = self.interpolation_1d(result, feature)
+
+        if interpolation is None:
+            result[feature]["values"] = np.nan
+        else:
+            result[feature]["values"] = interpolation(time)
+
+        result[feature]["time"] = time
+
+        return result
+
+
 
 
     def run(self, model_parameters):
@@ -284,24 +429,153 @@ class Parallel(Base):
         uncertainpy.utils.utility.none_to_nan : Method for converting from None to NaN
         uncertainpy.features.Features.preprocess : preprocessing model results before features are calculated
         uncertainpy.models.Model.postprocess : posteprocessing of model results
+        uncertainpy.core.Profiler : the stages recorded when profiling
+        """
+        return self.process_model_result(*self.evaluate_model(model_parameters))
+
+
+    def evaluate_model(self, model_parameters):
+        """
+        Run the model for one set of model parameters, without postprocessing
+        the model output or calculating features. This is the first stage of
+        ``run``, ``process_model_result`` is the second stage.
+
+        Parameters
+        ----------
+        model_parameters : dictionary
+            All model parameters as a dictionary. These parameters are sent to
+            model.run().
+
+        Returns
+        -------
+        model_result : tuple
+            The objects returned by the model, `time`, `values` and any number
+            of optional `info` objects.
+        timings : {None, Timings}
+            The time spent running the model if profiling, otherwise None.
+
+        See also
+        --------
+        uncertainpy.core.Parallel.run
+        uncertainpy.core.Parallel.process_model_result
         """
-        # logger = get_logger(self)
+        timings = Timings() if self.profile else None
 
         # Try-except to catch exceptions and print stack trace
         try:
+            if timings is None:
+                model_result = self.model.evaluate(**model_parameters)
+            else:
+                with timings.measure("model.run"):
+                    model_result = self.model.evaluate(**model_parameters)
 
-            # model_result = self.model.run(**model_parameters, **self.model.model_kwargs)
-            # self.model.validate_run(model_result)
+        except Exception as error:
+            print("")
+            print("Caught exception when running model: {} in parallel:".format(self.model.name))
+            print("===================================================================")
+            traceback.print_exc()
+            print("===================================================================")
+            print("")
+            raise
+
+        return model_result, timings
+
+
+    def run_batch(self, model_parameters):
+        """
+        Run a batch model once for several sets of model parameters, and
+        calculate features from each of the model outputs.
+
+        Parameters
+        ----------
+        model_parameters : list
+            A list where each element is a dictionary with all model parameters
+            for a single evaluation. The parameters are combined to one array
+            for each parameter, with one element for each evaluation, which is
+            sent to model.run().
+
+        Returns
+        -------
+        results : list
+            A list with the result for each set of model parameters, each on the
+            same form as the result returned by ``run``.
+
+        See also
+        --------
+        uncertainpy.core.Parallel.run
+        uncertainpy.models.Model.evaluate_batch : Requirements for batch models.
+        """
+        parameters = {}
+        for name in model_parameters[0]:
+            parameters[name] = np.array([parameter[name] for parameter in model_parameters])
+
+        try:
+            start = time.time()
+
+            model_results = self.model.evaluate_batch(**parameters)
+
+            duration = time.time() - start
+
+        except Exception as error:
+            print("")
+            print("Caught exception when running batch model: {} in parallel:".format(self.model.name))
+            print("===================================================================")
+            traceback.print_exc()
+            print("===================================================================")
+            print("")
+            raise
+
+        results = []
+        for model_result in model_results:
+            if self.profile:
+                # The time of the batch is divided evenly between the evaluations
+                timings = Timings({"model.run": duration/len(model_results)})
+            else:
+                timings = None
+
+            results.append(self.process_model_result(model_result, timings))
+
+        return results
 
-            model_result = self.model.evaluate(**model_parameters)
 
+    def process_model_result(self, model_result, timings=None):
+        """
+        Postprocess the result of a single model evaluation and calculate the
+        features from the model output.
+
+        Parameters
+        ----------
+        model_result : tuple
+            The objects returned by the model, `time`, `values` and any number
+            of optional `info` objects.
+        timings : {None, Timings}, optional
+            If given, the time spent in each stage is recorded in `timings`,
+            which is added to the result as ``"__timings__"``.
+            Default is None.
+
+        Returns
+        -------
+        result : dictionary
+            The model and feature results, on the same form as the result
+            returned by ``run``.
+
+        See also
+        --------
+        uncertainpy.core.Parallel.run
+        """
+        if timings is None:
+            timings = _NoTimings()
+
+        # Try-except to catch exceptions and print stack trace
+        try:
             results = {}
 
             if self.model.ignore:
                 time_postprocess, values_postprocess = model_result[:2]
 
             else:
-                postprocess_result = self.model.postprocess(*model_result)
+                with timings.measure("model.postprocess"):
+                    postprocess_result = self.model.postprocess(*model_result)
 
                 self.model.validate_postprocess(model_result)
 
@@ -324,8 +598,13 @@ class Parallel(Base):
             raise
 
         try:
-            # Calculate features from the model results
-            feature_results = self.features.calculate_features(*model_result)
+            # Calculate features from the model results. An override of
+            # calculate_features is only timed as a whole
+            if isinstance(timings, Timings) and _records_timings(self.features):
+                feature_results = self.features.calculate_features(*model_result, timings=timings)
+            else:
+                with timings.measure("features"):
+                    feature_results = self.features.calculate_features(*model_result)
 
             for feature in feature_results:
                 time_feature = feature_results[feature]["time"]
@@ -338,7 +617,18 @@ class Parallel(Base):
                                     "time": time_feature}
 
             # Create interpolations
-            results = self.create_interpolations(results)
+            with timings.measure("interpolation"):
+                results = self.create_interpolations(results)
+
+            # Large arrays are written to scratch files instead of being
+            # pickled and sent back to the main process
+            if self.transport is not None:
+                with timings.measure("transport"):
+                    results = self.transport.pack(results)
+
+            if isinstance(timings, Timings):
+                timings.finish()
+                results[TIMINGS_KEY] = timings
 
             return results
 
@@ -351,3 +641,30 @@ class Parallel(Base):
             print("")
             raise
 
+
+
+def _records_timings(features):
+    """
+    Test if `features` uses ``Features.calculate_features``, which records
+    the time spent in the preprocessing and in each feature.
+    """
+    function = getattr(type(features), "calculate_features", None)
+
+    return six.get_unbound_function(function) is six.get_unbound_function(Features.calculate_features)
+
+
+
+class _NoTimings(object):
+    """
+    Stand-in for Timings when not profiling, where measuring does nothing.
+    """
+    def measure(self, stage):
+        return self
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
@@ -0,0 +1,360 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import numpy as np
+
+from .pce_statistics import polynomial_coefficients
+from ..utils.lazy_import import lazy_import
+
+cp = lazy_import("chaospy")
+
+
+def create_polynomial(basis, coefficients):
+    """
+    Create the polynomial chaos expansion with the given coefficients in a
+    basis.
+
+    Parameters
+    ----------
+    basis : chaospy.Poly
+        The basis polynomials, with ``len(basis) = nr_polynomials``.
+    coefficients : array
+        The coefficients of each basis polynomial, with shape
+        ``(nr_polynomials,) + shape``.
+
+    Returns
+    -------
+    polynomial : chaospy.Poly
+        The polynomial chaos expansion, with shape `shape`. Same as
+        ``chaospy.poly.sum(basis*coefficients.T, -1)``.
+
+    Notes
+    -----
+    The monomial coefficients of the expansion are found as a single matrix
+    product of the monomial coefficients of the basis and `coefficients`,
+    instead of through the polynomial arithmetic of chaospy.
+    """
+    coefficients = np.asarray(coefficients, dtype=float)
+    shape = coefficients.shape[1:]
+
+    exponents, basis_coefficients = polynomial_coefficients(basis)
+    basis_coefficients = basis_coefficients.reshape(len(exponents), -1)
+
+    monomial_coefficients = np.dot(basis_coefficients,
+                                   coefficients.reshape(len(coefficients), -1))
+    monomial_coefficients = monomial_coefficients.reshape((len(exponents),) + shape)
+
+    if hasattr(basis, "exponents"):
+        # numpoly, used by chaospy >= 3.1
+        import numpoly
+
+        return numpoly.polynomial_from_attributes(exponents, monomial_coefficients,
+                                                  names=basis.names)
+
+    core = {tuple(int(power) for power in exponent): coefficient
+            for exponent, coefficient in zip(exponents, monomial_coefficients)}
+
+    return cp.Poly(core, dim=exponents.shape[1], shape=shape)
+
+
+
+class PCEFit(object):
+    """
+    Fit the polynomial chaos expansions of many features or time points that
+    are evaluated at the same nodes, with a single factorization of the
+    basis evaluated at the nodes.
+
+    Parameters
+    ----------
+    basis_values : array
+        The value of each basis polynomial at each node, with shape
+        ``(nr_polynomials, nr_nodes)``, as returned by
+        ``uncertainpy.core.pce_statistics.evaluate_basis``.
+    weights : {None, array}, optional
+        The quadrature weights of each node. If None, the coefficients are
+        found by point collocation with Tikhonov regularization, which
+        approximates ``chaospy.fit_regression(..., rule="T")`` as explained
+        in the notes. Otherwise the coefficients are found by pseudo-spectral
+        projection (same as ``chaospy.fit_quadrature``). Default is None.
+
+    Attributes
+    ----------
+    basis_values : array
+        The value of each basis polynomial at each node.
+    weights : {None, array}
+        The quadrature weights of each node.
+
+    Notes
+    -----
+    Everything that only depends on the nodes is calculated once when the
+    object is created: the singular value decomposition of the basis values,
+    or the weighted projection onto each basis polynomial. For point
+    collocation the Tikhonov regularized solution, the diagonal of the hat
+    matrix and the generalized cross-validation error of every candidate
+    damping parameter are all found from the same decomposition, by scaling
+    the singular values, so no inverse and no ``(nr_nodes, nr_nodes)`` matrix
+    is created. The evaluations of all features and time points are projected
+    onto the left singular vectors with one matrix product, for all
+    right-hand sides at the same time.
+
+    If no damping parameter gives a finite generalized cross-validation
+    error, for example without regularization and with fewer nodes than
+    basis polynomials, the minimum norm least squares solution is used (same
+    as ``numpy.linalg.lstsq``).
+
+    The damping parameter of the Tikhonov regularization is not optimized
+    continuously. It is picked from the fixed candidates
+    ``10**0, 10**-1, ..., 10**-15`` as the one with the lowest robust
+    generalized cross-validation error (with robustness parameter
+    ``gamma = 0.1``), and it is picked separately for each feature, with all
+    time points of a feature sharing the same damping parameter. This is the
+    same as calling ``chaospy.fit_regression(..., rule="T")`` once for each
+    feature with the chaospy versions that use the same candidates, and an
+    approximation of the optimal damping parameter otherwise.
+    """
+    # Candidate damping parameters and the robustness parameter of the
+    # generalized cross-validation, as in chaospy.regression.rlstsq
+    alphas = 10.**-np.arange(0, 16)
+    gamma = 0.1
+
+    def __init__(self, basis_values, weights=None):
+        self.basis_values = np.asarray(basis_values, dtype=float)
+        self.weights = None if weights is None else np.asarray(weights, dtype=float).flatten()
+
+        if self.weights is None:
+            self._create_regression()
+        else:
+            self._create_quadrature()
+
+
+    def _create_quadrature(self):
+        """
+        Calculate the projection of the evaluations onto each basis
+        polynomial.
+        """
+        weighted = self.basis_values*self.weights
+        norms = np.sum(self.basis_values*weighted, axis=1)
+
+        self._projection = weighted/norms[:, None]
+
+
+    def _create_regression(self):
+        """
+        Calculate the singular value decomposition of the basis values, and
+        the parts of the regularized solution and of the generalized
+        cross-validation error that do not depend on the evaluations, for
+        each candidate damping parameter.
+        """
+        coef_mat = self.basis_values.T
+        nr_nodes = coef_mat.shape[0]
+
+        self._left, singular_values, right = np.linalg.svd(coef_mat, full_matrices=False)
+        self._right = right.T
+
+        # filters[i, j] is s_j**2/(s_j**2 + alpha_i), the factor the
+        # regularization scales the solution along singular vector j with.
+        # The last row is the minimum norm least squares solution.
+        squared = singular_values**2
+        denominator = squared + np.asarray(self.alphas, dtype=float)[:, None]
+
+        self._filters = np.zeros((len(self.alphas) + 1, len(singular_values)))
+        np.divide(squared, denominator, out=self._filters[:-1], where=denominator > 0)
+
+        if len(singular_values) > 0:
+            cutoff = np.finfo(float).eps*max(coef_mat.shape)*singular_values[0]
+            self._filters[-1] = singular_values > cutoff
+
+        # The solution is right*filters/s*left.T*evaluations
+        self._scales = np.zeros(self._filters.shape)
+        np.divide(self._filters, singular_values, out=self._scales, where=singular_values > 0)
+
+        # The part of the generalized cross-validation error that does not
+        # depend on the evaluations, from the trace of the hat matrix and of
+        # the hat matrix squared
+        trace = nr_nodes - np.sum(self._filters[:-1], axis=1)
+        mu2 = np.sum(self._filters[:-1]**2, axis=1)/nr_nodes
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self._factors = (self.gamma + (1 - self.gamma)*mu2)*nr_nodes/trace**2
+
+        self._factors[~np.isfinite(self._factors)] = np.inf
+
+
+    def coefficients(self, evaluations):
+        """
+        Find the coefficients of the polynomial chaos expansion of each
+        feature.
+
+        Parameters
+        ----------
+        evaluations : list
+            The evaluations of each feature at the nodes, each with shape
+            ``(nr_nodes,) + shape``.
+
+        Returns
+        -------
+        coefficients : list
+            The coefficients of the expansion of each feature, each with shape
+            ``(nr_polynomials,) + shape``.
+        """
+        evaluations = [np.asarray(evaluation, dtype=float) for evaluation in evaluations]
+        ordinate, sizes = self._right_hand_side(evaluations)
+
+        if self.weights is None:
+            solution = self._solve_regression(ordinate, sizes)[0]
+        else:
+            solution = np.dot(self._projection, ordinate)
+
+        coefficients = []
+        start = 0
+        for evaluation, size in zip(evaluations, sizes):
+            coefficient = solution[:, start:start + size]
+            coefficients.append(coefficient.reshape((len(solution),) + evaluation.shape[1:]))
+            start += size
+
+        return coefficients
+
+
+    def leave_one_out(self, evaluations):
+        """
+        Calculate the relative leave-one-out error of the polynomial chaos
+        expansion of each feature found by point collocation.
+
+        Parameters
+        ----------
+        evaluations : list
+            The evaluations of each feature at the nodes, each with shape
+            ``(nr_nodes,) + shape``.
+
+        Returns
+        -------
+        errors : list
+            The relative leave-one-out error of each feature.
+
+        Raises
+        ------
+        ValueError
+            If the coefficients are found by pseudo-spectral projection.
+
+        Notes
+        -----
+        The leave-one-out error is the mean squared error of predicting the
+        evaluation at each node with an expansion fitted to the other nodes,
+        divided by the variance of the evaluations, summed over all time
+        points. Since the regularized least squares fit is linear in the
+        evaluations, it is found from the residuals ``r_i`` and the diagonal
+        ``h_i`` of the hat matrix as ``r_i/(1 - h_i)``, without refitting.
+        Features with zero variance have zero error.
+        """
+        if self.weights is not None:
+            raise ValueError("The leave-one-out error is only available for point collocation")
+
+        evaluations = [np.asarray(evaluation, dtype=float) for evaluation in evaluations]
+        ordinate, sizes = self._right_hand_side(evaluations)
+
+        chosen = self._solve_regression(ordinate, sizes)[1]
+        boundaries = np.cumsum([0] + sizes)
+
+        errors = []
+        for feature, i in enumerate(chosen):
+            values = ordinate[:, boundaries[feature]:boundaries[feature + 1]]
+
+            # The hat matrix is left*filters*left.T
+            projected = np.dot(self._left.T, values)
+            fitted = np.dot(self._left, self._filters[i][:, None]*projected)
+            leverages = np.dot(self._left**2, self._filters[i])
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                residuals = (values - fitted)/(1 - leverages)[:, None]
+
+            variance = np.sum(np.var(values, axis=0))
+            squared = np.mean(np.sum(residuals**2, axis=1))
+
+            # An evaluation the fit interpolates can not be predicted from
+            # the other nodes
+            if not np.isfinite(squared):
+                squared = np.inf
+
+            errors.append(squared/variance if variance > 0 else 0.)
+
+        return errors
+
+
+    def _right_hand_side(self, evaluations):
+        """
+        Combine the evaluations of all features and time points as columns of
+        one right-hand side.
+        """
+        nr_nodes = self.basis_values.shape[1]
+
+        columns = [evaluation.reshape(nr_nodes, -1) for evaluation in evaluations]
+        sizes = [column.shape[1] for column in columns]
+        ordinate = np.concatenate(columns, axis=1) if columns else np.zeros((nr_nodes, 0))
+
+        return ordinate, sizes
+
+
+    def _solve_regression(self, ordinate, sizes):
+        """
+        Solve the regularized least squares problem for each feature, with the
+        damping parameter that gives the lowest generalized cross-validation
+        error for the feature. Returns the solution and the index of the
+        damping parameter chosen for each feature, where
+        ``len(self.alphas)`` is the minimum norm least squares solution.
+        """
+        boundaries = np.cumsum([0] + sizes)
+
+        projected = np.dot(self._left.T, ordinate)
+
+        # The part of the evaluations outside the span of the basis values
+        outside = np.sum((ordinate - np.dot(self._left, projected))**2, axis=0)
+
+        # Squared residual of each feature for each damping parameter
+        errors = np.empty((len(self.alphas), len(sizes)))
+        for i, filters in enumerate(self._filters[:-1]):
+            squared = np.sum(((filters - 1)[:, None]*projected)**2, axis=0) + outside
+            cumulative = np.concatenate([[0], np.cumsum(squared)])
+
+            with np.errstate(invalid="ignore"):
+                errors[i] = self._factors[i]*(cumulative[boundaries[1:]] - cumulative[boundaries[:-1]])
+
+        errors[~np.isfinite(errors)] = np.inf
+
+        chosen = np.argmin(errors, axis=0)
+        chosen[np.all(np.isinf(errors), axis=0)] = len(self.alphas)
+
+        solution = np.empty((self.basis_values.shape[0], ordinate.shape[1]))
+        for i in np.unique(chosen):
+            for feature in np.flatnonzero(chosen == i):
+                columns = slice(boundaries[feature], boundaries[feature + 1])
+                solution[:, columns] = np.dot(self._right, self._scales[i][:, None]*projected[:, columns])
+
+        return solution, chosen
+
+
+
+def fit_group(arguments):
+    """
+    Find the coefficients of the polynomial chaos expansions of a group of
+    features that are evaluated at the same nodes.
+
+    Parameters
+    ----------
+    arguments : tuple
+        A tuple ``(basis_values, weights, evaluations, leave_one_out)`` with
+        the arguments to ``PCEFit`` and ``PCEFit.coefficients``, and if the
+        leave-one-out error should be calculated.
+
+    Returns
+    -------
+    coefficients : list
+        The coefficients of the expansion of each feature.
+    errors : {list, None}
+        The relative leave-one-out error of each feature, or None if
+        `leave_one_out` is False.
+    """
+    basis_values, weights, evaluations, leave_one_out = arguments
+
+    fit = PCEFit(basis_values, weights)
+    errors = fit.leave_one_out(evaluations) if leave_one_out else None
+
+    return fit.coefficients(evaluations), errors
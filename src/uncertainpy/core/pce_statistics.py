@@ -0,0 +1,685 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import numpy as np
+
+from ..utils.lazy_import import lazy_import
+
+cp = lazy_import("chaospy")
+
+
+def polynomial_coefficients(polynomial, dimensions=None):
+    """
+    Get the monomial exponents and coefficients of a chaospy polynomial.
+
+    Parameters
+    ----------
+    polynomial : chaospy.Poly
+        The polynomial.
+    dimensions : {None, int}, optional
+        The number of variables. Polynomials with fewer variables are padded
+        with zero exponents. If None, the number of variables of `polynomial`
+        is used. Default is None.
+
+    Returns
+    -------
+    exponents : array
+        The exponents of each monomial, with shape
+        ``(nr_monomials, dimensions)``.
+    coefficients : array
+        The coefficients of each monomial, with shape
+        ``(nr_monomials,) + polynomial.shape``.
+
+    Raises
+    ------
+    ValueError
+        If `polynomial` has more variables than `dimensions`.
+    """
+    if hasattr(polynomial, "exponents"):
+        # numpoly, used by chaospy >= 3.1
+        exponents = np.asarray(polynomial.exponents, dtype=int)
+        coefficients = np.array(polynomial.coefficients, dtype=float)
+    else:
+        keys = list(polynomial.keys)
+        exponents = np.array(keys, dtype=int).reshape(len(keys), -1)
+        coefficients = np.array([polynomial.A[key] for key in keys], dtype=float)
+
+    coefficients = coefficients.reshape((len(exponents),) + tuple(polynomial.shape))
+
+    if dimensions is not None:
+        if exponents.shape[1] > dimensions:
+            if np.any(exponents[:, dimensions:]):
+                raise ValueError("polynomial has more variables than the distribution")
+            exponents = exponents[:, :dimensions]
+
+        padding = np.zeros((len(exponents), dimensions - exponents.shape[1]), dtype=int)
+        exponents = np.concatenate([exponents, padding], axis=1)
+
+    return exponents, coefficients
+
+
+
+def same_polynomial(first, second, dimensions, rtol=1e-10):
+    """
+    Test if two chaospy polynomials have the same monomial coefficients.
+
+    Parameters
+    ----------
+    first : chaospy.Poly
+        The first polynomial.
+    second : chaospy.Poly
+        The second polynomial.
+    dimensions : int
+        The number of variables.
+    rtol : float, optional
+        The largest difference between two coefficients, relative to the
+        largest coefficient of the polynomials. Default is 1e-10.
+
+    Returns
+    -------
+    bool
+        True if the polynomials have the same shape and the same coefficients
+        for each monomial.
+    """
+    if tuple(first.shape) != tuple(second.shape):
+        return False
+
+    first_exponents, first_coefficients = polynomial_coefficients(first, dimensions)
+    second_exponents, second_coefficients = polynomial_coefficients(second, dimensions)
+
+    # Monomials that are missing from one of the polynomials have zero
+    # coefficients
+    difference = {}
+    for exponent, coefficient in zip(first_exponents, first_coefficients):
+        difference[tuple(exponent)] = difference.get(tuple(exponent), 0) + coefficient
+
+    for exponent, coefficient in zip(second_exponents, second_coefficients):
+        difference[tuple(exponent)] = difference.get(tuple(exponent), 0) - coefficient
+
+    scale = max(np.max(np.abs(first_coefficients), initial=0),
+                np.max(np.abs(second_coefficients), initial=0))
+
+    return all(np.all(np.abs(value) <= rtol*scale) for value in difference.values())
+
+
+
+def evaluate_basis(basis, samples):
+    """
+    Evaluate each polynomial in a basis at a set of samples.
+
+    Parameters
+    ----------
+    basis : chaospy.Poly
+        The basis polynomials.
+    samples : array
+        The samples, with shape ``(nr_uncertain_parameters, nr_samples)``,
+        or ``(nr_samples,)`` for a single uncertain parameter.
+
+    Returns
+    -------
+    basis_values : array
+        The value of each basis polynomial at each sample, with shape
+        ``(nr_polynomials, nr_samples)``.
+
+    Notes
+    -----
+    Each monomial of the basis is evaluated once, and the basis polynomials
+    are found as a single matrix product of their monomial coefficients and
+    the monomial values.
+    """
+    samples = np.asarray(samples, dtype=float)
+    samples = samples.reshape(-1, samples.shape[-1]) if samples.ndim > 0 else samples.reshape(1, 1)
+
+    exponents, coefficients = polynomial_coefficients(basis, len(samples))
+    coefficients = coefficients.reshape(len(exponents), -1)
+
+    # powers[d][p] is samples[d]**p
+    powers = []
+    for dimension in range(len(samples)):
+        highest = int(exponents[:, dimension].max()) if len(exponents) > 0 else 0
+
+        power = np.ones((highest + 1, samples.shape[1]))
+        for p in range(1, highest + 1):
+            power[p] = power[p - 1]*samples[dimension]
+
+        powers.append(power)
+
+    monomials = np.ones((len(exponents), samples.shape[1]))
+    for dimension in range(len(samples)):
+        monomials *= powers[dimension][exponents[:, dimension]]
+
+    return np.dot(coefficients.T, monomials)
+
+
+
+def basis_multi_indices(basis, dimensions):
+    """
+    Find the degree of each polynomial in an orthogonal basis in each
+    variable.
+
+    Parameters
+    ----------
+    basis : chaospy.Poly
+        An orthogonal basis of products of univariate polynomials, as created
+        by ``chaospy.orth_ttr``.
+    dimensions : int
+        The number of variables.
+
+    Returns
+    -------
+    multi_indices : array
+        The degree of each basis polynomial in each variable, with shape
+        ``(nr_polynomials, dimensions)``.
+    """
+    exponents, coefficients = polynomial_coefficients(basis, dimensions)
+    coefficients = coefficients.reshape(len(exponents), -1)
+
+    # Each basis polynomial is a product of univariate polynomials, so its
+    # degree in a variable is the highest exponent of the variable
+    nonzero = coefficients != 0
+    return np.max(exponents[:, None, :]*nonzero[:, :, None], axis=0)
+
+
+
+def stochastic_dependent(distribution):
+    """
+    Test if the variables of a chaospy distribution are dependent.
+
+    Parameters
+    ----------
+    distribution : chaospy.Dist
+        The distribution.
+
+    Returns
+    -------
+    bool
+        True if the variables are stochastically dependent.
+    """
+    if hasattr(distribution, "stochastic_dependent"):
+        return bool(distribution.stochastic_dependent)
+
+    return bool(distribution.dependent())
+
+
+
+def recurrence_coefficients(basis, dimensions):
+    """
+    Find the three-term recurrence coefficients of the univariate orthogonal
+    polynomials an orthogonal basis is made from.
+
+    Parameters
+    ----------
+    basis : chaospy.Poly
+        An orthogonal basis of products of univariate polynomials, as created
+        by ``chaospy.orth_ttr``, that contains each univariate polynomial.
+    dimensions : int
+        The number of variables.
+
+    Returns
+    -------
+    alpha : array
+        The recurrence coefficients ``alpha[d, k]``, with shape
+        ``(dimensions, order)``.
+    beta : array
+        The recurrence coefficients ``beta[d, k]``, with shape
+        ``(dimensions, order)``. ``beta[d, 0]`` is 0.
+
+    Raises
+    ------
+    ValueError
+        If `basis` does not contain the univariate polynomials.
+
+    Notes
+    -----
+    The monic univariate polynomials of variable ``d`` are given by
+    ``p_0 = 1``, ``p_1 = x - alpha[d, 0]`` and
+    ``p_(k+1) = (x - alpha[d, k])*p_k - beta[d, k]*p_(k-1)``,
+    which only depends on the distribution of variable ``d``.
+    """
+    exponents, coefficients = polynomial_coefficients(basis, dimensions)
+    coefficients = coefficients.reshape(len(exponents), -1)
+
+    order = int(exponents.max()) if exponents.size > 0 else 0
+
+    alpha = np.zeros((dimensions, order))
+    beta = np.zeros((dimensions, order))
+
+    for dimension in range(dimensions):
+        # univariate[k, j] is the coefficient of x**j in the monic p_k
+        univariate = np.full((order + 1, order + 1), np.nan)
+
+        for polynomial in coefficients.T:
+            nonzero = polynomial != 0
+            support = exponents[nonzero]
+
+            # Only polynomials of variable d
+            if len(support) == 0 or np.any(np.delete(support, dimension, axis=1)):
+                continue
+
+            powers = support[:, dimension]
+            values = polynomial[nonzero]
+            degree = powers.max()
+
+            univariate[degree] = 0
+            univariate[degree, powers] = values/values[powers == degree][0]
+
+        if np.any(np.isnan(univariate)):
+            raise ValueError("The basis does not contain the univariate polynomials of each variable")
+
+        for k in range(order):
+            previous = univariate[k, k - 1] if k >= 1 else 0
+            alpha[dimension, k] = previous - univariate[k + 1, k]
+
+            if k >= 1:
+                second = univariate[k, k - 2] if k >= 2 else 0
+                beta[dimension, k] = second - alpha[dimension, k]*univariate[k, k - 1] \
+                                     - univariate[k + 1, k - 1]
+
+    return alpha, beta
+
+
+
+class PCEStatistics(object):
+    """
+    The statistical metrics of a polynomial chaos expansion, calculated
+    directly from its coefficients in an orthogonal polynomial basis.
+
+    Parameters
+    ----------
+    coefficients : array
+        The coefficients of each basis polynomial, with shape
+        ``(nr_polynomials,) + shape``, where shape is the shape of the model
+        or feature output, for example the number of time points.
+    multi_indices : array
+        The degree of each basis polynomial in each uncertain parameter, with
+        shape ``(nr_polynomials, nr_uncertain_parameters)``. The first basis
+        polynomial must be the constant polynomial.
+    norms : array
+        The squared norm, ``E(P**2)``, of each basis polynomial.
+
+    Attributes
+    ----------
+    coefficients : array
+        The coefficients of each basis polynomial.
+    multi_indices : array
+        The degree of each basis polynomial in each uncertain parameter.
+    norms : array
+        The squared norm of each basis polynomial.
+
+    Raises
+    ------
+    ValueError
+        If the shapes of `coefficients`, `multi_indices` and `norms` do not
+        match.
+
+    Notes
+    -----
+    For an orthogonal basis of independent variables, the variance is the sum
+    of ``coefficient**2*norm`` over all non-constant basis polynomials, and
+    the part of the variance explained by a set of uncertain parameters is
+    the same sum over the basis polynomials that depend on exactly these
+    uncertain parameters (Sudret, 2008). All metrics are therefore sums over
+    the rows of the same ``(nr_polynomials,) + shape`` array of partial
+    variances, and are calculated for all time points at once.
+
+    See also
+    --------
+    uncertainpy.core.UncertaintyCalculations.analyse_PCE
+    """
+    def __init__(self, coefficients, multi_indices, norms):
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.multi_indices = np.asarray(multi_indices, dtype=int)
+        self.norms = np.asarray(norms, dtype=float).ravel()
+
+        if self.multi_indices.ndim != 2 \
+                or len(self.multi_indices) != len(self.coefficients) \
+                or len(self.norms) != len(self.coefficients):
+            raise ValueError("coefficients, multi_indices and norms must have one element for each basis polynomial")
+
+        if len(self.multi_indices) == 0 or np.any(self.multi_indices[0]):
+            raise ValueError("The first basis polynomial must be the constant polynomial")
+
+        norms = self.norms.reshape((-1,) + (1,)*(self.coefficients.ndim - 1))
+        self._partial_variances = self.coefficients**2*norms
+        self._partial_variances[0] = 0
+        self._variance = np.sum(self._partial_variances, axis=0)
+
+
+    @classmethod
+    def from_polynomial(cls, polynomial, distribution, basis=None, norms=None):
+        """
+        Find the coefficients of a polynomial chaos expansion in the
+        orthogonal basis of `distribution`.
+
+        Parameters
+        ----------
+        polynomial : chaospy.Poly
+            The polynomial chaos expansion, for example created by
+            ``chaospy.fit_regression`` or ``chaospy.fit_quadrature``.
+        distribution : chaospy.Dist
+            The distribution of the uncertain parameters, with independent
+            variables.
+        basis : {None, chaospy.Poly}, optional
+            An orthogonal basis of products of univariate polynomials, as
+            created by ``chaospy.orth_ttr``, that spans `polynomial`. If None,
+            a basis of the total degree of `polynomial` is created.
+            Default is None.
+        norms : {None, array}, optional
+            The squared norms of the polynomials in `basis`. Must be given
+            together with `basis`. Default is None.
+
+        Returns
+        -------
+        PCEStatistics
+            The statistics of the polynomial chaos expansion.
+
+        Raises
+        ------
+        ValueError
+            If the variables of `distribution` are dependent, or if
+            `polynomial` can not be written in the orthogonal basis.
+
+        Notes
+        -----
+        The coefficients are found by solving the linear system between the
+        monomial coefficients of the basis and of `polynomial`, so no
+        expectations of `polynomial` are calculated. This system is badly
+        conditioned for high polynomial orders and distributions far from
+        the origin, so the coefficients found by the fit should be used
+        directly when they are available.
+        """
+        if stochastic_dependent(distribution):
+            raise ValueError("The coefficients can only be found for independent uncertain parameters")
+
+        dimensions = len(distribution)
+
+        exponents, coefficients = polynomial_coefficients(polynomial, dimensions)
+
+        if basis is None:
+            order = int(exponents.sum(axis=1).max()) if len(exponents) > 0 else 0
+            basis, norms = cp.orth_ttr(order, distribution, retall=True)
+
+        basis_exponents, basis_coefficients = polynomial_coefficients(basis, dimensions)
+
+        if basis_coefficients.shape != (len(basis_exponents), len(basis_exponents)):
+            raise ValueError("The basis must have as many polynomials as monomials")
+
+        multi_indices = basis_multi_indices(basis, dimensions)
+
+        rows = {tuple(exponent): row for row, exponent in enumerate(basis_exponents)}
+
+        monomial_coefficients = np.zeros((len(basis_exponents),) + coefficients.shape[1:])
+        for exponent, coefficient in zip(exponents, coefficients):
+            if tuple(exponent) not in rows:
+                raise ValueError("The basis does not span the polynomial")
+
+            monomial_coefficients[rows[tuple(exponent)]] += coefficient
+
+        solved = np.linalg.solve(basis_coefficients,
+                                 monomial_coefficients.reshape(len(basis_exponents), -1))
+
+        return cls(solved.reshape(monomial_coefficients.shape), multi_indices, norms)
+
+
+    @property
+    def mean(self):
+        """
+        The mean of the polynomial chaos expansion.
+
+        Returns
+        -------
+        mean : array
+            The mean, with the shape of the model or feature output.
+        """
+        # The constant basis polynomial is the square root of its norm
+        return self.coefficients[0]*np.sqrt(self.norms[0])
+
+
+    @property
+    def variance(self):
+        """
+        The variance of the polynomial chaos expansion.
+
+        Returns
+        -------
+        variance : array
+            The variance, with the shape of the model or feature output.
+        """
+        return self._variance
+
+
+    def _normalize(self, partial_variance):
+        # As chaospy, indices are 0 where the variance is 0
+        variance = self._variance
+        return partial_variance/(variance + (variance == 0))*(variance != 0)
+
+
+    def sobol_index(self, parameters):
+        """
+        The Sobol index of the interaction between a set of uncertain
+        parameters, the part of the variance explained by the uncertain
+        parameters together that is not explained by any smaller set of them.
+
+        Parameters
+        ----------
+        parameters : list
+            The indices of the uncertain parameters.
+
+        Returns
+        -------
+        sobol_index : array
+            The Sobol index, with the shape of the model or feature output.
+            ``sobol_index([i])`` is the first order Sobol index of parameter
+            i, and ``sobol_index([i, j])`` the second order Sobol index of
+            parameters i and j.
+        """
+        support = np.zeros(self.multi_indices.shape[1], dtype=bool)
+        support[list(parameters)] = True
+
+        selected = np.all((self.multi_indices > 0) == support, axis=1)
+
+        return self._normalize(np.sum(self._partial_variances[selected], axis=0))
+
+
+    def sobol_first(self):
+        """
+        The first order Sobol indices of each uncertain parameter.
+
+        Returns
+        -------
+        sobol_first : array
+            The first order Sobol indices, with shape
+            ``(nr_uncertain_parameters,) + shape``. Same as
+            ``chaospy.Sens_m``.
+        """
+        depends = self.multi_indices > 0
+        only = depends & (np.sum(depends, axis=1) == 1)[:, None]
+
+        return self._normalize(np.tensordot(only.T.astype(float), self._partial_variances, axes=1))
+
+
+    def sobol_total(self):
+        """
+        The total order Sobol indices of each uncertain parameter.
+
+        Returns
+        -------
+        sobol_total : array
+            The total order Sobol indices, with shape
+            ``(nr_uncertain_parameters,) + shape``. Same as
+            ``chaospy.Sens_t``.
+        """
+        depends = (self.multi_indices > 0).astype(float)
+
+        return self._normalize(np.tensordot(depends.T, self._partial_variances, axes=1))
+
+
+    def sobol_second(self):
+        """
+        The second order Sobol indices of each pair of uncertain parameters.
+
+        Returns
+        -------
+        sobol_second : array
+            The second order Sobol indices, with shape
+            ``(nr_uncertain_parameters, nr_uncertain_parameters) + shape``,
+            and 0 on the diagonal. Same as ``chaospy.Sens_m2``.
+        """
+        depends = self.multi_indices > 0
+        pairs = depends & (np.sum(depends, axis=1) == 2)[:, None]
+        pairs = pairs.astype(float)
+
+        # pair_matrix[i, j, k] is 1 if basis polynomial k depends on exactly i and j
+        pair_matrix = pairs.T[:, None, :]*pairs.T[None, :, :]
+        dimensions = len(pairs.T)
+        pair_matrix[np.arange(dimensions), np.arange(dimensions)] = 0
+
+        return self._normalize(np.tensordot(pair_matrix, self._partial_variances, axes=1))
+
+
+    def evaluate(self, basis_values):
+        """
+        Evaluate the polynomial chaos expansion at a set of samples.
+
+        Parameters
+        ----------
+        basis_values : array
+            The value of each basis polynomial at each sample, with shape
+            ``(nr_polynomials, nr_samples)``, as returned by
+            ``evaluate_basis``.
+
+        Returns
+        -------
+        values : array
+            The values of the polynomial chaos expansion, with shape
+            ``shape + (nr_samples,)``.
+        """
+        coefficients = self.coefficients.reshape(len(self.coefficients), -1)
+        values = np.dot(coefficients.T, basis_values)
+
+        return values.reshape(self.coefficients.shape[1:] + (basis_values.shape[1],))
+
+
+    def percentile(self, q, basis, samples, memory_budget=2**28):
+        """
+        Calculate percentiles of the polynomial chaos expansion from its
+        values at a set of samples, for example from the distribution of the
+        uncertain parameters.
+
+        Parameters
+        ----------
+        q : {float, list}
+            The percentile or percentiles to calculate, between 0 and 100.
+        basis : chaospy.Poly
+            The orthogonal basis polynomials of the expansion.
+        samples : array
+            The samples, with shape ``(nr_uncertain_parameters, nr_samples)``,
+            or ``(nr_samples,)`` for a single uncertain parameter.
+        memory_budget : int, optional
+            The largest number of bytes used to hold the values of the
+            polynomial chaos expansion, and the largest number of bytes used
+            to hold the values of the basis polynomials, at a time.
+            Default is 2**28 (256 MiB).
+
+        Returns
+        -------
+        percentile : array
+            The percentiles, with shape ``shape`` for a single percentile
+            and ``(len(q),) + shape`` for a list of percentiles. Same as
+            ``numpy.percentile(values, q, -1)``.
+
+        See also
+        --------
+        uncertainpy.core.pce_statistics.percentiles
+        """
+        return percentiles(q, [self], basis, samples, memory_budget=memory_budget)[0]
+
+
+
+def percentiles(q, statistics, basis, samples, memory_budget=2**28):
+    """
+    Calculate percentiles of several polynomial chaos expansions in the same
+    orthogonal basis, for example of the model and all features, from their
+    values at the same samples.
+
+    Parameters
+    ----------
+    q : {float, list}
+        The percentile or percentiles to calculate, between 0 and 100.
+    statistics : list
+        The PCEStatistics of each polynomial chaos expansion.
+    basis : chaospy.Poly
+        The orthogonal basis polynomials of the expansions.
+    samples : array
+        The samples, with shape ``(nr_uncertain_parameters, nr_samples)``,
+        or ``(nr_samples,)`` for a single uncertain parameter.
+    memory_budget : int, optional
+        The largest number of bytes used to hold the values of the
+        polynomial chaos expansions, and the largest number of bytes used to
+        hold the values of the basis polynomials, at a time.
+        Default is 2**28 (256 MiB).
+
+    Returns
+    -------
+    percentiles : list
+        The percentiles of each polynomial chaos expansion, with shape
+        ``shape`` for a single percentile and ``(len(q),) + shape`` for a list
+        of percentiles.
+
+    Notes
+    -----
+    The outputs of all expansions, for example all time points of the model
+    and of each feature, are treated as one list of outputs. The values are
+    calculated for a block of the outputs at a time, and the percentiles of
+    each block are found with a selection algorithm by ``numpy.percentile``.
+    The values of a block are a matrix product of the coefficients and the
+    values of the basis polynomials, which are evaluated for a chunk of the
+    samples at a time. Neither the full matrix of values nor the full matrix
+    of basis values is created, unless they fit in `memory_budget`.
+
+    If the basis values of all samples fit in `memory_budget`, the basis is
+    evaluated once. Otherwise each chunk of samples is evaluated once per
+    block, and multiplied by the coefficients of all outputs in the block.
+    Since a block is as large as `memory_budget` allows, independent of which
+    expansion the outputs belong to, the basis is only evaluated again when
+    the values of all expansions do not fit in `memory_budget`.
+    """
+    shapes = [item.coefficients.shape[1:] for item in statistics]
+    coefficients = [item.coefficients.reshape(len(item.coefficients), -1) for item in statistics]
+    sizes = [coefficient.shape[1] for coefficient in coefficients]
+
+    nr_polynomials = len(basis)
+    coefficients = np.concatenate(coefficients, axis=1) if coefficients else np.zeros((nr_polynomials, 0))
+
+    samples = np.asarray(samples, dtype=float)
+
+    nr_samples = samples.shape[-1]
+    nr_outputs = coefficients.shape[1]
+
+    output_chunk_size = max(1, int(memory_budget//(8*max(nr_samples, 1))))
+    sample_chunk_size = max(1, int(memory_budget//(8*max(nr_polynomials, 1))))
+
+    if sample_chunk_size >= nr_samples:
+        basis_values = evaluate_basis(basis, samples)
+    else:
+        basis_values = None
+
+    result = np.empty(np.shape(q) + (nr_outputs,))
+    for start in range(0, nr_outputs, output_chunk_size):
+        stop = min(start + output_chunk_size, nr_outputs)
+
+        if basis_values is not None:
+            values = np.dot(coefficients[:, start:stop].T, basis_values)
+        else:
+            values = np.empty((stop - start, nr_samples))
+            for sample_start in range(0, nr_samples, sample_chunk_size):
+                sample_stop = min(sample_start + sample_chunk_size, nr_samples)
+
+                chunk = evaluate_basis(basis, samples[..., sample_start:sample_stop])
+                values[:, sample_start:sample_stop] = np.dot(coefficients[:, start:stop].T, chunk)
+
+        result[..., start:stop] = np.percentile(values, q, axis=-1)
+
+    boundaries = np.cumsum([0] + sizes)
+
+    return [result[..., boundaries[i]:boundaries[i + 1]].reshape(np.shape(q) + shape)
+            for i, shape in enumerate(shapes)]
@@ -0,0 +1,269 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import sys
+import time
+
+import numpy as np
+
+try:
+    import resource
+
+    prerequisites = True
+except ImportError:
+    prerequisites = False
+
+
+
+def peak_rss():
+    """
+    The peak resident set size (RSS) of the current process.
+
+    Returns
+    -------
+    peak_rss : float
+        The peak resident set size in bytes, or numpy.nan if it is not
+        available on this platform.
+    """
+    if not prerequisites:
+        return np.nan
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is given in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == "darwin":
+        return float(maxrss)
+    else:
+        return 1024.*maxrss
+
+
+
+class Timings(dict):
+    """
+    The time spent in each stage of a single model evaluation, recorded in the
+    worker process.
+
+    The keys are the names of the stages, and the values are the wall-clock
+    time in seconds. Use ``measure`` to time a stage.
+    """
+    def measure(self, stage):
+        """
+        Time a stage with a ``with`` statement. The time is added to any time
+        already recorded for the stage.
+
+        Parameters
+        ----------
+        stage : str
+            Name of the stage.
+
+        Returns
+        -------
+        _Stage
+            A context manager that times the enclosed block.
+        """
+        return _Stage(self, stage)
+
+
+    def finish(self):
+        """
+        Record the worker process ID, the peak resident set size and the
+        moment the evaluation finished.
+        """
+        self["pid"] = os.getpid()
+        self["peak_rss"] = peak_rss()
+        self["finished"] = time.time()
+
+
+
+class _Stage(object):
+    def __init__(self, timings, stage):
+        self.timings = timings
+        self.stage = stage
+
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timings[self.stage] = self.timings.get(self.stage, 0) + time.time() - self.start
+
+
+
+class Profiler(object):
+    """
+    Collects the timings of each model evaluation into a profiling table.
+
+    The profiling table has one column for each stage of the evaluations,
+    and one row for each evaluation. The stages are:
+
+        * ``model.run`` - running the model. For batch models the time of the
+          batch is divided evenly between the evaluations in the batch.
+        * ``model.postprocess`` - postprocessing the model result.
+        * ``features.preprocess`` - preprocessing the model result before the
+          features are calculated.
+        * ``features.<name>`` - calculating the feature `name`.
+        * ``features`` - preprocessing and calculating all features, instead
+          of the two stages above, when ``calculate_features`` is overridden
+          by a subclass of Features.
+        * ``interpolation`` - interpolating or resampling irregular results.
+        * ``transport`` - writing and reading large arrays through
+          a ResultTransport.
+        * ``ipc`` - the time from the evaluation finished in the worker process
+          until the result was received by the main process. Includes the time
+          the result waited for earlier evaluations to finish.
+
+    Additionally the table contains the ``pid`` and the ``peak_rss`` (peak
+    resident set size in bytes) of the worker process of each evaluation.
+
+    Parameters
+    ----------
+    nr_evaluations : int
+        The number of evaluations.
+
+    Attributes
+    ----------
+    nr_evaluations : int
+        The number of evaluations.
+    stages : list
+        The names of the stages, in the order they were first recorded.
+
+    See Also
+    --------
+    uncertainpy.core.RunModel
+    uncertainpy.core.Parallel
+    """
+    def __init__(self, nr_evaluations):
+        self.nr_evaluations = nr_evaluations
+        self.stages = []
+
+        self._columns = {}
+
+
+    def _column(self, name):
+        if name not in self._columns:
+            self._columns[name] = np.full(self.nr_evaluations, np.nan)
+
+            if name not in ["pid", "peak_rss"]:
+                self.stages.append(name)
+
+        return self._columns[name]
+
+
+    def add(self, index, timings, received=None):
+        """
+        Add the timings of a single evaluation.
+
+        Parameters
+        ----------
+        index : int
+            The index of the evaluation.
+        timings : dict
+            The time in seconds spent in each stage of the evaluation, as
+            recorded by Timings.
+        received : {None, float}, optional
+            The moment the result was received by the main process, as given
+            by ``time.time()``. Used to calculate the ``ipc`` time.
+            Default is None.
+        """
+        for name, value in timings.items():
+            if name == "finished":
+                if received is not None:
+                    self._column("ipc")[index] = max(received - value, 0)
+            else:
+                self._column(name)[index] = value
+
+
+    def table(self):
+        """
+        The profiling table.
+
+        Returns
+        -------
+        table : dict
+            A dictionary with the name of each stage, ``"pid"`` and
+            ``"peak_rss"`` as keys, and an array with the value for each
+            evaluation as values. Evaluations that were not run, for example
+            because the result was found in the cache, are numpy.nan.
+        """
+        return dict(self._columns)
+
+
+    def summary(self):
+        """
+        Aggregate the time spent in each stage over all evaluations.
+
+        Returns
+        -------
+        summary : list
+            A list of ``(stage, total, mean, max, fraction)`` tuples, sorted
+            with the most costly stage first. `fraction` is the fraction of
+            the total time of all stages.
+        """
+        return summarize(self.table())
+
+
+    def format_summary(self, top=5):
+        """
+        Format the most costly stages, and the largest peak resident set size
+        of the worker processes, as a human readable string.
+
+        Parameters
+        ----------
+        top : int, optional
+            The number of stages to include. Default is 5.
+
+        Returns
+        -------
+        summary : str
+            The summary of the most costly stages.
+        """
+        lines = ["Top costs of {} evaluations:".format(self.nr_evaluations)]
+        for stage, total, mean, maximum, fraction in self.summary()[:top]:
+            lines.append("    {:<30} total {:.3g} s, mean {:.3g} s, max {:.3g} s ({:.1%})".format(
+                stage, total, mean, maximum, fraction)
+            )
+
+        if "peak_rss" in self._columns and not np.all(np.isnan(self._columns["peak_rss"])):
+            pids = self._columns["pid"]
+            lines.append("    Peak RSS {:.1f} MB, over {} worker processes".format(
+                np.nanmax(self._columns["peak_rss"])/1024.**2, len(np.unique(pids[~np.isnan(pids)])))
+            )
+
+        return "\n".join(lines)
+
+
+
+def summarize(table):
+    """
+    Aggregate the time spent in each stage of a profiling table over all
+    evaluations.
+
+    Parameters
+    ----------
+    table : dict
+        A profiling table, as returned by Profiler.table.
+
+    Returns
+    -------
+    summary : list
+        A list of ``(stage, total, mean, max, fraction)`` tuples, sorted
+        with the most costly stage first. `fraction` is the fraction of
+        the total time of all stages.
+    """
+    summary = []
+    for stage in table:
+        values = np.asarray(table[stage], dtype=float)
+
+        if stage in ["pid", "peak_rss"] or np.all(np.isnan(values)):
+            continue
+
+        summary.append((stage, np.nansum(values), np.nanmean(values), np.nanmax(values)))
+
+    total = sum(stage[1] for stage in summary)
+
+    summary = [stage + (stage[1]/total if total > 0 else 0.,) for stage in summary]
+    summary.sort(key=lambda stage: stage[1], reverse=True)
+
+    return summary
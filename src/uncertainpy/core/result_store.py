@@ -0,0 +1,458 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import numpy as np
+
+from ..utils.utility import contains_nan
+from ..utils.spike_matrix import SpikeMatrix
+
+
+def _same(a, b):
+    """
+    Test if two time arrays are identical, without raising errors for
+    irregular or missing time arrays.
+    """
+    if a is b:
+        return True
+
+    try:
+        return np.shape(a) == np.shape(b) and np.array_equal(a, b)
+    except ValueError:
+        return False
+
+
+def _numeric(values):
+    """
+    Return `values` as a numeric array, or None if `values` can not be stored
+    in a numeric array.
+    """
+    try:
+        array = np.asarray(values)
+    except ValueError:
+        return None
+
+    if array.dtype.kind not in "biufc":
+        return None
+
+    return array
+
+
+def _ndim(values):
+    """
+    The number of dimensions of `values`. Irregular values, which numpy can
+    not create an array from, are counted as nested lists.
+    """
+    if isinstance(values, np.ndarray) and not values.dtype.hasobject \
+            or isinstance(values, SpikeMatrix):
+        return values.ndim
+
+    array = _numeric(values)
+    if array is not None:
+        return array.ndim
+
+    if isinstance(values, (list, tuple, np.ndarray)):
+        return 1 + max([_ndim(value) for value in values] + [0])
+
+    return 0
+
+
+
+class ResultStore(object):
+    """
+    Columnar store of the model and feature results of a series of
+    evaluations.
+
+    The results are added one evaluation at a time, as they are calculated.
+    The shape and data type of each model/feature are inferred from the first
+    valid result (a result without numpy.nan or None), and that result and
+    every later result is written directly into a preallocated array with
+    shape ``(nr_evaluations, ...)``. Rows for evaluations without a valid
+    result are filled with numpy.nan.
+    If the shape of a model/feature varies between evaluations, that
+    model/feature is instead stored as a list with one element per evaluation.
+    Sparse SpikeMatrix results are kept sparse, in a list with one SpikeMatrix
+    (or numpy.nan) per evaluation.
+
+    Parameters
+    ----------
+    nr_evaluations : int
+        The number of evaluations.
+
+    Attributes
+    ----------
+    nr_evaluations : int
+        The number of evaluations.
+    features : list
+        The names of the model and features, in the order they were first
+        added.
+
+    Notes
+    -----
+    The time array is only stored once for each model/feature, unless it
+    varies between evaluations. Interpolation objects are stored for each
+    evaluation.
+
+    See Also
+    --------
+    uncertainpy.core.RunModel.results_to_data
+    """
+    def __init__(self, nr_evaluations):
+        self.nr_evaluations = nr_evaluations
+        self.features = []
+
+        self._columns = {}
+
+
+    def __len__(self):
+        """
+        Get the number of evaluations.
+
+        Returns
+        -------
+        int
+            The number of evaluations.
+        """
+        return self.nr_evaluations
+
+
+    def __contains__(self, feature):
+        return feature in self._columns
+
+
+    def _new_column(self):
+        return {"values": None,
+                "written": np.zeros(self.nr_evaluations, dtype=bool),
+                "pending": {},
+                "list": None,
+                "sparse": None,
+                "sparse_shape": None,
+                "time": None,
+                "times": {},
+                "first": None,
+                "time_0": np.nan,
+                "ndim_0": 0,
+                "interpolations": {}}
+
+
+    def add(self, index, result):
+        """
+        Add the result of a single evaluation.
+
+        Parameters
+        ----------
+        index : int
+            The index of the evaluation.
+        result : dict
+            The model and feature results of the evaluation, on the same form
+            as returned by Parallel.run.
+        """
+        for feature in result:
+            if feature not in self._columns:
+                self._columns[feature] = self._new_column()
+                self.features.append(feature)
+
+            column = self._columns[feature]
+
+            values = result[feature]["values"]
+            time = result[feature]["time"]
+
+            invalid = bool(contains_nan(values))
+
+            # The time and number of dimensions are taken from the first
+            # valid result, or the first result if no results are valid
+            first = (invalid, index)
+            if column["first"] is None or first < column["first"]:
+                column["first"] = first
+                column["time_0"] = time
+                column["ndim_0"] = _ndim(values)
+
+            if "interpolation" in result[feature]:
+                column["interpolations"][index] = result[feature]["interpolation"]
+
+            # Store the time array only once, unless it varies
+            if column["time"] is None:
+                column["time"] = time
+            elif not _same(column["time"], time):
+                column["times"][index] = time
+
+            self._add_values(column, index, values, invalid)
+
+
+    def _add_values(self, column, index, values, invalid):
+        if column["list"] is not None:
+            column["list"][index] = values
+            return
+
+        if isinstance(values, SpikeMatrix) or column["sparse"] is not None:
+            self._add_sparse(column, index, values, invalid)
+            return
+
+        array = _numeric(values)
+
+        if column["values"] is None:
+            if array is None or invalid:
+                if array is None and not invalid:
+                    self._to_list(column)
+                    column["list"][index] = values
+                else:
+                    column["pending"][index] = values
+                return
+
+            self._allocate(column, array)
+
+        if array is None or array.shape != column["values"].shape[1:]:
+            if invalid:
+                # Invalid evaluations are stored as a row of numpy.nan
+                return
+
+            self._to_list(column)
+            column["list"][index] = values
+            return
+
+        dtype = np.result_type(column["values"].dtype, array.dtype)
+        if dtype != column["values"].dtype:
+            column["values"] = column["values"].astype(dtype)
+
+        column["values"][index] = array
+        column["written"][index] = True
+
+
+    def _add_sparse(self, column, index, values, invalid):
+        if column["values"] is None and column["sparse"] is None:
+            column["sparse"] = [np.nan]*self.nr_evaluations
+
+            # Invalid results are stored as numpy.nan
+            column["pending"] = {}
+
+        if invalid and not isinstance(values, SpikeMatrix):
+            return
+
+        if column["sparse_shape"] is None and isinstance(values, SpikeMatrix):
+            column["sparse_shape"] = values.shape
+
+        if column["values"] is not None or not isinstance(values, SpikeMatrix) \
+                or values.shape != column["sparse_shape"]:
+            self._to_list(column)
+            column["list"][index] = values
+            return
+
+        column["sparse"][index] = values
+
+
+    def _allocate(self, column, array):
+        column["values"] = np.empty((self.nr_evaluations,) + array.shape,
+                                    dtype=array.dtype)
+
+        # Invalid results with the same shape are kept, the rest become nan
+        for index, values in column["pending"].items():
+            pending = _numeric(values)
+
+            if pending is not None and pending.shape == array.shape:
+                dtype = np.result_type(column["values"].dtype, pending.dtype)
+                if dtype != column["values"].dtype:
+                    column["values"] = column["values"].astype(dtype)
+
+                column["values"][index] = pending
+                column["written"][index] = True
+
+        column["pending"] = {}
+
+
+    def _to_list(self, column):
+        values = [np.nan]*self.nr_evaluations
+
+        for index, value in column["pending"].items():
+            values[index] = value
+
+        if column["values"] is not None:
+            for index in np.flatnonzero(column["written"]):
+                values[index] = column["values"][index]
+
+        if column["sparse"] is not None:
+            for index, value in enumerate(column["sparse"]):
+                if isinstance(value, SpikeMatrix):
+                    values[index] = value
+
+        column["list"] = values
+        column["values"] = None
+        column["sparse"] = None
+        column["pending"] = {}
+
+
+    def regular(self, feature):
+        """
+        Test if the results of a model/feature have the same shape for every
+        valid evaluation.
+
+        Parameters
+        ----------
+        feature : str
+            Name of a feature or the model.
+
+        Returns
+        -------
+        bool
+            True if the feature is regular or False if the feature is
+            irregular.
+        """
+        return self._columns[feature]["list"] is None
+
+
+    def ndim(self, feature):
+        """
+        The number of dimensions of the result of the first valid evaluation.
+
+        Parameters
+        ----------
+        feature : str
+            Name of a feature or the model.
+
+        Returns
+        -------
+        int
+            The number of dimensions of the first valid result, or of the first
+            result if no results are valid.
+        """
+        return self._columns[feature]["ndim_0"]
+
+
+    def interpolated(self, feature):
+        """
+        Test if any evaluation of a model/feature has an interpolation object.
+
+        Parameters
+        ----------
+        feature : str
+            Name of a feature or the model.
+
+        Returns
+        -------
+        bool
+            True if any evaluation has an interpolation object.
+        """
+        return len(self._columns[feature]["interpolations"]) > 0
+
+
+    def common_time(self, feature):
+        """
+        Test if all evaluations of a model/feature have the same time array.
+
+        Parameters
+        ----------
+        feature : str
+            Name of a feature or the model.
+
+        Returns
+        -------
+        bool
+            True if the time array is identical for all evaluations.
+        """
+        return len(self._columns[feature]["times"]) == 0
+
+
+    def time(self, feature):
+        """
+        The time array of the first valid evaluation of a model/feature.
+
+        Parameters
+        ----------
+        feature : str
+            Name of a feature or the model.
+
+        Returns
+        -------
+        time : {array, numpy.nan}
+            The time array of the first valid evaluation, or of the first
+            evaluation if no evaluations are valid.
+        """
+        return self._columns[feature]["time_0"]
+
+
+    def times(self, feature):
+        """
+        The time arrays of every evaluation of a model/feature.
+
+        Parameters
+        ----------
+        feature : str
+            Name of a feature or the model.
+
+        Returns
+        -------
+        times : list
+            A list with the time array of each evaluation.
+        """
+        column = self._columns[feature]
+
+        return [column["times"].get(index, column["time"])
+                for index in range(self.nr_evaluations)]
+
+
+    def values(self, feature):
+        """
+        The results of every evaluation of a model/feature.
+
+        Parameters
+        ----------
+        feature : str
+            Name of a feature or the model.
+
+        Returns
+        -------
+        values : {array, list}
+            An array with shape ``(nr_evaluations, ...)`` where evaluations
+            without a valid result are numpy.nan, if the feature is regular.
+            Otherwise a list with the result of each evaluation. If no
+            evaluation has a valid result, a list with the results is returned.
+            Sparse results are returned as a list of SpikeMatrix objects,
+            with numpy.nan for evaluations without a valid result.
+        """
+        column = self._columns[feature]
+
+        if column["list"] is not None:
+            return column["list"]
+
+        if column["sparse"] is not None:
+            return column["sparse"]
+
+        if column["values"] is None:
+            return [column["pending"].get(index, np.nan)
+                    for index in range(self.nr_evaluations)]
+
+        if not np.all(column["written"]):
+            if column["values"].dtype.kind not in "fc":
+                column["values"] = column["values"].astype(float)
+
+            column["values"][~column["written"]] = np.nan
+            column["written"][:] = True
+
+        return column["values"]
+
+
+    def results(self, feature):
+        """
+        The results of a model/feature, on the same form as the list of
+        results returned by RunModel.evaluate_nodes.
+
+        Parameters
+        ----------
+        feature : str
+            Name of a feature or the model.
+
+        Returns
+        -------
+        results : list
+            A list with a result dictionary for each evaluation, which only
+            contains `feature`.
+        """
+        column = self._columns[feature]
+
+        results = []
+        for index, (time, values) in enumerate(zip(self.times(feature), self.values(feature))):
+            result = {"values": values, "time": time}
+
+            if index in column["interpolations"]:
+                result["interpolation"] = column["interpolations"][index]
+
+            results.append({feature: result})
+
+        return results
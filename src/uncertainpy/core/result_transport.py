@@ -0,0 +1,231 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from ..utils.logger import setup_module_logger, get_logger
+
+
+SHARED_MEMORY = "/dev/shm"
+
+
+class ArrayDescriptor(object):
+    """
+    A small, picklable reference to an array stored in a scratch file by
+    ResultTransport. Sent between processes instead of the array itself.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the ``.npy`` file the array is stored in.
+    shape : tuple
+        The shape of the array.
+    dtype : numpy.dtype
+        The data type of the array.
+
+    Attributes
+    ----------
+    filename : str
+        Name of the ``.npy`` file the array is stored in.
+    shape : tuple
+        The shape of the array.
+    dtype : numpy.dtype
+        The data type of the array.
+    """
+    def __init__(self, filename, shape, dtype):
+        self.filename = filename
+        self.shape = shape
+        self.dtype = dtype
+
+
+    @property
+    def nbytes(self):
+        """
+        The size of the stored array in bytes.
+
+        Returns
+        -------
+        nbytes : int
+            The size of the stored array in bytes.
+        """
+        return int(np.prod(self.shape))*np.dtype(self.dtype).itemsize
+
+
+
+class ResultTransport(object):
+    """
+    Transport of large model and feature results from the worker processes to
+    the main process through memory-mapped scratch files.
+
+    Instead of pickling each time and values array and sending it through
+    the pipes of the worker pool, the worker processes write arrays larger
+    than `min_size` bytes to ``.npy`` files in a scratch folder, and only send
+    a small ArrayDescriptor back. The main process memory-maps each file
+    (copy-on-write), so the array is not copied or sent through a pipe, and
+    removes the file name. The data stays available through the memory map
+    until the array is no longer used.
+
+    Parameters
+    ----------
+    folder : {None, str}, optional
+        Scratch folder the arrays are stored in. Should preferably be on a
+        memory backed file system, such as ``/dev/shm``. If None, a temporary
+        folder is created in ``/dev/shm`` if it exists, and otherwise in the
+        default temporary folder, when the transport is started, and removed
+        when it is closed. Default is None.
+    min_size : int, optional
+        The minimum size in bytes of the arrays that are stored in scratch
+        files. Smaller arrays are sent as usual. Default is 65536.
+    logger_level : {"info", "debug", "warning", "error", "critical", None}, optional
+        Set the threshold for the logging level. Logging messages less severe
+        than this level is ignored. If None, no logging to file is performed.
+        Default logger level is "info".
+
+    Attributes
+    ----------
+    folder : {None, str}
+        Scratch folder the arrays are stored in.
+    min_size : int
+        The minimum size in bytes of the arrays that are stored in scratch
+        files.
+
+    Notes
+    -----
+    Only numeric arrays are stored in scratch files. Irregular results
+    (object arrays), empty arrays, scalars and interpolation objects are sent
+    as usual.
+
+    See Also
+    --------
+    uncertainpy.core.RunModel
+    uncertainpy.core.Parallel
+    """
+    def __init__(self, folder=None, min_size=65536, logger_level="info"):
+        self.folder = folder
+        self.min_size = min_size
+
+        self._temporary = False
+
+        setup_module_logger(class_instance=self, level=logger_level)
+
+
+    def start(self):
+        """
+        Create the scratch folder, if it does not already exist.
+        """
+        if self.folder is None:
+            # Prefer a memory backed file system
+            if os.path.isdir(SHARED_MEMORY) and os.access(SHARED_MEMORY, os.W_OK):
+                folder = SHARED_MEMORY
+            else:
+                folder = None
+
+            self.folder = tempfile.mkdtemp(prefix="uncertainpy_", dir=folder)
+            self._temporary = True
+
+        elif not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+
+
+    def close(self):
+        """
+        Remove the scratch folder if it was created by ``start``. Otherwise
+        only the remaining scratch files, for example from evaluations that
+        were never received, are removed.
+        """
+        if self.folder is None or not os.path.isdir(self.folder):
+            return
+
+        if self._temporary:
+            shutil.rmtree(self.folder, ignore_errors=True)
+            self.folder = None
+            self._temporary = False
+
+        else:
+            for filename in os.listdir(self.folder):
+                if filename.startswith("uncertainpy_") and filename.endswith(".npy"):
+                    os.remove(os.path.join(self.folder, filename))
+
+
+    def _pack_array(self, value):
+        if not isinstance(value, np.ndarray) or value.dtype.hasobject \
+                or value.size == 0 or value.nbytes < self.min_size:
+            return value
+
+        fd, filename = tempfile.mkstemp(prefix="uncertainpy_",
+                                        suffix=".npy",
+                                        dir=self.folder)
+
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, value)
+
+        return ArrayDescriptor(filename, value.shape, value.dtype)
+
+
+    def _unpack_array(self, value):
+        if not isinstance(value, ArrayDescriptor):
+            return value
+
+        # Copy-on-write, so the array can be changed without changing the file
+        array = np.load(value.filename, mmap_mode="c").view(np.ndarray)
+        os.remove(value.filename)
+
+        return array
+
+
+    def pack(self, result):
+        """
+        Store the large arrays of a result in scratch files. Used in the worker
+        processes.
+
+        Parameters
+        ----------
+        result : dict
+            The model and feature results, as returned by Parallel.run.
+
+        Returns
+        -------
+        result : dict
+            The model and feature results, where each ``"values"`` and
+            ``"time"`` array larger than `min_size` is replaced by an
+            ArrayDescriptor.
+        """
+        for feature in result:
+            for key in ["values", "time"]:
+                result[feature][key] = self._pack_array(result[feature][key])
+
+        return result
+
+
+    def unpack(self, result):
+        """
+        Read the arrays of a packed result back from the scratch files, and
+        remove the scratch files. Used in the main process.
+
+        Parameters
+        ----------
+        result : dict
+            The model and feature results, as returned by ``pack``.
+
+        Returns
+        -------
+        result : dict
+            The model and feature results, with each ArrayDescriptor replaced
+            by the array it refers to. Results that are not packed are
+            returned unchanged.
+        """
+        logger = get_logger(self)
+
+        for feature in result:
+            for key in ["values", "time"]:
+                if isinstance(result[feature][key], ArrayDescriptor):
+                    logger.debug("{}: reading {} bytes from {}".format(
+                        feature, result[feature][key].nbytes, result[feature][key].filename)
+                    )
+
+                result[feature][key] = self._unpack_array(result[feature][key])
+
+        return result
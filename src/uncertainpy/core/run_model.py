@@ -10,8 +10,13 @@ except ImportError:
 from tqdm import tqdm
 
 import six
+import json
+import time
+import inspect
 import warnings
+import itertools
 import numpy as np
+import scipy.interpolate as scpi
 import logging
 
 try:
@@ -23,7 +28,93 @@ from ..data import Data
 from ..utils.utility import lengths, contains_nan
 from ..utils.logger import get_logger
 from .base import ParameterBase
-from .parallel import Parallel
+from .parallel import Parallel, TIMINGS_KEY
+from .profiler import Profiler
+from .worker_pool import WorkerPool, imap_sequential
+from .result_store import ResultStore
+
+
+
+class _FailedResult(dict):
+    """
+    The numpy.nan result of an evaluation that failed or exceeded the timeout.
+    Failed results are not stored in the checkpoint file or the cache.
+    """
+    pass
+
+
+
+def _identity(function):
+    """
+    Identify a function or class by its module and name, which, unlike its
+    repr, is the same across sessions.
+    """
+    function = getattr(function, "__func__", function)
+    name = getattr(function, "__qualname__", getattr(function, "__name__", None))
+
+    # Callable instances are identified by their class
+    if name is None:
+        return _identity(type(function))
+
+    return "{}.{}".format(function.__module__, name)
+
+
+def _is_simple(value):
+    """
+    Find if `value` is a number, a string, or a list or dictionary of these.
+    """
+    if value is None or isinstance(value, (bool, float, np.generic) + six.integer_types + six.string_types):
+        return True
+    elif isinstance(value, (list, tuple)):
+        return all(_is_simple(item) for item in value)
+    elif isinstance(value, dict):
+        return all(isinstance(key, six.string_types) and _is_simple(item) for key, item in value.items())
+    else:
+        return False
+
+
+def _attributes(instance):
+    """
+    The class of `instance` together with the attributes that are set from
+    the arguments of ``__init__`` (of the class or any base class), if they
+    are simple values or functions. Attributes that are arrays or other
+    objects are left out, as are attributes that are changed while evaluating,
+    for example intermediate results.
+    """
+    getargspec = getattr(inspect, "getfullargspec", getattr(inspect, "getargspec", None))
+
+    arguments = set()
+    for cls in type(instance).__mro__:
+        if inspect.isfunction(cls.__dict__.get("__init__")) or inspect.ismethod(cls.__dict__.get("__init__")):
+            arguments.update(getargspec(cls.__init__).args)
+
+    attributes = {"class": _identity(type(instance))}
+
+    for name, value in vars(instance).items():
+        if name not in arguments or value is None:
+            continue
+
+        if _is_simple(value):
+            attributes[name] = value
+        elif inspect.isfunction(value) or inspect.ismethod(value):
+            attributes[name] = _identity(value)
+
+    return attributes
+
+
+def _default(value):
+    """
+    Convert objects json can not serialize into something it can, used when
+    creating the evaluation settings.
+    """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    elif isinstance(value, np.generic):
+        return value.item()
+    elif callable(value):
+        return _identity(value)
+    else:
+        return repr(value)
 
 
 
@@ -63,6 +154,84 @@ class RunModel(ParameterBase):
         If "max", the maximum number of CPUs on the computer
         (multiprocess.cpu_count()) is used.
         Default is "max".
+    initializer : {None, callable, list of callables}, optional
+        Warm-up function(s) run once in each worker process when it is
+        started. Each callable must take no arguments. Default is None.
+    maxtasksperchild : {None, int}, optional
+        The number of model evaluations each worker process performs before it
+        is replaced by a fresh worker process. If None, the worker processes
+        live as long as the worker pool. Default is None.
+    cache : {None, EvaluationCache}, optional
+        Cache of previous model and feature evaluations. Evaluations found in
+        the cache are not rerun. If None, no cache is used. Default is None.
+    checkpoint : {None, Checkpoint}, optional
+        Checkpoint file each finished evaluation is written to. Evaluations
+        already in the checkpoint file are not rerun. If None, no checkpoint
+        file is used. Default is None.
+    interpolation_time : {None, "auto", array_like, dict}, optional
+        The time array irregular results are resampled onto. The resampling is
+        performed in the worker processes, so only arrays of a fixed length
+        are sent back instead of interpolation objects.
+        If None, an interpolation object is created for each evaluation and
+        all results are interpolated onto the longest time array afterwards.
+        If "auto", the time arrays of the first evaluation are used. The
+        first evaluation is then always run, also when it is in the cache,
+        since the time arrays are part of what identifies cached evaluations.
+        If array_like, the same time array is used for the model and all
+        features that are interpolated.
+        If dict, the model/feature name is key and the time array is value.
+        Default is None.
+    interpolation_method : {"cubic", "linear"}, optional
+        The type of spline used to interpolate irregular results.
+        Default is "cubic".
+    transport : {None, ResultTransport}, optional
+        Transport used to send large result arrays from the worker processes
+        through scratch files, which are memory-mapped by the main process,
+        instead of pickling them.
+        If None, the results are sent back as usual. Default is None.
+    timeout : {None, float}, optional
+        The maximum wall-clock time in seconds for a single model evaluation.
+        The worker process of an evaluation that exceeds the timeout is
+        killed and replaced, and the evaluation is given numpy.nan as result.
+        Requires multiprocessing (CPUs is not None). If None, there is no
+        timeout. Default is None.
+    retries : int, optional
+        The number of times an evaluation that raises an exception or
+        exceeds the timeout is retried. Default is 0.
+    on_failure : {"raise", "nan"}, optional
+        What to do with evaluations that still raise an exception after all
+        retries. If "raise", the exception is raised. If "nan", the
+        evaluation is given numpy.nan as result, so it can be handled by
+        `allow_incomplete`. Default is "raise".
+    speculative : bool, optional
+        If True, evaluations that run for more than twice the median time of
+        the finished evaluations are started once more on idle worker
+        processes when there are no more evaluations waiting, and the
+        result that finishes first is used. Default is False.
+    profile : bool, optional
+        If True, the time spent in each stage of each evaluation is recorded
+        in a profiling table, and a summary of the most costly stages is
+        logged after the evaluations. Default is False.
+    feature_CPUs : {None, int, "max"}, optional
+        The number of CPUs used to calculate the features. If not None, the
+        model and the features are calculated in a two-stage pipeline, where
+        the model is run by `CPUs` worker processes and the features are
+        calculated from the model output by `feature_CPUs` other worker
+        processes at the same time. A failing feature calculation is then
+        retried without running the model again. Requires multiprocessing
+        (CPUs is not None), and is not used for batch models or together with
+        `timeout` and `speculative`. If None, the model and features are
+        calculated in the same worker processes. Default is None.
+    queue_size : {None, int}, optional
+        The largest number of model outputs that wait for the features to be
+        calculated in the two-stage pipeline. When the queue is full, no new
+        model evaluations are started. If None, `feature_CPUs` is used.
+        Default is None.
+    keep_model_results : bool, optional
+        If True, the raw output of each model evaluation in the two-stage
+        pipeline is kept in `model_results`, so the features can be
+        recalculated with ``evaluate_features`` without running the model
+        again. Default is False.
 
 
     Attributes
@@ -75,6 +244,65 @@ class RunModel(ParameterBase):
         The features of the model to perform uncertainty quantification on.
     CPUs : int
         The number of CPUs used when calculating the model and features.
+    worker_pool : WorkerPool
+        The pool of worker processes used to evaluate the model in parallel.
+    cache : {None, EvaluationCache}
+        Cache of previous model and feature evaluations.
+    checkpoint : {None, Checkpoint}
+        Checkpoint file each finished evaluation is written to.
+    interpolation_time : {None, "auto", array_like, dict}
+        The time array irregular results are resampled onto.
+    interpolation_method : {"cubic", "linear"}
+        The type of spline used to interpolate irregular results.
+    transport : {None, ResultTransport}
+        Transport used to send large result arrays from the worker processes.
+    timeout : {None, float}
+        The maximum wall-clock time in seconds for a single model evaluation.
+    retries : int
+        The number of times a failed evaluation is retried.
+    on_failure : {"raise", "nan"}
+        What to do with evaluations that still fail after all retries.
+    speculative : bool
+        If evaluations that run for long are started once more.
+    failures : int
+        The number of evaluations that failed in the last call to
+        ``evaluate_nodes``.
+    timeouts : int
+        The number of evaluations that exceeded the timeout in the last call
+        to ``evaluate_nodes``.
+    profile : bool
+        If the time spent in each stage of each evaluation is recorded.
+    profiler : {None, Profiler}
+        The profiling table of the last call to ``evaluate_nodes``, if
+        `profile` is True.
+    feature_CPUs : {None, int}
+        The number of CPUs used to calculate the features in the two-stage
+        pipeline.
+    feature_pool : WorkerPool
+        The pool of worker processes used to calculate the features in the
+        two-stage pipeline.
+    queue_size : {None, int}
+        The largest number of model outputs that wait for the features to be
+        calculated in the two-stage pipeline.
+    keep_model_results : bool
+        If the raw output of each model evaluation is kept.
+    model_results : {None, list}
+        The raw output, ``(time, values, info...)``, of each model evaluation
+        in the last call to ``evaluate_nodes``, if `keep_model_results` is
+        True. Evaluations that were not run in the two-stage pipeline are
+        None.
+
+    Notes
+    -----
+    A new set of worker processes is started and stopped for each call to
+    ``run`` or ``evaluate_nodes``. To reuse the same worker processes across
+    several calls, use ``RunModel`` as a context manager:
+
+    .. code-block:: Python
+
+        with runmodel:
+            data_1 = runmodel.run(nodes_1, uncertain_parameters)
+            data_2 = runmodel.run(nodes_2, uncertain_parameters)
 
     See Also
     --------
@@ -83,6 +311,10 @@ class RunModel(ParameterBase):
     uncertainpy.Parameters
     uncertainpy.models.Model
     uncertainpy.models.Model.run : Requirements for the model run function.
+    uncertainpy.core.EvaluationCache
+    uncertainpy.core.Checkpoint
+    uncertainpy.core.ResultTransport
+    uncertainpy.core.Profiler
     """
 
     def __init__(self,
@@ -90,17 +322,51 @@ class RunModel(ParameterBase):
                  parameters,
                  features=None,
                  logger_level="info",
-                 CPUs="max"):
-
-        if CPUs == "max":
-            import multiprocess
-
-            CPUs = multiprocess.cpu_count()
-
+                 CPUs="max",
+                 initializer=None,
+                 maxtasksperchild=None,
+                 cache=None,
+                 checkpoint=None,
+                 interpolation_time=None,
+                 interpolation_method="cubic",
+                 transport=None,
+                 timeout=None,
+                 retries=0,
+                 on_failure="raise",
+                 speculative=False,
+                 profile=False,
+                 feature_CPUs=None,
+                 queue_size=None,
+                 keep_model_results=False):
+
+        self.cache = cache
+        self.checkpoint = checkpoint
+        self.interpolation_time = interpolation_time
+        self.timeout = timeout
+        self.retries = retries
+        self.on_failure = on_failure
+        self.speculative = speculative
+        self.queue_size = queue_size
+        self.keep_model_results = keep_model_results
+
+        self.failures = 0
+        self.timeouts = 0
+        self.profiler = None
+        self.model_results = None
+
+        self.worker_pool = WorkerPool(initializer=initializer,
+                                      maxtasksperchild=maxtasksperchild)
+        self._initializer = self.worker_pool.initializer
+
+        self.feature_pool = WorkerPool(initializer=initializer,
+                                       maxtasksperchild=maxtasksperchild)
 
         self._parallel = Parallel(model=model,
                                   features=features,
-                                  logger_level=logger_level)
+                                  logger_level=logger_level,
+                                  interpolation_method=interpolation_method,
+                                  transport=transport,
+                                  profile=profile)
 
         super(RunModel, self).__init__(model=model,
                                        parameters=parameters,
@@ -108,6 +374,196 @@ class RunModel(ParameterBase):
                                        logger_level=logger_level)
 
         self.CPUs = CPUs
+        self.feature_CPUs = feature_CPUs
+
+
+    @property
+    def on_failure(self):
+        """
+        What to do with evaluations that still raise an exception after all
+        retries.
+
+        Parameters
+        ----------
+        new_on_failure : {"raise", "nan"}
+            If "raise", the exception is raised. If "nan", the evaluation is
+            given numpy.nan as result.
+
+        Returns
+        -------
+        on_failure : {"raise", "nan"}
+            What to do with evaluations that fail.
+
+        Raises
+        ------
+        ValueError
+            If `new_on_failure` is not "raise" or "nan".
+        """
+        return self._on_failure
+
+
+    @on_failure.setter
+    def on_failure(self, new_on_failure):
+        if new_on_failure not in ["raise", "nan"]:
+            raise ValueError("on_failure {} not supported. ".format(new_on_failure)
+                             + "Supported options are: raise and nan")
+
+        self._on_failure = new_on_failure
+
+
+    @property
+    def transport(self):
+        """
+        Transport used to send large result arrays from the worker processes
+        to the main process through scratch files.
+
+        Parameters
+        ----------
+        new_transport : {None, ResultTransport}
+            Transport used to send large result arrays. If None, the results
+            are sent back as usual.
+
+        Returns
+        -------
+        transport : {None, ResultTransport}
+            Transport used to send large result arrays.
+        """
+        return self._parallel.transport
+
+
+    @transport.setter
+    def transport(self, new_transport):
+        self._parallel.transport = new_transport
+
+
+    @property
+    def profile(self):
+        """
+        If the time spent in each stage of each evaluation is recorded.
+
+        Parameters
+        ----------
+        new_profile : bool
+            If the time spent in each stage of each evaluation is recorded.
+
+        Returns
+        -------
+        profile : bool
+            If the time spent in each stage of each evaluation is recorded.
+        """
+        return self._parallel.profile
+
+
+    @profile.setter
+    def profile(self, new_profile):
+        self._parallel.profile = new_profile
+
+
+    @property
+    def interpolation_method(self):
+        """
+        The type of spline used to interpolate irregular results.
+
+        Parameters
+        ----------
+        new_interpolation_method : {"cubic", "linear"}
+            The type of spline used to interpolate irregular results.
+
+        Returns
+        -------
+        interpolation_method : {"cubic", "linear"}
+            The type of spline used to interpolate irregular results.
+        """
+        return self._parallel.interpolation_method
+
+
+    @interpolation_method.setter
+    def interpolation_method(self, new_interpolation_method):
+        self._parallel.interpolation_method = new_interpolation_method
+
+
+    def __enter__(self):
+        self.worker_pool.__enter__()
+        self.feature_pool.__enter__()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.feature_pool.__exit__(exc_type, exc_value, traceback)
+        self.worker_pool.__exit__(exc_type, exc_value, traceback)
+
+
+    @property
+    def CPUs(self):
+        """
+        The number of CPUs used when calculating the model and features.
+
+        Parameters
+        ----------
+        new_CPUs : {int, None, "max"}
+            The number of CPUs to use when calculating the model and features.
+            If None, no multiprocessing is used.
+            If "max", the maximum number of CPUs on the computer
+            (multiprocess.cpu_count()) is used.
+
+        Returns
+        -------
+        CPUs : {int, None}
+            The number of CPUs used when calculating the model and features.
+        """
+        return self._CPUs
+
+
+    @CPUs.setter
+    def CPUs(self, new_CPUs):
+        if new_CPUs == "max":
+            import multiprocess
+
+            new_CPUs = multiprocess.cpu_count()
+
+        self._CPUs = new_CPUs
+
+        if new_CPUs:
+            self.worker_pool.processes = new_CPUs
+        else:
+            self.worker_pool.terminate()
+
+
+    @property
+    def feature_CPUs(self):
+        """
+        The number of CPUs used to calculate the features in the two-stage
+        pipeline.
+
+        Parameters
+        ----------
+        new_feature_CPUs : {None, int, "max"}
+            The number of CPUs used to calculate the features. If None, the
+            model and features are calculated in the same worker processes.
+            If "max", the maximum number of CPUs on the computer
+            (multiprocess.cpu_count()) is used.
+
+        Returns
+        -------
+        feature_CPUs : {None, int}
+            The number of CPUs used to calculate the features.
+        """
+        return self._feature_CPUs
+
+
+    @feature_CPUs.setter
+    def feature_CPUs(self, new_feature_CPUs):
+        if new_feature_CPUs == "max":
+            import multiprocess
+
+            new_feature_CPUs = multiprocess.cpu_count()
+
+        self._feature_CPUs = new_feature_CPUs
+
+        if new_feature_CPUs:
+            self.feature_pool.processes = new_feature_CPUs
+        else:
+            self.feature_pool.terminate()
 
 
     @ParameterBase.features.setter
@@ -123,6 +579,12 @@ class RunModel(ParameterBase):
 
         self._parallel.model = self.model
 
+        # The model is prepared once in each worker process when it is started
+        if self.model is not None:
+            self.worker_pool.initializer = self._initializer + [self.model.initialize]
+        else:
+            self.worker_pool.initializer = self._initializer
+
 
     def apply_interpolation(self, results, feature):
         """
@@ -172,30 +634,63 @@ class RunModel(ParameterBase):
         Chooses the time array with the highest number of time points and use
         this time array to interpolate the model/feature results in each of
         those points. If an interpolation is None, gives numpy.nan instead.
+
+        Results that have already been resampled by Parallel (and therefore
+        have no interpolation object) are used directly if they are on the
+        chosen time array. Otherwise all results on the same time array are
+        interpolated together, with a single call to
+        ``scipy.interpolate.interp1d``.
         """
         logger = get_logger(self)
 
         time_lengths = []
         for result in results:
-            time_lengths.append(len(result[feature]["time"]))
+            time_lengths.append(np.size(result[feature]["time"]))
 
         index_max_len = np.argmax(time_lengths)
         time = results[index_max_len][feature]["time"]
 
-        interpolated_results = []
-        for result in results:
+        interpolated_results = [None]*len(results)
+
+        # Resampled results grouped by their time array
+        groups = {}
+        for i, result in enumerate(results):
+            if "interpolation" not in result[feature]:
+                if contains_nan(result[feature]["values"]):
+                    interpolated_results[i] = np.nan
+                elif np.shape(result[feature]["time"]) == np.shape(time) \
+                        and np.array_equal(result[feature]["time"], time):
+                    interpolated_results[i] = result[feature]["values"]
+                else:
+                    key = np.asarray(result[feature]["time"]).tobytes()
+                    groups.setdefault(key, []).append(i)
+
+                continue
+
             interpolation = result[feature]["interpolation"]
 
             if interpolation is None:
-                interpolated_results.append(np.nan)
+                interpolated_results[i] = np.nan
                 logger.error("{}: Unknown error while creating the interpolation".format(feature))
 
             elif isinstance(interpolation, six.string_types):
-                interpolated_results.append(np.nan)
+                interpolated_results[i] = np.nan
                 logger.error(interpolation)
 
             else:
-                interpolated_results.append(interpolation(time))
+                interpolated_results[i] = interpolation(time)
+
+        for indices in groups.values():
+            values = np.array([results[i][feature]["values"] for i in indices])
+            interpolation = scpi.interp1d(results[indices[0]][feature]["time"],
+                                          values,
+                                          kind=self.interpolation_method,
+                                          axis=1,
+                                          fill_value="extrapolate",
+                                          assume_sorted=True)
+
+            for i, interpolated in zip(indices, interpolation(time)):
+                interpolated_results[i] = interpolated
 
         return time, interpolated_results
 
@@ -213,9 +708,9 @@ class RunModel(ParameterBase):
 
         Parameters
         ----------
-        results : list
-            A list where each element is a result dictionary for each set
-            of model evaluations.
+        results : {list, ResultStore}
+            A ResultStore with the results, or a list where each element is a
+            result dictionary for each set of model evaluations.
             An example:
 
             .. code-block:: Python
@@ -251,16 +746,27 @@ class RunModel(ParameterBase):
         3. ``data["model/features"].labels``
         4. ``data.model_name``
 
+        The results of regular models/features are stored as a single array
+        with shape ``(nr_evaluations, ...)``, where evaluations without a
+        valid result are numpy.nan. Irregular results are stored as lists.
+
         See Also
         --------
         uncertainpy.Data
         """
         logger = get_logger(self)
 
+        if not isinstance(results, ResultStore):
+            store = ResultStore(len(results))
+            for index, result in enumerate(results):
+                store.add(index, result)
+
+            results = store
+
         data = Data(logger_level=self._logger_level)
 
         # Add features and labels
-        for feature in results[0]:
+        for feature in results.features:
             data.add_features(feature)
 
             if feature == self.model.name:
@@ -272,12 +778,8 @@ class RunModel(ParameterBase):
         data.model_ignore = self.model.ignore
 
         def add_results(results, data, feature):
-            data[feature].time = []
-            data[feature].evaluations = []
-
-            for result in results:
-                data[feature].evaluations.append(result[feature]["values"])
-                data[feature].time.append(result[feature]["time"])
+            data[feature].time = results.times(feature)
+            data[feature].evaluations = results.values(feature)
 
         # results = self.regularize_nan_results(results)
 
@@ -306,7 +808,7 @@ class RunModel(ParameterBase):
             if feature in self.features.interpolate or \
                     (feature == self.model.name and self.model.interpolate and not self.model.ignore):
                 # TODO implement interpolation of >= 2d data, part2
-                if np.ndim(results[0][feature]["values"]) >= 2:
+                if results.ndim(feature) >= 2:
                     # raise NotImplementedError("Feature: {feature},".format(feature=feature)
                     #                           + " no support for >= 2D interpolation")
                     logger.error("{feature}:".format(feature=feature)
@@ -315,20 +817,24 @@ class RunModel(ParameterBase):
                     add_results(results, data, feature)
 
 
-                elif np.ndim(results[0][feature]["values"]) == 1:
-                     data[feature].time, data[feature].evaluations = self.apply_interpolation(results, feature)
+                elif results.ndim(feature) == 1:
+                    # Results already resampled onto the same time array
+                    if results.regular(feature) and results.common_time(feature) \
+                            and not results.interpolated(feature):
+                        data[feature].time = results.time(feature)
+                        data[feature].evaluations = results.values(feature)
+                    else:
+                        data[feature].time, data[feature].evaluations = \
+                            self.apply_interpolation(results.results(feature), feature)
 
                 # Interpolating a 0D result makes no sense, so if a 0D feature
                 # is supposed to be interpolated store it as normal
-                elif np.ndim(results[0][feature]["values"]) == 0:
+                elif results.ndim(feature) == 0:
                     logger.warning("{feature}: ".format(feature=feature) +
                                         "returns a 0D result. No interpolation is performed.")
 
-                    data[feature].time = results[0][feature]["time"]
-
-                    data[feature].evaluations  = []
-                    for result in results:
-                        data[feature].evaluations.append(result[feature]["values"])
+                    data[feature].time = results.time(feature)
+                    data[feature].evaluations = results.values(feature)
 
 
             elif feature == self.model.name and self.model.ignore:
@@ -337,7 +843,7 @@ class RunModel(ParameterBase):
             else:
                 # Check if features are irregular without being specified as a interpolate
                 # TODO if the feature is irregular, perform the complete interpolation here instead
-                if not self.is_regular(results, feature):
+                if not results.regular(feature):
                     data.error.append(feature)
 
                     add_results(results, data, feature)
@@ -359,18 +865,15 @@ class RunModel(ParameterBase):
 
                 else:
                     # Store data from results in a Data object
-                    data[feature].time = results[0][feature]["time"]
-
-                    data[feature].evaluations = []
-                    for result in results:
-                        data[feature].evaluations.append(result[feature]["values"])
+                    data[feature].time = results.time(feature)
+                    data[feature].evaluations = results.values(feature)
 
         return data
 
 
 
 
-    def evaluate_nodes(self, nodes, uncertain_parameters):
+    def evaluate_nodes(self, nodes, uncertain_parameters, store=False):
         """
         Evaluate the the model and calculate the features
         for the nodes (values) for the uncertain parameters.
@@ -382,11 +885,16 @@ class RunModel(ParameterBase):
             to evaluate the model and features for.
         uncertain_parameters : list
             A list of the names of all uncertain parameters.
+        store : bool, optional
+            If True, each result is written into a ResultStore as soon as it
+            is calculated, instead of being collected in a list.
+            Default is False.
 
         Returns
         -------
-        results : list
-            A list where each element is a result dictionary for each set
+        results : {list, ResultStore}
+            A ResultStore with the results if `store` is True. Otherwise a
+            list where each element is a result dictionary for each set
             of model evaluations.
             An example:
 
@@ -414,6 +922,11 @@ class RunModel(ParameterBase):
         ImportError
             If xvfbwrapper is not installed.
         """
+        logger = get_logger(self)
+
+        self.failures = 0
+        self.timeouts = 0
+
         if self.model.suppress_graphics:
             if not prerequisites:
                 raise ImportError("Running with suppress_graphics require: xvfbwrapper")
@@ -421,34 +934,124 @@ class RunModel(ParameterBase):
             vdisplay = Xvfb()
             vdisplay.start()
 
-        results = []
-
         model_parameters = self.create_model_parameters(nodes, uncertain_parameters)
 
-        if self.CPUs:
-            import multiprocess as mp
+        self.profiler = Profiler(len(model_parameters)) if self.profile else None
 
-            pool = mp.Pool(processes=self.CPUs)
+        # Results that are already known, from the checkpoint file or the cache
+        known_results = [None]*len(model_parameters)
 
-            # pool.map(self._parallel.run, model_parameters)
-            # chunksize = int(np.ceil(len(model_parameters)/self.CPUs))
-            chunksize = 1
-            for result in tqdm(pool.imap(self._parallel.run, model_parameters, chunksize),
-                               desc="Running model",
-                               total=len(nodes.T)):
+        results = ResultStore(len(model_parameters)) if store else None
 
-                results.append(result)
+        self._parallel.interpolation_time = self.create_interpolation_time()
 
-            pool.close()
+        if self.transport is not None:
+            self.transport.start()
 
+        pipeline = self.use_pipeline()
+
+        self.model_results = [None]*len(known_results) if self.keep_model_results else None
+
+        # Timeouts, retries and failures require each evaluation to be followed
+        fault_tolerant = self.timeout is not None or self.retries > 0 \
+            or self.on_failure != "raise" or self.speculative
+
+        def create_tasks(indices):
+            parameters = [model_parameters[index] for index in indices]
+
+            # Batch models are evaluated for a batch of model parameters at the time
+            if self.model.batch:
+                return self._parallel.run_batch, self.create_batches(parameters)
+            else:
+                return self._parallel.run, parameters
+
+        def evaluate():
+            evaluated = []
+
+            # Derive the time arrays to resample onto from the first
+            # evaluation, which is therefore run before the rest, and before
+            # the cache and the checkpoint file are searched since the time
+            # arrays are part of the settings that identify an evaluation.
+            # It is run by the worker processes like the rest, with the same
+            # timeout, retries and failure handling.
+            if isinstance(self.interpolation_time, six.string_types) \
+                    and self.interpolation_time == "auto" and model_parameters:
+                first_indices = [0]
+                function, tasks = create_tasks(first_indices)
+
+                first_results = list(self._evaluate_tasks(function, tasks, pipeline,
+                                                          fault_tolerant, first_indices))[0]
+                if not self.model.batch:
+                    first_results = [first_results]
+
+                first_results = [self._receive(index, result)
+                                 for index, result in zip(first_indices, first_results)]
+
+                self._parallel.interpolation_time = self.create_interpolation_time(first_results[0])
+
+                for result in first_results:
+                    for feature in self._parallel.interpolation_time:
+                        result[feature].pop("interpolation", None)
+                        self._parallel.resample_1d(result, feature, self._parallel.interpolation_time[feature])
+
+            else:
+                first_indices = []
+                first_results = []
+
+            keys = self._load_known_results(known_results, model_parameters,
+                                           nodes, uncertain_parameters)
+
+            for index, result in zip(first_indices, first_results):
+                self._store_result(index, result, known_results, nodes,
+                                   uncertain_parameters, keys, results)
+                evaluated.append(index)
+
+            # Only evaluate the model parameters without a known result
+            indices = [index for index, result in enumerate(known_results)
+                       if result is None and index not in first_indices]
+            function, tasks = create_tasks(indices)
+
+            new_results = self._evaluate_tasks(function, tasks, pipeline,
+                                               fault_tolerant, indices)
+
+            self._store_results(new_results, known_results, indices, nodes,
+                                uncertain_parameters, keys, results)
+
+            return evaluated + indices
+
+        # The worker processes are only stopped here if they are not
+        # kept alive by an enclosing ``with runmodel:`` block
+        if self.CPUs and pipeline:
+            with self.worker_pool, self.feature_pool:
+                evaluated = evaluate()
+        elif self.CPUs:
+            with self.worker_pool:
+                evaluated = evaluate()
+        else:
+            evaluated = evaluate()
+
+        # Interpolations are not stored in the checkpoint file or the cache
+        evaluated = set(evaluated)
+
+        if store:
+            for index, result in enumerate(known_results):
+                if index not in evaluated:
+                    results.add(index, self._parallel.create_interpolations(result))
         else:
-            for result in tqdm(imap(self._parallel.run, model_parameters),
-                               desc="Running model",
-                               total=len(nodes.T)):
+            results = []
+            for index, result in enumerate(known_results):
+                if index in evaluated:
+                    results.append(result)
+                else:
+                    results.append(self._parallel.create_interpolations(result))
 
-                results.append(result)
+        self._parallel.interpolation_time = None
 
+        if self.transport is not None:
+            self.transport.close()
 
+        if self.profiler is not None:
+            logger.info(self.profiler.format_summary())
 
         if self.model.suppress_graphics:
             vdisplay.stop()
@@ -457,6 +1060,483 @@ class RunModel(ParameterBase):
 
 
 
+    def evaluation_settings(self):
+        """
+        The settings, besides the model parameters, that decide the result of
+        an evaluation. Used to identify evaluations in the cache and in the
+        checkpoint file.
+
+        Returns
+        -------
+        settings : str
+            A JSON string with the model and features classes, the run,
+            postprocess and preprocess functions, the simple (numbers, strings
+            and lists and dictionaries of these) public attributes of the model
+            and features, ``model_kwargs``, the features to run and interpolate,
+            `interpolation_method` and the time arrays irregular results are
+            resampled onto.
+
+        Notes
+        -----
+        The time arrays are those of the current call to ``evaluate_nodes``,
+        so for ``interpolation_time="auto"`` they are only known after the first
+        evaluation.
+        """
+        if self._parallel.interpolation_time is None:
+            interpolation_time = None
+        else:
+            interpolation_time = {feature: self._parallel.interpolation_time[feature].tolist()
+                                  for feature in self._parallel.interpolation_time}
+
+        settings = {"model": _attributes(self.model),
+                    "model_kwargs": self.model.model_kwargs,
+                    "run": _identity(self.model.run),
+                    "postprocess": _identity(self.model.postprocess),
+                    "features": _attributes(self.features),
+                    "preprocess": _identity(self.features.preprocess),
+                    "features_to_run": sorted(self.features.features_to_run),
+                    "interpolate": sorted(self.features.interpolate),
+                    "interpolation_time": interpolation_time,
+                    "interpolation_method": self.interpolation_method}
+
+        return json.dumps(settings, sort_keys=True, default=_default)
+
+
+
+    def _load_known_results(self, known_results, model_parameters, nodes,
+                            uncertain_parameters):
+        """
+        Fill `known_results` with the results found in the checkpoint file or
+        in the cache, for the current evaluation settings.
+
+        Returns
+        -------
+        keys : {None, list}
+            The cache key of each of the model parameters, None if no cache is
+            used.
+        """
+        logger = get_logger(self)
+
+        keys = None
+
+        if self.checkpoint is None and self.cache is None:
+            return keys
+
+        settings = self.evaluation_settings()
+
+        if self.checkpoint is not None:
+            checkpointed = self.checkpoint.load(uncertain_parameters, settings)
+
+            for index, node in enumerate(nodes.T):
+                if index in checkpointed and np.array_equal(checkpointed[index][0], node):
+                    known_results[index] = checkpointed[index][1]
+
+            if checkpointed:
+                logger.info("Reusing {} evaluations from {}".format(
+                    len(known_results) - known_results.count(None), self.checkpoint.filename)
+                )
+
+        if self.cache is not None:
+            keys = [self.cache.key(self.model, self.features, parameters, settings)
+                    for parameters in model_parameters]
+
+            for index, key in enumerate(keys):
+                if known_results[index] is None:
+                    known_results[index] = self.cache.get(key)
+
+        return keys
+
+
+
+    def use_pipeline(self):
+        """
+        Find if the model and features are calculated in the two-stage
+        pipeline.
+
+        Returns
+        -------
+        bool
+            True if `feature_CPUs` and `CPUs` are set, and the model is not a
+            batch model and neither `timeout` nor `speculative` is used.
+        """
+        logger = get_logger(self)
+
+        if not self.feature_CPUs or not self.CPUs:
+            return False
+
+        if self.model.batch:
+            logger.warning("feature_CPUs is not supported for batch models, "
+                           "the model and features are calculated in the same worker processes.")
+            return False
+
+        if self.timeout is not None or self.speculative:
+            logger.warning("feature_CPUs is not supported together with timeout and speculative, "
+                           "the model and features are calculated in the same worker processes.")
+            return False
+
+        return True
+
+
+
+    def evaluate_features(self, model_results, store=False):
+        """
+        Calculate the features from the raw output of model evaluations,
+        without running the model again, for example from `model_results`.
+
+        Parameters
+        ----------
+        model_results : list
+            A list where each element is the raw output, ``(time, values,
+            info...)``, of a model evaluation.
+        store : bool, optional
+            If True, the results are returned in a ResultStore instead of a
+            list. Default is False.
+
+        Returns
+        -------
+        results : {list, ResultStore}
+            The model and feature results of each model evaluation, on the
+            same form as returned by ``evaluate_nodes``.
+
+        Notes
+        -----
+        The features are calculated by the `feature_CPUs` worker processes
+        if set, otherwise by the `CPUs` worker processes. Irregular results
+        are resampled if `interpolation_time` is a dict or an array, and are
+        given an interpolation object otherwise. The results are not stored
+        in the checkpoint file or the cache.
+        """
+        if isinstance(self.interpolation_time, six.string_types):
+            self._parallel.interpolation_time = None
+        else:
+            self._parallel.interpolation_time = self.create_interpolation_time()
+
+        if self.transport is not None:
+            self.transport.start()
+
+        function = self._parallel.process_model_result
+
+        if self.feature_CPUs:
+            with self.feature_pool:
+                new_results = list(self.feature_pool.imap(function, model_results))
+        elif self.CPUs:
+            with self.worker_pool:
+                new_results = list(self.worker_pool.imap(function, model_results))
+        else:
+            new_results = [function(model_result) for model_result in model_results]
+
+        new_results = [self._receive(index, result) for index, result in enumerate(new_results)]
+
+        self._parallel.interpolation_time = None
+
+        if self.transport is not None:
+            self.transport.close()
+
+        if store:
+            results = ResultStore(len(new_results))
+            for index, result in enumerate(new_results):
+                results.add(index, result)
+
+            return results
+
+        return new_results
+
+
+
+    def _evaluate_tasks(self, function, tasks, pipeline, fault_tolerant, indices):
+        """
+        Evaluate the tasks with the worker processes if `CPUs` is set, and
+        otherwise in this process.
+
+        Parameters
+        ----------
+        function : callable
+            The function each task is evaluated with.
+        tasks : list
+            The tasks, either model parameters or batches of model parameters.
+        pipeline : bool
+            If the model and features are calculated in the two-stage
+            pipeline.
+        fault_tolerant : bool
+            If timeouts, retries and failures should be handled.
+        indices : list
+            The index of the node of each result.
+
+        Returns
+        -------
+        results : iterable
+            The result of each task, or a list of results for batches, in the
+            same order as `tasks`. Must be consumed while the worker
+            processes are running.
+        """
+        logger = get_logger(self)
+
+        if self.CPUs and pipeline:
+            def keep(index, model_result):
+                if self.model_results is not None:
+                    self.model_results[indices[index]] = model_result[0]
+
+            outcomes = self.worker_pool.imap_pipeline(self._parallel.evaluate_model,
+                                                      tasks,
+                                                      self.feature_pool,
+                                                      self._parallel.process_model_result,
+                                                      queue_size=self.queue_size,
+                                                      retries=self.retries,
+                                                      callback=keep)
+            return self._handle_failures(outcomes, tasks)
+
+        elif self.CPUs:
+            if fault_tolerant:
+                outcomes = self.worker_pool.imap_tasks(function,
+                                                       tasks,
+                                                       timeout=self.timeout,
+                                                       retries=self.retries,
+                                                       speculative=self.speculative)
+                return self._handle_failures(outcomes, tasks)
+
+            # chunksize = int(np.ceil(len(model_parameters)/self.CPUs))
+            chunksize = 1
+            return self.worker_pool.imap(function, tasks, chunksize)
+
+        if fault_tolerant:
+            if self.timeout is not None or self.speculative:
+                logger.warning("timeout and speculative require multiprocessing (CPUs is not None), "
+                               "and are ignored.")
+
+            outcomes = imap_sequential(function, tasks, retries=self.retries)
+            return self._handle_failures(outcomes, tasks)
+
+        return imap(function, tasks)
+
+
+
+    def _store_results(self, new_results, known_results, indices, nodes,
+                       uncertain_parameters, keys, store=None):
+        """
+        Store each new result as it is evaluated, in `store` if given and
+        otherwise in `known_results`, in the checkpoint file and in the cache.
+        """
+        if self.model.batch:
+            new_results = (result for batch in new_results for result in batch)
+
+        for index, result in zip(indices,
+                                 tqdm(new_results,
+                                      desc="Running model",
+                                      total=len(indices))):
+            result = self._receive(index, result)
+
+            self._store_result(index, result, known_results, nodes,
+                               uncertain_parameters, keys, store)
+
+
+
+    def _store_result(self, index, result, known_results, nodes,
+                      uncertain_parameters, keys, store=None):
+        """
+        Store a result that is already received, in `store` if given and
+        otherwise in `known_results`, in the checkpoint file and in the cache.
+        """
+        if store is not None:
+            store.add(index, result)
+        else:
+            known_results[index] = result
+
+        # Failed evaluations are rerun when resuming
+        if isinstance(result, _FailedResult):
+            return
+
+        if self.checkpoint is not None:
+            self.checkpoint.append(uncertain_parameters, index, nodes.T[index], result)
+
+        if self.cache is not None:
+            self.cache.set(keys[index], result)
+
+
+
+    def _receive(self, index, result):
+        """
+        Read the large arrays of a result from the transport, and move the
+        timings of the evaluation from the result to the profiler.
+        """
+        received = time.time()
+        timings = result.pop(TIMINGS_KEY, None)
+
+        if self.transport is not None:
+            start = time.time()
+            result = self.transport.unpack(result)
+
+            if timings is not None:
+                timings["transport"] = timings.get("transport", 0) + time.time() - start
+
+        if timings is not None and self.profiler is not None:
+            self.profiler.add(index, timings, received=received)
+
+        return result
+
+
+
+    def _handle_failures(self, outcomes, tasks):
+        """
+        Replace the results of evaluations that failed or exceeded the timeout
+        with numpy.nan results, and count them.
+
+        Parameters
+        ----------
+        outcomes : iterable
+            The ``(status, value)`` of each task, as yielded by
+            WorkerPool.imap_tasks.
+        tasks : list
+            The tasks, either model parameters or batches of model parameters.
+
+        Yields
+        ------
+        result : {dict, list}
+            The result of each task, or a list of results for batches.
+
+        Raises
+        ------
+        Exception
+            The exception raised by a failed evaluation, if `on_failure`
+            is "raise".
+        """
+        logger = get_logger(self)
+
+        for task, (status, value) in zip(tasks, outcomes):
+            if status == "ok":
+                yield value
+                continue
+
+            if status == "failed" and self.on_failure == "raise":
+                raise value
+
+            if status == "timeout":
+                self.timeouts += len(task) if self.model.batch else 1
+                logger.warning("An evaluation exceeded the timeout of {} s, "
+                               "the result is set to nan. Parameters: {}".format(self.timeout, task))
+            else:
+                self.failures += len(task) if self.model.batch else 1
+                logger.warning("An evaluation failed with {!r}, "
+                               "the result is set to nan. Parameters: {}".format(value, task))
+
+            if self.model.batch:
+                yield [self.create_failed_result() for parameters in task]
+            else:
+                yield self.create_failed_result()
+
+
+
+    def create_failed_result(self):
+        """
+        Create the result of an evaluation that failed, where the model and
+        each feature is numpy.nan.
+
+        Returns
+        -------
+        result : dict
+            The model and feature results, with numpy.nan as ``"values"`` and
+            ``"time"`` for the model and each feature.
+        """
+        result = _FailedResult()
+
+        result[self.model.name] = {"values": np.nan, "time": np.nan}
+        for feature in self.features.features_to_run:
+            result[feature] = {"values": np.nan, "time": np.nan}
+
+        return result
+
+
+
+    def create_interpolation_time(self, result=None):
+        """
+        Create the time arrays irregular results are resampled onto, from
+        `interpolation_time`.
+
+        Parameters
+        ----------
+        result : {None, dict}, optional
+            The result of the first evaluation, used to derive the time arrays
+            when `interpolation_time` is "auto". Default is None.
+
+        Returns
+        -------
+        interpolation_time : {None, dict}
+            A dictionary with the model/feature name as key and the time array
+            to resample onto as value. None if no resampling should be
+            performed.
+
+        Notes
+        -----
+        Only the model (if ``model.interpolate`` is True and ``model.ignore``
+        is False) and the features in ``features.interpolate`` are resampled.
+        When `interpolation_time` is "auto", features without a valid 1D time
+        array in the first evaluation are interpolated as without resampling.
+        """
+        interpolate = list(self.features.interpolate)
+        if self.model.interpolate and not self.model.ignore:
+            interpolate.append(self.model.name)
+
+        if self.interpolation_time is None:
+            return None
+
+        elif isinstance(self.interpolation_time, dict):
+            return {feature: np.asarray(self.interpolation_time[feature])
+                    for feature in self.interpolation_time if feature in interpolate}
+
+        elif isinstance(self.interpolation_time, six.string_types):
+            if self.interpolation_time != "auto":
+                raise ValueError("interpolation_time {} not supported.".format(self.interpolation_time))
+
+            interpolation_time = {}
+            if result is not None:
+                for feature in interpolate:
+                    if feature not in result:
+                        continue
+
+                    time = result[feature]["time"]
+                    if np.ndim(time) == 1 and np.ndim(result[feature]["values"]) == 1 \
+                            and not contains_nan(time) and not contains_nan(result[feature]["values"]):
+                        interpolation_time[feature] = np.asarray(time)
+
+            return interpolation_time
+
+        else:
+            return {feature: np.asarray(self.interpolation_time) for feature in interpolate}
+
+
+
+    def create_batches(self, model_parameters):
+        """
+        Split the model parameters into batches that are evaluated by a single
+        call to a batch model.
+
+        Parameters
+        ----------
+        model_parameters : list
+            A list where each element is a dictionary with the model parameters
+            for a single evaluation.
+
+        Returns
+        -------
+        batches : list
+            A list of batches, where each batch is a list of at most
+            ``model.batch_size`` model parameters. If ``model.batch_size`` is
+            None, the model parameters are split evenly between the CPUs.
+        """
+        batch_size = self.model.batch_size
+
+        if batch_size is None:
+            batch_size = int(np.ceil(len(model_parameters)/max(self.CPUs or 1, 1)))
+
+        batch_size = max(batch_size, 1)
+
+        batches = []
+        for i in range(0, len(model_parameters), batch_size):
+            batches.append(model_parameters[i:i + batch_size])
+
+        return batches
+
+
+
     def create_model_parameters(self, nodes, uncertain_parameters):
         """
         Combine nodes (values) with the uncertain parameter names to create a
@@ -597,11 +1677,24 @@ class RunModel(ParameterBase):
         if isinstance(uncertain_parameters, six.string_types):
             uncertain_parameters = [uncertain_parameters]
 
-        results = self.evaluate_nodes(nodes, uncertain_parameters)
+        if self.cache is not None:
+            hits, misses = self.cache.hits, self.cache.misses
+
+        results = self.evaluate_nodes(nodes, uncertain_parameters, store=True)
 
         data = self.results_to_data(results)
         data.uncertain_parameters = uncertain_parameters
 
+        if self.cache is not None:
+            data.cache_hits = self.cache.hits - hits
+            data.cache_misses = self.cache.misses - misses
+
+        data.failures = self.failures
+        data.timeouts = self.timeouts
+
+        if self.profiler is not None:
+            data.profiling = self.profiler.table()
+
         return data
 
     # Currently not needed
@@ -3,15 +3,22 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import six
 import numpy as np
 from tqdm import tqdm
-import chaospy as cp
 import types
-from SALib.sample import saltelli
-from SALib.analyze.sobol import first_order, total_order
 
 from .run_model import RunModel
 from .base import ParameterBase
+from .pce_statistics import PCEStatistics, polynomial_coefficients, stochastic_dependent
+from .pce_statistics import evaluate_basis, recurrence_coefficients, basis_multi_indices
+from .pce_statistics import same_polynomial, percentiles
+from .pce_fit import create_polynomial, fit_group
 from ..utils.utility import contains_nan
+from ..utils.spike_matrix import SpikeMatrix, spike_statistics
 from ..utils.logger import get_logger
+from ..utils.lazy_import import lazy_import
+
+cp = lazy_import("chaospy")
+saltelli = lazy_import("SALib.sample.saltelli")
+sobol = lazy_import("SALib.analyze.sobol")
 
 
 class UncertaintyCalculations(ParameterBase):
@@ -69,6 +76,69 @@ class UncertaintyCalculations(ParameterBase):
         Set the threshold for the logging level. Logging messages less severe
         than this level is ignored. If None, no logging to file is performed.
         Default logger level is "info".
+    initializer : {None, callable, list of callables}, optional
+        Warm-up function(s) run once in each worker process when it is
+        started. Each callable must take no arguments. Default is None.
+    maxtasksperchild : {None, int}, optional
+        The number of model evaluations each worker process performs before it
+        is replaced by a fresh worker process. If None, the worker processes
+        live as long as the worker pool. Default is None.
+    cache : {None, EvaluationCache}, optional
+        Cache of previous model and feature evaluations. Evaluations found in
+        the cache are not rerun. If None, no cache is used. Default is None.
+    interpolation_time : {None, "auto", array_like, dict}, optional
+        The time array irregular results are resampled onto, in the worker
+        processes. If None, irregular results are interpolated onto the
+        longest time array after all evaluations are finished. If "auto", the
+        time arrays of the first evaluation are used. If array_like, the same
+        time array is used for the model and all interpolated features. If
+        dict, the model/feature name is key and the time array is value.
+        Default is None.
+    interpolation_method : {"cubic", "linear"}, optional
+        The type of spline used to interpolate irregular results.
+        Default is "cubic".
+    transport : {None, ResultTransport}, optional
+        Transport used to send large result arrays from the worker processes
+        through memory-mapped scratch files instead of pickling them.
+        If None, the results are sent back as usual. Default is None.
+    timeout : {None, float}, optional
+        The maximum wall-clock time in seconds for a single model evaluation.
+        The worker process of an evaluation that exceeds the timeout is
+        killed and replaced, and the evaluation is given numpy.nan as result.
+        Requires multiprocessing (CPUs is not None). If None, there is no
+        timeout. Default is None.
+    retries : int, optional
+        The number of times an evaluation that raises an exception or
+        exceeds the timeout is retried. Default is 0.
+    on_failure : {"raise", "nan"}, optional
+        What to do with evaluations that still raise an exception after all
+        retries. If "raise", the exception is raised. If "nan", the
+        evaluation is given numpy.nan as result, so it can be handled by
+        `allow_incomplete`. Default is "raise".
+    speculative : bool, optional
+        If True, evaluations that run for more than twice the median time of
+        the finished evaluations are started once more on idle worker
+        processes when there are no more evaluations waiting, and the
+        result that finishes first is used. Default is False.
+    profile : bool, optional
+        If True, the time spent in each stage of each evaluation is recorded
+        in a profiling table, and a summary of the most costly stages is
+        logged after the evaluations. Default is False.
+    feature_CPUs : {None, int, "max"}, optional
+        The number of CPUs used to calculate the features. If not None, the
+        model and the features are calculated in a two-stage pipeline, where
+        the model is run by `CPUs` worker processes and the features are
+        calculated from the model output by `feature_CPUs` other worker
+        processes at the same time. Default is None.
+    queue_size : {None, int}, optional
+        The largest number of model outputs that wait for the features to be
+        calculated in the two-stage pipeline. If None, `feature_CPUs` is used.
+        Default is None.
+    memory_budget : int, optional
+        The largest number of bytes used at a time to hold evaluations of the
+        polynomial chaos expansions, and of their orthogonal basis, when
+        calculating percentiles.
+        Default is 2**28 (256 MiB).
 
     Attributes
     ----------
@@ -80,6 +150,15 @@ class UncertaintyCalculations(ParameterBase):
         The features of the model to perform uncertainty quantification on.
     runmodel : RunModel
         Runmodel object responsible for evaluating the model and calculating features.
+    memory_budget : int
+        The largest number of bytes used at a time to hold evaluations of the
+        polynomial chaos expansions, and of their orthogonal basis, when
+        calculating percentiles.
+
+    Notes
+    -----
+    Used as a context manager, the same worker processes are used for every
+    model evaluation performed inside the ``with`` block.
 
     See Also
     --------
@@ -97,14 +176,43 @@ class UncertaintyCalculations(ParameterBase):
                  create_PCE_custom=None,
                  custom_uncertainty_quantification=None,
                  CPUs="max",
-                 logger_level="info"):
-
+                 logger_level="info",
+                 initializer=None,
+                 maxtasksperchild=None,
+                 cache=None,
+                 interpolation_time=None,
+                 interpolation_method="cubic",
+                 transport=None,
+                 timeout=None,
+                 retries=0,
+                 on_failure="raise",
+                 speculative=False,
+                 profile=False,
+                 feature_CPUs=None,
+                 queue_size=None,
+                 memory_budget=2**28):
+
+
+        self.memory_budget = memory_budget
 
         self.runmodel = RunModel(model=model,
                                  parameters=parameters,
                                  features=features,
                                  logger_level=logger_level,
-                                 CPUs=CPUs)
+                                 CPUs=CPUs,
+                                 initializer=initializer,
+                                 maxtasksperchild=maxtasksperchild,
+                                 cache=cache,
+                                 interpolation_time=interpolation_time,
+                                 interpolation_method=interpolation_method,
+                                 transport=transport,
+                                 timeout=timeout,
+                                 retries=retries,
+                                 on_failure=on_failure,
+                                 speculative=speculative,
+                                 profile=profile,
+                                 feature_CPUs=feature_CPUs,
+                                 queue_size=queue_size)
 
 
         if create_PCE_custom is not None:
@@ -119,6 +227,15 @@ class UncertaintyCalculations(ParameterBase):
                                                       logger_level=logger_level)
 
 
+    def __enter__(self):
+        self.runmodel.__enter__()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.runmodel.__exit__(exc_type, exc_value, traceback)
+
+
     @ParameterBase.features.setter
     def features(self, new_features):
         ParameterBase.features.fset(self, new_features)
@@ -374,6 +491,140 @@ class UncertaintyCalculations(ParameterBase):
 
 
 
+    def fit_PCE(self, data, P, nodes, weights=None, allow_incomplete=True, retall=False):
+        """
+        Find the polynomial approximation of the model and each feature from
+        their evaluations at the nodes, using point collocation or
+        pseudo-spectral projection.
+
+        Parameters
+        ----------
+        data : Data
+            A Data object with evaluations for the model and each feature.
+        P : chaospy.Poly
+            The orthogonal polynomial basis.
+        nodes : array_like
+            The nodes used to evaluate the model.
+        weights : {None, array_like}, optional
+            The quadrature weights of each node. If None, point collocation
+            with Tikhonov regularization is used (an approximation of
+            ``chaospy.fit_regression(..., rule="T")``, see PCEFit). Otherwise
+            pseudo-spectral projection is used (same as
+            ``chaospy.fit_quadrature``). Default is None.
+        allow_incomplete : bool, optional
+            If the polynomial approximation should be performed for features or
+            models with incomplete evaluations.
+            Default is True.
+        retall : bool, optional
+            If the relative leave-one-out error of each polynomial
+            approximation should also be returned. Only available for point
+            collocation. Default is False.
+
+        Returns
+        -------
+        U_hat : dict
+            A dictionary containing the polynomial approximations for the
+            model and each feature as chaospy.Poly objects.
+        errors : dict
+            A dictionary containing the relative leave-one-out error of the
+            polynomial approximation of the model and each feature. Only
+            returned if `retall` is True.
+
+        Raises
+        ------
+        ValueError
+            If `retall` is True and `weights` is given.
+
+        Notes
+        -----
+        Features are grouped by which nodes give results. For each group the
+        basis is evaluated at the nodes, and factorized, once, and the
+        coefficients of all features and time points in the group are found
+        as one system with many right-hand sides. The groups are fitted in
+        the main process, without starting the worker processes of the model.
+        Features that are not fitted are added to ``data.incomplete`` if
+        they have missing values. The coefficients of each polynomial
+        approximation in the basis `P` are stored in
+        ``data["model/features"].pce_coefficients``, so the statistical
+        metrics can be calculated from them by `analyse_PCE`.
+
+        See also
+        --------
+        uncertainpy.core.pce_fit.PCEFit
+        """
+        logger = get_logger(self)
+
+        if retall and weights is not None:
+            raise ValueError("The leave-one-out error is only available for point collocation")
+
+        nodes = np.asarray(nodes)
+        if weights is not None:
+            weights = np.asarray(weights)
+
+        # Features that give results for the same nodes, with the mask of
+        # the nodes as key
+        groups = {}
+        fitted = []
+
+        for feature in data:
+            if feature == self.model.name and self.model.ignore:
+                continue
+
+            masked_evaluations, mask = self.create_masked_evaluations(data, feature)
+
+            if (np.all(mask) or allow_incomplete) and sum(mask) > 0:
+                key = mask.tobytes()
+                if key not in groups:
+                    groups[key] = (mask, [], [])
+
+                groups[key][1].append(feature)
+                groups[key][2].append(masked_evaluations)
+
+                fitted.append(feature)
+            elif not allow_incomplete:
+                logger.warning("{}: not all parameter combinations give results.".format(feature) +
+                               " No uncertainty quantification is performed since allow_incomplete=False")
+
+            else:
+                logger.warning("{}: not all parameter combinations give results.".format(feature))
+
+            if not np.all(mask):
+                data.incomplete.append(feature)
+
+        tasks = []
+        for mask, features, evaluations in groups.values():
+            masked_nodes = nodes[..., mask]
+            masked_weights = None if weights is None else weights[..., mask]
+
+            tasks.append((evaluate_basis(P, masked_nodes), masked_weights, evaluations, retall))
+
+        results = [fit_group(task) for task in tasks]
+
+        coefficients = {}
+        errors = {}
+        for (mask, features, evaluations), (result, error) in zip(groups.values(), results):
+            coefficients.update(zip(features, result))
+
+            if retall:
+                errors.update(zip(features, error))
+
+        U_hat = {}
+        for feature in tqdm(fitted,
+                            desc="Calculating PC for each feature",
+                            total=len(fitted)):
+            U_hat[feature] = create_polynomial(P, coefficients[feature])
+
+            # Kept so the statistics can be calculated from the coefficients
+            # in the orthogonal basis, see create_PCE_statistics
+            data[feature].pce_coefficients = coefficients[feature]
+
+        if retall:
+            return U_hat, errors
+
+        return U_hat
+
+
+
 
 
     def create_PCE_spectral(self,
@@ -480,32 +731,8 @@ class UncertaintyCalculations(ParameterBase):
 
         data.method = "polynomial chaos expansion with the pseudo-spectral method. polynomial_order={}, quadrature_order={}".format(polynomial_order, quadrature_order)
 
-        logger = get_logger(self)
-
-        U_hat = {}
-        # Calculate PC for each feature
-        for feature in tqdm(data,
-                            desc="Calculating PC for each feature",
-                            total=len(data)):
-            if feature == self.model.name and self.model.ignore:
-                continue
-
-            masked_evaluations, mask, masked_nodes, masked_weights = \
-                self.create_masked_nodes_weights(data, feature, nodes, weights)
-
-
-            if (np.all(mask) or allow_incomplete) and sum(mask) > 0:
-                U_hat[feature] = cp.fit_quadrature(P, masked_nodes,
-                                                   masked_weights, masked_evaluations)
-            elif not allow_incomplete:
-                logger.warning("{}: not all parameter combinations give results.".format(feature) +
-                               " No uncertainty quantification is performed since allow_incomplete=False")
-
-            else:
-                logger.warning("{}: not all parameter combinations give results.".format(feature))
-
-            if not np.all(mask):
-                data.incomplete.append(feature)
+        U_hat = self.fit_PCE(data, P, nodes, weights=weights,
+                             allow_incomplete=allow_incomplete)
 
         return U_hat, distribution, data
 
@@ -610,31 +837,193 @@ class UncertaintyCalculations(ParameterBase):
 
         data.method = "polynomial chaos expansion with point collocation. polynomial_order={}, nr_collocation_nodes={}".format(polynomial_order, nr_collocation_nodes)
 
+        U_hat = self.fit_PCE(data, P, nodes, allow_incomplete=allow_incomplete)
+
+        return U_hat, distribution, data
+
+
+    def create_PCE_collocation_adaptive(self,
+                                        uncertain_parameters=None,
+                                        polynomial_order=4,
+                                        tolerance=1e-3,
+                                        allow_incomplete=True):
+        """
+        Create the polynomial approximation `U_hat` using point collocation,
+        where the polynomial order is increased until the leave-one-out error
+        of the approximation is below a tolerance.
+
+        Parameters
+        ----------
+        uncertain_parameters : {None, str, list}, optional
+            The uncertain parameter(s) to use when creating the polynomial
+            approximation. If None, all uncertain parameters are used.
+            Default is None.
+        polynomial_order : int, optional
+            The highest polynomial order of the polynomial approximation.
+            Default is 4.
+        tolerance : float, optional
+            The relative leave-one-out error the polynomial approximation of
+            each feature must be below.
+            Default is 1e-3.
+        allow_incomplete : bool, optional
+            If the polynomial approximation should be performed for features or
+            models with incomplete evaluations.
+            Default is True.
+
+        Returns
+        -------
+        U_hat : dict
+            A dictionary containing the polynomial approximations for the
+            model and each feature as chaospy.Poly objects.
+        distribution : chaospy.Dist
+            The multivariate distribution for the uncertain parameters.
+        data : Data
+            A data object containing the values from the model evaluation
+            and feature calculations.
+
+        Raises
+        ------
+        ValueError
+            If a common multivariate distribution is given in
+            Parameters.distribution and not all uncertain parameters are used.
+
+        Notes
+        -----
+        The returned `data` should contain (but not necessarily) the following:
+
+            1. ``data["model/features"].evaluations``
+            2. ``data["model/features"].time``
+            3. ``data["model/features"].labels``
+            4. ``data["model/features"].pce_order``
+            5. ``data["model/features"].pce_error``
+            6. ``data.model_name``
+            7. ``data.incomplete``
+            8. ``data.method``
+            9. ``data.errored``
+
+        For each polynomial order, starting at 1, the approximation is found
+        by point collocation with 2* number of expansion factors + 2
+        collocation nodes. The nodes are the first nodes of a single Halton
+        sequence from the `distribution`, so the nodes of a lower order are
+        reused by all higher orders, and the model is only evaluated for the
+        new nodes. The relative leave-one-out error of the approximation of
+        each feature is found without refitting (see
+        uncertainpy.core.PCEFit.leave_one_out). A feature keeps the
+        approximation of the first order where the error is below
+        `tolerance`, and the order is increased until this is true for all
+        features, or `polynomial_order` is reached. The order and error of
+        each feature is stored in `data`.
+
+        See also
+        --------
+        uncertainpy.Data
+        uncertainpy.Parameters
+        uncertainpy.core.PCEFit.leave_one_out
+        """
         logger = get_logger(self)
 
+        uncertain_parameters = self.convert_uncertain_parameters(uncertain_parameters)
+
+        distribution = self.create_distribution(uncertain_parameters=uncertain_parameters)
+
+        bases = [cp.orth_ttr(order, distribution) for order in range(1, polynomial_order + 1)]
+        nr_collocation_nodes = [2*len(P) + 2 for P in bases]
+
+        # Nested nodes, the nodes of each order are the first nodes of the
+        # sequence
+        nodes = distribution.sample(nr_collocation_nodes[-1], "H")
+
+        results = []
         U_hat = {}
-        # Calculate PC for each feature
-        for feature in tqdm(data,
-                            desc="Calculating PC for each feature",
-                            total=len(data)):
-            if feature == self.model.name and self.model.ignore:
-                continue
+        coefficients = {}
+        errors = {}
+        orders = {}
+        converged = set()
 
-            masked_evaluations, mask, masked_nodes = self.create_masked_nodes(data, feature, nodes)
+        failures = 0
+        timeouts = 0
+        cache_hits = 0
+        cache_misses = 0
+        profiling = []
 
-            if (np.all(mask) or allow_incomplete) and sum(mask) > 0:
-                U_hat[feature] = cp.fit_regression(P, masked_nodes,
-                                                   masked_evaluations, rule="T")
-            elif not allow_incomplete:
-                logger.warning("{}: not all parameter combinations give results.".format(feature) +
-                               " No uncertainty quantification is performed since allow_incomplete=False")
+        # The time arrays derived from the first evaluation are kept for the
+        # evaluations of the higher orders
+        interpolation_time = self.runmodel.interpolation_time
 
-            else:
-                logger.warning("{}: not all parameter combinations give results.".format(feature))
+        try:
+            for order, P, nr_nodes in zip(range(1, polynomial_order + 1), bases, nr_collocation_nodes):
+                new_nodes = nodes[..., len(results):nr_nodes]
 
+                if self.runmodel.cache is not None:
+                    hits, misses = self.runmodel.cache.hits, self.runmodel.cache.misses
 
-            if not np.all(mask):
-                data.incomplete.append(feature)
+                results.extend(self.runmodel.evaluate_nodes(new_nodes, uncertain_parameters))
+
+                failures += self.runmodel.failures
+                timeouts += self.runmodel.timeouts
+
+                if self.runmodel.cache is not None:
+                    cache_hits += self.runmodel.cache.hits - hits
+                    cache_misses += self.runmodel.cache.misses - misses
+
+                if self.runmodel.profiler is not None:
+                    profiling.append((new_nodes.shape[-1], self.runmodel.profiler.table()))
+
+                if isinstance(interpolation_time, six.string_types) and results:
+                    self.runmodel.interpolation_time = self.runmodel.create_interpolation_time(results[0])
+
+                data = self.runmodel.results_to_data(results)
+                data.uncertain_parameters = uncertain_parameters
+
+                U_hat_order, errors_order = self.fit_PCE(data,
+                                                         P,
+                                                         nodes[..., :nr_nodes],
+                                                         allow_incomplete=allow_incomplete,
+                                                         retall=True)
+
+                for feature in U_hat_order:
+                    if feature in converged:
+                        continue
+
+                    U_hat[feature] = U_hat_order[feature]
+                    coefficients[feature] = data[feature].pce_coefficients
+                    errors[feature] = errors_order[feature]
+                    orders[feature] = order
+
+                    if errors[feature] <= tolerance:
+                        converged.add(feature)
+
+                if all(feature in converged for feature in U_hat_order):
+                    break
+
+        finally:
+            self.runmodel.interpolation_time = interpolation_time
+
+        for feature in U_hat:
+            if feature not in converged:
+                logger.warning("{}: leave-one-out error {:g} is above the tolerance {:g} ".format(feature,
+                                                                                                    errors[feature],
+                                                                                                    tolerance) +
+                               "with the highest polynomial_order={}".format(polynomial_order))
+
+            data[feature].pce_coefficients = coefficients[feature]
+            data[feature].pce_order = orders[feature]
+            data[feature].pce_error = errors[feature]
+
+        if self.runmodel.cache is not None:
+            data.cache_hits = cache_hits
+            data.cache_misses = cache_misses
+
+        data.failures = failures
+        data.timeouts = timeouts
+
+        if profiling:
+            stages = set(stage for nr_evaluations, table in profiling for stage in table)
+            data.profiling = {stage: np.concatenate([table.get(stage, np.full(nr_evaluations, np.nan))
+                                                     for nr_evaluations, table in profiling])
+                              for stage in stages}
+
+        data.method = "polynomial chaos expansion with adaptive point collocation. polynomial_order={}, tolerance={}, nr_collocation_nodes={}".format(max(orders.values()) if orders else 1, tolerance, len(results))
 
         return U_hat, distribution, data
 
@@ -761,45 +1150,10 @@ class UncertaintyCalculations(ParameterBase):
 
         data.method = "polynomial chaos expansion with the pseudo-spectral method and the Rosenblatt transformation. polynomial_order={}, quadrature_order={}".format(polynomial_order, quadrature_order)
 
-        logger = get_logger(self)
-
-        U_hat = {}
-        # Calculate PC for each feature
-        for feature in tqdm(data,
-                            desc="Calculating PC for each feature",
-                            total=len(data)):
-
-            if feature == self.model.name and self.model.ignore:
-                continue
-
-            # The tutorial version
-            # masked_nodes, masked_values, mask, masked_weights = self.create_mask(data,
-            #                                                           nodes_R,
-            #                                                           feature,
-            #                                                           weights)
-
-            # The version thats seems to be working
-            masked_evaluations, mask, masked_nodes, masked_weights = \
-                self.create_masked_nodes_weights(data,
-                                                 feature,
-                                                 nodes_R,
-                                                 weights_R)
-
-            if (np.all(mask) or allow_incomplete) and sum(mask) > 0:
-                U_hat[feature] = cp.fit_quadrature(P,
-                                                masked_nodes,
-                                                masked_weights,
-                                                masked_evaluations)
-            elif not allow_incomplete:
-                logger.warning("{}: not all parameter combinations give results.".format(feature) +
-                               " No uncertainty quantification is performed since allow_incomplete=False")
-
-            else:
-                logger.warning("{}: not all parameter combinations give results.".format(feature))
-
-
-            if not np.all(mask):
-                data.incomplete.append(feature)
+        # The polynomial approximation is created in the transformed
+        # space, using the untransformed nodes and weights
+        U_hat = self.fit_PCE(data, P, nodes_R, weights=weights_R,
+                             allow_incomplete=allow_incomplete)
 
         return U_hat, dist_R, data
 
@@ -917,37 +1271,12 @@ class UncertaintyCalculations(ParameterBase):
 
         data.method = "polynomial chaos expansion with point collocation and the Rosenblatt transformation. polynomial_order={}, nr_collocation_nodes={}".format(polynomial_order, nr_collocation_nodes)
 
-        logger = get_logger(self)
-
-        U_hat = {}
-        # Calculate PC for each feature
-        for feature in tqdm(data,
-                            desc="Calculating PC for each feature",
-                            total=len(data)):
-            if feature == self.model.name and self.model.ignore:
-                continue
-
-            masked_evaluations, mask, masked_nodes = self.create_masked_nodes(data, feature, nodes_R)
-
-            if (np.all(mask) or allow_incomplete) and sum(mask) > 0:
-                U_hat[feature] = cp.fit_regression(P,
-                                                masked_nodes,
-                                                masked_evaluations,
-                                                rule="T")
-            elif not allow_incomplete:
-                logger.warning("{}: not all parameter combinations give results.".format(feature) +
-                               " No uncertainty quantification is performed since allow_incomplete=False")
-
-            else:
-                logger.warning("{}: not all parameter combinations give results.".format(feature))
-
-            if not np.all(mask):
-                data.incomplete.append(feature)
+        U_hat = self.fit_PCE(data, P, nodes_R, allow_incomplete=allow_incomplete)
 
         return U_hat, dist_R, data
 
 
-    def analyse_PCE(self, U_hat, distribution, data, nr_samples=10**4):
+    def analyse_PCE(self, U_hat, distribution, data, nr_samples=10**4, surrogate=True):
         """
         Calculate the statistical metrics from the polynomial chaos
         approximation.
@@ -966,6 +1295,12 @@ class UncertaintyCalculations(ParameterBase):
             Number of samples for the Monte Carlo sampling of the polynomial
             chaos approximation.
             Default is 10**4.
+        surrogate : bool, optional
+            If the coefficients of the polynomial chaos expansions should be
+            stored in `data`, so they can be used as a surrogate model (see
+            uncertainpy.Surrogate). Must be False if `U_hat` is not a function
+            of the uncertain parameters themselves, such as when the Rosenblatt
+            transformation is used. Default is True.
 
         Returns
         -------
@@ -994,44 +1329,203 @@ class UncertaintyCalculations(ParameterBase):
             13. ``data["model/features"].sobol_total``, if more than 1 parameter
             14. ``data["model/features"].sobol_first_average``, if more than 1 parameter
             15. ``data["model/features"].sobol_total_average``, if more than 1 parameter
+            16. ``data["model/features"].sobol_second``, if more than 1 parameter
+            17. ``data["model/features"].pce_coefficients``, if `surrogate`
+            18. ``data["model/features"].pce_multi_indices``, if `surrogate`
+            19. ``data.pce_recurrence``, if `surrogate`
+
+        The percentiles are calculated from the same `nr_samples` samples for
+        all features. For independent uncertain parameters the orthogonal
+        basis of each polynomial order is evaluated at the samples for all
+        features of that order together, and the values of the features and
+        of the basis are calculated in chunks that each use at most
+        `memory_budget` bytes (see
+        uncertainpy.core.pce_statistics.percentiles).
 
         See also
         --------
         uncertainpy.Data
         """
 
+        logger = get_logger(self)
+
         if len(data.uncertain_parameters) == 1:
-            logger = get_logger(self)
             logger.info("Only 1 uncertain parameter. Sensitivities are not calculated")
 
-        U_mc = {}
+        # Orthogonal basis of each polynomial order, shared between features
+        bases = {}
+
+        # The same samples are used for the percentiles of all features
+        samples = None
+
+        # The features with statistics from the orthogonal basis of each
+        # polynomial order
+        orders = {}
+
         for feature in tqdm(data,
                             desc="Calculating statistics from PCE",
                             total=len(data)):
             if feature in U_hat:
-                data[feature].mean = cp.E(U_hat[feature], distribution)
-                data[feature].variance = cp.Var(U_hat[feature], distribution)
+                if samples is None:
+                    samples = distribution.sample(nr_samples, "M")
+
+                statistics = self.create_PCE_statistics(U_hat[feature],
+                                                        distribution,
+                                                        bases,
+                                                        coefficients=data[feature].pce_coefficients)
 
-                samples = distribution.sample(nr_samples, "M")
+                if statistics is None:
+                    data[feature].mean = cp.E(U_hat[feature], distribution)
+                    data[feature].variance = cp.Var(U_hat[feature], distribution)
+                else:
+                    data[feature].mean = statistics.mean
+                    data[feature].variance = statistics.variance
 
                 if len(data.uncertain_parameters) > 1:
-                    U_mc[feature] = U_hat[feature](*samples)
+                    if statistics is None:
+                        data[feature].sobol_first = cp.Sens_m(U_hat[feature], distribution)
+                        data[feature].sobol_second = cp.Sens_m2(U_hat[feature], distribution)
+                        data[feature].sobol_total = cp.Sens_t(U_hat[feature], distribution)
+                    else:
+                        data[feature].sobol_first = statistics.sobol_first()
+                        data[feature].sobol_second = statistics.sobol_second()
+                        data[feature].sobol_total = statistics.sobol_total()
 
-                    data[feature].sobol_first = cp.Sens_m(U_hat[feature], distribution)
-                    data[feature].sobol_total = cp.Sens_t(U_hat[feature], distribution)
                     data = self.average_sensitivity(data, sensitivity="sobol_first")
                     data = self.average_sensitivity(data, sensitivity="sobol_total")
 
+                if statistics is None:
+                    if len(data.uncertain_parameters) > 1:
+                        U_mc = U_hat[feature](*samples)
+                    else:
+                        U_mc = U_hat[feature](samples)
+
+                    data[feature].percentile_5, data[feature].percentile_95 = np.percentile(U_mc, [5, 95], -1)
+
                 else:
-                    U_mc[feature] = U_hat[feature](samples)
+                    # The total order of the basis
+                    order = int(np.max(np.sum(statistics.multi_indices, axis=1)))
+                    orders.setdefault(order, []).append((feature, statistics))
 
-                data[feature].percentile_5 = np.percentile(U_mc[feature], 5, -1)
-                data[feature].percentile_95 = np.percentile(U_mc[feature], 95, -1)
+                if surrogate and statistics is not None:
+                    data[feature].pce_coefficients = statistics.coefficients
+                    data[feature].pce_multi_indices = statistics.multi_indices
+                else:
+                    data[feature].pce_coefficients = None
+                    data[feature].pce_multi_indices = None
+
+        # The basis of each order is evaluated at the samples for all features
+        # with an expansion of that order at the same time
+        for order, features in orders.items():
+            results = percentiles([5, 95],
+                                  [statistics for feature, statistics in features],
+                                  bases[order][0],
+                                  samples,
+                                  memory_budget=self.memory_budget)
+
+            for (feature, statistics), result in zip(features, results):
+                data[feature].percentile_5 = result[0]
+                data[feature].percentile_95 = result[1]
+
+        # The orthogonal polynomials of each uncertain parameter, up to the
+        # highest order used by any feature
+        if surrogate and bases:
+            alpha, beta = recurrence_coefficients(bases[max(bases)][0], len(distribution))
+            data.pce_recurrence = {"alpha": alpha, "beta": beta}
 
         return data
 
 
 
+    def create_PCE_statistics(self, U_hat, distribution, bases=None, coefficients=None):
+        """
+        Find the coefficients of a polynomial chaos expansion in an orthogonal
+        basis, which the statistical metrics are calculated from.
+
+        Parameters
+        ----------
+        U_hat : chaospy.Poly
+            The polynomial chaos expansion of the model or a feature.
+        distribution : chaospy.Dist
+            The multivariate distribution for the uncertain parameters.
+        bases : {None, dict}, optional
+            Orthogonal bases that are already created, with the polynomial
+            order as key and ``(basis, norms)`` as value. New bases are added
+            to the dictionary. Default is None.
+        coefficients : {None, array}, optional
+            The coefficients of `U_hat` in the orthogonal basis of
+            `distribution`, as found by `fit_PCE`. Default is None.
+
+        Returns
+        -------
+        statistics : {PCEStatistics, None}
+            The statistics of the polynomial chaos expansion, or None if the
+            uncertain parameters are dependent or the polynomial can not be
+            written in an orthogonal basis.
+
+        Notes
+        -----
+        If `coefficients` are given and `U_hat` is the expansion with these
+        coefficients in the ``chaospy.orth_ttr`` basis of `distribution`, the
+        statistics are calculated from `coefficients` directly. Otherwise, for
+        example for a `U_hat` from a custom method, the coefficients are found
+        from the monomial coefficients of `U_hat` (see
+        PCEStatistics.from_polynomial), which is less accurate for high
+        polynomial orders.
+
+        See also
+        --------
+        uncertainpy.core.PCEStatistics
+        """
+        logger = get_logger(self)
+
+        if bases is None:
+            bases = {}
+
+        try:
+            if stochastic_dependent(distribution):
+                logger.debug("Dependent uncertain parameters, the statistics are calculated by chaospy")
+                return None
+
+            dimensions = len(distribution)
+
+            if coefficients is not None:
+                coefficients = np.asarray(coefficients, dtype=float)
+
+                # The total order of a basis with this number of polynomials
+                order = 0
+                nr_polynomials = 1
+                while nr_polynomials < len(coefficients):
+                    order += 1
+                    nr_polynomials = nr_polynomials*(order + dimensions)//order
+
+                if order not in bases:
+                    bases[order] = cp.orth_ttr(order, distribution, retall=True)
+
+                basis, norms = bases[order]
+
+                if len(basis) == len(coefficients) \
+                        and same_polynomial(U_hat, create_polynomial(basis, coefficients), dimensions):
+                    return PCEStatistics(coefficients, basis_multi_indices(basis, dimensions), norms)
+
+                logger.debug("U_hat does not have the given coefficients in the orthogonal basis")
+
+            exponents, coefficients = polynomial_coefficients(U_hat, dimensions)
+            order = int(exponents.sum(axis=1).max()) if len(exponents) > 0 else 0
+
+            if order not in bases:
+                bases[order] = cp.orth_ttr(order, distribution, retall=True)
+
+            basis, norms = bases[order]
+
+            return PCEStatistics.from_polynomial(U_hat, distribution, basis=basis, norms=norms)
+
+        except (ValueError, np.linalg.LinAlgError) as error:
+            logger.debug("The statistics are calculated by chaospy: {}".format(error))
+            return None
+
+
+
     @property
     def create_PCE_custom(self, uncertain_parameters=None, **kwargs):
         """
@@ -1175,6 +1669,7 @@ class UncertaintyCalculations(ParameterBase):
                          nr_pc_mc_samples=10**4,
                          allow_incomplete=True,
                          seed=None,
+                         tolerance=None,
                          **custom_kwargs):
         """
         Perform an uncertainty quantification and sensitivity analysis
@@ -1218,6 +1713,14 @@ class UncertaintyCalculations(ParameterBase):
             Default is True.
         seed : int, optional
             Set a random seed. If None, no seed is set. Default is None.
+        tolerance : {None, float}, optional
+            If given, the polynomial order is chosen adaptively for each
+            feature with point collocation, as the lowest order where the
+            relative leave-one-out error is below `tolerance`, up to
+            `polynomial_order`. The nodes of the lower orders are reused by
+            the higher orders. `nr_collocation_nodes` is ignored.
+            Only available for point collocation without the Rosenblatt
+            transformation. Default is None.
 
         Returns
         -------
@@ -1232,6 +1735,9 @@ class UncertaintyCalculations(ParameterBase):
             Parameters.distribution and not all uncertain parameters are used.
         ValueError
             If `method` not one of "collocation", "spectral" or "custom".
+        ValueError
+            If `tolerance` is given and `method` is not "collocation", or the
+            Rosenblatt transformation is used.
         NotImplementedError
             If "custom" is chosen and have not been implemented.
 
@@ -1320,9 +1826,18 @@ class UncertaintyCalculations(ParameterBase):
             if distribution.dependent():
                 raise ValueError('Dependent parameters require using the Rosenblatt transformation. Set rosenblatt="auto" or rosenblatt=True')
 
+        if tolerance is not None and (method != "collocation" or rosenblatt):
+            raise ValueError("tolerance is only available for point collocation without the Rosenblatt transformation")
+
 
         if method == "collocation":
-            if rosenblatt:
+            if tolerance is not None:
+                U_hat, distribution, data = \
+                    self.create_PCE_collocation_adaptive(uncertain_parameters=uncertain_parameters,
+                                                         polynomial_order=polynomial_order,
+                                                         tolerance=tolerance,
+                                                         allow_incomplete=allow_incomplete)
+            elif rosenblatt:
                 U_hat, distribution, data = \
                     self.create_PCE_collocation_rosenblatt(uncertain_parameters=uncertain_parameters,
                                                            polynomial_order=polynomial_order,
@@ -1362,7 +1877,11 @@ class UncertaintyCalculations(ParameterBase):
         else:
             raise ValueError("No polynomial chaos method with name {}".format(method))
 
-        data = self.analyse_PCE(U_hat, distribution, data, nr_samples=nr_pc_mc_samples)
+        # The expansions are created in a transformed space with the
+        # Rosenblatt transformation, and can not be used as a surrogate
+        data = self.analyse_PCE(U_hat, distribution, data,
+                                nr_samples=nr_pc_mc_samples,
+                                surrogate=not rosenblatt)
 
         data.seed = seed
 
@@ -1493,22 +2012,35 @@ class UncertaintyCalculations(ParameterBase):
                 continue
 
             # Only use A to calculate the mean and variance
-            A, B, AB = self.separate_output_values(data[feature].evaluations,
-                                                   len(uncertain_parameters),
-                                                   nr_sobol_samples)
+            sparse = any(isinstance(evaluation, SpikeMatrix) for evaluation in data[feature].evaluations)
+            if sparse:
+                # Keep sparse evaluations sparse, A and B are every
+                # (len(uncertain_parameters) + 2)th evaluation
+                step = len(uncertain_parameters) + 2
+                independent_evaluations = list(data[feature].evaluations[0::step]) \
+                                          + list(data[feature].evaluations[(step - 1)::step])
+            else:
+                A, B, AB = self.separate_output_values(data[feature].evaluations,
+                                                       len(uncertain_parameters),
+                                                       nr_sobol_samples)
 
-            independent_evaluations = np.concatenate([A, B])
+                independent_evaluations = np.concatenate([A, B])
 
             masked_evaluations, mask = self.create_mask(independent_evaluations)
 
             logger = get_logger(self)
 
             if (np.all(mask) or allow_incomplete) and sum(mask) > 0:
-                data[feature].mean = np.mean(masked_evaluations, 0)
-                data[feature].variance = np.var(masked_evaluations, 0)
+                if all(isinstance(evaluation, SpikeMatrix) for evaluation in masked_evaluations):
+                    data[feature].mean, data[feature].variance, \
+                        data[feature].percentile_5, data[feature].percentile_95 = \
+                        spike_statistics(masked_evaluations)
+                else:
+                    data[feature].mean = np.mean(masked_evaluations, 0)
+                    data[feature].variance = np.var(masked_evaluations, 0)
 
-                data[feature].percentile_5 = np.percentile(masked_evaluations, 5, 0)
-                data[feature].percentile_95 = np.percentile(masked_evaluations, 95, 0)
+                    data[feature].percentile_5 = np.percentile(masked_evaluations, 5, 0)
+                    data[feature].percentile_95 = np.percentile(masked_evaluations, 95, 0)
 
                 if len(data.uncertain_parameters) > 1:
                     # Results cannot be removed when calculating the sensitivity.
@@ -1628,8 +2160,8 @@ class UncertaintyCalculations(ParameterBase):
         A, B, AB = self.separate_output_values(evaluations, nr_uncertain_parameters, nr_samples)
 
         for i in range(nr_uncertain_parameters):
-            sobol_first[i] = first_order(A, AB[:, i], B)
-            sobol_total[i] = total_order(A, AB[:, i], B)
+            sobol_first[i] = sobol.first_order(A, AB[:, i], B)
+            sobol_total[i] = sobol.total_order(A, AB[:, i], B)
 
         return sobol_first, sobol_total
 
@@ -0,0 +1,732 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import time
+import signal
+import itertools
+import collections
+
+import numpy as np
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+# Queue the worker processes report which task they start on
+_started = None
+
+
+def _run_initializers(initializers, started=None):
+    """
+    Run each initializer once in a newly started worker process.
+
+    Parameters
+    ----------
+    initializers : list
+        A list of callables that take no arguments.
+    started : {None, multiprocess.Queue}, optional
+        Queue the worker process reports the tasks it starts on to.
+    """
+    global _started
+    _started = started
+
+    for initializer in initializers:
+        initializer()
+
+
+
+def _run_task(arguments):
+    """
+    Report that a task is started, together with the process id of the
+    worker process, and run it.
+
+    Parameters
+    ----------
+    arguments : tuple
+        A tuple ``(function, task_id, argument)``.
+
+    Returns
+    -------
+    result
+        The result of ``function(argument)``.
+    """
+    function, task_id, argument = arguments
+
+    if _started is not None:
+        _started.put((task_id, os.getpid()))
+
+    return function(argument)
+
+
+
+def imap_sequential(function, iterable, retries=0):
+    """
+    Apply `function` to each element in `iterable` in the current process,
+    retrying each element that fails.
+
+    Parameters
+    ----------
+    function : callable
+        The function to apply.
+    iterable : iterable
+        The arguments to apply `function` to.
+    retries : int, optional
+        The number of times an element that raises an exception is retried.
+        Default is 0.
+
+    Yields
+    ------
+    status : {"ok", "failed"}
+        If `function` succeeded or failed for the element.
+    value
+        The result, or the exception raised by the last attempt.
+    """
+    for argument in iterable:
+        for attempt in range(retries + 1):
+            try:
+                result = function(argument)
+            except Exception as error:
+                if attempt == retries:
+                    yield "failed", error
+            else:
+                yield "ok", result
+                break
+
+
+
+class WorkerPool(object):
+    """
+    A long lived pool of worker processes used to evaluate the model and
+    calculate features in parallel.
+
+    The worker processes are started the first time they are needed, and are
+    kept alive until the outermost context the pool is used in is exited.
+    This means the same worker processes are reused by every model evaluation
+    performed inside a ``with`` block.
+
+    Parameters
+    ----------
+    processes : {int, None}, optional
+        The number of worker processes to use. If None, the number of CPUs on
+        the computer (multiprocess.cpu_count()) is used.
+        Default is None.
+    initializer : {None, callable, list of callables}, optional
+        Warm-up function(s) that are run once in each worker process when it is
+        started, for example to import modules or load a simulator model. Each
+        callable must take no arguments. Default is None.
+    maxtasksperchild : {None, int}, optional
+        The number of model evaluations a worker process performs before it is
+        replaced by a fresh worker process. Useful for models that leak
+        memory. If None, worker processes live as long as the pool.
+        Default is None.
+
+    Attributes
+    ----------
+    processes : {int, None}
+        The number of worker processes used.
+    initializer : list
+        Warm-up functions run in each worker process when it is started.
+    maxtasksperchild : {None, int}
+        The number of model evaluations a worker process performs before it is
+        replaced.
+    running : bool
+        If the worker processes have been started.
+
+    Notes
+    -----
+    The pool can be used as a (reentrant) context manager:
+
+    .. code-block:: Python
+
+        with worker_pool:
+            results_1 = list(worker_pool.imap(function, parameters_1))
+            results_2 = list(worker_pool.imap(function, parameters_2))
+
+    where both calls to ``imap`` are performed by the same worker processes.
+    Nested ``with`` blocks keep the pool alive until the outermost block is
+    exited. Outside of a ``with`` block the pool must be closed manually with
+    ``close``.
+    """
+    def __init__(self,
+                 processes=None,
+                 initializer=None,
+                 maxtasksperchild=None):
+
+        self._pool = None
+        self._started = None
+        self._abandoned = False
+        self._task_ids = itertools.count()
+        self._depth = 0
+        self._processes = processes
+
+        self.initializer = initializer
+        self.maxtasksperchild = maxtasksperchild
+
+
+    @property
+    def initializer(self):
+        """
+        Warm-up functions that are run once in each worker process when it is
+        started.
+
+        Parameters
+        ----------
+        new_initializer : {None, callable, list of callables}
+            Warm-up function(s) that take no arguments.
+
+        Returns
+        -------
+        initializer : list
+            A list of the warm-up functions.
+        """
+        return self._initializer
+
+
+    @initializer.setter
+    def initializer(self, new_initializer):
+        if new_initializer is None:
+            self._initializer = []
+        elif callable(new_initializer):
+            self._initializer = [new_initializer]
+        else:
+            self._initializer = list(new_initializer)
+
+        for initializer in self._initializer:
+            if not callable(initializer):
+                raise TypeError("initializer must be a callable or list of callables")
+
+
+    @property
+    def processes(self):
+        """
+        The number of worker processes.
+
+        Parameters
+        ----------
+        new_processes : {int, None}
+            The number of worker processes. If the pool is running with a
+            different number of processes, the running worker processes are
+            terminated and new worker processes are started the next time
+            they are needed.
+
+        Returns
+        -------
+        processes : {int, None}
+            The number of worker processes.
+        """
+        return self._processes
+
+
+    @processes.setter
+    def processes(self, new_processes):
+        if new_processes != self._processes:
+            self.terminate()
+
+        self._processes = new_processes
+
+
+    @property
+    def running(self):
+        """
+        If the worker processes have been started.
+
+        Returns
+        -------
+        bool
+            True if the worker processes are running.
+        """
+        return self._pool is not None
+
+
+    def start(self):
+        """
+        Start the worker processes, if they are not already running.
+
+        Returns
+        -------
+        pool : multiprocess.Pool
+            The underlying pool of worker processes.
+        """
+        if self._pool is None:
+            import multiprocess as mp
+
+            self._started = mp.Queue()
+            self._pool = mp.Pool(processes=self.processes,
+                                 initializer=_run_initializers,
+                                 initargs=(self.initializer, self._started),
+                                 maxtasksperchild=self.maxtasksperchild)
+
+        return self._pool
+
+
+    def imap(self, function, iterable, chunksize=1):
+        """
+        Apply `function` to each element in `iterable` using the worker
+        processes. The worker processes are started if they are not already
+        running.
+
+        Parameters
+        ----------
+        function : callable
+            The function to apply.
+        iterable : iterable
+            The arguments to apply `function` to.
+        chunksize : int, optional
+            The number of elements sent to a worker process at a time.
+            Default is 1.
+
+        Returns
+        -------
+        iterator
+            An iterator over the results, in the same order as `iterable`.
+        """
+        return self.start().imap(function, iterable, chunksize)
+
+
+    def imap_tasks(self, function, iterable, timeout=None, retries=0, speculative=False):
+        """
+        Apply `function` to each element in `iterable` using the worker
+        processes, with a timeout for each element, retries of elements that
+        fail and optional speculative re-execution of straggling elements.
+
+        Parameters
+        ----------
+        function : callable
+            The function to apply.
+        iterable : iterable
+            The arguments to apply `function` to.
+        timeout : {None, float}, optional
+            The maximum wall-clock time in seconds for a single element. The
+            worker process of an element that exceeds the timeout is killed
+            and replaced by a new worker process. If None, there is no
+            timeout. Default is None.
+        retries : int, optional
+            The number of times an element that raises an exception or
+            exceeds the timeout is retried. Default is 0.
+        speculative : bool, optional
+            If True, elements that run longer than twice the median time of
+            the finished elements are started once more on idle worker
+            processes when there are no more elements waiting, and the result
+            that finishes first is used. Default is False.
+
+        Yields
+        ------
+        status : {"ok", "failed", "timeout"}
+            If `function` succeeded, raised an exception or exceeded the
+            timeout for the element.
+        value
+            The result, the exception raised by the last attempt, or None if
+            the last attempt exceeded the timeout.
+
+        Notes
+        -----
+        The results are yielded in the same order as `iterable`.
+
+        Only one element for each worker process is given to the pool at a
+        time, and a new element is taken from `iterable` when one finishes, so
+        the work done for each check of the running elements does not depend
+        on the length of `iterable`. The timeout of an element is measured
+        from when its worker process reports that it started, or from when it
+        was given to the pool if no worker process has reported it yet. An
+        element that exceeds the timeout before its worker process is known
+        can not be killed, and the pool is terminated when it is closed.
+        """
+        pool = self.start()
+        processes = len(pool._pool)
+
+        elements = iter(iterable)
+        exhausted = False
+        nr_elements = 0
+
+        # The argument and number of attempts of each element that is not
+        # finished
+        arguments = {}
+        attempts = {}
+
+        # Elements to submit again when a worker process is free
+        waiting = collections.deque()
+
+        duplicated = set()
+        outcomes = {}
+        durations = []
+        median = {"count": 0, "limit": None}
+
+        # task_id: {"index": ..., "result": ..., "pid": ..., "start": ...}
+        running = {}
+
+        # The task ids of each element, and of each worker process
+        by_index = collections.defaultdict(set)
+        by_pid = collections.defaultdict(set)
+
+        def submit(index):
+            task_id = next(self._task_ids)
+            result = pool.apply_async(_run_task, ((function, task_id, arguments[index]),))
+            running[task_id] = {"index": index, "result": result, "pid": None, "start": time.time()}
+            by_index[index].add(task_id)
+
+        def remove(task_id):
+            task = running.pop(task_id)
+
+            by_index[task["index"]].discard(task_id)
+            if not by_index[task["index"]]:
+                del by_index[task["index"]]
+
+            if task["pid"] is not None:
+                by_pid[task["pid"]].discard(task_id)
+                if not by_pid[task["pid"]]:
+                    del by_pid[task["pid"]]
+
+            return task
+
+        def kill(pid):
+            self._abandoned = True
+
+            try:
+                os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+            except OSError:
+                pass
+
+            # Other tasks that were running in the killed process are lost,
+            # results that are ready are still used
+            for task_id in list(by_pid.get(pid, ())):
+                if running[task_id]["result"].ready():
+                    continue
+
+                task = remove(task_id)
+                if task["index"] in arguments and task["index"] not in by_index:
+                    waiting.append(task["index"])
+
+        def finish(index, outcome):
+            outcomes[index] = outcome
+            del arguments[index]
+            del attempts[index]
+
+            # Stop duplicates of the task that are still running
+            for task_id in list(by_index.get(index, ())):
+                task = remove(task_id)
+                self._abandoned = True
+
+                if task["pid"] is not None and not task["result"].ready():
+                    kill(task["pid"])
+
+        def retry_or_finish(index, outcome):
+            if index in by_index:
+                return
+
+            if attempts[index] < retries:
+                attempts[index] += 1
+                waiting.append(index)
+            else:
+                finish(index, outcome)
+
+        next_index = 0
+
+        try:
+            while True:
+                # Keep one task running for each worker process
+                while len(running) < processes:
+                    if waiting:
+                        index = waiting.popleft()
+                        if index in arguments and index not in by_index:
+                            submit(index)
+                        continue
+
+                    if exhausted:
+                        break
+
+                    try:
+                        argument = next(elements)
+                    except StopIteration:
+                        exhausted = True
+                        break
+
+                    arguments[nr_elements] = argument
+                    attempts[nr_elements] = 0
+                    submit(nr_elements)
+                    nr_elements += 1
+
+                if next_index in outcomes:
+                    yield outcomes.pop(next_index)
+                    next_index += 1
+                    continue
+
+                if exhausted and next_index == nr_elements:
+                    break
+
+                while True:
+                    try:
+                        task_id, pid = self._started.get_nowait()
+                    except queue.Empty:
+                        break
+
+                    if task_id in running:
+                        running[task_id]["pid"] = pid
+                        running[task_id]["start"] = time.time()
+                        by_pid[pid].add(task_id)
+
+                now = time.time()
+                for task_id in list(running):
+                    if task_id not in running:
+                        continue
+
+                    task = running[task_id]
+                    index = task["index"]
+
+                    if task["result"].ready():
+                        remove(task_id)
+
+                        if index not in arguments:
+                            continue
+
+                        try:
+                            outcome = ("ok", task["result"].get())
+                        except Exception as error:
+                            retry_or_finish(index, ("failed", error))
+                        else:
+                            if task["pid"] is not None:
+                                durations.append(now - task["start"])
+
+                            finish(index, outcome)
+
+                    elif timeout is not None and now - task["start"] > timeout:
+                        remove(task_id)
+
+                        if task["pid"] is not None:
+                            kill(task["pid"])
+                        else:
+                            self._abandoned = True
+
+                        retry_or_finish(index, ("timeout", None))
+
+                # Start stragglers once more on idle worker processes when there
+                # are no more elements waiting
+                if speculative and durations and exhausted and not waiting \
+                        and len(running) < processes:
+                    if median["count"] != len(durations):
+                        median["count"] = len(durations)
+                        median["limit"] = 2*np.median(durations)
+
+                    for task_id, task in sorted(running.items(), key=lambda item: item[1]["start"]):
+                        if len(running) >= processes:
+                            break
+
+                        if task["index"] not in duplicated and task["pid"] is not None \
+                                and now - task["start"] > median["limit"]:
+                            duplicated.add(task["index"])
+                            submit(task["index"])
+
+                if next_index not in outcomes:
+                    for task_id in by_index.get(next_index, ()):
+                        running[task_id]["result"].wait(0.01)
+                        break
+                    else:
+                        time.sleep(0.01)
+
+        finally:
+            # Tasks still running when the iteration is stopped are abandoned
+            if running:
+                self._abandoned = True
+
+
+    def imap_pipeline(self, function, iterable, next_pool, next_function,
+                      queue_size=None, retries=0, callback=None):
+        """
+        Apply `function` to each element in `iterable` using these worker
+        processes, and then `next_function` to each result using the worker
+        processes of `next_pool`, so the two stages run at the same time with
+        a separate number of worker processes each.
+
+        Parameters
+        ----------
+        function : callable
+            The function of the first stage.
+        iterable : iterable
+            The arguments to apply `function` to.
+        next_pool : WorkerPool
+            The worker pool of the second stage.
+        next_function : callable
+            The function of the second stage. Takes the elements of the tuple
+            returned by `function` as arguments.
+        queue_size : {None, int}, optional
+            The largest number of results of the first stage that wait for the
+            second stage. When the queue is full, no new elements are given to
+            the first stage, so the first stage never runs far ahead of the
+            second stage. If None, the number of worker processes of
+            `next_pool` is used. Default is None.
+        retries : int, optional
+            The number of times a stage that raises an exception is retried.
+            A failure in the second stage only retries the second stage, with
+            the result of the first stage. Default is 0.
+        callback : {None, callable}, optional
+            Called as ``callback(index, result)`` in the current process with
+            the result of the first stage for the element at `index`.
+            Default is None.
+
+        Yields
+        ------
+        status : {"ok", "failed"}
+            If both stages succeeded, or a stage raised an exception for the
+            element.
+        value
+            The result of the second stage, or the exception raised by the
+            last attempt.
+
+        Notes
+        -----
+        The results are yielded in the same order as `iterable`.
+        The results of the first stage are sent through the current process.
+        """
+        pool = self.start()
+        second = next_pool.start()
+
+        processes = len(pool._pool)
+        next_processes = len(second._pool)
+
+        if queue_size is None:
+            queue_size = next_processes
+
+        arguments = iter(iterable)
+        exhausted = False
+
+        # Each task is a dictionary {"stage": ..., "argument": ...,
+        # "intermediate": ..., "attempts": ..., "result": ..., "outcome": ...}
+        tasks = collections.deque()
+        next_index = 0
+
+        def submit(task):
+            if task["stage"] == 0:
+                task["result"] = pool.apply_async(function, (task["argument"],))
+            else:
+                task["result"] = second.apply_async(next_function, task["intermediate"])
+
+        def failed(task, error):
+            if task["attempts"] < retries:
+                task["attempts"] += 1
+                submit(task)
+            else:
+                task["outcome"] = ("failed", error)
+                task["intermediate"] = None
+
+        try:
+            while tasks or not exhausted:
+                first_stage = sum(1 for task in tasks if task["stage"] == 0)
+                second_stage = sum(1 for task in tasks if task["stage"] == 1 and task["outcome"] is None)
+
+                # Backpressure: the first stage waits when the queue is full
+                while not exhausted and first_stage < processes + queue_size:
+                    try:
+                        argument = next(arguments)
+                    except StopIteration:
+                        exhausted = True
+                        break
+
+                    task = {"stage": 0, "argument": argument, "intermediate": None,
+                            "attempts": 0, "result": None, "outcome": None}
+                    submit(task)
+                    tasks.append(task)
+                    first_stage += 1
+
+                changed = False
+                for index, task in enumerate(tasks):
+                    if task["outcome"] is not None or not task["result"].ready():
+                        continue
+
+                    if task["stage"] == 0 and second_stage >= 2*next_processes:
+                        continue
+
+                    changed = True
+
+                    try:
+                        result = task["result"].get()
+                    except Exception as error:
+                        failed(task, error)
+                        continue
+
+                    if task["stage"] == 0:
+                        if callback is not None:
+                            callback(next_index + index, result)
+
+                        task["stage"] = 1
+                        task["attempts"] = 0
+                        task["intermediate"] = result
+                        submit(task)
+                        second_stage += 1
+                    else:
+                        task["outcome"] = ("ok", result)
+                        task["intermediate"] = None
+                        second_stage -= 1
+
+                while tasks and tasks[0]["outcome"] is not None:
+                    yield tasks.popleft()["outcome"]
+                    next_index += 1
+                    changed = True
+
+                if not changed and tasks:
+                    for task in tasks:
+                        if task["outcome"] is None and not task["result"].ready():
+                            task["result"].wait(0.01)
+                            break
+                    else:
+                        time.sleep(0.01)
+
+        finally:
+            # Tasks still running when the iteration is stopped are abandoned
+            if any(task["outcome"] is None for task in tasks):
+                self._abandoned = True
+                next_pool._abandoned = True
+
+
+    def close(self):
+        """
+        Wait for the worker processes to finish their current tasks and then
+        stop them. If any tasks were abandoned by ``imap_tasks``, the worker
+        processes are stopped immediately instead.
+        """
+        if self._abandoned:
+            self.terminate()
+
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._started = None
+
+
+    def terminate(self):
+        """
+        Stop the worker processes immediately.
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            self._started = None
+
+        self._abandoned = False
+
+
+    def __enter__(self):
+        self._depth += 1
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth = max(self._depth - 1, 0)
+
+        if self._depth == 0:
+            if exc_type is None:
+                self.close()
+            else:
+                self.terminate()
+
+
+    def __getstate__(self):
+        # The worker processes can not be sent to other processes
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        state["_started"] = None
+        state["_abandoned"] = False
+        state["_depth"] = 0
+        return state
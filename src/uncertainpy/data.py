@@ -8,9 +8,76 @@ import numpy as np
 
 from .utils.utility import contains_nan, is_regular
 from .utils.logger import setup_module_logger, get_logger
+from .utils.spike_matrix import SpikeMatrix
 from ._version import __version__
 
 
+def _is_sparse(evaluations):
+    """
+    Test if `evaluations` is a list of SpikeMatrix objects, where evaluations
+    without a valid result are numpy.nan.
+    """
+    if isinstance(evaluations, np.ndarray) or not isinstance(evaluations, list):
+        return False
+
+    shapes = set()
+    for evaluation in evaluations:
+        if isinstance(evaluation, SpikeMatrix):
+            shapes.add(evaluation.shape)
+        elif not (np.isscalar(evaluation) and np.isnan(evaluation)):
+            return False
+
+    return len(shapes) == 1
+
+
+def _save_sparse(group, evaluations):
+    """
+    Save a list of SpikeMatrix objects as the concatenated spike indices,
+    the indptr of each evaluation offset into the concatenated indices, and
+    which evaluations are valid.
+    """
+    valid = np.array([isinstance(evaluation, SpikeMatrix) for evaluation in evaluations])
+    shape = [evaluation for evaluation in evaluations if isinstance(evaluation, SpikeMatrix)][0].shape
+
+    indices = []
+    indptr = np.zeros((len(evaluations), shape[0] + 1), dtype=np.int64)
+
+    start = 0
+    for i, evaluation in enumerate(evaluations):
+        if valid[i]:
+            indices.append(evaluation.indices)
+            indptr[i] = evaluation.indptr + start
+            start += evaluation.nnz
+        else:
+            indptr[i] = start
+
+    group.attrs["sparse"] = "SpikeMatrix"
+    group.attrs["shape"] = shape
+    group.create_dataset("indices", data=np.concatenate(indices))
+    group.create_dataset("indptr", data=indptr)
+    group.create_dataset("valid", data=valid)
+
+
+def _load_sparse(group):
+    """
+    Load a list of SpikeMatrix objects saved with _save_sparse.
+    """
+    indices = group["indices"][()]
+    indptr = group["indptr"][()]
+    valid = group["valid"][()]
+    shape = tuple(group.attrs["shape"])
+
+    evaluations = []
+    for i in range(len(valid)):
+        if valid[i]:
+            start, stop = indptr[i][0], indptr[i][-1]
+            evaluations.append(SpikeMatrix(indices[start:stop], indptr[i] - start, shape))
+        else:
+            evaluations.append(np.nan)
+
+    return evaluations
+
+
 class DataFeature(collections.MutableMapping):
     """
     Store the results of each statistical metric calculated from the uncertainty
@@ -57,6 +124,26 @@ class DataFeature(collections.MutableMapping):
         Average of the total effect sensitivity of
         the feature or model results.
         Default is None.
+    sobol_second : {None, array_like}, optional.
+        Second order sensitivity of each pair of uncertain parameters of the
+        feature or model results.
+        Default is None.
+    pce_coefficients : {None, array_like}, optional.
+        Coefficients of the polynomial chaos expansion of the feature or
+        model in the orthogonal basis.
+        Default is None.
+    pce_multi_indices : {None, array_like}, optional.
+        The degree of each polynomial in the orthogonal basis in each
+        uncertain parameter.
+        Default is None.
+    pce_order : {None, int}, optional.
+        Polynomial order of the polynomial chaos expansion of the feature or
+        model, chosen by adaptive point collocation.
+        Default is None.
+    pce_error : {None, float}, optional.
+        Relative leave-one-out error of the polynomial chaos expansion of the
+        feature or model, from adaptive point collocation.
+        Default is None.
     labels : list, optional.
         A list of labels for plotting, ``[x-axis, y-axis, z-axis]``
         Default is ``[]``.
@@ -85,6 +172,21 @@ class DataFeature(collections.MutableMapping):
         Total order Sobol indices (sensitivity) of the feature or model results.
     sobol_total_average : {None, array_like}
         Average of the total order Sobol indices of the feature or model results.
+    sobol_second : {None, array_like}
+        Second order Sobol indices (sensitivity) of each pair of uncertain
+        parameters of the feature or model results.
+    pce_coefficients : {None, array_like}
+        Coefficients of the polynomial chaos expansion of the feature or
+        model in the orthogonal basis.
+    pce_multi_indices : {None, array_like}
+        The degree of each polynomial in the orthogonal basis in each
+        uncertain parameter.
+    pce_order : {None, int}
+        Polynomial order of the polynomial chaos expansion of the feature or
+        model, chosen by adaptive point collocation.
+    pce_error : {None, float}
+        Relative leave-one-out error of the polynomial chaos expansion of the
+        feature or model, from adaptive point collocation.
     labels : list
         A list of labels for plotting, ``[x-axis, y-axis, z-axis]``.
 
@@ -106,6 +208,8 @@ class DataFeature(collections.MutableMapping):
           of the model/feature.
         * ``sobol_total_average`` - the average of the total order Sobol
           indices (sensitivity) of the model/feature.
+        * ``sobol_second`` - the second order Sobol indices (sensitivity) of
+          the model/feature, only calculated by polynomial chaos expansions.
     """
     def __init__(self,
                  name,
@@ -119,6 +223,11 @@ class DataFeature(collections.MutableMapping):
                  sobol_first_average=None,
                  sobol_total=None,
                  sobol_total_average=None,
+                 sobol_second=None,
+                 pce_coefficients=None,
+                 pce_multi_indices=None,
+                 pce_order=None,
+                 pce_error=None,
                  labels=[]):
 
         self.name = name
@@ -132,12 +241,18 @@ class DataFeature(collections.MutableMapping):
         self.sobol_first_average = sobol_first_average
         self.sobol_total = sobol_total
         self.sobol_total_average = sobol_total_average
+        self.sobol_second = sobol_second
+        self.pce_coefficients = pce_coefficients
+        self.pce_multi_indices = pce_multi_indices
+        self.pce_order = pce_order
+        self.pce_error = pce_error
         self.labels = labels
 
         self._statistical_metrics = ["evaluations", "time", "mean", "variance",
                                      "percentile_5", "percentile_95",
                                      "sobol_first", "sobol_first_average",
-                                     "sobol_total", "sobol_total_average"]
+                                     "sobol_total", "sobol_total_average",
+                                     "sobol_second"]
 
         self._information = ["name", "labels"]
 
@@ -336,6 +451,29 @@ class Data(collections.MutableMapping):
         A dictionary with a DataFeature for each model/feature.
     data_information : list
         List of attributes containing additional information.
+    cache_hits : int
+        The number of model evaluations that were found in the evaluation
+        cache.
+    cache_misses : int
+        The number of model evaluations that were not found in the evaluation
+        cache, and therefore were run.
+    failures : int
+        The number of model evaluations that failed and were given numpy.nan
+        as result.
+    timeouts : int
+        The number of model evaluations that exceeded the timeout and were
+        given numpy.nan as result.
+    profiling : dict
+        The profiling table of the model evaluations, if they were profiled.
+        A dictionary with the name of each stage of the evaluations, ``"pid"``
+        and ``"peak_rss"`` as keys, and an array with the value for each
+        evaluation as values. See uncertainpy.core.Profiler.
+    pce_recurrence : dict
+        The three-term recurrence coefficients of the orthogonal polynomials
+        of each uncertain parameter used in the polynomial chaos expansions,
+        with ``"alpha"`` and ``"beta"`` as keys. Together with
+        ``pce_coefficients`` and ``pce_multi_indices`` of each feature this
+        describes the polynomial chaos expansions. See uncertainpy.Surrogate.
 
 
     Notes
@@ -357,6 +495,8 @@ class Data(collections.MutableMapping):
           of the model/feature.
         * ``sobol_total_average`` - the average of the total order Sobol
           indices (sensitivity) of the model/feature.
+        * ``sobol_second`` - the second order Sobol indices (sensitivity) of
+          the model/feature, only calculated by polynomial chaos expansions.
 
     Raises
     ------
@@ -374,7 +514,8 @@ class Data(collections.MutableMapping):
 
         self.data_information = ["uncertain_parameters", "model_name",
                                  "incomplete", "method", "version", "seed",
-                                 "model_ignore", "error"]
+                                 "model_ignore", "error", "cache_hits",
+                                 "cache_misses", "failures", "timeouts"]
 
 
         if backend not in ["auto", "hdf5", "exdir"]:
@@ -390,6 +531,12 @@ class Data(collections.MutableMapping):
         self.method = ""
         self.model_ignore = False
         self._seed = ""
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.profiling = {}
+        self.pce_recurrence = {}
         self.backend = backend
 
         self.version = __version__
@@ -473,6 +620,12 @@ class Data(collections.MutableMapping):
         self.method = ""
         self._seed = ""
         self.model_ignore = False
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.profiling = {}
+        self.pce_recurrence = {}
         self.version = __version__
 
 
@@ -693,13 +846,42 @@ class Data(collections.MutableMapping):
         f.attrs["seed"] = self.seed
         f.attrs["model ignore"] = self.model_ignore
 
+        # Only stored if an evaluation cache was used
+        if self.cache_hits or self.cache_misses:
+            f.attrs["cache hits"] = self.cache_hits
+            f.attrs["cache misses"] = self.cache_misses
+
+        # Only stored if any evaluations failed
+        if self.failures or self.timeouts:
+            f.attrs["failures"] = self.failures
+            f.attrs["timeouts"] = self.timeouts
+
+        # Only stored if the evaluations were profiled
+        if self.profiling:
+            f.attrs["profiling"] = [stage.encode("utf8") for stage in self.profiling]
+
+            group = f.create_group("profiling")
+            for stage in self.profiling:
+                group.create_dataset(stage, data=self.profiling[stage])
+
+        # Only stored for polynomial chaos expansions
+        if self.pce_recurrence:
+            f.attrs["pce recurrence"] = [key.encode("utf8") for key in self.pce_recurrence]
+
+            group = f.create_group("pce recurrence")
+            for key in self.pce_recurrence:
+                group.create_dataset(key, data=self.pce_recurrence[key])
+
 
         for feature in self.data:
             group = f.create_group(feature)
 
             for statistical_metric in self[feature]:
                 if statistical_metric in ["evaluations", "time"]:
-                    if is_regular(self[feature][statistical_metric]):
+                    if _is_sparse(self[feature][statistical_metric]):
+                        _save_sparse(group.create_group(statistical_metric),
+                                     self[feature][statistical_metric])
+                    elif is_regular(self[feature][statistical_metric]):
                         group.create_dataset(statistical_metric, data=self[feature][statistical_metric])
                     else:
                         evaluations_group = group.create_group(statistical_metric)
@@ -801,8 +983,36 @@ class Data(collections.MutableMapping):
         if "model ignore" in f.attrs:
             self.model_ignore = f.attrs["model ignore"]
 
+        if "cache hits" in f.attrs:
+            self.cache_hits = int(f.attrs["cache hits"])
+
+        if "cache misses" in f.attrs:
+            self.cache_misses = int(f.attrs["cache misses"])
+
+        if "failures" in f.attrs:
+            self.failures = int(f.attrs["failures"])
+
+        if "timeouts" in f.attrs:
+            self.timeouts = int(f.attrs["timeouts"])
+
+        if "profiling" in f.attrs:
+            for stage in f.attrs["profiling"]:
+                self.profiling[stage.decode("utf8")] = f["profiling"][stage.decode("utf8")][()]
+
+        if "pce recurrence" in f.attrs:
+            for key in f.attrs["pce recurrence"]:
+                self.pce_recurrence[key.decode("utf8")] = f["pce recurrence"][key.decode("utf8")][()]
+
 
         for feature in f:
+            # The profiling table is not a model/feature
+            if feature == "profiling" and self.profiling:
+                continue
+
+            # The recurrence coefficients are not a model/feature
+            if feature == "pce recurrence" and self.pce_recurrence:
+                continue
+
             self.add_features(str(feature))
             for statistical_metric in f[feature]:
 
@@ -812,6 +1022,8 @@ class Data(collections.MutableMapping):
 
                     if isinstance(values, backend.Dataset):
                         evaluations = values[()]
+                    elif "sparse" in values.attrs:
+                        evaluations = _load_sparse(values)
                     else:
                         evaluations = []
 
@@ -841,7 +1053,7 @@ class Data(collections.MutableMapping):
         for feature in feature_list:
             all_nan = True
             for U in self[feature].evaluations:
-                if not np.all(np.isnan(U)):
+                if isinstance(U, SpikeMatrix) or not np.all(np.isnan(U)):
                     all_nan = False
 
             if all_nan:
@@ -1,6 +1,8 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-import chaospy as cp
+from .utils.lazy_import import lazy_import
+
+cp = lazy_import("chaospy")
 
 """
 Functions (that work as closures) used to set the distribution of a
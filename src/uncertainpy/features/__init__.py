@@ -17,14 +17,16 @@ __all__ = ["Features",
            "SpikingFeatures",
            "Spike",
            "Spikes",
+           "SpikeTable",
            "NetworkFeatures",
            "GeneralNetworkFeatures",
+           "Spiketrains",
            "EfelFeatures"]
 
 from .features import Features
 from .general_spiking_features import GeneralSpikingFeatures
 from .spiking_features import SpikingFeatures
-from .spikes import Spike, Spikes
+from .spikes import Spike, Spikes, SpikeTable
 from .network_features import NetworkFeatures
-from .general_network_features import GeneralNetworkFeatures
+from .general_network_features import GeneralNetworkFeatures, Spiketrains
 from .efel_features import EfelFeatures
\ No newline at end of file
@@ -1,14 +1,19 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-try:
-    import efel
-
-    prerequisites = True
-except ImportError:
-    prerequisites = False
-
 from .features import Features
 from ..utils.logger import get_logger
+from ..utils.lazy_import import lazy_import, module_available
+
+efel = lazy_import("efel")
+
+# Efel features that are always calculated with a separate call to eFEL.
+# decay_time_constant_after_stim throws an error if there are no time points
+# after the stimulus, and min_AHP_values and AHP_slow_time get values that
+# they do not get on their own when other features are calculated first in
+# the same call.
+_separate_efel_features = ("decay_time_constant_after_stim",
+                           "min_AHP_values",
+                           "AHP_slow_time")
 
 
 class EfelFeatures(Features):
@@ -96,6 +101,12 @@ class EfelFeatures(Features):
     Efel features take the parameters ``(time, values, info)`` and require
     info["stimulus_start"] and info["stimulus_end"] to be set.
 
+    The feature function of each Efel feature is created the first time the
+    feature is used. All Efel features in ``features_to_run`` are calculated
+    with a single call to eFEL the first time one of them is calculated for a
+    trace, so eFEL only analyses each trace once. The results are reused by
+    the other features for the same trace.
+
     Implemented Efel features are:
 
     ================================  ================================  ================================
@@ -167,11 +178,16 @@ class EfelFeatures(Features):
                  strict=True,
                  logger_level="info"):
 
-        if not prerequisites:
+        if not module_available("efel"):
             raise ImportError("Efel features require: efel")
 
         efel.reset()
 
+        self._efel_cache = None
+        self._efel_feature_names = set(efel.getFeatureNames())
+
+        self.strict = strict
+
         implemented_labels = {}
 
         super(EfelFeatures, self).__init__(new_features=new_features,
@@ -181,70 +197,182 @@ class EfelFeatures(Features):
                                            labels=implemented_labels,
                                            logger_level=logger_level)
 
-        def efel_wrapper(feature_name):
-            def feature_function(time, values, info):
-                disable = False
-                logger = get_logger(self)
-
-
-                if "stimulus_start" not in info:
-                    if strict:
-                        raise ValueError("Efel features require info['stimulus_start']. "
-                                           "No 'stimulus_start' found in info, "
-                                           "Set 'stimulus_start', or set strict to "
-                                           "False to use initial time as stimulus start")
-                    else:
-                        info["stimulus_start"] = time[0]
-                        logger.warning("Efel features require info['stimulus_start']. "
-                                       "No 'stimulus_start' found in info, "
-                                       "setting stimulus start as initial time")
+        self.labels = labels
+        self.features_to_run = features_to_run
 
-                if "stimulus_end" not in info:
-                    if strict:
-                        raise ValueError("Efel features require info['stimulus_end']. "
-                                         "No 'stimulus_end' found in info, "
-                                         "Set 'stimulus_start', or set strict to "
-                                         "False to use end time as stimulus end")
-                    else:
-                        info["stimulus_end"] = time[-1]
-                        logger.warning("Efel features require info['stimulus_start']. "
-                                       "No 'stimulus_end' found in info, "
-                                       "setting stimulus end as end time")
 
+    def _efel_wrapper(self, feature_name):
+        """
+        Create the feature function for an Efel feature.
 
-                if info["stimulus_start"] >= info["stimulus_end"]:
-                    raise ValueError("stimulus_start >= stimulus_end.")
+        Parameters
+        ----------
+        feature_name : str
+            Name of the Efel feature.
 
+        Returns
+        -------
+        feature_function : callable
+            The feature function, with the requirements stated in
+            ``reference_feature``.
+        """
+        def feature_function(time, values, info):
+            disable = False
+            logger = get_logger(self)
 
-                trace = {}
-                trace["T"] = time
-                trace["V"] = values
-                trace["stim_start"] = [info["stimulus_start"]]
-                trace["stim_end"] = [info["stimulus_end"]]
 
+            if "stimulus_start" not in info:
+                if self.strict:
+                    raise ValueError("Efel features require info['stimulus_start']. "
+                                       "No 'stimulus_start' found in info, "
+                                       "Set 'stimulus_start', or set strict to "
+                                       "False to use initial time as stimulus start")
+                else:
+                    info["stimulus_start"] = time[0]
+                    logger.warning("Efel features require info['stimulus_start']. "
+                                   "No 'stimulus_start' found in info, "
+                                   "setting stimulus start as initial time")
+
+            if "stimulus_end" not in info:
+                if self.strict:
+                    raise ValueError("Efel features require info['stimulus_end']. "
+                                     "No 'stimulus_end' found in info, "
+                                     "Set 'stimulus_start', or set strict to "
+                                     "False to use end time as stimulus end")
+                else:
+                    info["stimulus_end"] = time[-1]
+                    logger.warning("Efel features require info['stimulus_start']. "
+                                   "No 'stimulus_end' found in info, "
+                                   "setting stimulus end as end time")
+
+
+            if info["stimulus_start"] >= info["stimulus_end"]:
+                raise ValueError("stimulus_start >= stimulus_end.")
+
+
+            # Disable decay_time_constant_after_stim if no time points left
+            # in simulation after stimulation has ended.
+            # Otherwise it throws an error
+            if feature_name == "decay_time_constant_after_stim":
+                if info["stimulus_end"] >= time[-1]:
+                    return None, None
+
+            return None, self._efel_result(feature_name, time, values, info)
+
+        feature_function.__name__ = feature_name
+        return feature_function
+
+
+    def __getattr__(self, name):
+        # Efel features are created the first time they are used
+        if not name.startswith("_") and name in self.__dict__.get("_efel_feature_names", ()):
+            feature_function = self._efel_wrapper(name)
+            setattr(self, name, feature_function)
 
-                # Disable decay_time_constant_after_stim if no time points left
-                # in simulation after stimulation has ended.
-                # Otherwise it throws an error
-                if feature_name == "decay_time_constant_after_stim":
-                    if info["stimulus_end"] >= time[-1]:
-                        return None, None
+            return feature_function
 
-                result = efel.getMeanFeatureValues([trace], [feature_name], raise_warnings=False)
+        raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
 
-                return None, result[0][feature_name]
 
-            feature_function.__name__ = feature_name
-            return feature_function
+    def implemented_features(self):
+        """
+        Return a list of all Efel features and all callable methods in
+        feature, that are not utility methods, does not starts with "_" and
+        not a method of a general python object.
 
-        for feature_name in efel.getFeatureNames():
-            self.add_features(efel_wrapper(feature_name))
+        Returns
+        -------
+        list
+            A list of all Efel features and callable methods in feature, that
+            are not utility methods.
+        """
+        implemented_features = super(EfelFeatures, self).implemented_features()
 
-        self.labels = labels
-        self.features_to_run = features_to_run
+        return sorted(set(implemented_features) | self._efel_feature_names)
 
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_efel_cache"] = None
 
+        return state
+
+
+    def _efel_result(self, feature_name, time, values, info):
+        """
+        Get the mean value of an Efel feature for a trace. All Efel features in
+        ``features_to_run`` that are not already calculated for the trace are
+        calculated with a single call to eFEL, and the results are stored until
+        a feature is requested for a different trace.
+
+        Parameters
+        ----------
+        feature_name : str
+            Name of the Efel feature.
+        time : array_like
+            Time values of the trace.
+        values : array_like
+            Voltage values of the trace.
+        info : dictionary
+            A dictionary with info["stimulus_start"] and info["stimulus_end"]
+            set.
+
+        Returns
+        -------
+        result : {float, None}
+            The mean value of the feature.
+        """
+        stimulus = (info["stimulus_start"], info["stimulus_end"])
+
+        # The trace is identified by the time and values objects themselves,
+        # which are shared between all features of a single evaluation
+        cache = self._efel_cache
+        if cache is None or cache["time"] is not time \
+                or cache["values"] is not values or cache["stimulus"] != stimulus:
+            cache = {"time": time,
+                     "values": values,
+                     "stimulus": stimulus,
+                     "results": {}}
+            self._efel_cache = cache
+
+        results = cache["results"]
+
+        if feature_name not in results:
+            # The features that give the same result when calculated together
+            # as on their own
+            if feature_name in _separate_efel_features:
+                feature_names = [feature_name]
+            else:
+                feature_names = [name for name in self.features_to_run
+                                 if name not in results and name in self._efel_feature_names
+                                 and name not in _separate_efel_features]
+                if feature_name not in feature_names:
+                    feature_names.append(feature_name)
+
+            trace = {}
+            trace["T"] = time
+            trace["V"] = values
+            trace["stim_start"] = [info["stimulus_start"]]
+            trace["stim_end"] = [info["stimulus_end"]]
+
+            try:
+                result = efel.getMeanFeatureValues([trace], feature_names, raise_warnings=False)
+                results.update(result[0])
+
+            except Exception:
+                # Calculate each feature separately, so an error in one feature
+                # is only raised for that feature
+                for name in feature_names:
+                    try:
+                        result = efel.getMeanFeatureValues([trace], [name], raise_warnings=False)
+                        results[name] = result[0][name]
+                    except Exception as error:
+                        results[name] = error
+
+        if isinstance(results[feature_name], Exception):
+            raise results[feature_name]
+
+        return results[feature_name]
 
 
     def reference_feature(self, time, values, info):
@@ -5,6 +5,31 @@ import six
 
 from ..utils.logger import setup_module_logger
 
+
+class _NoMeasure(object):
+    """
+    Context manager that does nothing, used when no timings are recorded.
+    """
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+def _measure(timings, stage):
+    """
+    Time `stage` in `timings` with a ``with`` statement, or do nothing if
+    `timings` is None.
+    """
+    if timings is None:
+        return _NoMeasure()
+
+    return timings.measure(stage)
+
+
+
 class Features(object):
     """
     Class for calculating features of a model.
@@ -443,7 +468,7 @@ class Features(object):
 
 
 
-    def calculate_features(self, *model_results):
+    def calculate_features(self, *model_results, **kwargs):
         """
         Calculate all features in ``features_to_run``.
 
@@ -453,6 +478,10 @@ class Features(object):
             Variable length argument list. Is the values that ``model.run()``
             returns. By default it contains `time` and `values`, and then any number of
             optional `info` values.
+        timings : {None, uncertainpy.core.Timings}, optional
+            Keyword only. If given, the time spent in ``preprocess`` and in
+            each feature is recorded in `timings`, as ``"features.preprocess"``
+            and ``"features.<feature name>"``. Default is None.
 
         Returns
         -------
@@ -464,7 +493,8 @@ class Features(object):
         Raises
         ------
         TypeError
-            If `feature_name` is a utility method.
+            If `feature_name` is a utility method, or if a keyword argument
+            other than `timings` is given.
 
         Notes
         -----
@@ -474,11 +504,17 @@ class Features(object):
         --------
         uncertainpy.features.Features.calculate_feature : Method for calculating a single feature.
         """
-        preprocess_results = self.preprocess(*model_results)
+        timings = kwargs.pop("timings", None)
+        if kwargs:
+            raise TypeError("calculate_features() got an unexpected keyword argument '{}'".format(list(kwargs)[0]))
+
+        with _measure(timings, "features.preprocess"):
+            preprocess_results = self.preprocess(*model_results)
 
         results = {}
         for feature in self.features_to_run:
-            time_feature, values_feature = self.calculate_feature(feature, *preprocess_results)
+            with _measure(timings, "features." + feature):
+                time_feature, values_feature = self.calculate_feature(feature, *preprocess_results)
 
             results[feature] = {"time": time_feature, "values": values_feature}
 
@@ -2,15 +2,247 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import numpy as np
 
-try:
-    import neo.core
-    import quantities as pq
+from .features import Features
+from ..utils.lazy_import import lazy_import, module_available
 
-    prerequisites = True
-except ImportError:
-    prerequisites = False
+neo = lazy_import("neo")
+pq = lazy_import("quantities")
+
+
+class Spiketrains(object):
+    """
+    The spiketrains of a single model evaluation. The spike times of all
+    neurons are stored in one concatenated array, together with the index of
+    the first spike of each neuron. Intermediate results shared between
+    several features, such as the interspike intervals, are stored so they
+    are only calculated once for each evaluation.
+
+    Indexing and iterating over a Spiketrains object gives Neo spiketrains,
+    which are created the first time they are needed.
+
+    Parameters
+    ----------
+    spiketrains : list, optional
+        A list of spiketrains, each spiketrain is a list of the times when
+        a given neuron spikes. Neo spiketrains and quantities arrays are
+        rescaled to `units`. Default is an empty list.
+    t_stop : {None, float}, optional
+        The end time of the spiketrains. If None, the largest ``t_stop``
+        of the Neo spiketrains is used, or the last spike time if there are
+        no Neo spiketrains. Default is None.
+    units : {None, Quantities}, optional
+        The unit of the spike times. If None, ``quantities.ms`` is used.
+        Default is None.
+
+    Attributes
+    ----------
+    times : array
+        The spike times of all neurons, concatenated. The spike times of each
+        neuron are sorted.
+    offsets : array
+        The index of the first spike of each neuron in `times`, with
+        ``len(times)`` as the last element. The spike times of neuron ``i``
+        are ``times[offsets[i]:offsets[i + 1]]``.
+    neurons : array
+        The index of the neuron of each spike in `times`.
+    t_stop : float
+        The end time of the spiketrains.
+    units : Quantities
+        The unit of the spike times.
+    intermediates : dict
+        The intermediate results calculated so far. The keys are the name of
+        the intermediate result and its arguments.
+
+    Raises
+    ------
+    ValueError
+        If a spike time is before 0 or after `t_stop`.
+
+    See also
+    --------
+    GeneralNetworkFeatures.preprocess
+    """
+    def __init__(self, spiketrains=(), t_stop=None, units=None):
+        if units is None:
+            units = pq.ms
+
+        self.units = units
+
+        if isinstance(spiketrains, Spiketrains):
+            # Avoid creating Neo spiketrains when copying
+            if t_stop is None:
+                t_stop = (spiketrains.t_stop*spiketrains.units).rescale(units).magnitude
+
+            to_units = (1.*spiketrains.units).rescale(units).magnitude
+            spiketrains = [to_units*spiketrains.spike_times(i) for i in range(len(spiketrains))]
+
+        arrays = []
+        t_stops = []
+        for spiketrain in spiketrains:
+            if hasattr(spiketrain, "t_stop"):
+                t_stops.append(float(spiketrain.t_stop.rescale(units).magnitude))
+
+            if hasattr(spiketrain, "rescale"):
+                spiketrain = spiketrain.rescale(units).magnitude
+
+            arrays.append(np.asarray(spiketrain, dtype=float).ravel())
+
+        counts = np.array([len(array) for array in arrays], dtype=int)
+
+        self.offsets = np.zeros(len(arrays) + 1, dtype=int)
+        np.cumsum(counts, out=self.offsets[1:])
+
+        self.neurons = np.repeat(np.arange(len(arrays)), counts)
+
+        if arrays:
+            self.times = np.concatenate(arrays)
+        else:
+            self.times = np.zeros(0)
+
+        # Sort the spike times of each neuron
+        if np.any(np.diff(self.times)[np.diff(self.neurons) == 0] < 0):
+            order = np.lexsort((self.times, self.neurons))
+            self.times = self.times[order]
+
+        if t_stop is None:
+            if t_stops:
+                t_stop = max(t_stops)
+            elif len(self.times) > 0:
+                t_stop = self.times.max()
+            else:
+                t_stop = 0
+
+        self.t_stop = float(t_stop)
+
+        if len(self.times) > 0:
+            if self.times.min() < 0:
+                raise ValueError("The first spike ({}) is before t_start (0)".format(self.times.min()))
+
+            if self.times.max() > self.t_stop:
+                raise ValueError("The last spike ({}) is after t_stop ({})".format(self.times.max(),
+                                                                                   self.t_stop))
+
+        self.intermediates = {}
+
+
+    def __len__(self):
+        """
+        Find the number of spiketrains.
+
+        Returns
+        -------
+        int
+            The number of spiketrains.
+        """
+        return len(self.offsets) - 1
+
+
+    def __getitem__(self, i):
+        """
+        Return spiketrain number `i` as a Neo spiketrain.
+
+        Parameters
+        ----------
+        i : int
+            Spiketrain number `i`.
+
+        Returns
+        -------
+        neo.core.SpikeTrain
+            Spiketrain number `i`.
+        """
+        return self.neo[i]
+
+
+    def __iter__(self):
+        """
+        Iterate over the Neo spiketrains.
+
+        Yields
+        ------
+        neo.core.SpikeTrain
+            A Neo spiketrain.
+        """
+        return iter(self.neo)
+
+
+    @property
+    def counts(self):
+        """
+        The number of spikes of each neuron.
+
+        Returns
+        -------
+        counts : array
+            The number of spikes of each neuron.
+        """
+        return np.diff(self.offsets)
+
+
+    def spike_times(self, i):
+        """
+        The spike times of neuron `i`, as a view of `times`.
+
+        Parameters
+        ----------
+        i : int
+            Neuron number `i`.
+
+        Returns
+        -------
+        spike_times : array
+            The sorted spike times of neuron `i`.
+        """
+        return self.times[self.offsets[i]:self.offsets[i + 1]]
+
+
+    @property
+    def neo(self):
+        """
+        The spiketrains as Neo spiketrains, created the first time they are
+        needed.
+
+        Returns
+        -------
+        neo_spiketrains : list
+            A list of Neo spiketrains.
+        """
+        return self.intermediate("neo", Spiketrains._to_neo)
+
+
+    def _to_neo(self):
+        return [neo.core.SpikeTrain(self.spike_times(i), t_stop=self.t_stop, units=self.units)
+                for i in range(len(self))]
+
+
+    def intermediate(self, name, function, *args):
+        """
+        Get an intermediate result. The result is calculated as
+        ``function(self, *args)`` the first time it is requested, and stored
+        for later requests.
+
+        Parameters
+        ----------
+        name : str
+            Name of the intermediate result.
+        function : callable
+            The function that calculates the intermediate result.
+        *args
+            Additional arguments to `function`. Intermediate results with
+            different arguments are stored separately.
+
+        Returns
+        -------
+        result
+            The intermediate result.
+        """
+        key = (name,) + args
+
+        if key not in self.intermediates:
+            self.intermediates[key] = function(self, *args)
+
+        return self.intermediates[key]
 
-from .features import Features
 
 
 class GeneralNetworkFeatures(Features):
@@ -84,8 +316,8 @@ class GeneralNetworkFeatures(Features):
 
     simulation_end : float
         The simulation end time
-    neo_spiketrains : list
-        A list of Neo spiketrains.
+    neo_spiketrains : Spiketrains
+        The spiketrains, which behave as a list of Neo spiketrains.
 
     The model must return:
 
@@ -113,7 +345,7 @@ class GeneralNetworkFeatures(Features):
                  units=None,
                  logger_level="info"):
 
-        if not prerequisites:
+        if not (module_available("neo") and module_available("quantities")):
             raise ImportError("Network features require: neo, quantities")
 
         super(GeneralNetworkFeatures, self).__init__(new_features=new_features,
@@ -146,19 +378,28 @@ class GeneralNetworkFeatures(Features):
         -------
         simulation_end : float
             The simulation end time
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        spiketrains : Spiketrains
+            The spiketrains, with the spike times of all neurons in one
+            concatenated array. Indexing and iterating gives Neo spiketrains.
 
         Raises
         ------
         ValueError
             If `simulation_end` is np.nan or None.
+        ValueError
+            If a spike time is before 0 or after `simulation_end`.
 
         Notes
         -----
         This preprocessing makes it so all features get the input
         `simulation_end` and `spiketrains`.
 
+        The spiketrains are returned as a ``Spiketrains`` object, which stores
+        the spike times of all neurons in a single array, and creates Neo
+        spiketrains only for features that need them. It also stores
+        intermediate results that are shared between features, so they are
+        only calculated once for each model evaluation.
+
         See also
         --------
         uncertainpy.models.Model.run : The model run method
@@ -168,13 +409,56 @@ class GeneralNetworkFeatures(Features):
         if simulation_end is None or np.isnan(simulation_end):
             raise ValueError("simulation_end is NaN or None. simulation_end must be the time when the simulation ends.")
 
-        neo_spiketrains = []
-        for spiketrain in spiketrains:
-            neo_spiketrain = neo.core.SpikeTrain(spiketrain, t_stop=simulation_end, units=self.units)
-            neo_spiketrains.append(neo_spiketrain)
+        return simulation_end, Spiketrains(spiketrains, t_stop=simulation_end, units=self.units)
+
 
-        return simulation_end, neo_spiketrains
 
+    def _spiketrains(self, spiketrains):
+        """
+        Get `spiketrains` as a Spiketrains object.
+
+        Parameters
+        ----------
+        spiketrains : {Spiketrains, list}
+            The spiketrains as returned by ``preprocess``, or a list of Neo
+            spiketrains.
+
+        Returns
+        -------
+        spiketrains : Spiketrains
+            `spiketrains` itself if it already is a Spiketrains object,
+            otherwise a new Spiketrains object.
+        """
+        if isinstance(spiketrains, Spiketrains):
+            return spiketrains
+
+        return Spiketrains(spiketrains, units=self.units)
+
+
+    def _intermediate(self, spiketrains, name, *args):
+        """
+        Get an intermediate result shared between features, calculated by the
+        method ``_<name>(spiketrains, *args)``. The result is only calculated
+        once for each Spiketrains object, as returned by ``preprocess``.
+
+        Parameters
+        ----------
+        spiketrains : {Spiketrains, list}
+            The spiketrains as returned by ``preprocess``, or a list of Neo
+            spiketrains.
+        name : str
+            Name of the intermediate result.
+        *args
+            Additional arguments to the method that calculates the result.
+
+        Returns
+        -------
+        result
+            The intermediate result.
+        """
+        function = getattr(self, "_" + name)
+
+        return self._spiketrains(spiketrains).intermediate(name, function, *args)
 
 
     def reference_feature(self, simulation_end, neo_spiketrains):
@@ -187,8 +471,8 @@ class GeneralNetworkFeatures(Features):
         ----------
         simulation_end : float
             The simulation end time
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -2,15 +2,12 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import numpy as np
 
-try:
-    import elephant
-    import quantities as pq
+from .general_network_features import GeneralNetworkFeatures, Spiketrains
+from .spike_distances import van_rossum_distances, victor_purpura_distances
+from ..utils.lazy_import import lazy_import, module_available
 
-    prerequisites = True
-except ImportError:
-    prerequisites = False
-
-from .general_network_features import GeneralNetworkFeatures
+elephant = lazy_import("elephant")
+pq = lazy_import("quantities")
 
 
 class NetworkFeatures(GeneralNetworkFeatures):
@@ -68,6 +65,15 @@ class NetworkFeatures(GeneralNetworkFeatures):
     covariance_bin_size : int
         The size of each bin in the ``covariance`` method.
         Default is 1.
+    distance_nr_neurons : {None, int}, optional
+        The number of neurons used in ``van_rossum_dist`` and
+        ``victor_purpura_dist``, which scale quadratically with the number
+        of neurons. The neurons are evenly spaced among all neurons, and are
+        the same for every model evaluation. If None, all neurons are used.
+        Default is None.
+    distance_nr_threads : int, optional
+        The number of threads used to calculate ``van_rossum_dist`` and
+        ``victor_purpura_dist``. Default is 1.
     logger_level : {"info", "debug", "warning", "error", "critical", None}, optional
         Set the threshold for the logging level. Logging messages less severe
         than this level is ignored. If None, no logging is performed.
@@ -98,6 +104,15 @@ class NetworkFeatures(GeneralNetworkFeatures):
     covariance_bin_size : int
         The size of each bin in the ``covariance`` method.
         Default is 1.
+    distance_nr_neurons : {None, int}, optional
+        The number of neurons used in ``van_rossum_dist`` and
+        ``victor_purpura_dist``, which scale quadratically with the number
+        of neurons. The neurons are evenly spaced among all neurons, and are
+        the same for every model evaluation. If None, all neurons are used.
+        Default is None.
+    distance_nr_threads : int, optional
+        The number of threads used to calculate ``van_rossum_dist`` and
+        ``victor_purpura_dist``. Default is 1.
 
     Notes
     -----
@@ -111,12 +126,39 @@ class NetworkFeatures(GeneralNetworkFeatures):
     covariance
     ======================= ======================= =======================
 
+    Intermediate results that several features need are calculated once for
+    each model evaluation, the first time a feature needs them, and are not
+    calculated if none of the features that need them are calculated:
+
+    ========================= ================================================
+    Intermediate result       Used by
+    ========================= ================================================
+    interspike intervals      binned_isi, average_isi, local_variation,
+                              average_local_variation
+    local variation           local_variation, average_local_variation
+    coefficient of variation  cv, average_cv
+    mean firing rate          average_firing_rate
+    binned spiketrains        corrcoef, covariance (shared if
+                              ``corrcoef_bin_size == covariance_bin_size``)
+    subsampled spiketrains    van_rossum_dist, victor_purpura_dist
+    Neo spiketrains           instantaneous_rate, corrcoef, covariance
+    ========================= ================================================
+
+    The remaining features are calculated directly from the concatenated
+    spike times in Spiketrains, without creating Neo spiketrains.
+    ``van_rossum_dist`` and ``victor_purpura_dist`` give the same distances
+    as Elephant, with a time constant of 1 s and a cost of shifting a spike
+    of 1 Hz, but the van Rossum distance is calculated in linear time for
+    each pair of neurons and the Victor-Purpura distance vectorized over
+    blocks of neurons. The cost is bounded by ``distance_nr_neurons``, and
+    the blocks can be spread across ``distance_nr_threads`` threads.
+
     All features in this set of features take the following input arguments:
 
     simulation_end : float
         The simulation end time
-    neo_spiketrains : list
-        A list of Neo spiketrains.
+    neo_spiketrains : Spiketrains
+        The spiketrains, which behave as a list of Neo spiketrains.
 
     The model must return:
 
@@ -145,9 +187,11 @@ class NetworkFeatures(GeneralNetworkFeatures):
                  isi_bin_size=1,
                  corrcoef_bin_size=1,
                  covariance_bin_size=1,
+                 distance_nr_neurons=None,
+                 distance_nr_threads=1,
                  logger_level="info"):
 
-        if not prerequisites:
+        if not (module_available("elephant") and module_available("quantities")):
             raise ImportError("Network features require: elephant and quantities")
 
         if units is None:
@@ -183,6 +227,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         self.isi_bin_size = isi_bin_size
         self.corrcoef_bin_size = corrcoef_bin_size
         self.covariance_bin_size = covariance_bin_size
+        self.distance_nr_neurons = distance_nr_neurons
+        self.distance_nr_threads = distance_nr_threads
 
 
     def cv(self, simulation_end, spiketrains):
@@ -193,8 +239,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         ----------
         simulation_end : float
             The simulation end time.
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -205,11 +251,7 @@ class NetworkFeatures(GeneralNetworkFeatures):
         if len(spiketrains) == 0:
             return None, None
 
-        cv = []
-        for spiketrain in spiketrains:
-            cv.append(elephant.statistics.cv(spiketrain))
-
-        return None, np.array(cv)
+        return None, np.array(self._intermediate(spiketrains, "cv"))
 
 
     def average_cv(self, simulation_end, spiketrains):
@@ -220,8 +262,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         ----------
         simulation_end : float
             The simulation end time.
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -232,11 +274,7 @@ class NetworkFeatures(GeneralNetworkFeatures):
         if len(spiketrains) == 0:
             return None, None
 
-        cv = []
-        for spiketrain in spiketrains:
-            cv.append(elephant.statistics.cv(spiketrain))
-
-        return None, np.mean(cv)
+        return None, np.mean(self._intermediate(spiketrains, "cv"))
 
 
 
@@ -248,8 +286,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         ----------
         simulation_end : float
             The simulation end time.
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -261,16 +299,21 @@ class NetworkFeatures(GeneralNetworkFeatures):
         if len(spiketrains) == 0:
             return None, None
 
-        binned_isi = []
-        bins = np.arange(0, spiketrains[0].t_stop.magnitude + self.isi_bin_size, self.isi_bin_size)
+        spiketrains = self._spiketrains(spiketrains)
 
-        for spiketrain in spiketrains:
-            if len(spiketrain) > 1:
-                isi = elephant.statistics.isi(spiketrain)
-                binned_isi.append(np.histogram(isi, bins=bins)[0])
+        bins = np.arange(0, spiketrains.t_stop + self.isi_bin_size, self.isi_bin_size)
+        nr_bins = len(bins) - 1
 
-            else:
-                binned_isi.append(np.zeros(len(bins) - 1))
+        intervals, neurons = self._intermediate(spiketrains, "isi")
+
+        # Same bins as numpy.histogram, the last bin includes the right edge
+        index = np.searchsorted(bins, intervals, side="right") - 1
+        index[intervals == bins[-1]] = nr_bins - 1
+        inside = (index >= 0) & (index < nr_bins)
+
+        counts = np.bincount(neurons[inside]*nr_bins + index[inside],
+                             minlength=len(spiketrains)*nr_bins)
+        binned_isi = list(counts.reshape(len(spiketrains), nr_bins))
 
         centers = bins[1:] - 0.5
         return centers, binned_isi
@@ -284,8 +327,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         ----------
         simulation_end : float
             The simulation end time.
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -296,12 +339,15 @@ class NetworkFeatures(GeneralNetworkFeatures):
         if len(spiketrains) == 0:
             return None, None
 
-        isi = []
-        for spiketrain in spiketrains:
-            if len(spiketrain) > 1:
-                isi.append(np.mean(elephant.statistics.isi(spiketrain)))
+        intervals, neurons = self._intermediate(spiketrains, "isi")
+
+        nr_intervals = np.bincount(neurons, minlength=len(spiketrains))
+        sum_intervals = np.bincount(neurons, intervals, minlength=len(spiketrains))
 
-        return None, np.mean(isi)
+        # Only spiketrains with more than one spike
+        valid = nr_intervals > 0
+
+        return None, np.mean(sum_intervals[valid]/nr_intervals[valid])
 
 
     def local_variation(self, simulation_end, spiketrains):
@@ -312,8 +358,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         ----------
         simulation_end : float
             The simulation end time.
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -324,15 +370,7 @@ class NetworkFeatures(GeneralNetworkFeatures):
         if len(spiketrains) == 0:
             return None, None
 
-        local_variation = []
-        for spiketrain in spiketrains:
-            isi = elephant.statistics.isi(spiketrain)
-            if len(isi) > 1:
-                local_variation.append(elephant.statistics.lv(isi))
-            else:
-                local_variation.append(None)
-
-        return None, local_variation
+        return None, list(self._intermediate(spiketrains, "local_variation"))
 
 
 
@@ -344,8 +382,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         ----------
         simulation_end : float
             The simulation end time.
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -356,11 +394,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         if len(spiketrains) == 0:
             return None, None
 
-        local_variation = []
-        for spiketrain in spiketrains:
-            isi = elephant.statistics.isi(spiketrain)
-            if len(isi) > 1:
-                local_variation.append(elephant.statistics.lv(isi))
+        local_variation = [lv for lv in self._intermediate(spiketrains, "local_variation")
+                           if lv is not None]
 
         return None, np.mean(local_variation)
 
@@ -373,8 +408,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         ----------
         simulation_end : float
             The simulation end time.
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -382,17 +417,10 @@ class NetworkFeatures(GeneralNetworkFeatures):
         average_firing_rate : float
             The mean firing rate of all neurons.
         """
-        average_firing_rates = []
-
         if len(spiketrains) == 0:
             return None, None
 
-        for spiketrain in spiketrains:
-            average_firing_rate = elephant.statistics.mean_firing_rate(spiketrain)
-            average_firing_rate.units = pq.Hz
-            average_firing_rates.append(average_firing_rate.magnitude)
-
-        return None, average_firing_rates
+        return None, list(self._intermediate(spiketrains, "firing_rate"))
 
 
     def instantaneous_rate(self, simulation_end, spiketrains):
@@ -403,8 +431,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         ----------
         simulation_end : float
             The simulation end time.
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -449,8 +477,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         ----------
         simulation_end : float
             The simulation end time.
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -461,8 +489,12 @@ class NetworkFeatures(GeneralNetworkFeatures):
         if len(spiketrains) == 0:
             return None, None
 
+        counts = self._spiketrains(spiketrains).counts
 
-        return None, elephant.statistics.fanofactor(spiketrains)
+        if np.all(counts == 0):
+            return None, np.nan
+
+        return None, counts.var()/counts.mean()
 
 
     def van_rossum_dist(self, simulation_end, spiketrains):
@@ -473,8 +505,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         ----------
         simulation_end : float
             The simulation end time.
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -485,12 +517,14 @@ class NetworkFeatures(GeneralNetworkFeatures):
         if len(spiketrains) == 0:
             return None, None
 
-        van_rossum_dist = elephant.spike_train_dissimilarity.van_rossum_dist(spiketrains)
+        distance_spiketrains = self._intermediate(spiketrains, "distance_spiketrains")
 
-        # van_rossum_dist returns 0.j imaginary parts in some cases
-        van_rossum_dist = np.real_if_close(van_rossum_dist)
-        if np.any(np.iscomplex(van_rossum_dist)):
-            return None, None
+        # Same time constant as elephant, 1 s
+        tau = float(pq.Quantity(1., pq.s).rescale(distance_spiketrains.units).magnitude)
+
+        van_rossum_dist = van_rossum_distances(distance_spiketrains,
+                                               tau,
+                                               nr_threads=self.distance_nr_threads)
 
         return None, van_rossum_dist
 
@@ -502,8 +536,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         ----------
         simulation_end : float
             The simulation end time.
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -515,7 +549,14 @@ class NetworkFeatures(GeneralNetworkFeatures):
             return None, None
 
 
-        victor_purpura_dist = elephant.spike_train_dissimilarity.victor_purpura_dist(spiketrains)
+        distance_spiketrains = self._intermediate(spiketrains, "distance_spiketrains")
+
+        # Same cost of shifting a spike as elephant, 1 Hz
+        q = 1./float(pq.Quantity(1., pq.s).rescale(distance_spiketrains.units).magnitude)
+
+        victor_purpura_dist = victor_purpura_distances(distance_spiketrains,
+                                                       q,
+                                                       nr_threads=self.distance_nr_threads)
 
         return None, victor_purpura_dist
 
@@ -528,8 +569,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         ----------
         simulation_end : float
             The simulation end time.
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -541,8 +582,7 @@ class NetworkFeatures(GeneralNetworkFeatures):
             return None, None
 
 
-        binned_sts = elephant.conversion.BinnedSpikeTrain(spiketrains,
-                                                          binsize=self.corrcoef_bin_size*self.units)
+        binned_sts = self._intermediate(spiketrains, "binned", self.corrcoef_bin_size)
         corrcoef = elephant.spike_train_correlation.corrcoef(binned_sts)
 
         return None, corrcoef
@@ -555,8 +595,8 @@ class NetworkFeatures(GeneralNetworkFeatures):
         ----------
         simulation_end : float
             The simulation end time.
-        neo_spiketrains : list
-            A list of Neo spiketrains.
+        neo_spiketrains : Spiketrains
+            The spiketrains, which behave as a list of Neo spiketrains.
 
         Returns
         -------
@@ -567,8 +607,91 @@ class NetworkFeatures(GeneralNetworkFeatures):
         if len(spiketrains) == 0:
             return None, None
 
-        binned_sts = elephant.conversion.BinnedSpikeTrain(spiketrains,
-                                                          binsize=self.covariance_bin_size*self.units)
+        binned_sts = self._intermediate(spiketrains, "binned", self.covariance_bin_size)
         covariance = elephant.spike_train_correlation.covariance(binned_sts)
 
         return None, covariance
+
+
+    def _isi(self, spiketrains):
+        """
+        The interspike intervals of all spiketrains, concatenated, and the
+        index of the spiketrain of each interval.
+        """
+        within = np.diff(spiketrains.neurons) == 0
+
+        intervals = np.diff(spiketrains.times)[within]
+        neurons = spiketrains.neurons[1:][within]
+
+        return intervals, neurons
+
+
+    def _cv(self, spiketrains):
+        """
+        The coefficient of variation of the spike times of each spiketrain,
+        numpy.nan for empty spiketrains.
+        """
+        neurons = spiketrains.neurons
+        counts = spiketrains.counts
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.bincount(neurons, spiketrains.times, minlength=len(spiketrains))/counts
+
+            deviation = spiketrains.times - mean[neurons]
+            std = np.sqrt(np.bincount(neurons, deviation*deviation, minlength=len(spiketrains))/counts)
+
+            return std/mean
+
+
+    def _local_variation(self, spiketrains):
+        """
+        The local variation of each spiketrain, None for spiketrains with less
+        than two interspike intervals.
+        """
+        intervals, neurons = self._intermediate(spiketrains, "isi")
+
+        within = np.diff(neurons) == 0
+        terms = np.diff(intervals)[within]/(intervals[:-1] + intervals[1:])[within]
+        pair_neurons = neurons[1:][within]
+
+        nr_terms = np.bincount(pair_neurons, minlength=len(spiketrains))
+        sum_terms = np.bincount(pair_neurons, terms*terms, minlength=len(spiketrains))
+
+        local_variation = list(3.*(sum_terms/np.maximum(nr_terms, 1)))
+        for i in np.flatnonzero(nr_terms == 0):
+            local_variation[i] = None
+
+        return local_variation
+
+
+    def _firing_rate(self, spiketrains):
+        """
+        The mean firing rate of each spiketrain in Hz.
+        """
+        to_Hz = float((1/spiketrains.units).rescale(pq.Hz).magnitude)
+
+        return to_Hz*(spiketrains.counts/spiketrains.t_stop)
+
+
+    def _distance_spiketrains(self, spiketrains):
+        """
+        The spiketrains of the ``distance_nr_neurons`` evenly spaced neurons
+        used in the spike distances.
+        """
+        nr_neurons = self.distance_nr_neurons
+        if nr_neurons is None or nr_neurons >= len(spiketrains):
+            return spiketrains
+
+        neurons = np.round(np.linspace(0, len(spiketrains) - 1, nr_neurons)).astype(int)
+
+        return Spiketrains([spiketrains.spike_times(i) for i in neurons],
+                           t_stop=spiketrains.t_stop,
+                           units=spiketrains.units)
+
+
+    def _binned(self, spiketrains, bin_size):
+        """
+        The spiketrains binned with bins of `bin_size` in ``units``.
+        """
+        return elephant.conversion.BinnedSpikeTrain(spiketrains.neo,
+                                                    binsize=bin_size*self.units)
@@ -0,0 +1,260 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+
+def _markage(times, neurons, tau):
+    """
+    For each spike, the sum of ``exp(-(t - t_k)/tau)`` over all earlier
+    spikes ``t_k`` of the same neuron.
+
+    Parameters
+    ----------
+    times : array
+        The spike times of all neurons, concatenated. The spike times of
+        each neuron must be sorted.
+    neurons : array
+        The index of the neuron of each spike in `times`.
+    tau : float
+        The time constant of the exponential kernel.
+
+    Returns
+    -------
+    markage : array
+        The markage of each spike.
+
+    Notes
+    -----
+    The recursion ``markage[i] = decay[i]*(markage[i - 1] + 1)`` is solved
+    with a parallel prefix scan, which needs ``log2(n)`` vectorized steps
+    where n is the largest number of spikes of a single neuron. The decay is
+    0 for the first spike of each neuron, which restarts the recursion.
+    """
+    decay = np.zeros(len(times))
+    same = np.diff(neurons) == 0
+    decay[1:][same] = np.exp(-np.diff(times)[same]/tau)
+
+    scale = decay.copy()
+    markage = decay.copy()
+
+    longest = np.bincount(neurons).max() if len(neurons) > 0 else 0
+
+    shift = 1
+    while shift < longest:
+        markage[shift:] = markage[shift:] + scale[shift:]*markage[:-shift]
+        scale[shift:] = scale[shift:]*scale[:-shift]
+        shift *= 2
+
+    return markage
+
+
+
+def _pairwise(block_function, nr_spiketrains, block_size, nr_threads):
+    """
+    Calculate a symmetric matrix from blocks of rows of its upper triangle.
+
+    Parameters
+    ----------
+    block_function : callable
+        ``block_function(start, stop)`` returns the elements of rows
+        ``start`` to ``stop`` and columns ``start`` to ``nr_spiketrains``.
+    nr_spiketrains : int
+        The number of rows and columns in the matrix.
+    block_size : int
+        The number of rows in each block.
+    nr_threads : int
+        The number of threads that calculate blocks in parallel.
+
+    Returns
+    -------
+    matrix : array
+        The symmetric matrix.
+    """
+    starts = list(range(0, nr_spiketrains, max(1, block_size)))
+    stops = starts[1:] + [nr_spiketrains]
+
+    def calculate(bounds):
+        return bounds[0], bounds[1], block_function(*bounds)
+
+    if nr_threads > 1 and len(starts) > 1:
+        pool = ThreadPool(min(nr_threads, len(starts)))
+        try:
+            blocks = pool.map(calculate, zip(starts, stops), chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        blocks = [calculate(bounds) for bounds in zip(starts, stops)]
+
+    matrix = np.zeros((nr_spiketrains, nr_spiketrains))
+    for start, stop, block in blocks:
+        matrix[start:stop, start:] = block
+
+    upper = np.triu(matrix, 1)
+    return np.diag(np.diag(matrix)) + upper + upper.T
+
+
+
+def van_rossum_distances(spiketrains, tau, nr_threads=1):
+    """
+    Calculate the van Rossum distance between all pairs of spiketrains.
+
+    Parameters
+    ----------
+    spiketrains : Spiketrains
+        The spiketrains.
+    tau : float
+        The time constant of the exponential kernel, in the units of
+        the spike times.
+    nr_threads : int, optional
+        The number of threads used to calculate the distances.
+        Default is 1.
+
+    Returns
+    -------
+    van_rossum_distances : array
+        The van Rossum distance between each pair of spiketrains.
+
+    Notes
+    -----
+    The distance uses the same normalization as
+    ``elephant.spike_train_dissimilarity.van_rossum_dist``, so the distance
+    between an empty spiketrain and a spiketrain with one spike is 1.
+
+    The exponentially filtered spiketrain of a neuron is found at all spike
+    times of the other neurons from the filtered value at the closest
+    earlier and later spike of the neuron (Houghton and Kreuz, 2012). Each
+    row of the distance matrix is therefore calculated in time linear in the
+    total number of spikes.
+    """
+    times = spiketrains.times
+    neurons = spiketrains.neurons
+    offsets = spiketrains.offsets
+    nr_spiketrains = len(spiketrains)
+
+    forward = _markage(times, neurons, tau)
+    backward = _markage(-times[::-1], neurons[::-1], tau)[::-1]
+
+    def block(start, stop):
+        rows = np.zeros((stop - start, nr_spiketrains - start))
+
+        for i in range(start, stop):
+            first, last = offsets[i], offsets[i + 1]
+
+            # All spikes of this neuron and the following neurons
+            other_times = times[first:]
+            index = np.searchsorted(times[first:last], other_times, side="right") + first
+
+            kernel_sum = np.zeros(len(other_times))
+
+            before = index > first
+            earlier = index[before] - 1
+            kernel_sum[before] = np.exp((times[earlier] - other_times[before])/tau)*(1 + forward[earlier])
+
+            after = index < last
+            later = index[after]
+            kernel_sum[after] += np.exp((other_times[after] - times[later])/tau)*(1 + backward[later])
+
+            rows[i - start, i - start:] = np.bincount(neurons[first:] - i,
+                                                      kernel_sum,
+                                                      minlength=nr_spiketrains - i)
+
+        return rows
+
+    block_size = int(np.ceil(nr_spiketrains/(4.*max(1, nr_threads))))
+    kernel_sums = _pairwise(block, nr_spiketrains, block_size, nr_threads)
+
+    diagonal = np.diag(kernel_sums)
+    squared = diagonal[:, None] + diagonal[None, :] - 2*kernel_sums
+
+    return np.sqrt(np.maximum(squared, 0))
+
+
+
+def victor_purpura_distances(spiketrains, q, nr_threads=1, max_elements=2**20):
+    """
+    Calculate the Victor-Purpura distance between all pairs of spiketrains.
+
+    Parameters
+    ----------
+    spiketrains : Spiketrains
+        The spiketrains.
+    q : float
+        The cost of shifting a spike, per unit of time, in the inverse units
+        of the spike times.
+    nr_threads : int, optional
+        The number of threads used to calculate the distances.
+        Default is 1.
+    max_elements : int, optional
+        The largest number of elements in each array of the dynamic program.
+        Rows are calculated in blocks small enough to stay below this.
+        Default is 2**20.
+
+    Returns
+    -------
+    victor_purpura_distances : array
+        The Victor-Purpura distance between each pair of spiketrains.
+
+    Notes
+    -----
+    The dynamic program of Victor and Purpura (1996) is run for a block of
+    spiketrains against all spiketrains at the same time, one spike of the
+    block spiketrains at a time. The minimum over inserted spikes is found
+    with a cumulative minimum, so the only Python loop is over the spikes of
+    the longest spiketrain in each block.
+    """
+    times = spiketrains.times
+    neurons = spiketrains.neurons
+    offsets = spiketrains.offsets
+    counts = spiketrains.counts
+    nr_spiketrains = len(spiketrains)
+
+    longest = counts.max() if nr_spiketrains > 0 else 0
+
+    # Spike times padded with inf after the last spike of each neuron
+    padded = np.full((nr_spiketrains, longest), np.inf)
+    padded[neurons, np.arange(len(times)) - offsets[neurons]] = times
+
+    index = np.arange(longest + 1, dtype=float)
+
+    def block(start, stop):
+        block_times = padded[start:stop]
+        other_times = padded[start:]
+        block_counts = counts[start:stop]
+        other_counts = counts[start:]
+        columns = np.arange(nr_spiketrains - start)
+
+        # cost[..., j] is the cost of transforming the first i spikes of a
+        # block spiketrain into the first j spikes of another spiketrain
+        cost = np.tile(index, (stop - start, nr_spiketrains - start, 1))
+
+        distances = np.zeros((stop - start, nr_spiketrains - start))
+        distances[block_counts == 0] = other_counts
+
+        for i in range(1, block_counts.max() + 1):
+            with np.errstate(invalid="ignore"):
+                shift = q*np.abs(block_times[:, i - 1, None, None] - other_times[None, :, :])
+
+            # Delete spike i, or shift it onto spike j
+            new_cost = np.empty_like(cost)
+            new_cost[..., 0] = i
+            np.minimum(cost[..., 1:] + 1, cost[..., :-1] + shift, out=new_cost[..., 1:])
+
+            # Insert spikes
+            new_cost -= index
+            np.minimum.accumulate(new_cost, axis=2, out=cost)
+            cost += index
+
+            finished = block_counts == i
+            if np.any(finished):
+                distances[finished] = cost[finished][:, columns, other_counts]
+
+        return distances
+
+    block_size = max(1, max_elements//max(1, nr_spiketrains*(longest + 1)))
+    if nr_threads > 1:
+        block_size = min(block_size, int(np.ceil(nr_spiketrains/(4.*nr_threads))))
+
+    return _pairwise(block, nr_spiketrains, block_size, nr_threads)
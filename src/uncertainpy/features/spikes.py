@@ -1,10 +1,12 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 from ..plotting.prettyplot import prettyPlot, create_figure, get_current_colormap
+from ..utils.lazy_import import lazy_import
 
-import matplotlib.pyplot as plt
 import numpy as np
 
+plt = lazy_import("matplotlib.pyplot")
+
 
 class Spike:
     """
@@ -191,7 +193,262 @@ class Spike:
 
 
 
-class Spikes:
+class SpikeTable(object):
+    """
+    The spikes found in a voltage trace, stored as arrays with one element for
+    each spike.
+
+    The table only stores the indices of each spike in the voltage trace,
+    and refers to the original time and voltage arrays instead of copying
+    the part of the voltage trace that belongs to each spike.
+
+    Parameters
+    ----------
+    time : array_like
+        The time of the voltage trace.
+    V : array_like
+        The voltage trace.
+    start : array_like
+        The index of the first point of each spike.
+    end : array_like
+        The index after the last point of each spike.
+    peak : array_like
+        The index of the peak of each spike.
+
+    Attributes
+    ----------
+    time : array
+        The time of the voltage trace.
+    V : array
+        The voltage trace.
+    start : array
+        The index of the first point of each spike.
+    end : array
+        The index after the last point of each spike.
+    peak : array
+        The index of the peak of each spike.
+
+    See also
+    --------
+    Spikes : Finding spikes in a voltage trace.
+    """
+    def __init__(self, time, V, start, end, peak):
+        self.time = np.asarray(time)
+        self.V = np.asarray(V)
+
+        self.start = np.asarray(start, dtype=int)
+        self.end = np.asarray(end, dtype=int)
+        self.peak = np.asarray(peak, dtype=int)
+
+
+    def __len__(self):
+        """
+        Find the number of spikes.
+
+        Returns
+        -------
+        int
+            The number of spikes.
+        """
+        return len(self.peak)
+
+
+    @property
+    def time_peak(self):
+        """
+        The time of the peak of each spike.
+
+        Returns
+        -------
+        time_peak : array
+            The time of the peak of each spike.
+        """
+        return self.time[self.peak]
+
+
+    @property
+    def V_peak(self):
+        """
+        The voltage at the peak of each spike.
+
+        Returns
+        -------
+        V_peak : array
+            The voltage at the peak of each spike.
+        """
+        return self.V[self.peak]
+
+
+    @property
+    def durations(self):
+        """
+        The duration of each spike, from the first to the last point of the
+        spike.
+
+        Returns
+        -------
+        durations : array
+            The duration of each spike.
+        """
+        return self.time[self.end - 1] - self.time[self.start]
+
+
+    @property
+    def lengths(self):
+        """
+        The number of points in each spike.
+
+        Returns
+        -------
+        lengths : array
+            The number of points in each spike.
+        """
+        return self.end - self.start
+
+
+    def spike(self, i):
+        """
+        Create a Spike object for spike number `i`. The time and voltage of the
+        spike are views into the original voltage trace.
+
+        Parameters
+        ----------
+        i : int
+            Spike number `i`.
+
+        Returns
+        -------
+        Spike
+            The Spike object for spike number `i`.
+        """
+        start, end, peak = self.start[i], self.end[i], self.peak[i]
+
+        return Spike(self.time[start:end], self.V[start:end],
+                     self.time[peak], self.V[peak], peak)
+
+
+    def AHP_minima(self):
+        """
+        The minimum of the voltage trace between the peaks of each pair of
+        consecutive spikes.
+
+        Returns
+        -------
+        AHP_minima : array
+            The minimum voltage between each pair of consecutive spikes,
+            with one element less than the number of spikes.
+        """
+        if len(self) < 2:
+            return np.array([])
+
+        return np.minimum.reduceat(self.V, self.peak)[:-1]
+
+
+    def interspike_intervals(self):
+        """
+        The time between the peaks of each pair of consecutive spikes.
+
+        Returns
+        -------
+        interspike_intervals : array
+            The interspike intervals, with one element less than the number of
+            spikes.
+        """
+        return np.diff(self.time_peak)
+
+
+    def widths(self):
+        """
+        The width of each spike at the midpoint between the voltage at the
+        start of the spike and the peak voltage of the spike.
+
+        Returns
+        -------
+        widths : array
+            The width of each spike. Spikes with less than three points, and
+            spikes that do not cross the midpoint both before and after the
+            peak, are numpy.nan.
+
+        Notes
+        -----
+        The width is the time between where the linear interpolation of the
+        voltage trace crosses the midpoint before and after the peak. If the
+        voltage trace crosses the midpoint several times, the crossings
+        closest to the peak are used.
+        """
+        widths = np.full(len(self), np.nan)
+
+        valid = (self.end - self.start >= 3) & (self.peak > self.start) & (self.end - 1 > self.peak)
+        valid = np.flatnonzero(valid)
+
+        if len(valid) == 0:
+            return widths
+
+        start, end, peak = self.start[valid], self.end[valid], self.peak[valid]
+
+        midpoint = (self.V[peak] + self.V[start])/2.
+
+        # The spike must start below the midpoint and fall below the midpoint
+        # again before the end
+        rises = self.V[start] <= midpoint
+        falls = self.V[end - 1] <= midpoint
+        crosses = rises & falls
+
+        # Last point at or below the midpoint before the peak
+        index, offsets, lengths = _segments(start, peak)
+        below = self.V[index] - np.repeat(midpoint, lengths) <= 0
+        position = np.maximum.reduceat(np.where(below, np.arange(len(index)), -1), offsets)
+        position[~crosses] = offsets[~crosses]
+        before = index[position]
+
+        # First point at or below the midpoint after the peak
+        index, offsets, lengths = _segments(peak + 1, end)
+        below = self.V[index] - np.repeat(midpoint, lengths) <= 0
+        position = np.minimum.reduceat(np.where(below, np.arange(len(index)), len(index)), offsets)
+        position[~crosses] = offsets[~crosses]
+        after = index[position]
+
+        root_1 = self._crossing(before, before + 1, midpoint)
+        root_2 = self._crossing(after - 1, after, midpoint)
+
+        widths[valid] = np.where(crosses, np.abs(root_2 - root_1), np.nan)
+
+        return widths
+
+
+    def _crossing(self, first, second, level):
+        """
+        The time where the straight line between the points `first` and
+        `second` of the voltage trace crosses `level`.
+        """
+        V_first = self.V[first] - level
+        V_second = self.V[second] - level
+
+        difference = V_first - V_second
+        fraction = np.divide(V_first, difference,
+                             out=np.zeros(len(difference)),
+                             where=difference != 0)
+
+        return self.time[first] + fraction*(self.time[second] - self.time[first])
+
+
+
+def _segments(starts, stops):
+    """
+    The indices of all points in the intervals ``[starts[i], stops[i])``
+    concatenated, the offset of each interval in the concatenated indices,
+    and the length of each interval.
+    """
+    lengths = stops - starts
+    offsets = np.cumsum(lengths) - lengths
+
+    index = np.arange(lengths.sum()) - np.repeat(offsets, lengths) + np.repeat(starts, lengths)
+
+    return index, offsets, lengths
+
+
+
+class Spikes(object):
     """
     Finds spikes in the given voltage trace and is a container for the resulting
     Spike objects.
@@ -231,6 +488,8 @@ class Spikes:
 
     Attributes
     ----------
+    table : SpikeTable
+        The spikes, stored as arrays.
     spikes : list
         A list of Spike objects.
     nr_spikes : int
@@ -257,6 +516,7 @@ class Spikes:
     See also
     --------
     Spike : The class for a single spike.
+    SpikeTable : The spikes stored as arrays.
     find_spikes : Finding spikes in the voltage trace.
     """
     def __init__(self,
@@ -272,6 +532,7 @@ class Spikes:
                  xlabel="",
                  ylabel=""):
 
+        self.table = SpikeTable([], [], [], [], [])
         self.spikes = []
         self.nr_spikes = 0
 
@@ -292,6 +553,33 @@ class Spikes:
                              min_duration=min_duration)
 
 
+    @property
+    def spikes(self):
+        """
+        The spikes as Spike objects. The Spike objects are created from
+        ``table`` the first time they are needed.
+
+        Parameters
+        ----------
+        new_spikes : list
+            A list of Spike objects.
+
+        Returns
+        -------
+        spikes : list
+            A list of Spike objects.
+        """
+        if self._spikes is None:
+            self._spikes = [self.table.spike(i) for i in range(len(self.table))]
+
+        return self._spikes
+
+
+    @spikes.setter
+    def spikes(self, new_spikes):
+        self._spikes = list(new_spikes)
+
+
     def __iter__(self):
         """
         Iterate over all spikes.
@@ -404,7 +692,7 @@ class Spikes:
 
         Notes
         -----
-        The spikes are added to ``self.spikes`` and ``self.nr_spikes`` is
+        The spikes are stored in ``self.table`` and ``self.nr_spikes`` is
         updated.
 
         The spikes are found by finding where the voltage trace goes above the
@@ -449,10 +737,9 @@ class Spikes:
         min_extent_from_peak = 1
         derivative_cutoff = 0.5
 
-        self.spikes = []
-
-        spike_start = 0
-        start_flag = False
+        starts = []
+        ends = []
+        peaks = []
 
         if extended_spikes:
             dVdt = np.gradient(voltage)
@@ -462,77 +749,199 @@ class Spikes:
 
         prev_spike_end = 0
 
-        for i in range(len(V)):
-            if voltage[i] > threshold and start_flag is False:
-                if i > 0:
-                    spike_start = i - 1
-                else:
-                    spike_start = i
+        crossings, terminations = self.threshold_crossings(voltage,
+                                                           threshold,
+                                                           end_threshold)
+
+        for i, j in zip(crossings, terminations):
+            if i > 0:
+                spike_start = i - 1
+            else:
+                spike_start = i
+
+            spike_end = j + 1
+
+            global_index = np.argmax(V[spike_start:spike_end]) + spike_start
+            V_max = V[global_index]
 
-                start_flag = True
+            # Discard the first spike if the spike max is at the first
+            # point in the voltage trace, or the voltage trace starts above
+            # the threshold
+            if global_index == 0 or spike_start == 0:
+                prev_spike_end = spike_end
                 continue
 
-            elif voltage[i] < (threshold + end_threshold) and start_flag is True:
-                start_flag = False
-                spike_end = i + 1
 
-                time_spike = time[spike_start:spike_end]
-                V_spike = V[spike_start:spike_end]
+            if extended_spikes:
+                lower = np.searchsorted(gt_derivative, prev_spike_end, side="right")
+                upper = np.searchsorted(gt_derivative, global_index, side="left")
+                spike_start = gt_derivative[lower:upper][0]
+
+                after_peak = lt_derivative[np.searchsorted(lt_derivative, global_index, side="right"):]
+                spike_end = self.consecutive(after_peak)[-1] + 1
 
-                spike_index = np.argmax(V_spike)
-                global_index = spike_index + spike_start
-                time_max = time[global_index]
-                V_max = V[global_index]
+            else:
+                # Check if the spike has the minimum required extent,
+                # if not extend the spike
+                # Should never be required with min_extent_from_peak = 1
+                if global_index > 0 and global_index - min_extent_from_peak < spike_start:
+                    spike_start = global_index - min_extent_from_peak
 
-                # Discard the first spike if the spike max is at the first
-                # point in the voltage trace, or the voltage trace starts above
-                # the threshold
-                if global_index == 0 or spike_start == 0:
-                    prev_spike_end = spike_end
+                if global_index < len(self.V) and global_index + min_extent_from_peak + 1 > spike_end:
+                    spike_end = global_index + min_extent_from_peak + 1
+
+            prev_spike_end = spike_end
+
+            start, end = slice(spike_start, spike_end).indices(len(V))[:2]
+
+            if not extended_spikes and trim:
+                bounds = self._trim_bounds(V, start, end, V_max,
+                                           threshold=rescaled_threshold,
+                                           min_extent_from_peak=min_extent_from_peak)
+
+                # The spike is removed if no points are above the threshold
+                if bounds is None:
                     continue
 
+                start, end = bounds
+
+            # Do not add if less than minimum height or less than minimum duration
+            if (abs(V_max - V[start:end].min()) >= min_amplitude) \
+                    and ((time[end - 1] - time[start]) >= min_duration):
+
+                starts.append(start)
+                ends.append(end)
+                peaks.append(global_index)
 
-                if extended_spikes:
-                    spike_start = gt_derivative[(gt_derivative > prev_spike_end) & (gt_derivative < global_index)][0]
-                    spike_end = self.consecutive(lt_derivative[lt_derivative > global_index])[-1] + 1
 
-                else:
-                    # Check if the spike has the minimum required extent,
-                    # if not extend the spike
-                    # Should never be required with min_extent_from_peak = 1
-                    if global_index > 0 and global_index - min_extent_from_peak < spike_start:
-                        spike_start = global_index - min_extent_from_peak
+        self.table = SpikeTable(time, V, starts, ends, peaks)
+        self._spikes = None
+        self.nr_spikes = len(self.table)
 
-                    if global_index < len(self.V) and global_index + min_extent_from_peak + 1 > spike_end:
-                        spike_end = global_index + min_extent_from_peak + 1
 
-                time_spike = time[spike_start:spike_end]
-                V_spike = V[spike_start:spike_end]
 
+    def _trim_bounds(self, V, start, end, V_max, threshold, min_extent_from_peak=1):
+        """
+        The start and end index of a spike after it is trimmed as by
+        Spike.trim, or None if the spike is removed.
+        """
+        V_spike = V[start:end]
+
+        indices = np.where(V_spike > threshold)[0]
 
-                spike = Spike(time_spike, V_spike, time_max, V_max, global_index)
+        if len(indices) == 0:
+            return None
 
+        peak_index = np.where(V_spike == V_max)[0][0]
 
-                if not extended_spikes and trim:
-                    spike.trim(threshold=rescaled_threshold,
-                               min_extent_from_peak=min_extent_from_peak)
+        if indices[0] > 0:
+            start_index = indices[0] - 1
+        else:
+            start_index = indices[0]
 
-                # Do not add if the spike is empty or less than minimum height
-                # or less than minimum duration
-                if spike.V is not None \
-                        and (abs(spike.V_spike - spike.V.min()) >= min_amplitude) \
-                        and ((spike.time[-1] - spike.time[0]) >= min_duration):
+        end_index = indices[-1] + 2
 
-                    self.spikes.append(spike)
+        if start_index > 0 and start_index > peak_index - min_extent_from_peak:
+            start_index = peak_index - min_extent_from_peak
 
+        if end_index < len(V_spike) and end_index < peak_index + min_extent_from_peak + 1:
+            end_index = peak_index + min_extent_from_peak + 1
 
-                prev_spike_end = spike_end
+        start_index, end_index = slice(start_index, end_index).indices(len(V_spike))[:2]
 
+        return start + start_index, start + end_index
 
-        self.nr_spikes = len(self.spikes)
 
 
 
+    def threshold_crossings(self, voltage, threshold, end_threshold=-10):
+        """
+        Find where the voltage trace goes above the `threshold`, and where it
+        afterwards falls below `threshold` + `end_threshold`.
+
+        Parameters
+        ----------
+        voltage : array_like
+            The voltage trace.
+        threshold : {int, float}
+            The threshold for the start of a spike.
+        end_threshold : {int, float}, optional
+            The end threshold for a spike relative to the threshold.
+            Default is -10.
+
+        Returns
+        -------
+        crossings : array
+            The index of the first point above `threshold` of each spike.
+        terminations : array
+            The index of the first point below `threshold` + `end_threshold`
+            after each crossing. Spikes that do not fall below
+            `threshold` + `end_threshold` before the end of the voltage trace
+            are not included.
+
+        Notes
+        -----
+        When `end_threshold` is not positive, a point can not both be above
+        the threshold and below the end threshold, and the voltage trace is
+        above the threshold (within a spike) if the last point outside the
+        interval between the two thresholds was above the threshold.
+        The crossings are then found without looping over the voltage trace,
+        from where this state changes.
+        """
+        voltage = np.asarray(voltage)
+
+        above = voltage > threshold
+        below = voltage < (threshold + end_threshold)
+
+        if end_threshold > 0:
+            return self._walk_crossings(above, below)
+
+        indices = np.arange(len(voltage))
+        last_event = np.maximum.accumulate(np.where(above | below, indices, 0))
+
+        within = above[last_event]
+
+        changes = np.diff(within.astype(np.int8))
+
+        crossings = np.flatnonzero(changes == 1) + 1
+        if len(within) > 0 and within[0]:
+            crossings = np.concatenate(([0], crossings))
+
+        terminations = np.flatnonzero(changes == -1) + 1
+
+        return crossings[:len(terminations)], terminations
+
+
+    def _walk_crossings(self, above, below):
+        """
+        Find the crossings when a point can be both above the threshold and
+        below the end threshold, by jumping from crossing to crossing.
+        """
+        above = np.flatnonzero(above)
+        below = np.flatnonzero(below)
+
+        crossings = []
+        terminations = []
+
+        position = 0
+        while True:
+            index = np.searchsorted(above, position)
+            if index == len(above):
+                break
+
+            crossing = above[index]
+
+            index = np.searchsorted(below, crossing, side="right")
+            if index == len(below):
+                break
+
+            crossings.append(crossing)
+            terminations.append(below[index])
+
+            position = below[index] + 1
+
+        return np.array(crossings, dtype=int), np.array(terminations, dtype=int)
+
 
     def consecutive(self, data):
         """
@@ -548,15 +957,17 @@ class Spikes:
         array_like
             The first consecutive array
         """
+        data = np.asarray(data)
+
+        if len(data) == 0:
+            raise IndexError("data is empty")
+
+        gaps = np.flatnonzero(np.diff(data) != 1)
 
-        result = [data[0]]
-        d_prev = data[0]
-        for d in data[1:]:
-            if d_prev + 1 != d:
-                return result
-            d_prev = d
+        if len(gaps) > 0:
+            return data[:gaps[0] + 1]
 
-        return result
+        return data
 
 
     def plot_spikes(self, save_name=None):
@@ -1,13 +1,5 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-try:
-    import scipy.interpolate
-    import scipy.optimize
-
-    prerequisites = True
-except ImportError:
-    prerequisites = False
-
 import numpy as np
 
 from .general_spiking_features import GeneralSpikingFeatures
@@ -125,11 +117,6 @@ class SpikingFeatures(GeneralSpikingFeatures):
     strict : bool
         If missing info values should raise an error.
 
-    Raises
-    ------
-    ImportError
-        If scipy is not installed.
-
     Notes
     -----
     The implemented features are:
@@ -167,9 +154,6 @@ class SpikingFeatures(GeneralSpikingFeatures):
                  strict=True,
                  logger_level="info"):
 
-        if not prerequisites:
-            raise ImportError("Spiking features require: scipy")
-
         implemented_labels = {"nr_spikes": ["Number of spikes"],
                               "spike_rate": ["Spike rate (1/ms)"],
                               "time_before_first_spike": ["Time (ms)"],
@@ -254,12 +238,11 @@ class SpikingFeatures(GeneralSpikingFeatures):
         if info["stimulus_start"] >= info["stimulus_end"]:
             raise ValueError("stimulus_start >= stimulus_end.")
 
-        nr_spikes = 0
-        for spike in spikes:
-            if info["stimulus_start"] < spike.time_spike < info["stimulus_end"]:
-                nr_spikes += 1
+        time_peak = spikes.table.time_peak
+        nr_spikes = np.count_nonzero((time_peak > info["stimulus_start"])
+                                     & (time_peak < info["stimulus_end"]))
 
-        return None, nr_spikes
+        return None, int(nr_spikes)
 
 
     def time_before_first_spike(self, time, spikes, info):
@@ -306,7 +289,7 @@ class SpikingFeatures(GeneralSpikingFeatures):
         if spikes.nr_spikes <= 0:
             return None, None
 
-        time = spikes.spikes[0].time_spike - info["stimulus_start"]
+        time = spikes.table.time_peak[0] - info["stimulus_start"]
 
         return None, time
 
@@ -404,9 +387,7 @@ class SpikingFeatures(GeneralSpikingFeatures):
         if spikes.nr_spikes <= 0:
             return None, None
 
-        sum_AP_overshoot = 0
-        for spike in spikes:
-            sum_AP_overshoot += spike.V_spike
+        sum_AP_overshoot = np.sum(spikes.table.V_peak)
 
         return None, sum_AP_overshoot/float(spikes.nr_spikes)
 
@@ -439,9 +420,7 @@ class SpikingFeatures(GeneralSpikingFeatures):
         if spikes.nr_spikes <= 2:
             return None, None
 
-        sum_AHP_depth = 0
-        for i in range(spikes.nr_spikes - 1):
-            sum_AHP_depth += min(self.values[spikes[i].global_index:spikes[i+1].global_index])
+        sum_AHP_depth = np.sum(spikes.table.AHP_minima())
 
         return None, sum_AHP_depth/float(spikes.nr_spikes)
 
@@ -474,28 +453,20 @@ class SpikingFeatures(GeneralSpikingFeatures):
         if spikes.nr_spikes <= 0:
             return None, None
 
-        sum_AP_width = 0
-        for spike in spikes:
-            if len(spike.V) < 3:
-                logger.warning("Spike with no width found (only one or two time points in spike).")
-                continue
-
-            V_width = (spike.V_spike + spike.V[0])/2.
+        table = spikes.table
 
-            V_interpolation = scipy.interpolate.interp1d(spike.time, spike.V - V_width)
+        short = table.lengths < 3
+        nr_short = np.count_nonzero(short)
+        if nr_short > 0:
+            logger.warning("{} spike(s) with no width found (only one or two time points in spike).".format(nr_short))
 
-            # root1 = scipy.optimize.fsolve(U_interpolation, (spike.t_spike - spike.t[0])/2. + spike.t[0])
-            # root2 = scipy.optimize.fsolve(U_interpolation, (spike.t[-1] - spike.t_spike)/2. + spike.t_spike)
-
-            try:
-                root1 = scipy.optimize.brentq(V_interpolation, spike.time[0], spike.time_spike)
-                root2 = scipy.optimize.brentq(V_interpolation, spike.time_spike, spike.time[-1])
-
-            except ValueError:
-                return None, None
+        widths = table.widths()[~short]
 
+        # No crossing of the midpoint on one side of the peak
+        if np.any(np.isnan(widths)):
+            return None, None
 
-            sum_AP_width += abs(root2 - root1)
+        sum_AP_width = np.sum(widths)
 
         return None, sum_AP_width/float(spikes.nr_spikes)
 
@@ -525,11 +496,7 @@ class SpikingFeatures(GeneralSpikingFeatures):
         if spikes.nr_spikes <= 0:
             return None, None
 
-        durations = []
-        for spike in spikes:
-            durations.append(spike.time[-1] - spike.time[0])
-
-        return None, np.mean(durations)
+        return None, np.mean(spikes.table.durations)
 
 
 
@@ -578,12 +545,8 @@ class SpikingFeatures(GeneralSpikingFeatures):
 
         k = min(4, int(round(N-1)/5.))
 
-        ISIs = []
-        for i in range(N-1):
-            ISIs.append(spikes[i+1].time_spike - spikes[i].time_spike)
+        ISIs = spikes.table.interspike_intervals()
 
-        A = 0
-        for i in range(k+1, N-1):
-            A += (ISIs[i] - ISIs[i-1])/(ISIs[i] + ISIs[i-1])
+        A = np.sum((ISIs[k+1:] - ISIs[k:-1])/(ISIs[k+1:] + ISIs[k:-1]))
 
         return None, A/(N - k - 1)
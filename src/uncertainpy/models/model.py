@@ -43,6 +43,15 @@ class Model(object):
         Set the threshold for the logging level. Logging messages less severe
         than this level is ignored. If None, no logging to file is performed.
         Default logger level is "info".
+    batch : bool, optional
+        True if the model is a batch model, meaning ``run`` evaluates the
+        model for several sets of parameters in a single call. See
+        ``evaluate_batch`` for the requirements of batch models.
+        Default is False.
+    batch_size : {None, int}, optional
+        The maximum number of parameter sets sent to a single call of a batch
+        model. If None, the parameter sets are split evenly between the CPUs.
+        Default is None.
     **model_kwargs
         Any number of arguments passed to the model function when it is run.
 
@@ -65,11 +74,17 @@ class Model(object):
         Ignore the model results when calculating uncertainties, which means the
         uncertainty is not calculated for the model. The model results are still
         postprocessed if a postprocessing is implemented. Default is False.
+    batch : bool
+        True if the model is a batch model.
+    batch_size : {None, int}
+        The maximum number of parameter sets sent to a single call of a batch
+        model.
 
     See Also
     --------
     uncertainpy.models.Model.run
     uncertainpy.models.Model.postprocess
+    uncertainpy.models.Model.evaluate_batch
     """
     def __init__(self,
                  run=None,
@@ -79,12 +94,16 @@ class Model(object):
                  ignore=False,
                  suppress_graphics=False,
                  logger_level="info",
+                 batch=False,
+                 batch_size=None,
                  **model_kwargs):
 
         self.interpolate = interpolate
         self.labels = labels
         self.ignore = ignore
         self.suppress_graphics = suppress_graphics
+        self.batch = batch
+        self.batch_size = batch_size
 
         self.model_kwargs = model_kwargs
 
@@ -260,6 +279,106 @@ class Model(object):
 
         return model_result
 
+
+    def evaluate_batch(self, **parameters):
+        """
+        Run a batch model once for several sets of parameters and default
+        model_kwargs options, validate the result, and split it into the
+        result of each set of parameters.
+
+        Parameters
+        ----------
+        **parameters : A number of named arguments (name=array).
+            The parameters of the model. Each parameter is an array with one
+            value for each set of parameters.
+
+        Returns
+        -------
+        model_results : list
+            A list with the model result, ``(time, values, info, ...)``, of
+            each set of parameters. Each model result is on the same form as
+            returned by ``evaluate``.
+
+        Raises
+        ------
+        ValueError
+            If the model does not return one result for each set of parameters.
+
+        Notes
+        -----
+        A batch model has the same requirements as a regular model (see
+        ``run``), except that:
+
+        1. **Input.**
+           Each of the parameters given as arguments is a one dimensional
+           array, with one element for each set of parameters. Together, the
+           parameters form a two dimensional array with one row for each set of
+           parameters. The model_kwargs options are not batched.
+
+        2. **Output.**
+           The output is stacked, with one element for each set of parameters:
+
+            1. **Time** (``time``).
+               Either a single time array shared by all sets of parameters, or
+               a list (or 2D array) with one time array for each set of
+               parameters.
+
+            2. **Model output** (``values``).
+               A list or array where the first axis has one element for each
+               set of parameters.
+
+            3. **Additional info** (``info``).
+               Each info object is either a single dictionary shared by all
+               sets of parameters, or a list with one element for each set of
+               parameters.
+
+        The result of each set of parameters is then postprocessed, and the
+        features calculated from it, as for a regular model.
+
+        See also
+        --------
+        uncertainpy.models.Model.run : Requirements for the model run function.
+        """
+        all_parameters = self.model_kwargs.copy()
+        all_parameters.update(parameters)
+
+        nr_samples = len(next(iter(parameters.values())))
+
+        model_result = self.run(**all_parameters)
+
+        self.validate_run(model_result)
+
+        time, values = model_result[:2]
+        info = model_result[2:]
+
+        if len(values) != nr_samples:
+            raise ValueError("Batch model {} returns {} values for {} sets of parameters. ".format(self.name, len(values), nr_samples)
+                             + "A batch model must return one result for each set of parameters.")
+
+        # A single info dictionary is shared by all sets of parameters
+        info = [[info_object]*nr_samples if isinstance(info_object, dict) else info_object
+                for info_object in info]
+
+        for info_object in info:
+            if len(info_object) != nr_samples:
+                raise ValueError("Batch model {} returns an info object with {} ".format(self.name, len(info_object))
+                                 + "elements for {} sets of parameters. ".format(nr_samples)
+                                 + "Each info object of a batch model must have one element for each set of parameters.")
+
+        # Time is either shared by all sets of parameters or given for each set
+        if np.ndim(time) == 2 or \
+            (isinstance(time, (list, tuple)) and len(time) == nr_samples
+             and (time[0] is None or np.ndim(time[0]) > 0)):
+            times = time
+        else:
+            times = [time]*nr_samples
+
+        model_results = []
+        for i in range(nr_samples):
+            model_results.append((times[i], values[i]) + tuple(info_object[i] for info_object in info))
+
+        return model_results
+
     @property
     def postprocess(self, *model_result):
         """
@@ -497,3 +616,16 @@ class Model(object):
         """
         for parameter in parameters:
             setattr(self, parameter, parameters[parameter])
+
+
+
+    def initialize(self):
+        """
+        Prepare the model for evaluations in the current process.
+
+        Run once in each worker process when it is started, before any model
+        evaluations are performed in that process. Can be overridden to
+        perform expensive setup only once per process, for example loading a
+        simulator model. By default nothing is done.
+        """
+        pass
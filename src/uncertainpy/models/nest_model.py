@@ -1,16 +1,13 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-try:
-    import nest
-
-    prerequisites = True
-except ImportError:
-    prerequisites = False
-
 import numpy as np
 
 from .model import Model
 from ..utils.logger import setup_module_logger, get_logger
+from ..utils.spike_matrix import SpikeMatrix
+from ..utils.lazy_import import lazy_import, module_available
+
+nest = lazy_import("nest")
 
 class NestModel(Model):
     """
@@ -75,7 +72,7 @@ class NestModel(Model):
                  **model_kwargs):
 
 
-        if not prerequisites:
+        if not module_available("nest"):
             raise ImportError("NestModel requires: nest")
 
         super(NestModel, self).__init__(run=run,
@@ -156,6 +153,11 @@ class NestModel(Model):
         timestep in the simulation the result is 0 if there is no spike
         and 1 if there is a spike.
 
+        The result is stored as a sparse SpikeMatrix with only the index of
+        the time step of each spike, which is converted to a dense array only
+        when a dense array is needed, for example by the polynomial chaos
+        expansions.
+
         Parameters
         ----------
         simulation_end : {int, float}
@@ -167,28 +169,25 @@ class NestModel(Model):
         -------
         time : array
             A time array of all time points in the Nest simulation.
-        spiketrains : list
-            A list of the probability for a spike at each timestep, for each
-            neuron.
+        spiketrains : SpikeMatrix
+            The probability for a spike at each timestep, for each neuron, as
+            a sparse matrix with shape ``(nr_neurons, len(time))``.
 
         Example
         -------
         In a simulation that gives the spiketrain ``[0, 2, 3]``, with a
         time resolution of 0.5 ms and that ends after 4 ms,
         the resulting spike train become:
-        ``[1, 0, 0, 0, 1, 0, 1, 0, 0]``.
+        ``[1, 0, 0, 0, 1, 0, 1, 0]``.
+
+        See also
+        --------
+        uncertainpy.utils.SpikeMatrix
         """
 
         dt = nest.GetKernelStatus()["resolution"]
         time = np.arange(0, simulation_end, dt)
 
-        expanded_spiketrains = []
-        for spiketrain in spiketrains:
-            binary_spike = np.zeros(len(time))
-            binary_spike[np.in1d(time, spiketrain)] = 1
-
-            expanded_spiketrains.append(binary_spike)
-
-        values = np.array(expanded_spiketrains)
+        values = SpikeMatrix.from_spiketrains(spiketrains, time)
 
         return time, values
\ No newline at end of file
@@ -9,6 +9,12 @@ from .model import Model
 from ..utils.logger import setup_module_logger, get_logger
 
 
+# The NEURON models and Python run functions already loaded in this process.
+# NEURON has a single global state in each process, so a model is only loaded
+# once in each worker process and reused by every evaluation in that process.
+_sessions = {}
+
+
 class NeuronModel(Model):
     """
     Class for Neuron simulator models.
@@ -56,6 +62,11 @@ class NeuronModel(Model):
         Default logger level is "info".
     info : dict, optional
         Dictionary added to info. Default is an empty dictionary.
+    record_interval : {None, float}, optional
+        The time interval in ms the time and voltage are recorded with. If
+        None, the values at every time step of the simulation are recorded.
+        Recording with a larger interval than the time step of the
+        simulation reduces the size of the model result. Default is None.
     **model_kwargs
         Any number of arguments passed to the model function when it is run.
 
@@ -72,6 +83,8 @@ class NeuronModel(Model):
         an interpolation of the results is performed. Default is False.
     suppress_graphics : bool
         Suppress all graphics created by the model.
+    record_interval : {None, float}
+        The time interval in ms the time and voltage are recorded with.
     ignore : bool
         Ignore the model results when calculating uncertainties, which means the
         uncertainty is not calculated for the model. The model results are still
@@ -85,6 +98,12 @@ class NeuronModel(Model):
     Notes
     -----
     Measures the voltage in the section with name ``soma``.
+
+    The model is only loaded once in each process, the first time it is run
+    or when the process is started as a worker process of RunModel.
+    The model state is reset with ``finitialize`` after the parameters are
+    set, at the start of each simulation. The recordings are reused by each
+    simulation, and are redone if `record_interval` changes.
     """
     def __init__(self,
                  file="mosinit.hoc",
@@ -99,6 +118,7 @@ class NeuronModel(Model):
                  suppress_graphics=True,
                  logger_level="info",
                  info={},
+                 record_interval=None,
                  **model_kwargs):
 
         super(NeuronModel, self).__init__(interpolate=interpolate,
@@ -110,6 +130,7 @@ class NeuronModel(Model):
         self.file = file
         self.path = path
         self.info = info
+        self.record_interval = record_interval
 
         if stimulus_end:
             self.info["stimulus_end"] = stimulus_end
@@ -155,15 +176,17 @@ class NeuronModel(Model):
         os.chdir(path)
 
         try:
-            import neuron
-        except ImportError:
-            raise ImportError("NeuronModel requires: neuron")
+            try:
+                import neuron
+            except ImportError:
+                raise ImportError("NeuronModel requires: neuron")
 
-        h = neuron.h
+            h = neuron.h
 
-        h.load_file(0, file.encode())
+            h.load_file(0, file.encode())
 
-        os.chdir(current_dir)
+        finally:
+            os.chdir(current_dir)
 
         return h
 
@@ -202,15 +225,80 @@ class NeuronModel(Model):
         module_path = module_path.strip(os.sep)
         module_name = module_path.replace(os.sep, ".")
 
-        module = importlib.import_module(module_name)
-        model = getattr(module, name)
+        try:
+            module = importlib.import_module(module_name)
+            model = getattr(module, name)
 
-        os.chdir(current_dir)
+        finally:
+            os.chdir(current_dir)
 
         return model
 
 
 
+    def _session_key(self):
+        if self.file.endswith(".py"):
+            return (os.path.abspath(os.path.join(self.path, self.file)), self.name)
+        else:
+            return (os.path.abspath(os.path.join(self.path, self.file)), None)
+
+
+    def load_session(self):
+        """
+        Load the Neuron model in the current process, if it is not already
+        loaded.
+
+        Returns
+        -------
+        session : dict
+            The loaded model. Contains the Neuron ``h`` object for ``.hoc``
+            files, or the run function ``run`` for ``.py`` files.
+
+        Raises
+        ------
+        ValueError
+            If the file is not a ``.hoc`` or ``.py`` file.
+        """
+        key = self._session_key()
+
+        if key not in _sessions:
+            if self.file.endswith(".hoc"):
+                session = {"h": self.load_neuron(self.path, self.file),
+                           "time": None,
+                           "record_interval": None,
+                           "setters": {}}
+
+            elif self.file.endswith(".py"):
+                session = {"run": self.load_python(self.path, self.file, self.name)}
+
+            else:
+                raise ValueError("Unknown fileformat on file: {}".format(self.file))
+
+            _sessions[key] = session
+
+        return _sessions[key]
+
+
+    def initialize(self):
+        """
+        Load the Neuron model once in the current process. Run once in each
+        worker process when it is started, so the model is not loaded for
+        each evaluation.
+        """
+        self.load_session()
+
+
+    def __getstate__(self):
+        # Neuron objects can not be pickled, and are recreated from the
+        # session in each process
+        state = self.__dict__.copy()
+        state["h"] = None
+        state["time"] = None
+
+        return state
+
+
+
     # Be really careful with these. Need to make sure that all references to
     # neuron are inside this class
     def _record(self, ref_data):
@@ -218,10 +306,25 @@ class NeuronModel(Model):
         Record data from a neuron simulation.
         """
         data = self.h.Vector()
-        data.record(getattr(self.h, ref_data))
+        self._record_into(data, getattr(self.h, ref_data))
         return data
 
 
+    def _record_into(self, vector, reference):
+        """
+        Record `reference` into `vector`, with the recording interval if
+        given. With a recording interval the memory for the whole recording
+        is allocated up front.
+        """
+        if self.record_interval is None:
+            vector.record(reference)
+        else:
+            if hasattr(self.h, "tstop"):
+                vector.buffer_size(int(np.ceil(self.h.tstop/self.record_interval)) + 1)
+
+            vector.record(reference, self.record_interval)
+
+
     def _to_array(self, hocObject):
         """
         Convert a Neuron Vector object to an array.
@@ -235,16 +338,31 @@ class NeuronModel(Model):
         -------
         array : array
             The converted array.
+
+        Notes
+        -----
+        The Vector is read directly through a NumPy view of its memory when
+        the installed version of Neuron supports it, and copied once into a
+        new array, as the Vector is reused by the next simulation.
         """
+        if hasattr(hocObject, "as_numpy"):
+            return np.array(hocObject.as_numpy(), dtype=float)
+
         array = np.zeros(int(round(hocObject.size())))
         hocObject.to_python(array)
         return array
 
 
-    def _record_v(self):
+    def _record_v(self, rerecord=False):
         """
         Record voltage in the soma.
 
+        Parameters
+        ----------
+        rerecord : bool, optional
+            If the voltage should be recorded into a new Vector, even if it is
+            already recorded. Default is False.
+
         Raises
         ------
         RuntimeError
@@ -253,7 +371,7 @@ class NeuronModel(Model):
         # if not hasattr(self.h, "soma"):
         #     raise RuntimeError("No section with name soma found in: {}. Unable to record from soma".format(self.name))
 
-        if not hasattr(self.h, "voltage_soma"):
+        if rerecord or not hasattr(self.h, "voltage_soma"):
             # self.h("objref voltage_soma")
             # self.h("voltage_soma = new Vector()")
 
@@ -261,10 +379,13 @@ class NeuronModel(Model):
 
             for section in self.h.allsec():
                 if section.name().lower() == "soma":
-                    self.h("objref voltage_soma")
+                    if not hasattr(self.h, "voltage_soma"):
+                        self.h("objref voltage_soma")
+
+                    # Replacing the Vector removes any previous recording
                     self.h("voltage_soma = new Vector()")
 
-                    self.h.voltage_soma.record(section(0.5)._ref_v)
+                    self._record_into(self.h.voltage_soma, section(0.5)._ref_v)
                     break
 
         if not hasattr(self.h, "voltage_soma"):
@@ -376,16 +497,32 @@ class NeuronModel(Model):
         uncertainpy.models.Model.run : Requirements for the model run function.
         """
 
-        self.h = self.load_neuron(self.path, self.file)
+        session = self.load_session()
+        self.h = session["h"]
 
         self.set_parameters(parameters)
 
+        # The recordings are reused by every simulation in the session,
+        # unless the recording interval has changed
+        rerecord = session["time"] is not None \
+            and session["record_interval"] != self.record_interval
+
+        self.time = None if rerecord else session["time"]
         self._record_t()
-        self._record_v()
+        session["time"] = self.time
+        session["record_interval"] = self.record_interval
+
+        self._record_v(rerecord)
+
+        # Reset the state left by the previous simulation in the session
+        if hasattr(self.h, "v_init"):
+            self.h.finitialize(self.h.v_init)
+        else:
+            self.h.finitialize()
 
         self.h.run()
 
-        values = np.array(self.h.voltage_soma.to_python())
+        values = self._to_array(self.h.voltage_soma)
         time = self._to_array(self.time)
 
         return time, values, self.info
@@ -428,7 +565,7 @@ class NeuronModel(Model):
         uncertainpy.models.Model.run : Requirements for the model run function.
         """
 
-        model = self.load_python(self.path, self.file, self.name)
+        model = self.load_session()["run"]
 
         result = model(**parameters)
 
@@ -459,9 +596,43 @@ class NeuronModel(Model):
         parameters : dict
             A dictionary with parameter names as keys and the parameter value as
             value.
+
+        Notes
+        -----
+        The parameters are assigned directly through a reference to each hoc
+        variable, which is looked up once in each process. Parameters that
+        are not top level hoc variables, such as ``soma.gnabar_hh``, are
+        set by executing ``parameter = value`` in hoc.
         """
+        if self._session_key() in _sessions:
+            setters = _sessions[self._session_key()]["setters"]
+        else:
+            setters = {}
+
         for parameter in parameters:
-            self.h(parameter + " = " + str(parameters[parameter]))
+            if parameter not in setters:
+                setters[parameter] = self._setter(parameter)
+
+            setters[parameter](parameters[parameter])
+
+
+    def _setter(self, parameter):
+        """
+        Create a function that sets a parameter in the neuron model.
+        """
+        h = self.h
+
+        try:
+            reference = getattr(h, "_ref_" + parameter)
+
+            def setter(value):
+                reference[0] = float(value)
+
+        except (AttributeError, LookupError, TypeError, ValueError):
+            def setter(value):
+                h(parameter + " = " + str(value))
+
+        return setter
 
 
     def postprocess(self, time, values, info):
@@ -6,7 +6,9 @@ import fileinput
 import sys
 import collections
 
-import chaospy as cp
+from .utils.lazy_import import lazy_import
+
+cp = lazy_import("chaospy")
 
 
 __all__ = ["Parameters", "Parameter"]
@@ -3,7 +3,6 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import glob
 import os
 
-import matplotlib.pyplot as plt
 import numpy as np
 
 from .prettyplot import prettyPlot, prettyBar
@@ -11,9 +10,13 @@ from .prettyplot import spines_color, get_current_colormap
 from .prettyplot import get_colormap_tableu20, set_style, get_colormap, reset_style
 from .prettyplot import axis_grey, labelsize, fontsize, titlesize, linewidth
 
-import seaborn as sns
 from ..data import Data
 from ..utils.logger import setup_module_logger, get_logger
+from ..utils.lazy_import import lazy_import
+from ..utils.spike_matrix import SpikeMatrix
+
+plt = lazy_import("matplotlib.pyplot")
+sns = lazy_import("seaborn")
 
 
 # TODO compare plots in a grid of all plots,
@@ -320,7 +323,8 @@ class PlotUncertainty(object):
 
     def evaluations_2d(self, feature=None, foldername="", **plot_kwargs):
         """
-        Plot all 2D evaluations for a specific model/feature.
+        Plot all 2D evaluations for a specific model/feature. Sparse
+        SpikeMatrix evaluations are plotted as spike rasters.
 
         Parameters
         ----------
@@ -376,14 +380,21 @@ class PlotUncertainty(object):
             ax = fig.add_subplot(111)
             ax.set_title("{}, evaluation {:d}".format(feature.replace("_", " "), i))
 
-            iax = ax.imshow(evaluation, cmap="viridis", aspect="auto",
-                            extent=[time[0],
-                                    time[-1],
-                                    0, evaluation.shape[0]],
-                            **plot_kwargs)
-
-            cbar = fig.colorbar(iax)
-            cbar.ax.set_ylabel(zlabel)
+            if isinstance(evaluation, SpikeMatrix):
+                # Plot only the spikes instead of the dense matrix
+                ax.scatter(time[evaluation.indices], evaluation.rows() + 0.5,
+                           marker="|", color="k", **plot_kwargs)
+                ax.set_xlim([time[0], time[-1]])
+                ax.set_ylim([0, evaluation.shape[0]])
+            else:
+                iax = ax.imshow(evaluation, cmap="viridis", aspect="auto",
+                                extent=[time[0],
+                                        time[-1],
+                                        0, evaluation.shape[0]],
+                                **plot_kwargs)
+
+                cbar = fig.colorbar(iax)
+                cbar.ax.set_ylabel(zlabel)
 
             ax.set_xlabel(xlabel.capitalize())
             ax.set_ylabel(ylabel.capitalize())
@@ -1,8 +1,15 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-import matplotlib.pyplot as plt
 import numpy as np
-import seaborn as sns
+
+try:
+    from ...utils.lazy_import import lazy_import
+except (ImportError, ValueError):
+    # prettyplot used on its own, outside of uncertainpy
+    from importlib import import_module as lazy_import
+
+plt = lazy_import("matplotlib.pyplot")
+sns = lazy_import("seaborn")
 
 
 axis_grey = (0.6, 0.6, 0.6)
@@ -0,0 +1,256 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import numpy as np
+
+from .data import Data
+
+
+class Surrogate(object):
+    """
+    The polynomial chaos expansions of the model and features, used as a
+    surrogate model that is evaluated for new values of the uncertain
+    parameters instead of running the model.
+
+    The expansions are evaluated with NumPy only, from the coefficients and
+    multi-indices of each model/feature and the three-term recurrence
+    coefficients of the orthogonal polynomials of each uncertain parameter,
+    which are stored in `data` by a polynomial chaos expansion.
+
+    Parameters
+    ----------
+    data : Data
+        A Data object from a polynomial chaos expansion with independent
+        uncertain parameters, that contains ``data.pce_recurrence`` and
+        ``data[feature].pce_coefficients`` and
+        ``data[feature].pce_multi_indices`` for the model and features.
+
+    Attributes
+    ----------
+    uncertain_parameters : list
+        The names of the uncertain parameters, in the order the expansions
+        use them.
+    model_name : str
+        Name of the model.
+    features : list
+        The model and features that have an expansion.
+    coefficients : dict
+        The coefficients of the expansion of each model/feature, with shape
+        ``(nr_polynomials,) + shape``.
+    multi_indices : dict
+        The degree of each basis polynomial in each uncertain parameter for
+        each model/feature, with shape
+        ``(nr_polynomials, nr_uncertain_parameters)``.
+    alpha : array
+        The recurrence coefficients ``alpha``, with shape
+        ``(nr_uncertain_parameters, order)``.
+    beta : array
+        The recurrence coefficients ``beta``, with shape
+        ``(nr_uncertain_parameters, order)``.
+
+    Raises
+    ------
+    ValueError
+        If `data` does not contain any polynomial chaos expansions.
+
+    Notes
+    -----
+    The expansions are only stored for polynomial chaos expansions that do
+    not use the Rosenblatt transformation, since the expansion is otherwise
+    created in a transformed space.
+
+    See also
+    --------
+    uncertainpy.Data
+    uncertainpy.core.pce_statistics.recurrence_coefficients
+    """
+    def __init__(self, data):
+        self.uncertain_parameters = list(data.uncertain_parameters)
+        self.model_name = data.model_name
+
+        self.coefficients = {}
+        self.multi_indices = {}
+
+        for feature in data:
+            if "pce_coefficients" in data[feature] and "pce_multi_indices" in data[feature]:
+                self.coefficients[feature] = np.asarray(data[feature].pce_coefficients, dtype=float)
+                self.multi_indices[feature] = np.asarray(data[feature].pce_multi_indices, dtype=int)
+
+        if not self.coefficients or not data.pce_recurrence:
+            raise ValueError("data does not contain any polynomial chaos expansions")
+
+        self.alpha = np.asarray(data.pce_recurrence["alpha"], dtype=float)
+        self.beta = np.asarray(data.pce_recurrence["beta"], dtype=float)
+
+
+    @classmethod
+    def load(cls, filename, backend="auto"):
+        """
+        Load the surrogate from a HDF5 or Exdir file saved by
+        ``UncertaintyQuantification`` or ``Data.save``.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the file to load the surrogate from.
+        backend : {"auto", "hdf5", "exdir"}, optional
+            The fileformat of the file. See uncertainpy.Data.
+            Default is "auto".
+
+        Returns
+        -------
+        Surrogate
+            The surrogate of the model and features in the file.
+        """
+        return cls(Data(filename, backend=backend, logger_level=None))
+
+
+    @property
+    def features(self):
+        """
+        The model and features that have an expansion.
+
+        Returns
+        -------
+        features : list
+            The names of the model and features.
+        """
+        return sorted(self.coefficients.keys())
+
+
+    def create_nodes(self, parameters):
+        """
+        Convert the values of the uncertain parameters to an array of nodes.
+
+        Parameters
+        ----------
+        parameters : {dict, array_like}
+            The values of the uncertain parameters, either as a dictionary with
+            the name of each uncertain parameter as key, or as an array with
+            shape ``(nr_uncertain_parameters, nr_samples)`` in the order of
+            `uncertain_parameters`. A single set of values can be given with
+            shape ``(nr_uncertain_parameters,)``.
+
+        Returns
+        -------
+        nodes : array
+            The nodes, with shape ``(nr_uncertain_parameters, nr_samples)``.
+        single : bool
+            If a single set of values were given.
+
+        Raises
+        ------
+        ValueError
+            If a dictionary does not contain all uncertain parameters, or the
+            array has the wrong number of uncertain parameters.
+        """
+        if isinstance(parameters, dict):
+            missing = [name for name in self.uncertain_parameters if name not in parameters]
+            if missing:
+                raise ValueError("Missing values for the uncertain parameters: {}".format(missing))
+
+            parameters = np.broadcast_arrays(*[np.asarray(parameters[name], dtype=float)
+                                               for name in self.uncertain_parameters])
+
+        nodes = np.asarray(parameters, dtype=float)
+        dimensions = len(self.uncertain_parameters)
+
+        single = nodes.ndim == 0 or (nodes.ndim == 1 and dimensions > 1)
+
+        if dimensions == 1 and nodes.ndim < 2:
+            nodes = nodes.reshape(1, -1)
+        else:
+            nodes = nodes.reshape(len(nodes), -1)
+
+        if len(nodes) != dimensions:
+            raise ValueError("Expected values for {} uncertain parameters, got {}".format(dimensions,
+                                                                                          len(nodes)))
+
+        return nodes, single
+
+
+    def univariate(self, nodes, order):
+        """
+        Evaluate the monic orthogonal polynomials of each uncertain parameter
+        with the three-term recurrence relation.
+
+        Parameters
+        ----------
+        nodes : array
+            The nodes, with shape ``(nr_uncertain_parameters, nr_samples)``.
+        order : int
+            The highest polynomial degree.
+
+        Returns
+        -------
+        values : array
+            ``values[d, k]`` is the polynomial of degree ``k`` of uncertain
+            parameter ``d`` at the nodes, with shape
+            ``(nr_uncertain_parameters, order + 1, nr_samples)``.
+        """
+        values = np.empty((len(nodes), order + 1, nodes.shape[1]))
+        values[:, 0] = 1
+
+        if order >= 1:
+            values[:, 1] = nodes - self.alpha[:, 0, None]
+
+        for k in range(1, order):
+            values[:, k + 1] = (nodes - self.alpha[:, k, None])*values[:, k] \
+                               - self.beta[:, k, None]*values[:, k - 1]
+
+        return values
+
+
+    def predict(self, parameters, feature=None):
+        """
+        Evaluate the surrogate of the model or a feature.
+
+        Parameters
+        ----------
+        parameters : {dict, array_like}
+            The values of the uncertain parameters, either as a dictionary with
+            the name of each uncertain parameter as key, or as an array with
+            shape ``(nr_uncertain_parameters, nr_samples)`` in the order of
+            `uncertain_parameters`. A single set of values can be given with
+            shape ``(nr_uncertain_parameters,)``.
+        feature : {None, str}, optional
+            Name of the model or feature to evaluate. If None, the model is
+            used. Default is None.
+
+        Returns
+        -------
+        values : array
+            The values of the model/feature, with shape
+            ``(nr_samples,) + shape``, same as
+            ``data[feature].evaluations``. For a single set of values the
+            shape is `shape`.
+
+        Raises
+        ------
+        ValueError
+            If `feature` does not have an expansion.
+        """
+        if feature is None:
+            feature = self.model_name
+
+        if feature not in self.coefficients:
+            raise ValueError("{} does not have a polynomial chaos expansion. ".format(feature) +
+                             "Available: {}".format(", ".join(self.features)))
+
+        nodes, single = self.create_nodes(parameters)
+
+        coefficients = self.coefficients[feature]
+        multi_indices = self.multi_indices[feature]
+
+        univariate = self.univariate(nodes, int(multi_indices.max()) if multi_indices.size else 0)
+
+        basis_values = np.ones((len(multi_indices), nodes.shape[1]))
+        for dimension in range(len(nodes)):
+            basis_values *= univariate[dimension, multi_indices[:, dimension]]
+
+        values = np.dot(basis_values.T, coefficients.reshape(len(coefficients), -1))
+        values = values.reshape((nodes.shape[1],) + coefficients.shape[1:])
+
+        if single:
+            return values[0]
+
+        return values
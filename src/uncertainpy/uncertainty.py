@@ -6,6 +6,7 @@ import types
 import numpy as np
 
 from .core.uncertainty_calculations import UncertaintyCalculations
+from .core.checkpoint import Checkpoint
 from .plotting.plot_uncertainty import PlotUncertainty
 from .utils.logger import get_logger, add_file_handler
 from .data import Data
@@ -71,6 +72,71 @@ class UncertaintyQuantification(ParameterBase):
         If unknown fileextension defaults to saving data as HDF5 files. "hdf5" saves
         and loads files from HDF5 files. "exdir" saves and loads files from
         Exdir files. Default is "auto".
+    initializer : {None, callable, list of callables}, optional
+        Warm-up function(s) run once in each worker process when it is
+        started, for example to import modules or load a simulator model.
+        Each callable must take no arguments. Default is None.
+    maxtasksperchild : {None, int}, optional
+        The number of model evaluations each worker process performs before it
+        is replaced by a fresh worker process. Useful for models that leak
+        memory. If None, the worker processes live as long as the worker pool.
+        Default is None.
+    cache : {None, EvaluationCache}, optional
+        Cache of previous model and feature evaluations. Evaluations found in
+        the cache are not rerun. If None, no cache is used. Default is None.
+    interpolation_time : {None, "auto", array_like, dict}, optional
+        The time array irregular results are resampled onto, in the worker
+        processes. If None, irregular results are interpolated onto the
+        longest time array after all evaluations are finished. If "auto", the
+        time arrays of the first evaluation are used. If array_like, the same
+        time array is used for the model and all interpolated features. If
+        dict, the model/feature name is key and the time array is value.
+        Default is None.
+    interpolation_method : {"cubic", "linear"}, optional
+        The type of spline used to interpolate irregular results.
+        Default is "cubic".
+    transport : {None, ResultTransport}, optional
+        Transport used to send large result arrays from the worker processes
+        through memory-mapped scratch files instead of pickling them.
+        If None, the results are sent back as usual. Default is None.
+    timeout : {None, float}, optional
+        The maximum wall-clock time in seconds for a single model evaluation.
+        The worker process of an evaluation that exceeds the timeout is
+        killed and replaced, and the evaluation is given numpy.nan as result.
+        Requires multiprocessing (CPUs is not None). If None, there is no
+        timeout. Default is None.
+    retries : int, optional
+        The number of times an evaluation that raises an exception or
+        exceeds the timeout is retried. Default is 0.
+    on_failure : {"raise", "nan"}, optional
+        What to do with evaluations that still raise an exception after all
+        retries. If "raise", the exception is raised. If "nan", the
+        evaluation is given numpy.nan as result, so it can be handled by
+        `allow_incomplete`. Default is "raise".
+    speculative : bool, optional
+        If True, evaluations that run for more than twice the median time of
+        the finished evaluations are started once more on idle worker
+        processes when there are no more evaluations waiting, and the
+        result that finishes first is used. Default is False.
+    profile : bool, optional
+        If True, the time spent in each stage of each evaluation is recorded
+        in a profiling table, and a summary of the most costly stages is
+        logged after the evaluations. Default is False.
+    feature_CPUs : {None, int, "max"}, optional
+        The number of CPUs used to calculate the features. If not None, the
+        model and the features are calculated in a two-stage pipeline, where
+        the model is run by `CPUs` worker processes and the features are
+        calculated from the model output by `feature_CPUs` other worker
+        processes at the same time. Default is None.
+    queue_size : {None, int}, optional
+        The largest number of model outputs that wait for the features to be
+        calculated in the two-stage pipeline. If None, `feature_CPUs` is used.
+        Default is None.
+    memory_budget : int, optional
+        The largest number of bytes used at a time to hold evaluations of the
+        polynomial chaos expansions, and of their orthogonal basis, when
+        calculating percentiles.
+        Default is 2**28 (256 MiB).
 
     Attributes
     ----------
@@ -93,6 +159,19 @@ class UncertaintyQuantification(ParameterBase):
     ValueError
         If unsupported backend is chosen.
 
+    Notes
+    -----
+    By default a new set of worker processes is started for each uncertainty
+    quantification. Used as a context manager, the same worker processes are
+    shared by every uncertainty quantification performed inside the ``with``
+    block:
+
+    .. code-block:: Python
+
+        with UncertaintyQuantification(model, parameters) as UQ:
+            for polynomial_order in range(1, 8):
+                UQ.quantify(polynomial_order=polynomial_order)
+
     See Also
     --------
     uncertainpy.features
@@ -113,7 +192,21 @@ class UncertaintyQuantification(ParameterBase):
                  CPUs="max",
                  logger_level="info",
                  logger_filename="uncertainpy.log",
-                 backend="auto"):
+                 backend="auto",
+                 initializer=None,
+                 maxtasksperchild=None,
+                 cache=None,
+                 interpolation_time=None,
+                 interpolation_method="cubic",
+                 transport=None,
+                 timeout=None,
+                 retries=0,
+                 on_failure="raise",
+                 speculative=False,
+                 profile=False,
+                 feature_CPUs=None,
+                 queue_size=None,
+                 memory_budget=2**28):
 
 
         if backend not in ["auto", "hdf5", "exdir"]:
@@ -136,6 +229,20 @@ class UncertaintyQuantification(ParameterBase):
                 custom_uncertainty_quantification=custom_uncertainty_quantification,
                 CPUs=CPUs,
                 logger_level=logger_level,
+                initializer=initializer,
+                maxtasksperchild=maxtasksperchild,
+                cache=cache,
+                interpolation_time=interpolation_time,
+                interpolation_method=interpolation_method,
+                transport=transport,
+                timeout=timeout,
+                retries=retries,
+                on_failure=on_failure,
+                speculative=speculative,
+                profile=profile,
+                feature_CPUs=feature_CPUs,
+                queue_size=queue_size,
+                memory_budget=memory_budget
             )
         else:
             self._uncertainty_calculations = uncertainty_calculations
@@ -155,6 +262,15 @@ class UncertaintyQuantification(ParameterBase):
         add_file_handler(filename=logger_filename)
 
 
+    def __enter__(self):
+        self.uncertainty_calculations.__enter__()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.uncertainty_calculations.__exit__(exc_type, exc_value, traceback)
+
+
     @ParameterBase.features.setter
     def features(self, new_features):
         ParameterBase.features.fset(self, new_features)
@@ -229,6 +345,9 @@ class UncertaintyQuantification(ParameterBase):
                  save=True,
                  data_folder="data",
                  filename=None,
+                 checkpoint=None,
+                 resume=False,
+                 tolerance=None,
                  **custom_kwargs):
         """
         Perform an uncertainty quantification and sensitivity analysis
@@ -316,6 +435,22 @@ class UncertaintyQuantification(ParameterBase):
         filename : {None, str}, optional
             Name of the data file. If None the model name is used.
             Default is None.
+        checkpoint : {None, str}, optional
+            Name of a checkpoint file each finished model evaluation is written
+            to, so an interrupted uncertainty quantification can be resumed.
+            If None, no checkpoint file is used. Default is None.
+        resume : bool, optional
+            If the model evaluations already stored in `checkpoint` should be
+            reused instead of evaluated again. Requires the same `seed` as the
+            interrupted uncertainty quantification. If False, any existing
+            `checkpoint` file is overwritten. Default is False.
+        tolerance : {None, float}, optional
+            If given, the polynomial order is chosen adaptively for the model
+            and each feature with point collocation, as the lowest order where
+            the relative leave-one-out error is below `tolerance`, up to
+            `polynomial_order`. The model evaluations of the lower orders are
+            reused by the higher orders. Only used by point collocation
+            without the Rosenblatt transformation. Default is None.
         **custom_kwargs
             Any number of arguments for either the custom polynomial chaos method,
             ``create_PCE_custom``, or the custom uncertainty quantification,
@@ -390,82 +525,97 @@ class UncertaintyQuantification(ParameterBase):
         uncertainpy.core.UncertaintyCalculations.monte_carlo : Uncertainty quantification using quasi-Monte Carlo methods
         uncertainpy.core.UncertaintyCalculations.create_PCE_custom : Requirements for create_PCE_custom
         uncertainpy.core.UncertaintyCalculations.custom_uncertainty_quantification : Requirements for custom_uncertainty_quantification
+        uncertainpy.core.Checkpoint
         """
         uncertain_parameters = self.uncertainty_calculations.convert_uncertain_parameters(uncertain_parameters)
 
-        if method.lower() == "pc":
-            if single:
-                data = self.polynomial_chaos_single(uncertain_parameters=uncertain_parameters,
-                                                    method=pc_method,
-                                                    rosenblatt=rosenblatt,
-                                                    polynomial_order=polynomial_order,
-                                                    nr_collocation_nodes=nr_collocation_nodes,
-                                                    quadrature_order=quadrature_order,
-                                                    nr_pc_mc_samples=nr_pc_mc_samples,
-                                                    allow_incomplete=allow_incomplete,
-                                                    seed=seed,
-                                                    plot=plot,
-                                                    figure_folder=figure_folder,
-                                                    figureformat=figureformat,
-                                                    save=save,
-                                                    data_folder=data_folder,
-                                                    filename=filename,
-                                                    **custom_kwargs)
-
-            else:
-                data = self.polynomial_chaos(uncertain_parameters=uncertain_parameters,
-                                             method=pc_method,
-                                             rosenblatt=rosenblatt,
-                                             polynomial_order=polynomial_order,
-                                             nr_collocation_nodes=nr_collocation_nodes,
-                                             quadrature_order=quadrature_order,
-                                             nr_pc_mc_samples=nr_pc_mc_samples,
-                                             allow_incomplete=allow_incomplete,
-                                             seed=seed,
-                                             plot=plot,
-                                             figure_folder=figure_folder,
-                                             figureformat=figureformat,
-                                             save=save,
-                                             data_folder=data_folder,
-                                             filename=filename,
-                                             **custom_kwargs)
-
-        elif method.lower() == "mc":
-            if single:
-                data = self.monte_carlo_single(uncertain_parameters=uncertain_parameters,
-                                               nr_samples=nr_mc_samples,
-                                               plot=plot,
-                                               figure_folder=figure_folder,
-                                               figureformat=figureformat,
-                                               save=save,
-                                               data_folder=data_folder,
-                                               filename=filename,
-                                               seed=seed)
-
+        runmodel = self.uncertainty_calculations.runmodel
+        previous_checkpoint = runmodel.checkpoint
+
+        if checkpoint is not None:
+            runmodel.checkpoint = Checkpoint(checkpoint,
+                                             resume=resume,
+                                             logger_level=self._logger_level)
+
+        try:
+            if method.lower() == "pc":
+                if single:
+                    data = self.polynomial_chaos_single(uncertain_parameters=uncertain_parameters,
+                                                        method=pc_method,
+                                                        rosenblatt=rosenblatt,
+                                                        polynomial_order=polynomial_order,
+                                                        nr_collocation_nodes=nr_collocation_nodes,
+                                                        quadrature_order=quadrature_order,
+                                                        nr_pc_mc_samples=nr_pc_mc_samples,
+                                                        allow_incomplete=allow_incomplete,
+                                                        seed=seed,
+                                                        plot=plot,
+                                                        figure_folder=figure_folder,
+                                                        figureformat=figureformat,
+                                                        save=save,
+                                                        data_folder=data_folder,
+                                                        filename=filename,
+                                                        tolerance=tolerance,
+                                                        **custom_kwargs)
+
+                else:
+                    data = self.polynomial_chaos(uncertain_parameters=uncertain_parameters,
+                                                 method=pc_method,
+                                                 rosenblatt=rosenblatt,
+                                                 polynomial_order=polynomial_order,
+                                                 nr_collocation_nodes=nr_collocation_nodes,
+                                                 quadrature_order=quadrature_order,
+                                                 nr_pc_mc_samples=nr_pc_mc_samples,
+                                                 allow_incomplete=allow_incomplete,
+                                                 seed=seed,
+                                                 plot=plot,
+                                                 figure_folder=figure_folder,
+                                                 figureformat=figureformat,
+                                                 save=save,
+                                                 data_folder=data_folder,
+                                                 filename=filename,
+                                                 tolerance=tolerance,
+                                                 **custom_kwargs)
+
+            elif method.lower() == "mc":
+                if single:
+                    data = self.monte_carlo_single(uncertain_parameters=uncertain_parameters,
+                                                   nr_samples=nr_mc_samples,
+                                                   plot=plot,
+                                                   figure_folder=figure_folder,
+                                                   figureformat=figureformat,
+                                                   save=save,
+                                                   data_folder=data_folder,
+                                                   filename=filename,
+                                                   seed=seed)
+
+
+                else:
+                    data = self.monte_carlo(uncertain_parameters=uncertain_parameters,
+                                            nr_samples=nr_mc_samples,
+                                            plot=plot,
+                                            figure_folder=figure_folder,
+                                            figureformat=figureformat,
+                                            save=save,
+                                            data_folder=data_folder,
+                                            filename=filename,
+                                            seed=seed)
+
+
+            elif method.lower() == "custom":
+                data = self.custom_uncertainty_quantification(plot=plot,
+                                                              figure_folder=figure_folder,
+                                                              figureformat=figureformat,
+                                                              save=save,
+                                                              data_folder=data_folder,
+                                                              filename=filename,
+                                                              **custom_kwargs)
 
             else:
-                data = self.monte_carlo(uncertain_parameters=uncertain_parameters,
-                                        nr_samples=nr_mc_samples,
-                                        plot=plot,
-                                        figure_folder=figure_folder,
-                                        figureformat=figureformat,
-                                        save=save,
-                                        data_folder=data_folder,
-                                        filename=filename,
-                                        seed=seed)
-
-
-        elif method.lower() == "custom":
-            data = self.custom_uncertainty_quantification(plot=plot,
-                                                          figure_folder=figure_folder,
-                                                          figureformat=figureformat,
-                                                          save=save,
-                                                          data_folder=data_folder,
-                                                          filename=filename,
-                                                          **custom_kwargs)
+                raise ValueError("No method with name {}".format(method))
 
-        else:
-            raise ValueError("No method with name {}".format(method))
+        finally:
+            runmodel.checkpoint = previous_checkpoint
 
         return data
 
@@ -568,6 +718,7 @@ class UncertaintyQuantification(ParameterBase):
                          save=True,
                          data_folder="data",
                          filename=None,
+                         tolerance=None,
                          **custom_kwargs):
         """
         Perform an uncertainty quantification and sensitivity analysis
@@ -639,6 +790,13 @@ class UncertaintyQuantification(ParameterBase):
         filename : {None, str}, optional
             Name of the data file. If None the model name is used.
             Default is None.
+        tolerance : {None, float}, optional
+            If given, the polynomial order is chosen adaptively for the model
+            and each feature with point collocation, as the lowest order where
+            the relative leave-one-out error is below `tolerance`, up to
+            `polynomial_order`. The model evaluations of the lower orders are
+            reused by the higher orders. Only used by point collocation
+            without the Rosenblatt transformation. Default is None.
         **custom_kwargs
             Any number of arguments for the custom polynomial chaos method,
             ``create_PCE_custom``.
@@ -710,6 +868,7 @@ class UncertaintyQuantification(ParameterBase):
             nr_pc_mc_samples=nr_pc_mc_samples,
             allow_incomplete=allow_incomplete,
             seed=seed,
+            tolerance=tolerance,
             **custom_kwargs
             )
 
@@ -865,7 +1024,8 @@ class UncertaintyQuantification(ParameterBase):
                                 figureformat=".png",
                                 save=True,
                                 data_folder="data",
-                                filename=None):
+                                filename=None,
+                                tolerance=None):
         """
         Perform an uncertainty quantification and sensitivity analysis for a
         single parameter at the time using polynomial chaos expansions.
@@ -936,6 +1096,13 @@ class UncertaintyQuantification(ParameterBase):
         filename : {None, str}, optional
             Name of the data file. If None the model name is used.
             Default is None.
+        tolerance : {None, float}, optional
+            If given, the polynomial order is chosen adaptively for the model
+            and each feature with point collocation, as the lowest order where
+            the relative leave-one-out error is below `tolerance`, up to
+            `polynomial_order`. The model evaluations of the lower orders are
+            reused by the higher orders. Only used by point collocation
+            without the Rosenblatt transformation. Default is None.
         **custom_kwargs
             Any number of arguments for the custom polynomial chaos method,
             ``create_PCE_custom``.
@@ -1006,25 +1173,28 @@ class UncertaintyQuantification(ParameterBase):
 
         data_dict = {}
 
-        for uncertain_parameter in uncertain_parameters:
-            logger.info("Running for " + uncertain_parameter)
-
-            data = self.uncertainty_calculations.polynomial_chaos(
-                uncertain_parameters=uncertain_parameter,
-                method=method,
-                rosenblatt=rosenblatt,
-                polynomial_order=polynomial_order,
-                nr_collocation_nodes=nr_collocation_nodes,
-                quadrature_order=quadrature_order,
-                nr_pc_mc_samples=nr_pc_mc_samples,
-                allow_incomplete=allow_incomplete,
-            )
+        # Use the same worker processes for each uncertain parameter
+        with self:
+            for uncertain_parameter in uncertain_parameters:
+                logger.info("Running for " + uncertain_parameter)
+
+                data = self.uncertainty_calculations.polynomial_chaos(
+                    uncertain_parameters=uncertain_parameter,
+                    method=method,
+                    rosenblatt=rosenblatt,
+                    polynomial_order=polynomial_order,
+                    nr_collocation_nodes=nr_collocation_nodes,
+                    quadrature_order=quadrature_order,
+                    nr_pc_mc_samples=nr_pc_mc_samples,
+                    allow_incomplete=allow_incomplete,
+                    tolerance=tolerance,
+                )
 
-            data.backend = self.backend
-            data.seed = seed
-            self.data = data
+                data.backend = self.backend
+                data.seed = seed
+                self.data = data
 
-            data_dict[uncertain_parameter] = data
+                data_dict[uncertain_parameter] = data
 
         self.data = data_dict
 
@@ -1149,16 +1319,18 @@ class UncertaintyQuantification(ParameterBase):
             np.random.seed(seed)
 
         data_dict = {}
-        for uncertain_parameter in uncertain_parameters:
-            logger.info("Running MC for " + uncertain_parameter)
+        # Use the same worker processes for each uncertain parameter
+        with self:
+            for uncertain_parameter in uncertain_parameters:
+                logger.info("Running MC for " + uncertain_parameter)
 
-            data = self.uncertainty_calculations.monte_carlo(uncertain_parameters=uncertain_parameter,
-                                                                  nr_samples=nr_samples)
+                data = self.uncertainty_calculations.monte_carlo(uncertain_parameters=uncertain_parameter,
+                                                                 nr_samples=nr_samples)
 
-            data.backend = self.backend
-            data.seed = seed
+                data.backend = self.backend
+                data.seed = seed
 
-            data_dict[uncertain_parameter] = data
+                data_dict[uncertain_parameter] = data
 
         self.data = data_dict
 
@@ -7,10 +7,14 @@ Small utility functions for various purposes.
 __all__ = ["lengths", "none_to_nan", "contains_nan", "is_regular",
             "MyFormatter", "TqdmLoggingHandler", "MultiprocessLoggingHandler",
             "setup_module_logger", "setup_logger",
-           "has_handlers", "add_file_handler", "add_screen_handler"]
+           "has_handlers", "add_file_handler", "add_screen_handler",
+           "lazy_import", "module_available", "LazyModule",
+           "SpikeMatrix", "spike_statistics"]
 
 from .logger import setup_module_logger, setup_logger
 from .logger import has_handlers, add_file_handler, add_screen_handler
 from .logger import MyFormatter, TqdmLoggingHandler, MultiprocessLoggingHandler
 from .utility import lengths, none_to_nan, contains_nan
 from .utility import is_regular, set_nan
+from .lazy_import import lazy_import, module_available, LazyModule
+from .spike_matrix import SpikeMatrix, spike_statistics
@@ -0,0 +1,111 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    A placeholder for a module that is imported the first time one of its
+    attributes is accessed.
+
+    Parameters
+    ----------
+    name : str
+        The full name of the module, for example ``"matplotlib.pyplot"``.
+
+    Notes
+    -----
+    Every attribute lookup is forwarded to the imported module, so changes
+    to the module after it is imported are seen through the placeholder.
+    """
+    def __init__(self, name):
+        super(LazyModule, self).__init__(str(name))
+
+        self._lazy_name = name
+        self._lazy_module = None
+
+
+    def _load(self):
+        """
+        Import the module, if it is not already imported.
+
+        Returns
+        -------
+        module : module
+            The imported module.
+        """
+        if self._lazy_module is None:
+            self._lazy_module = importlib.import_module(self._lazy_name)
+
+        return self._lazy_module
+
+
+    def __getattr__(self, name):
+        # Only called for attributes not found in the placeholder
+        if name.startswith("_lazy_"):
+            raise AttributeError(name)
+
+        return getattr(self._load(), name)
+
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+    def __repr__(self):
+        if self._lazy_module is None:
+            return "<lazy module '{}' (not imported)>".format(self._lazy_name)
+
+        return repr(self._lazy_module)
+
+
+
+def lazy_import(name):
+    """
+    Get a module that is first imported when one of its attributes is used.
+    If the module is already imported, the module itself is returned.
+
+    Parameters
+    ----------
+    name : str
+        The full name of the module, for example ``"matplotlib.pyplot"``.
+
+    Returns
+    -------
+    module : {module, LazyModule}
+        The module, or a LazyModule that imports the module on first use.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    return LazyModule(name)
+
+
+
+def module_available(name):
+    """
+    Test if a module can be imported, by importing it. Use it where the
+    module is about to be used, for example when creating a class that
+    requires the module, so importing uncertainpy does not import it.
+
+    Parameters
+    ----------
+    name : str
+        The full name of the module, for example ``"efel"``.
+
+    Returns
+    -------
+    bool
+        True if the module is installed and can be imported, False otherwise.
+    """
+    if name in sys.modules:
+        return sys.modules[name] is not None
+
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        return False
+
+    return True
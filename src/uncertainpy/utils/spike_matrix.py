@@ -0,0 +1,247 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import numpy as np
+
+
+class SpikeMatrix(object):
+    """
+    A binary matrix with a row for each neuron and a column for each time
+    step, where an element is 1 if the neuron spikes in that time step and 0
+    otherwise. Only the spikes are stored, in compressed sparse row (CSR) form.
+
+    A SpikeMatrix behaves as a read only array, and is converted to a dense
+    array by ``numpy.asarray`` or ``toarray``.
+
+    Parameters
+    ----------
+    indices : array
+        The time step of each spike. The spikes of each neuron are sorted.
+    indptr : array
+        The index in `indices` of the first spike of each neuron, with
+        ``len(indices)`` as the last element. The spikes of neuron ``i`` are
+        ``indices[indptr[i]:indptr[i + 1]]``.
+    shape : tuple
+        The shape of the matrix, ``(nr_neurons, nr_time_steps)``.
+
+    Attributes
+    ----------
+    indices : array
+        The time step of each spike.
+    indptr : array
+        The index in `indices` of the first spike of each neuron.
+    shape : tuple
+        The shape of the matrix, ``(nr_neurons, nr_time_steps)``.
+
+    Raises
+    ------
+    ValueError
+        If `indptr` does not match the number of neurons and spikes.
+
+    See also
+    --------
+    uncertainpy.models.NestModel.postprocess
+    """
+    ndim = 2
+    dtype = np.dtype(float)
+
+    def __init__(self, indices, indptr, shape):
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.shape = (int(shape[0]), int(shape[1]))
+
+        if len(self.indptr) != self.shape[0] + 1 or self.indptr[-1] != len(self.indices):
+            raise ValueError("indptr must have nr_neurons + 1 elements, and end with the number of spikes")
+
+
+    @classmethod
+    def from_spiketrains(cls, spiketrains, time):
+        """
+        Create a SpikeMatrix from spiketrains.
+
+        Parameters
+        ----------
+        spiketrains : list
+            A list of spike trains for each neuron.
+        time : array
+            The sorted time of each time step.
+
+        Returns
+        -------
+        SpikeMatrix
+            The spike matrix. A spike is set in the time step with a time
+            equal to the spike time, spikes that do not fall exactly on a
+            time step are ignored, as with ``numpy.in1d``.
+        """
+        time = np.asarray(time)
+        nr_neurons = len(spiketrains)
+
+        spike_times = [np.asarray(spiketrain, dtype=float).ravel() for spiketrain in spiketrains]
+        counts = [len(spiketrain) for spiketrain in spike_times]
+
+        if sum(counts) > 0:
+            spike_times = np.concatenate(spike_times)
+        else:
+            spike_times = np.zeros(0)
+
+        neurons = np.repeat(np.arange(nr_neurons), counts)
+
+        steps = np.searchsorted(time, spike_times)
+        on_step = steps < len(time)
+        on_step[on_step] = time[steps[on_step]] == spike_times[on_step]
+
+        # Sorted by neuron, then time step, without duplicated spikes
+        keys = np.unique(neurons[on_step]*len(time) + steps[on_step])
+
+        indptr = np.zeros(nr_neurons + 1, dtype=np.int64)
+        if len(time) > 0:
+            np.cumsum(np.bincount(keys//len(time), minlength=nr_neurons), out=indptr[1:])
+            indices = keys % len(time)
+        else:
+            indices = keys
+
+        return cls(indices, indptr, (nr_neurons, len(time)))
+
+
+    @property
+    def nnz(self):
+        """
+        The number of spikes.
+
+        Returns
+        -------
+        int
+            The number of spikes.
+        """
+        return len(self.indices)
+
+
+    def rows(self):
+        """
+        The row (neuron) of each spike.
+
+        Returns
+        -------
+        rows : array
+            The row of each spike in `indices`.
+        """
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+
+    def toarray(self, dtype=None):
+        """
+        Convert the spike matrix to a dense array.
+
+        Parameters
+        ----------
+        dtype : {None, numpy.dtype}, optional
+            The data type of the array. If None, float is used.
+            Default is None.
+
+        Returns
+        -------
+        array
+            A dense array with shape `shape`.
+        """
+        array = np.zeros(self.shape, dtype=self.dtype if dtype is None else dtype)
+        array[self.rows(), self.indices] = 1
+
+        return array
+
+
+    def __array__(self, dtype=None):
+        return self.toarray(dtype)
+
+
+    def __len__(self):
+        return self.shape[0]
+
+
+    def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            if i < 0:
+                i += self.shape[0]
+
+            row = np.zeros(self.shape[1], dtype=self.dtype)
+            row[self.indices[self.indptr[i]:self.indptr[i + 1]]] = 1
+
+            return row
+
+        return self.toarray()[i]
+
+
+    def __eq__(self, other):
+        if not isinstance(other, SpikeMatrix):
+            return NotImplemented
+
+        return self.shape == other.shape \
+            and np.array_equal(self.indptr, other.indptr) \
+            and np.array_equal(self.indices, other.indices)
+
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+
+        return not equal
+
+
+    __hash__ = None
+
+
+    def __repr__(self):
+        return "<SpikeMatrix of shape {} with {} spikes>".format(self.shape, self.nnz)
+
+
+
+def spike_statistics(spike_matrices):
+    """
+    Calculate the mean, variance, and 5th and 95th percentile of each element
+    over a set of spike matrices, without converting them to dense arrays.
+
+    Parameters
+    ----------
+    spike_matrices : list
+        A list of SpikeMatrix objects with the same shape.
+
+    Returns
+    -------
+    mean : array
+        The mean of each element, the spiking probability.
+    variance : array
+        The variance of each element.
+    percentile_5 : array
+        The 5th percentile of each element.
+    percentile_95 : array
+        The 95th percentile of each element.
+
+    Notes
+    -----
+    Gives the same results as ``numpy.mean``, ``numpy.var`` and
+    ``numpy.percentile`` along the first axis of the dense arrays, since the
+    elements only take the values 0 and 1.
+    """
+    nr_evaluations = len(spike_matrices)
+    shape = spike_matrices[0].shape
+
+    keys = [spike_matrix.rows()*shape[1] + spike_matrix.indices
+            for spike_matrix in spike_matrices]
+    keys = np.concatenate(keys) if keys else np.zeros(0, dtype=int)
+
+    counts = np.bincount(keys, minlength=shape[0]*shape[1]).reshape(shape)
+
+    mean = counts/nr_evaluations
+    variance = mean*(1 - mean)
+
+    def percentile(q):
+        # The sorted values are nr_evaluations - counts zeros followed by ones
+        position = (nr_evaluations - 1)*q/100.
+        lower = int(np.floor(position))
+        upper = int(np.ceil(position))
+
+        lower_value = (lower >= nr_evaluations - counts).astype(float)
+        upper_value = (upper >= nr_evaluations - counts).astype(float)
+
+        return lower_value + (position - lower)*(upper_value - lower_value)
+
+    return mean, variance, percentile(5), percentile(95)
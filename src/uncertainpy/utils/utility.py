@@ -4,6 +4,8 @@ import six
 import warnings
 import numpy as np
 
+from .spike_matrix import SpikeMatrix
+
 
 def set_nan(values, index):
     """
@@ -89,6 +91,10 @@ def contains_nan(values):
         ``True`` if `values` has at least one occurrence of ``None`` or
         ``numpy.nan``.
     """
+    # Spike matrices only contain 0 and 1
+    if isinstance(values, SpikeMatrix):
+        return False
+
     # To speed up we first try the fast option np.any(np.isnan(values))
     try:
         return np.any(np.isnan(values))
@@ -74,27 +74,29 @@ testing_spikes = [TestSpike, TestSpikes]
 
 testing_features = [TestFeatures, TestGeneralSpikingFeatures, TestSpikingFeatures,
                     TestTestingFeatures, TestNetworkFeatures, TestGeneralNetworkFeatures,
-                    TestEfelFeatures]
+                    TestEfelFeatures, TestSpikeDistances]
 
 testing_base = [TestBase, TestParameterBase]
 
-testing_data = [TestData, TestDataFeature]
+testing_data = [TestData, TestDataFeature, TestSurrogate]
 
 testing_utils = [TestLogger, TestNoneToNan, TestLengths, TestContainsNoneOrNan,
-                 TestIsRegular, TestSetNan]
+                 TestIsRegular, TestSetNan, TestLazyImport, TestSpikeMatrix]
 
 # TODO: several tests crashes when several tests with Xvfb is run one after another
 testing_models = [TestTestingModel0d, TestTestingModel1d, TestTestingModel2d,
                   TestModel, TestHodgkinHuxleyModel, TestCoffeeCupModel,
                   TestIzhikevichModel, TestNestModel, TestNeuronModel,
-                  TestRunModel, TestParallel]
+                  TestRunModel, TestParallel, TestWorkerPool,
+                  TestEvaluationCache, TestCheckpoint, TestResultTransport,
+                  TestResultStore, TestProfiler]
 
 testing_parameters = [TestParameter, TestParameters]
 
 testing_exact = testing_spikes + [TestUncertainty, TestPlotUncertainpy]
 
 testing_all = testing_parameters + testing_models + testing_base\
-              + testing_features + testing_data + [TestUncertaintyCalculations, TestDistribution]\
+              + testing_features + testing_data + [TestUncertaintyCalculations, TestPCEStatistics, TestPCEFit, TestDistribution]\
               + testing_utils
 
 testing_complete = testing_all + [TestExamples]
@@ -193,6 +195,14 @@ def utilities():
 def uncertainty_calculations():
     run(TestUncertaintyCalculations)
 
+@cli.command()
+def pce_statistics():
+    run(TestPCEStatistics)
+
+@cli.command()
+def pce_fit():
+    run(TestPCEFit)
+
 @cli.command()
 def base():
     run(TestBase)
@@ -233,6 +243,11 @@ def data():
     run(TestData)
 
 
+@cli.command()
+def surrogate():
+    run(TestSurrogate)
+
+
 @cli.command()
 def all_data():
     run(testing_data)
@@ -265,6 +280,36 @@ def run_model():
     run(TestRunModel)
 
 
+@cli.command()
+def worker_pool():
+    run(TestWorkerPool)
+
+
+@cli.command()
+def evaluation_cache():
+    run(TestEvaluationCache)
+
+
+@cli.command()
+def checkpoint():
+    run(TestCheckpoint)
+
+
+@cli.command()
+def result_transport():
+    run(TestResultTransport)
+
+
+@cli.command()
+def result_store():
+    run(TestResultStore)
+
+
+@cli.command()
+def profiler():
+    run(TestProfiler)
+
+
 @cli.command()
 def model():
     run(TestModel)
@@ -12,12 +12,24 @@ from .test_parameters import TestParameter, TestParameters
 from .test_plot_uncertainty import TestPlotUncertainpy
 from .test_spike import TestSpike
 from .test_spikes import TestSpikes
+from .test_spike_distances import TestSpikeDistances
+from .test_spike_matrix import TestSpikeMatrix
 from .test_uncertainty import TestUncertainty
 from .test_data import TestData, TestDataFeature
 from .test_run_model import TestRunModel
 from .test_uncertainty_calculations import TestUncertaintyCalculations
 from .test_parallel import TestParallel
+from .test_worker_pool import TestWorkerPool
+from .test_evaluation_cache import TestEvaluationCache
+from .test_checkpoint import TestCheckpoint
+from .test_result_transport import TestResultTransport
+from .test_result_store import TestResultStore
+from .test_profiler import TestProfiler
+from .test_pce_statistics import TestPCEStatistics
+from .test_pce_fit import TestPCEFit
+from .test_surrogate import TestSurrogate
 from .test_examples import TestExamples
 from .test_base import TestBase, TestParameterBase
 from .test_utility import TestLengths, TestNoneToNan, TestContainsNoneOrNan
-from .test_utility import TestIsRegular, TestSetNan
\ No newline at end of file
+from .test_utility import TestIsRegular, TestSetNan
+from .test_lazy_import import TestLazyImport
\ No newline at end of file
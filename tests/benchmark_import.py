@@ -0,0 +1,67 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+"""
+Benchmark of the time it takes to import uncertainpy, which should not import
+any of the heavy optional dependencies. Run with:
+
+    python tests/benchmark_import.py
+"""
+
+import json
+import subprocess
+import sys
+
+
+# Modules that are only imported when they are used
+HEAVY_MODULES = ["chaospy", "SALib", "elephant", "neo", "quantities", "efel",
+                 "matplotlib", "seaborn", "nest", "neuron"]
+
+
+def _run(code):
+    """
+    Run `code` in a new Python process and return what it prints.
+    """
+    output = subprocess.check_output([sys.executable, "-c", code],
+                                     stderr=subprocess.STDOUT)
+
+    return json.loads(output.decode().strip().split("\n")[-1])
+
+
+def loaded_modules(modules):
+    """
+    The modules in `modules` that are imported by ``import uncertainpy``, in
+    a new Python process.
+    """
+    code = ("import json, sys; import uncertainpy; "
+            "print(json.dumps([m for m in {} if m in sys.modules]))").format(json.dumps(modules))
+
+    return _run(code)
+
+
+def import_time(module="uncertainpy", repeat=3):
+    """
+    The shortest time it takes to import `module`, in a new Python process
+    where numpy is already imported.
+    """
+    code = ("import json, time, numpy; start = time.time(); import {}; "
+            "print(json.dumps(time.time() - start))").format(module)
+
+    return min(_run(code) for i in range(repeat))
+
+
+def benchmark(repeat=3):  # pragma: no cover
+    print("import uncertainpy:      {:.3f} s".format(import_time(repeat=repeat)))
+
+    for module in HEAVY_MODULES:
+        try:
+            print("import {:<18} {:.3f} s".format(module + ":", import_time(module, repeat=1)))
+        except subprocess.CalledProcessError:
+            print("import {:<18} not installed".format(module + ":"))
+
+    loaded = loaded_modules(HEAVY_MODULES)
+    if loaded:
+        raise RuntimeError("import uncertainpy imports: {}".format(", ".join(loaded)))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    benchmark()
@@ -0,0 +1,173 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+"""
+Benchmark of Spikes.find_spikes against the original implementation, which
+loops over every point in the voltage trace. Run with:
+
+    python tests/benchmark_spikes.py
+"""
+
+import timeit
+
+import numpy as np
+
+from uncertainpy.features.spikes import Spike, Spikes
+
+
+def find_spikes_loop(time,
+                     V,
+                     threshold=-30,
+                     end_threshold=-10,
+                     extended_spikes=False,
+                     trim=True,
+                     normalize=False,
+                     min_amplitude=0,
+                     min_duration=0):
+    """
+    The original implementation of Spikes.find_spikes, which loops over every
+    point in the voltage trace. Returns a list of the Spike objects found.
+    """
+    spikes_object = Spikes()
+
+    if normalize:
+        voltage = V.copy()
+        voltage -= voltage.min()
+        voltage /= voltage.max()
+
+        if threshold == "auto":
+            threshold = np.sqrt(voltage.var())
+
+        rescaled_threshold = threshold*(V.max() - V.min()) + V.min()
+    else:
+        voltage = V
+
+        if threshold == "auto":
+            threshold = np.sqrt(voltage.var())
+
+        rescaled_threshold = threshold
+
+    min_extent_from_peak = 1
+    derivative_cutoff = 0.5
+
+    spikes = []
+
+    spike_start = 0
+    start_flag = False
+
+    if extended_spikes:
+        dVdt = np.gradient(voltage)
+
+        gt_derivative = np.where(dVdt >= derivative_cutoff)[0]
+        lt_derivative = np.where(dVdt <= -derivative_cutoff)[0]
+
+    prev_spike_end = 0
+
+    for i in range(len(V)):
+        if voltage[i] > threshold and start_flag is False:
+            if i > 0:
+                spike_start = i - 1
+            else:
+                spike_start = i
+
+            start_flag = True
+            continue
+
+        elif voltage[i] < (threshold + end_threshold) and start_flag is True:
+            start_flag = False
+            spike_end = i + 1
+
+            V_spike = V[spike_start:spike_end]
+
+            spike_index = np.argmax(V_spike)
+            global_index = spike_index + spike_start
+            time_max = time[global_index]
+            V_max = V[global_index]
+
+            if global_index == 0 or spike_start == 0:
+                prev_spike_end = spike_end
+                continue
+
+            if extended_spikes:
+                spike_start = gt_derivative[(gt_derivative > prev_spike_end) & (gt_derivative < global_index)][0]
+                spike_end = spikes_object.consecutive(lt_derivative[lt_derivative > global_index])[-1] + 1
+
+            else:
+                if global_index > 0 and global_index - min_extent_from_peak < spike_start:
+                    spike_start = global_index - min_extent_from_peak
+
+                if global_index < len(V) and global_index + min_extent_from_peak + 1 > spike_end:
+                    spike_end = global_index + min_extent_from_peak + 1
+
+            spike = Spike(time[spike_start:spike_end], V[spike_start:spike_end],
+                          time_max, V_max, global_index)
+
+            if not extended_spikes and trim:
+                spike.trim(threshold=rescaled_threshold,
+                           min_extent_from_peak=min_extent_from_peak)
+
+            if spike.V is not None \
+                    and (abs(spike.V_spike - spike.V.min()) >= min_amplitude) \
+                    and ((spike.time[-1] - spike.time[0]) >= min_duration):
+
+                spikes.append(spike)
+
+            prev_spike_end = spike_end
+
+    return spikes
+
+
+def spike_train(nr_points=10**6, nr_spikes=1000, noise=1, seed=10):
+    """
+    A voltage trace with `nr_spikes` spikes of 5 ms, with a time step of
+    0.025 ms, a resting potential of -65 mV and Gaussian noise.
+    """
+    random = np.random.RandomState(seed)
+
+    time = np.arange(nr_points)*0.025
+    V = -65 + noise*random.randn(nr_points)
+
+    spike_shape = 100*np.sin(np.linspace(0, np.pi, 200))
+    for start in random.choice(nr_points - 200, nr_spikes, replace=False):
+        V[start:start + 200] += spike_shape
+
+    return time, V
+
+
+def same_spikes(spikes_1, spikes_2):
+    """
+    Test if two lists of Spike objects are identical.
+    """
+    if len(spikes_1) != len(spikes_2):
+        return False
+
+    for spike_1, spike_2 in zip(spikes_1, spikes_2):
+        if spike_1.global_index != spike_2.global_index \
+                or spike_1.V_spike != spike_2.V_spike \
+                or spike_1.time_spike != spike_2.time_spike \
+                or not np.array_equal(spike_1.time, spike_2.time) \
+                or not np.array_equal(spike_1.V, spike_2.V):
+            return False
+
+    return True
+
+
+def benchmark(nr_points=10**6, repeat=3):  # pragma: no cover
+    time, V = spike_train(nr_points)
+
+    spikes = Spikes()
+    spikes.find_spikes(time, V)
+
+    if not same_spikes(spikes.spikes, find_spikes_loop(time, V)):
+        raise RuntimeError("find_spikes does not match the loop implementation")
+
+    loop = min(timeit.repeat(lambda: find_spikes_loop(time, V), number=1, repeat=repeat))
+    vectorized = min(timeit.repeat(lambda: Spikes().find_spikes(time, V), number=1, repeat=repeat))
+
+    print("{} points, {} spikes".format(nr_points, len(spikes)))
+    print("loop:       {:.4f} s".format(loop))
+    print("vectorized: {:.4f} s".format(vectorized))
+    print("speedup:    {:.1f}x".format(loop/vectorized))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    benchmark()
@@ -0,0 +1,103 @@
+import unittest
+import os
+import shutil
+
+import numpy as np
+
+from uncertainpy.core import Checkpoint
+
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.output_test_dir = ".tests/"
+
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+        os.makedirs(self.output_test_dir)
+
+        self.filename = os.path.join(self.output_test_dir, "checkpoint.pkl")
+
+        self.result = {"TestingModel1d": {"values": np.arange(0, 10) + 1,
+                                          "time": np.arange(0, 10)},
+                       "feature0d": {"values": 1,
+                                     "time": np.nan,
+                                     "interpolation": "an interpolation"}}
+
+
+    def tearDown(self):
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+
+
+    def test_init(self):
+        Checkpoint(self.filename, logger_level="error")
+
+        self.assertTrue(os.path.isfile(self.filename))
+
+
+    def test_append_load(self):
+        checkpoint = Checkpoint(self.filename, logger_level="error")
+
+        checkpoint.append(["a", "b"], 0, np.array([1, 2]), self.result)
+        checkpoint.append(["a", "b"], 2, np.array([3, 4]), self.result)
+        checkpoint.append(["a"], 1, 5, self.result)
+
+        evaluations = checkpoint.load(["a", "b"])
+
+        self.assertEqual(set(evaluations.keys()), set([0, 2]))
+        self.assertTrue(np.array_equal(evaluations[2][0], [3, 4]))
+        self.assertTrue(np.array_equal(evaluations[0][1]["TestingModel1d"]["values"],
+                                       np.arange(0, 10) + 1))
+        self.assertNotIn("interpolation", evaluations[0][1]["feature0d"])
+
+        evaluations = checkpoint.load(["a"])
+        self.assertEqual(list(evaluations.keys()), [1])
+        self.assertEqual(evaluations[1][0], 5)
+
+
+    def test_resume(self):
+        checkpoint = Checkpoint(self.filename, logger_level="error")
+        checkpoint.append(["a", "b"], 0, np.array([1, 2]), self.result)
+
+        checkpoint = Checkpoint(self.filename, resume=True, logger_level="error")
+        self.assertEqual(list(checkpoint.load(["a", "b"]).keys()), [0])
+
+        checkpoint = Checkpoint(self.filename, logger_level="error")
+        self.assertEqual(checkpoint.load(["a", "b"]), {})
+
+
+    def test_load_partially_written(self):
+        checkpoint = Checkpoint(self.filename, logger_level="error")
+        checkpoint.append(["a", "b"], 0, np.array([1, 2]), self.result)
+        checkpoint.append(["a", "b"], 1, np.array([3, 4]), self.result)
+
+        # Simulate a run that was killed while writing the last evaluation
+        size = os.path.getsize(self.filename)
+        with open(self.filename, "ab") as f:
+            f.truncate(size - 10)
+
+        evaluations = checkpoint.load(["a", "b"])
+        self.assertEqual(list(evaluations.keys()), [0])
+
+        checkpoint.append(["a", "b"], 1, np.array([3, 4]), self.result)
+
+        evaluations = checkpoint.load(["a", "b"])
+        self.assertEqual(set(evaluations.keys()), set([0, 1]))
+
+
+    def test_load_settings(self):
+        checkpoint = Checkpoint(self.filename, logger_level="error")
+
+        self.assertEqual(checkpoint.load(["a", "b"], "settings 1"), {})
+        checkpoint.append(["a", "b"], 0, np.array([1, 2]), self.result)
+
+        checkpoint = Checkpoint(self.filename, resume=True, logger_level="error")
+        self.assertEqual(list(checkpoint.load(["a", "b"], "settings 1").keys()), [0])
+        self.assertEqual(list(checkpoint.load(["a", "b"]).keys()), [0])
+
+        self.assertEqual(checkpoint.load(["a", "b"], "settings 2"), {})
+        checkpoint.append(["a", "b"], 1, np.array([3, 4]), self.result)
+
+        self.assertEqual(list(checkpoint.load(["a", "b"], "settings 2").keys()), [1])
+        self.assertEqual(checkpoint.load(["a", "b"], "settings 1"), {})
@@ -7,6 +7,7 @@ import numpy as np
 
 from uncertainpy import Data
 from uncertainpy.data import DataFeature
+from uncertainpy.utils import SpikeMatrix
 
 
 class TestDataFeature(unittest.TestCase):
@@ -24,7 +25,8 @@ class TestDataFeature(unittest.TestCase):
         self.statistical_metrics = ["evaluations", "time", "mean", "variance",
                                     "percentile_5", "percentile_95",
                                     "sobol_first", "sobol_first_average",
-                                    "sobol_total", "sobol_total_average"]
+                                    "sobol_total", "sobol_total_average",
+                                    "sobol_second"]
 
 
     def tearDown(self):
@@ -330,6 +332,37 @@ class TestData(unittest.TestCase):
         self.assertEqual(data.seed, "")
 
 
+    def test_save_load_sparse(self):
+        time = np.arange(0, 10)
+        evaluations = [SpikeMatrix.from_spiketrains([[1, 3], [2]], time),
+                       np.nan,
+                       SpikeMatrix.from_spiketrains([[], [5, 6, 7]], time)]
+
+        self.data.add_features("model")
+        self.data["model"].evaluations = evaluations
+        self.data["model"].time = time
+
+        filename = os.path.join(self.output_test_dir, "test_save_sparse")
+        self.data.save(filename)
+
+        data = Data(filename, logger_level="error")
+
+        self.assertEqual(data["model"].evaluations[0], evaluations[0])
+        self.assertTrue(np.isnan(data["model"].evaluations[1]))
+        self.assertEqual(data["model"].evaluations[2], evaluations[2])
+        self.assertEqual(data["model"].ndim(), 2)
+        self.assertTrue(np.array_equal(data["model"].time, time))
+
+
+    def test_remove_only_invalid_features_sparse(self):
+        self.data.add_features("model")
+        self.data["model"].evaluations = [SpikeMatrix.from_spiketrains([[1]], np.arange(0, 10)), np.nan]
+
+        self.data.remove_only_invalid_features()
+
+        self.assertIn("model", self.data)
+
+
     def test_save_empty(self):
         data = Data()
 
@@ -546,6 +579,12 @@ class TestData(unittest.TestCase):
         self.data.incomplete = -1
         self.data.method = -1
         self.data.seed = -1
+        self.data.cache_hits = -1
+        self.data.cache_misses = -1
+        self.data.failures = -1
+        self.data.timeouts = -1
+        self.data.profiling = {"model.run": np.ones(2)}
+        self.data.pce_recurrence = {"alpha": np.ones((2, 3))}
 
         self.data.clear()
 
@@ -556,6 +595,121 @@ class TestData(unittest.TestCase):
         self.assertEqual(self.data.model_name, "")
         self.assertEqual(self.data.method, "")
         self.assertEqual(self.data.seed, "")
+        self.assertEqual(self.data.cache_hits, 0)
+        self.assertEqual(self.data.cache_misses, 0)
+        self.assertEqual(self.data.failures, 0)
+        self.assertEqual(self.data.timeouts, 0)
+        self.assertEqual(self.data.profiling, {})
+        self.assertEqual(self.data.pce_recurrence, {})
+
+
+    def test_save_load_cache(self):
+        self.setup_mock_data(self.data)
+
+        filename = os.path.join(self.output_test_dir, "test_save_cache.h5")
+
+        self.data.save(filename)
+        new_data = Data(filename, logger_level="error")
+
+        self.assertEqual(new_data.cache_hits, 0)
+        self.assertEqual(new_data.cache_misses, 0)
+
+        self.data.cache_hits = 3
+        self.data.cache_misses = 2
+        self.data.save(filename)
+
+        new_data = Data(filename, logger_level="error")
+
+        self.assertEqual(new_data.cache_hits, 3)
+        self.assertEqual(new_data.cache_misses, 2)
+
+
+    def test_save_load_failures(self):
+        self.setup_mock_data(self.data)
+
+        filename = os.path.join(self.output_test_dir, "test_save_failures.h5")
+
+        self.data.save(filename)
+        new_data = Data(filename, logger_level="error")
+
+        self.assertEqual(new_data.failures, 0)
+        self.assertEqual(new_data.timeouts, 0)
+
+        self.data.failures = 3
+        self.data.timeouts = 1
+        self.data.save(filename)
+
+        new_data = Data(filename, logger_level="error")
+
+        self.assertEqual(new_data.failures, 3)
+        self.assertEqual(new_data.timeouts, 1)
+
+
+    def test_save_load_profiling(self):
+        self.setup_mock_data(self.data)
+
+        filename = os.path.join(self.output_test_dir, "test_save_profiling.h5")
+
+        self.data.profiling = {"model.run": np.array([1., np.nan, 2.]),
+                               "features.feature1d": np.array([0.5, np.nan, 0.5]),
+                               "pid": np.array([10., np.nan, 11.])}
+        self.data.save(filename)
+
+        new_data = Data(filename, logger_level="error")
+
+        self.assertEqual(sorted(new_data.profiling.keys()),
+                         ["features.feature1d", "model.run", "pid"])
+        self.assertTrue(np.array_equal(new_data.profiling["model.run"][[0, 2]], [1, 2]))
+        self.assertTrue(np.isnan(new_data.profiling["model.run"][1]))
+
+        self.assertNotIn("profiling", new_data)
+        self.assertEqual(sorted(new_data.data.keys()), sorted(self.data.data.keys()))
+
+
+    def test_save_load_pce(self):
+        self.setup_mock_data(self.data)
+
+        filename = os.path.join(self.output_test_dir, "test_save_pce.h5")
+
+        self.data.pce_recurrence = {"alpha": np.array([[1.5, 1.5], [0, 0]]),
+                                    "beta": np.array([[0, 1/12.], [0, 1]])}
+        self.data["feature1d"].pce_coefficients = np.arange(12.).reshape(6, 2)
+        self.data["feature1d"].pce_multi_indices = np.array([[0, 0], [1, 0], [0, 1],
+                                                             [2, 0], [1, 1], [0, 2]])
+        self.data["feature1d"].pce_order = 2
+        self.data["feature1d"].pce_error = 1e-4
+        self.data.save(filename)
+
+        new_data = Data(filename, logger_level="error")
+
+        self.assertEqual(sorted(new_data.pce_recurrence.keys()), ["alpha", "beta"])
+        self.assertTrue(np.array_equal(new_data.pce_recurrence["beta"],
+                                       self.data.pce_recurrence["beta"]))
+        self.assertTrue(np.array_equal(new_data["feature1d"].pce_coefficients,
+                                       self.data["feature1d"].pce_coefficients))
+        self.assertTrue(np.array_equal(new_data["feature1d"].pce_multi_indices,
+                                       self.data["feature1d"].pce_multi_indices))
+        self.assertEqual(new_data["feature1d"].pce_order, 2)
+        self.assertEqual(new_data["feature1d"].pce_error, 1e-4)
+
+        self.assertNotIn("pce recurrence", new_data)
+        self.assertEqual(sorted(new_data.data.keys()), sorted(self.data.data.keys()))
+
+
+    def test_save_load_sobol_second(self):
+        self.setup_mock_data(self.data)
+
+        filename = os.path.join(self.output_test_dir, "test_save_sobol_second.h5")
+
+        self.data["feature1d"].sobol_second = np.array([[[0, 0], [0.1, 0.2]],
+                                                        [[0.1, 0.2], [0, 0]]])
+        self.data.save(filename)
+
+        new_data = Data(filename, logger_level="error")
+
+        self.assertTrue(np.array_equal(new_data["feature1d"].sobol_second,
+                                       self.data["feature1d"].sobol_second))
+        self.assertIsNone(new_data["TestingModel1d"].sobol_second)
 
 
     def test_ndim(self):
@@ -0,0 +1,225 @@
+import unittest
+import os
+import shutil
+
+import numpy as np
+
+from uncertainpy.core import EvaluationCache
+from uncertainpy.models import Model
+from uncertainpy.features import Features
+from uncertainpy.utils import SpikeMatrix
+
+from .testing_classes import TestingFeatures, TestingModel1d
+
+
+
+class TestEvaluationCache(unittest.TestCase):
+    def setUp(self):
+        self.output_test_dir = ".tests/"
+
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+        os.makedirs(self.output_test_dir)
+
+        self.cache_folder = os.path.join(self.output_test_dir, "cache")
+
+        self.model = TestingModel1d()
+        self.features = TestingFeatures(features_to_run=["feature0d", "feature1d"])
+
+        self.result = {"TestingModel1d": {"values": np.arange(0, 10) + 1,
+                                          "time": np.arange(0, 10)},
+                       "feature0d": {"values": 1,
+                                     "time": np.nan},
+                       "feature1d": {"values": [np.arange(0, 3), np.arange(0, 5)],
+                                     "time": np.arange(0, 2),
+                                     "interpolation": "an interpolation"}}
+
+
+    def tearDown(self):
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+
+
+    def test_init(self):
+        cache = EvaluationCache(logger_level="error")
+
+        self.assertIsNone(cache.folder)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 0)
+        self.assertEqual(len(cache), 0)
+
+
+    def test_init_folder(self):
+        EvaluationCache(folder=self.cache_folder, logger_level="error")
+
+        self.assertTrue(os.path.isdir(self.cache_folder))
+
+
+    def test_key(self):
+        cache = EvaluationCache(logger_level="error")
+
+        key = cache.key(self.model, self.features, {"a": 1.0, "b": 2.0})
+
+        self.assertEqual(key, cache.key(self.model, self.features, {"b": 2.0, "a": 1.0}))
+        self.assertEqual(key, cache.key(self.model, self.features, {"a": np.float64(1.0), "b": 2.0}))
+
+        self.assertNotEqual(key, cache.key(self.model, self.features, {"a": 1.0, "b": 2.1}))
+        self.assertNotEqual(key, cache.key(self.model, self.features, {"a": 1.0}))
+        self.assertNotEqual(key, cache.key(Model(model_function), self.features, {"a": 1.0, "b": 2.0}))
+        self.assertNotEqual(key, cache.key(self.model, Features(), {"a": 1.0, "b": 2.0}))
+
+        self.model.model_kwargs = {"c": 3}
+        self.assertNotEqual(key, cache.key(self.model, self.features, {"a": 1.0, "b": 2.0}))
+
+
+    def test_key_version(self):
+        cache_1 = EvaluationCache(version="1", logger_level="error")
+        cache_2 = EvaluationCache(version="2", logger_level="error")
+
+        self.assertNotEqual(cache_1.key(self.model, self.features, {"a": 1}),
+                            cache_2.key(self.model, self.features, {"a": 1}))
+
+
+    def check_result(self, result):
+        self.assertEqual(set(result.keys()), set(["TestingModel1d", "feature0d", "feature1d"]))
+
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["values"], np.arange(0, 10) + 1))
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["time"], np.arange(0, 10)))
+        self.assertEqual(result["feature0d"]["values"], 1)
+        self.assertTrue(np.isnan(result["feature0d"]["time"]))
+        self.assertTrue(np.array_equal(result["feature1d"]["values"][0], np.arange(0, 3)))
+        self.assertTrue(np.array_equal(result["feature1d"]["values"][1], np.arange(0, 5)))
+        self.assertNotIn("interpolation", result["feature1d"])
+
+
+    def test_get_set_memory(self):
+        cache = EvaluationCache(logger_level="error")
+
+        self.assertIsNone(cache.get("key"))
+        self.assertEqual(cache.misses, 1)
+
+        cache.set("key", self.result)
+        result = cache.get("key")
+
+        self.assertEqual(cache.hits, 1)
+        self.check_result(result)
+
+        # Changes to the returned result are not stored in the cache
+        result["feature1d"]["interpolation"] = "an interpolation"
+        self.check_result(cache.get("key"))
+
+
+    def test_get_set_folder(self):
+        cache = EvaluationCache(folder=self.cache_folder, logger_level="error")
+        cache.set("key", self.result)
+
+        self.assertTrue(os.path.isfile(os.path.join(self.cache_folder, "key.npz")))
+
+        cache = EvaluationCache(folder=self.cache_folder, logger_level="error")
+        result = cache.get("key")
+
+        self.assertEqual(cache.hits, 1)
+        self.check_result(result)
+
+
+    def test_get_set_folder_sparse(self):
+        spike_matrix = SpikeMatrix.from_spiketrains([[1, 3], [2]], np.arange(0, 10))
+        self.result["TestingModel1d"]["values"] = spike_matrix
+
+        cache = EvaluationCache(folder=self.cache_folder, logger_level="error")
+        cache.set("key", self.result)
+
+        cache = EvaluationCache(folder=self.cache_folder, logger_level="error")
+        result = cache.get("key")
+
+        self.assertIsInstance(result["TestingModel1d"]["values"], SpikeMatrix)
+        self.assertEqual(result["TestingModel1d"]["values"], spike_matrix)
+
+
+    def test_max_items(self):
+        cache = EvaluationCache(max_items=2, logger_level="error")
+
+        cache.set("key_1", self.result)
+        cache.set("key_2", self.result)
+        cache.get("key_1")
+        cache.set("key_3", self.result)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("key_2"))
+        self.assertIsNotNone(cache.get("key_1"))
+        self.assertIsNotNone(cache.get("key_3"))
+
+
+    def test_max_size(self):
+        cache = EvaluationCache(folder=self.cache_folder, logger_level="error")
+        cache.set("key_1", self.result)
+
+        size = os.path.getsize(os.path.join(self.cache_folder, "key_1.npz"))
+
+        cache = EvaluationCache(folder=self.cache_folder,
+                                max_size=2*size,
+                                logger_level="error")
+
+        os.utime(os.path.join(self.cache_folder, "key_1.npz"), (0, 0))
+        cache.set("key_2", self.result)
+        cache.set("key_3", self.result)
+
+        self.assertEqual(len(cache), 2)
+        self.assertFalse(os.path.isfile(os.path.join(self.cache_folder, "key_1.npz")))
+
+
+    def test_max_size_recently_used(self):
+        cache = EvaluationCache(folder=self.cache_folder, logger_level="error")
+        cache.set("key_1", self.result)
+
+        size = os.path.getsize(os.path.join(self.cache_folder, "key_1.npz"))
+
+        cache = EvaluationCache(folder=self.cache_folder,
+                                max_items=0,
+                                max_size=2*size,
+                                logger_level="error")
+
+        cache.set("key_2", self.result)
+        cache.get("key_1")
+        cache.set("key_3", self.result)
+
+        self.assertTrue(os.path.isfile(os.path.join(self.cache_folder, "key_1.npz")))
+        self.assertFalse(os.path.isfile(os.path.join(self.cache_folder, "key_2.npz")))
+        self.assertTrue(os.path.isfile(os.path.join(self.cache_folder, "key_3.npz")))
+
+
+    def test_set_does_not_list_folder(self):
+        cache = EvaluationCache(folder=self.cache_folder, max_size=10**9, logger_level="error")
+
+        listdir = os.listdir
+        calls = []
+
+        def counting(path):
+            calls.append(path)
+            return listdir(path)
+
+        os.listdir = counting
+        try:
+            for i in range(5):
+                cache.set("key_{}".format(i), self.result)
+        finally:
+            os.listdir = listdir
+
+        self.assertEqual(calls, [])
+        self.assertEqual(len(cache), 5)
+
+
+    def test_clear(self):
+        cache = EvaluationCache(folder=self.cache_folder, logger_level="error")
+        cache.set("key", self.result)
+        cache.get("key")
+
+        cache.clear()
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 0)
+        self.assertIsNone(cache.get("key"))
+
+
+def model_function(a=1, b=2):
+    return np.arange(0, 10), np.arange(0, 10) + a + b
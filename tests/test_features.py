@@ -10,7 +10,8 @@ import quantities as pq
 from uncertainpy.features import Features, GeneralSpikingFeatures
 from uncertainpy.features import SpikingFeatures, NetworkFeatures, GeneralNetworkFeatures
 from uncertainpy.features import EfelFeatures
-from uncertainpy.features import Spikes
+from uncertainpy.core import Timings
+from uncertainpy.features import Spikes, Spiketrains
 from .testing_classes import TestingFeatures
 
 class TestFeatures(unittest.TestCase):
@@ -534,6 +535,19 @@ class TestEfelFeatures(unittest.TestCase):
         self.assertEqual(set(self.features.implemented_features()), set(self.implemented_features))
 
 
+    def test_features_created_on_demand(self):
+        self.assertNotIn("Spikecount", self.features.__dict__)
+
+        feature_function = self.features.Spikecount
+
+        self.assertIn("Spikecount", self.features.__dict__)
+        self.assertIs(self.features.Spikecount, feature_function)
+        self.assertEqual(feature_function.__name__, "Spikecount")
+
+        with self.assertRaises(AttributeError):
+            self.features.not_an_efel_feature
+
+
     def test_spikecount(self):
         time, values = self.features.Spikecount(self.time, self.values, self.info)
 
@@ -578,6 +592,119 @@ class TestEfelFeatures(unittest.TestCase):
         self.assertEqual(values, 12)
 
 
+    def count_efel_calls(self, function):
+        calls = []
+        getMeanFeatureValues = efel.getMeanFeatureValues
+
+        def counting(traces, feature_names, **kwargs):
+            calls.append(list(feature_names))
+            return getMeanFeatureValues(traces, feature_names, **kwargs)
+
+        efel.getMeanFeatureValues = counting
+        try:
+            function()
+        finally:
+            efel.getMeanFeatureValues = getMeanFeatureValues
+
+        return calls
+
+
+    def test_single_efel_call(self):
+        self.features.features_to_run = ["Spikecount", "AP_height", "ISI_CV"]
+
+        def calculate():
+            self.result = self.features.calculate_features(self.time, self.values, self.info)
+
+        calls = self.count_efel_calls(calculate)
+
+        self.assertEqual(calls, [["Spikecount", "AP_height", "ISI_CV"]])
+        self.assertEqual(self.result["Spikecount"]["values"], 12)
+
+        trace = {"T": self.time,
+                 "V": self.values,
+                 "stim_start": [self.info["stimulus_start"]],
+                 "stim_end": [self.info["stimulus_end"]]}
+        expected = efel.getMeanFeatureValues([trace], ["AP_height"], raise_warnings=False)[0]
+        self.assertEqual(self.result["AP_height"]["values"], expected["AP_height"])
+
+
+    def test_efel_same_as_single_call(self):
+        # impedance raises an error for this trace, which makes every
+        # feature be calculated on its own
+        feature_names = [name for name in self.implemented_features if name != "impedance"]
+        self.features.features_to_run = feature_names
+
+        result = self.features.calculate_features(self.time, self.values, self.info)
+
+        trace = {"T": self.time,
+                 "V": self.values,
+                 "stim_start": [self.info["stimulus_start"]],
+                 "stim_end": [self.info["stimulus_end"]]}
+
+        for feature_name in feature_names:
+            expected = efel.getMeanFeatureValues([trace], [feature_name], raise_warnings=False)[0][feature_name]
+
+            if expected is None:
+                self.assertIsNone(result[feature_name]["values"], feature_name)
+            else:
+                self.assertTrue(np.allclose(result[feature_name]["values"], expected, equal_nan=True),
+                                feature_name)
+
+
+    def test_efel_new_trace(self):
+        self.features.features_to_run = ["Spikecount", "AP_height"]
+
+        def calculate():
+            self.features.Spikecount(self.time, self.values, self.info)
+            self.features.AP_height(self.time, self.values, self.info)
+            self.features.AP_height(self.time, self.values.copy(), self.info)
+
+        calls = self.count_efel_calls(calculate)
+
+        self.assertEqual(len(calls), 2)
+
+
+    def test_efel_not_in_features_to_run(self):
+        self.features.features_to_run = ["Spikecount"]
+
+        time, values = self.features.AP_height(self.time, self.values, self.info)
+
+        self.assertIsNotNone(values)
+        self.assertEqual(self.features._efel_cache["results"]["Spikecount"], 12)
+
+
+    def test_efel_error_only_for_failing_feature(self):
+        self.features.features_to_run = ["Spikecount", "AP_height"]
+
+        calls = []
+        getMeanFeatureValues = efel.getMeanFeatureValues
+
+        def failing(traces, feature_names, **kwargs):
+            calls.append(list(feature_names))
+            if "AP_height" in feature_names:
+                raise TypeError("AP_height failed")
+            return getMeanFeatureValues(traces, feature_names, **kwargs)
+
+        efel.getMeanFeatureValues = failing
+        try:
+            time, values = self.features.Spikecount(self.time, self.values, self.info)
+            self.assertEqual(values, 12)
+
+            with self.assertRaises(TypeError):
+                self.features.AP_height(self.time, self.values, self.info)
+        finally:
+            efel.getMeanFeatureValues = getMeanFeatureValues
+
+        self.assertEqual(calls, [["Spikecount", "AP_height"], ["Spikecount"], ["AP_height"]])
+
+
+    def test_efel_getstate(self):
+        self.features.Spikecount(self.time, self.values, self.info)
+        self.assertIsNotNone(self.features._efel_cache)
+
+        self.assertIsNone(self.features.__getstate__()["_efel_cache"])
+
+
 
 class TestGeneralNetworkFeatures(unittest.TestCase):
     def setUp(self):
@@ -635,6 +762,95 @@ class TestGeneralNetworkFeatures(unittest.TestCase):
         self.assertEqual(spiketrains[0].t_stop, self.time_original)
 
 
+    def test_preprocess_spiketrains(self):
+        self.features = GeneralNetworkFeatures(logger_level="error")
+
+        time, spiketrains = self.features.preprocess(self.time_original, self.values)
+
+        self.assertIsInstance(spiketrains, Spiketrains)
+        self.assertEqual(len(spiketrains), 4)
+        self.assertEqual(spiketrains.intermediates, {})
+
+        self.assertTrue(np.array_equal(spiketrains.times, np.concatenate(self.values)))
+        self.assertTrue(np.array_equal(spiketrains.offsets, [0, 4, 8, 12, 13]))
+        self.assertTrue(np.array_equal(spiketrains.neurons, [0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2, 3]))
+        self.assertTrue(np.array_equal(spiketrains.counts, [4, 4, 4, 1]))
+        self.assertEqual(spiketrains.t_stop, self.time_original)
+        self.assertEqual(spiketrains.units, pq.ms)
+
+
+    def test_spiketrains_intermediate(self):
+        calls = []
+
+        def count(spiketrains, factor):
+            calls.append(factor)
+            return factor*len(spiketrains)
+
+        spiketrains = Spiketrains([np.array([1]), np.array([2])])
+
+        self.assertEqual(spiketrains.intermediate("count", count, 2), 4)
+        self.assertEqual(spiketrains.intermediate("count", count, 2), 4)
+        self.assertEqual(spiketrains.intermediate("count", count, 3), 6)
+
+        self.assertEqual(calls, [2, 3])
+        self.assertEqual(set(spiketrains.intermediates), set([("count", 2), ("count", 3)]))
+
+
+    def test_spiketrains_sort(self):
+        spiketrains = Spiketrains([np.array([3, 1, 2]), np.array([]), np.array([2, 1])],
+                                  t_stop=4)
+
+        self.assertTrue(np.array_equal(spiketrains.times, [1, 2, 3, 1, 2]))
+        self.assertTrue(np.array_equal(spiketrains.offsets, [0, 3, 3, 5]))
+        self.assertTrue(np.array_equal(spiketrains.neurons, [0, 0, 0, 2, 2]))
+        self.assertTrue(np.array_equal(spiketrains.spike_times(0), [1, 2, 3]))
+        self.assertTrue(np.array_equal(spiketrains.spike_times(1), []))
+        self.assertTrue(np.array_equal(spiketrains.spike_times(2), [1, 2]))
+
+
+    def test_spiketrains_t_stop(self):
+        spiketrains = Spiketrains([np.array([1, 3]), np.array([2])])
+        self.assertEqual(spiketrains.t_stop, 3)
+
+        spiketrains = Spiketrains()
+        self.assertEqual(len(spiketrains), 0)
+        self.assertEqual(spiketrains.t_stop, 0)
+
+        with self.assertRaises(ValueError):
+            Spiketrains([np.array([1, 3])], t_stop=2)
+
+        with self.assertRaises(ValueError):
+            Spiketrains([np.array([-1, 1])], t_stop=2)
+
+
+    def test_spiketrains_neo(self):
+        neo_spiketrains = [neo.core.SpikeTrain([1, 2]*pq.s, t_stop=3*pq.s),
+                           neo.core.SpikeTrain([500]*pq.ms, t_stop=3000*pq.ms)]
+
+        spiketrains = Spiketrains(neo_spiketrains)
+
+        self.assertTrue(np.array_equal(spiketrains.times, [1000, 2000, 500]))
+        self.assertEqual(spiketrains.t_stop, 3000)
+        self.assertNotIn(("neo",), spiketrains.intermediates)
+
+        self.assertIsInstance(spiketrains[0], neo.core.SpikeTrain)
+        self.assertIn(("neo",), spiketrains.intermediates)
+        self.assertEqual(spiketrains[1].t_stop, 3000*pq.ms)
+        self.assertTrue(np.array_equal(spiketrains[1].magnitude, [500]))
+        self.assertEqual(len(list(spiketrains)), 2)
+
+
+    def test_spiketrains_copy(self):
+        spiketrains = Spiketrains([np.array([1, 2]), np.array([3])], t_stop=4)
+
+        copy = Spiketrains(spiketrains, units=pq.s)
+
+        self.assertNotIn(("neo",), spiketrains.intermediates)
+        self.assertTrue(np.allclose(copy.times, [0.001, 0.002, 0.003]))
+        self.assertTrue(np.array_equal(copy.offsets, spiketrains.offsets))
+        self.assertEqual(copy.t_stop, 0.004)
+
+
 class TestNetworkFeatures(unittest.TestCase):
     def setUp(self):
         folder = os.path.dirname(os.path.realpath(__file__))
@@ -823,6 +1039,54 @@ class TestNetworkFeatures(unittest.TestCase):
         self.assertTrue(np.all(values[diag] == 0))
 
 
+    def test_van_rossum_dist_elephant(self):
+        time, values = self.features.van_rossum_dist(self.time, self.spiketrains)
+
+        correct = elephant.spike_train_dissimilarity.van_rossum_dist(self.spiketrains.neo)
+        correct = np.real(correct)
+
+        self.assertTrue(np.allclose(values, correct, atol=1e-6))
+
+
+    def test_victor_purpura_dist_elephant(self):
+        time, values = self.features.victor_purpura_dist(self.time, self.spiketrains)
+
+        correct = elephant.spike_train_dissimilarity.victor_purpura_dist(self.spiketrains.neo)
+
+        self.assertTrue(np.allclose(values, correct))
+
+
+    def test_distance_nr_neurons(self):
+        self.features.distance_nr_neurons = 2
+
+        time, van_rossum_dist = self.features.van_rossum_dist(self.time, self.spiketrains)
+        time, victor_purpura_dist = self.features.victor_purpura_dist(self.time, self.spiketrains)
+
+        self.assertEqual(van_rossum_dist.shape, (2, 2))
+        self.assertEqual(victor_purpura_dist.shape, (2, 2))
+
+        # The first and last neuron
+        self.assertTrue(np.array_equal(victor_purpura_dist, [[0, 3], [3, 0]]))
+
+
+    def test_distance_nr_neurons_all(self):
+        self.features.distance_nr_neurons = 10
+
+        time, values = self.features.victor_purpura_dist(self.time, self.spiketrains)
+
+        self.assertEqual(values.shape, (4, 4))
+
+
+    def test_distance_nr_threads(self):
+        time, correct = self.features.victor_purpura_dist(self.time, self.spiketrains)
+
+        self.features.distance_nr_threads = 2
+
+        time, values = self.features.victor_purpura_dist(self.time, self.spiketrains)
+
+        self.assertTrue(np.array_equal(values, correct))
+
+
     def test_corrcoef(self):
         time, values = self.features.corrcoef(self.time, self.spiketrains)
 
@@ -838,6 +1102,95 @@ class TestNetworkFeatures(unittest.TestCase):
         self.assertEqual(values.shape, (4, 4))
 
 
+    def count_intermediates(self):
+        calls = []
+
+        def counting(name):
+            function = getattr(self.features, "_" + name)
+
+            def intermediate(*args):
+                calls.append(name)
+                return function(*args)
+
+            return intermediate
+
+        for name in ["isi", "cv", "local_variation", "firing_rate", "binned"]:
+            setattr(self.features, "_" + name, counting(name))
+
+        return calls
+
+
+    def test_intermediates_shared(self):
+        calls = self.count_intermediates()
+
+        self.features.calculate_features(self.time, self.spiketrains)
+
+        self.assertEqual(sorted(calls),
+                         ["binned", "cv", "firing_rate", "isi", "local_variation"])
+
+
+    def test_intermediates_not_used(self):
+        calls = self.count_intermediates()
+
+        self.features.average_isi(self.time, self.spiketrains)
+        self.features.binned_isi(self.time, self.spiketrains)
+
+        self.assertEqual(calls, ["isi"])
+        self.assertEqual(list(self.spiketrains.intermediates.keys()), [("isi",)])
+
+
+    def test_intermediates_bin_size(self):
+        self.features.covariance_bin_size = 2
+
+        calls = self.count_intermediates()
+
+        time, corrcoef = self.features.corrcoef(self.time, self.spiketrains)
+        time, covariance = self.features.covariance(self.time, self.spiketrains)
+
+        self.assertEqual(calls, ["binned", "binned"])
+        self.assertEqual(covariance.shape, (4, 4))
+
+
+    def test_intermediates_list(self):
+        spiketrains = list(self.spiketrains)
+
+        time, values = self.features.average_cv(self.time, spiketrains)
+        time, expected = self.features.average_cv(self.time, self.spiketrains)
+
+        self.assertEqual(values, expected)
+
+
+    def test_native_features_no_neo(self):
+        for feature in ["cv", "average_cv", "binned_isi", "average_isi",
+                        "local_variation", "average_local_variation",
+                        "average_firing_rate", "fanofactor"]:
+            getattr(self.features, feature)(self.time, self.spiketrains)
+
+        self.assertNotIn(("neo",), self.spiketrains.intermediates)
+
+
+    def test_binned_isi_histogram(self):
+        values = [np.array([0, 1, 2.5, 6, 8]), np.array([]), np.array([4])]
+        time, spiketrains = self.features.preprocess(self.time_original, values)
+
+        centers, binned_isi = self.features.binned_isi(time, spiketrains)
+
+        bins = np.arange(0, self.time_original + 1, 1)
+        self.assertEqual(len(binned_isi), 3)
+        self.assertTrue(np.array_equal(binned_isi[0], np.histogram(np.diff(values[0]), bins=bins)[0]))
+        self.assertTrue(np.array_equal(binned_isi[1], np.zeros(len(bins) - 1)))
+        self.assertTrue(np.array_equal(binned_isi[2], np.zeros(len(bins) - 1)))
+
+
+    def test_fanofactor_no_spikes(self):
+        time, spiketrains = self.features.preprocess(self.time_original,
+                                                     [np.array([]), np.array([])])
+
+        time, values = self.features.fanofactor(time, spiketrains)
+
+        self.assertTrue(np.isnan(values))
+
+
     def test_reference_feature(self):
         time, values = self.features.reference_feature(1, 1)
 
@@ -881,6 +1234,20 @@ class TestTestingFeatures(unittest.TestCase):
                          set(self.implemented_features))
 
 
+    def test_calculate_features_timings(self):
+        timings = Timings()
+
+        results = self.features.calculate_features(None, None, timings=timings)
+
+        self.assertEqual(set(results.keys()), set(self.implemented_features))
+        self.assertEqual(sorted(timings.keys()),
+                         sorted(["features.preprocess"] +
+                                ["features." + feature for feature in self.implemented_features]))
+
+        with self.assertRaises(TypeError):
+            self.features.calculate_features(None, None, timing=timings)
+
+
     # def test_calculate_none(self):
     #     self.assertEqual(set(self.features.calculate(None, None).keys()),
     #                      set(self.implemented_features))
@@ -0,0 +1,76 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from uncertainpy.utils import lazy_import, module_available, LazyModule
+from .benchmark_import import HEAVY_MODULES, loaded_modules
+
+
+
+class TestLazyImport(unittest.TestCase):
+    def setUp(self):
+        self.output_test_dir = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+
+
+    def test_lazy_import(self):
+        module = lazy_import("uncertainpy.utils.test_lazy_module_missing")
+
+        self.assertIsInstance(module, LazyModule)
+
+        with self.assertRaises(ImportError):
+            module.attribute
+
+
+    def test_lazy_import_loaded(self):
+        self.assertIs(lazy_import("os"), os)
+
+
+    def test_lazy_import_forwards(self):
+        module = LazyModule("json")
+
+        self.assertIn("not imported", repr(module))
+        self.assertEqual(module.dumps([1]), "[1]")
+        self.assertIn("dumps", dir(module))
+        self.assertNotIn("not imported", repr(module))
+
+
+    def test_lazy_import_sees_changes(self):
+        module = LazyModule("json")
+        module.dumps
+
+        import json
+        json.lazy_import_test = 1
+        try:
+            self.assertEqual(module.lazy_import_test, 1)
+        finally:
+            del json.lazy_import_test
+
+
+    def test_module_available(self):
+        self.assertTrue(module_available("os"))
+        self.assertTrue(module_available("numpy"))
+        self.assertFalse(module_available("uncertainpy_module_that_does_not_exist"))
+
+
+    def test_module_available_broken(self):
+        sys.path.insert(0, self.output_test_dir)
+
+        # Installed, but fails to import, for example from a missing library
+        with open(os.path.join(self.output_test_dir, "uncertainpy_broken_module.py"), "w") as f:
+            f.write("raise ImportError('missing library')\n")
+
+        try:
+            self.assertFalse(module_available("uncertainpy_broken_module"))
+        finally:
+            sys.path.remove(self.output_test_dir)
+
+
+    def test_import_uncertainpy(self):
+        self.assertEqual(loaded_modules(HEAVY_MODULES), [])
@@ -1,11 +1,14 @@
 import os
 import unittest
+import pickle
 
 import numpy as np
 from xvfbwrapper import Xvfb
 # import nest
 
 from uncertainpy.models import Model, NeuronModel, NestModel
+from uncertainpy.models import neuron_model
+from uncertainpy.utils import SpikeMatrix
 from uncertainpy.core import Parallel
 from uncertainpy.core import RunModel
 
@@ -22,6 +25,82 @@ from .testing_classes import TestingModelAdaptive, model_function
 folder = os.path.dirname(os.path.realpath(__file__))
 
 
+class HocStandIn(object):
+    """
+    Stands in for the Neuron h object, with a single hoc variable cap.
+    """
+    def __init__(self):
+        self._ref_cap = [0]
+        self.statements = []
+
+    def __call__(self, statement):
+        self.statements.append(statement)
+
+
+class VectorStandIn(object):
+    """
+    Stands in for a Neuron Vector.
+    """
+    def __init__(self, values):
+        self.values = np.array(values, dtype=float)
+        self.recorded = None
+        self.size = None
+
+    def as_numpy(self):
+        return self.values
+
+    def record(self, *arguments):
+        self.recorded = arguments
+
+    def buffer_size(self, size):
+        self.size = size
+
+
+class SectionStandIn(object):
+    """
+    Stands in for a Neuron section.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._ref_v = "v"
+
+    def name(self):
+        return self._name
+
+    def __call__(self, x):
+        return self
+
+
+class SimulatorStandIn(HocStandIn):
+    """
+    Stands in for the Neuron h object of a loaded model with a soma.
+    """
+    def __init__(self):
+        super(SimulatorStandIn, self).__init__()
+        self._ref_t = "t"
+        self.tstop = 1
+        self.v_init = -65
+        self.calls = []
+
+    def __call__(self, statement):
+        super(SimulatorStandIn, self).__call__(statement)
+
+        if statement == "voltage_soma = new Vector()":
+            self.voltage_soma = self.Vector()
+
+    def Vector(self):
+        return VectorStandIn(np.arange(0, 11))
+
+    def allsec(self):
+        return [SectionStandIn("soma")]
+
+    def finitialize(self, *arguments):
+        self.calls.append(("finitialize",) + arguments)
+
+    def run(self):
+        self.calls.append(("run",))
+
+
 class TestModel(unittest.TestCase):
     def setUp(self):
         self.model = Model(logger_level="error")
@@ -121,6 +200,84 @@ class TestModel(unittest.TestCase):
 
 
 
+    def test_init_batch(self):
+        model = Model(logger_level="error")
+
+        self.assertFalse(model.batch)
+        self.assertIsNone(model.batch_size)
+
+        model = Model(batch=True, batch_size=10, logger_level="error")
+
+        self.assertTrue(model.batch)
+        self.assertEqual(model.batch_size, 10)
+
+
+    def test_evaluate_batch(self):
+        def test_model(a, b, c=12):
+            return np.arange(0, 3), np.arange(0, 3) + a[:, np.newaxis] + b[:, np.newaxis] + c
+
+        model = Model(test_model, batch=True, c=22)
+
+        model_results = model.evaluate_batch(a=np.array([0, 1]), b=np.array([1, 2]))
+
+        self.assertEqual(len(model_results), 2)
+        self.assertTrue(np.array_equal(model_results[0][0], np.arange(0, 3)))
+        self.assertTrue(np.array_equal(model_results[0][1], np.arange(0, 3) + 23))
+        self.assertTrue(np.array_equal(model_results[1][0], np.arange(0, 3)))
+        self.assertTrue(np.array_equal(model_results[1][1], np.arange(0, 3) + 25))
+
+
+    def test_evaluate_batch_time_info(self):
+        def test_model(a):
+            time = [np.arange(0, 2 + value) for value in a]
+            values = [np.arange(0, 2 + value) for value in a]
+            info = [{"a": value} for value in a]
+
+            return time, values, info
+
+        model = Model(test_model, batch=True)
+
+        model_results = model.evaluate_batch(a=np.array([0, 1]))
+
+        self.assertTrue(np.array_equal(model_results[0][0], np.arange(0, 2)))
+        self.assertTrue(np.array_equal(model_results[1][0], np.arange(0, 3)))
+        self.assertTrue(np.array_equal(model_results[1][1], np.arange(0, 3)))
+        self.assertEqual(model_results[0][2], {"a": 0})
+        self.assertEqual(model_results[1][2], {"a": 1})
+
+
+    def test_evaluate_batch_shared_info(self):
+        def test_model(a):
+            return np.arange(0, 3), np.arange(0, 3) + a[:, np.newaxis], {"stimulus_start": 1, "stimulus_end": 2}
+
+        model = Model(test_model, batch=True)
+
+        model_results = model.evaluate_batch(a=np.array([0, 1, 2]))
+
+        self.assertEqual(len(model_results), 3)
+        for i, model_result in enumerate(model_results):
+            self.assertTrue(np.array_equal(model_result[1], np.arange(0, 3) + i))
+            self.assertEqual(model_result[2], {"stimulus_start": 1, "stimulus_end": 2})
+
+
+    def test_evaluate_batch_error(self):
+        def test_model(a):
+            return np.arange(0, 3), [np.arange(0, 3)]
+
+        model = Model(test_model, batch=True)
+
+        with self.assertRaises(ValueError):
+            model.evaluate_batch(a=np.array([0, 1]))
+
+        def test_model(a):
+            return np.arange(0, 3), [np.arange(0, 3), np.arange(0, 3)], [{}]
+
+        model = Model(test_model, batch=True)
+
+        with self.assertRaises(ValueError):
+            model.evaluate_batch(a=np.array([0, 1]))
+
+
     def test_validate_run(self):
         self.model.validate_run(("t", "U"))
         self.model.validate_run((1, 2, 3))
@@ -452,6 +609,135 @@ class TestNeuronModel(unittest.TestCase):
 
 
 
+    def test_load_session_python(self):
+        path = os.path.join("tests", "testing_classes")
+
+        model = NeuronModel(path=path,
+                            file="load_python_test.py",
+                            name="testing",
+                            logger_level="error")
+
+        session = model.load_session()
+
+        self.assertEqual(session["run"].__name__, "testing")
+        self.assertIs(model.load_session(), session)
+
+        # A new copy of the model, as in a worker process, reuses the session
+        model = pickle.loads(pickle.dumps(model))
+        self.assertIs(model.load_session(), session)
+
+
+    def test_load_session_error(self):
+        model = NeuronModel(file="model.txt",
+                            logger_level="error")
+
+        with self.assertRaises(ValueError):
+            model.load_session()
+
+
+    def test_initialize(self):
+        path = os.path.join("tests", "testing_classes")
+
+        model = NeuronModel(path=path,
+                            file="load_python_test.py",
+                            name="testing_info",
+                            logger_level="error")
+
+        model.initialize()
+
+        session = model.load_session()
+        self.assertEqual(session["run"].__name__, "testing_info")
+
+
+    def test_set_parameters(self):
+        model = NeuronModel(logger_level="error")
+        model.h = HocStandIn()
+
+        model.set_parameters({"cap": 1.1, "soma.gnabar_hh": 0.12})
+
+        self.assertEqual(model.h._ref_cap[0], 1.1)
+        self.assertEqual(model.h.statements, ["soma.gnabar_hh = 0.12"])
+
+
+    def test_to_array(self):
+        model = NeuronModel(logger_level="error")
+
+        vector = VectorStandIn(np.arange(0, 10))
+        array = model._to_array(vector)
+
+        self.assertTrue(np.array_equal(array, np.arange(0, 10)))
+
+        # The array does not share memory with the reused Vector
+        vector.values[0] = 10
+        self.assertEqual(array[0], 0)
+
+
+    def test_record_into(self):
+        model = NeuronModel(logger_level="error")
+        model.h = HocStandIn()
+
+        vector = VectorStandIn([])
+        model._record_into(vector, "reference")
+
+        self.assertEqual(vector.recorded, ("reference",))
+        self.assertIsNone(vector.size)
+
+        model.record_interval = 0.1
+        model.h.tstop = 100
+
+        model._record_into(vector, "reference")
+
+        self.assertEqual(vector.recorded, ("reference", 0.1))
+        self.assertEqual(vector.size, 1001)
+
+
+    def test_run_neuron_session(self):
+        model = NeuronModel(file="standin.hoc", logger_level="error")
+
+        h = SimulatorStandIn()
+        neuron_model._sessions[model._session_key()] = {"h": h,
+                                                        "time": None,
+                                                        "record_interval": None,
+                                                        "setters": {}}
+
+        try:
+            model.run_neuron(cap=1.1)
+            time = model.time
+            voltage = h.voltage_soma
+
+            self.assertEqual(h._ref_cap[0], 1.1)
+            self.assertEqual(h.calls, [("finitialize", -65), ("run",)])
+            self.assertEqual(time.recorded, ("t",))
+
+            # The recordings are reused
+            model.run_neuron(cap=1.2)
+            self.assertIs(model.time, time)
+            self.assertIs(h.voltage_soma, voltage)
+            self.assertEqual(h.calls[2:], [("finitialize", -65), ("run",)])
+
+            # and redone when the recording interval changes
+            model.record_interval = 0.1
+            model.run_neuron(cap=1.3)
+            self.assertIsNot(model.time, time)
+            self.assertIsNot(h.voltage_soma, voltage)
+            self.assertEqual(model.time.recorded, ("t", 0.1))
+            self.assertEqual(h.voltage_soma.recorded, ("v", 0.1))
+
+        finally:
+            del neuron_model._sessions[model._session_key()]
+
+
+    def test_pickle(self):
+        model = NeuronModel(logger_level="error")
+        model.h = HocStandIn()
+        model.time = HocStandIn()
+
+        model = pickle.loads(pickle.dumps(model))
+
+        self.assertIsNone(model.h)
+        self.assertIsNone(model.time)
+
+
     def test_run_python_model_update_info(self):
         path = os.path.join("tests", "testing_classes")
 
@@ -564,6 +850,7 @@ class TestNestModel(unittest.TestCase):
 
         binary_spike = [binary_spike]
         self.assertTrue(np.array_equal(time, correct_time))
+        self.assertIsInstance(values, SpikeMatrix)
         self.assertTrue(np.array_equal(values, binary_spike))
 
 
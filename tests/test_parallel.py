@@ -12,6 +12,7 @@ from uncertainpy.features import Features
 
 from .testing_classes import TestingFeatures
 from .testing_classes import TestingModel1d, model_function
+from .testing_classes import TestingModel1dBatch
 from .testing_classes import TestingModelNoTime
 from .testing_classes import TestingModelAdaptive
 from .testing_classes import PostprocessErrorNumpy
@@ -273,6 +274,80 @@ class TestParallel(unittest.TestCase):
                               scipy.interpolate.fitpack2.UnivariateSpline)
 
 
+    def test_init_interpolation_method(self):
+        parallel = Parallel(model=TestingModel1d(),
+                            interpolation_method="linear",
+                            logger_level="error")
+
+        self.assertEqual(parallel.interpolation_method, "linear")
+
+        with self.assertRaises(ValueError):
+            Parallel(model=TestingModel1d(),
+                     interpolation_method="quadratic",
+                     logger_level="error")
+
+
+    def test_interpolation_1d_linear(self):
+        self.parallel.interpolation_method = "linear"
+
+        results = {"TestingModel1d": {"values": np.arange(0, 10)**2,
+                                      "time": np.arange(0, 10)}}
+
+        interpolation = self.parallel.interpolation_1d(results, "TestingModel1d")
+
+        self.assertTrue(np.allclose(interpolation([0.5, 2.5]), [0.5, 6.5]))
+
+
+    def test_resample_1d(self):
+        results = {"TestingModel1d": {"values": np.arange(0, 10) + 1,
+                                      "time": np.arange(0, 10)}}
+
+        time = np.linspace(0, 9, 19)
+        self.parallel.resample_1d(results, "TestingModel1d", time)
+
+        self.assertNotIn("interpolation", results["TestingModel1d"])
+        self.assertTrue(np.array_equal(results["TestingModel1d"]["time"], time))
+        self.assertTrue(np.allclose(results["TestingModel1d"]["values"], time + 1))
+
+
+    def test_resample_1d_values_nan(self):
+        results = {"TestingModel1d": {"values": [1, 2, 3, 4, np.nan],
+                                      "time": [1, 2, 3, 4, 5]}}
+
+        time = np.arange(0, 10)
+        self.parallel.resample_1d(results, "TestingModel1d", time)
+
+        self.assertTrue(np.isnan(results["TestingModel1d"]["values"]))
+        self.assertTrue(np.array_equal(results["TestingModel1d"]["time"], time))
+
+
+    def test_create_interpolations_interpolation_time(self):
+        self.parallel.model.interpolate = True
+        self.parallel.features.interpolate = ["feature_interpolate"]
+        self.parallel.interpolation_time = {"TestingModel1d": np.arange(0, 5),
+                                            "feature_interpolate": np.arange(0, 20)}
+
+        results = {"TestingModel1d": {"values": np.arange(0, 10) + 1,
+                                      "time": np.arange(0, 10)},
+                   "feature_interpolate": {"values": np.arange(0, 10) + 1,
+                                           "time": np.arange(0, 10)},
+                   "feature1d": {"values": np.arange(0, 10),
+                                 "time": np.arange(0, 10)}}
+
+        results = self.parallel.create_interpolations(results)
+
+        self.assertNotIn("interpolation", results["TestingModel1d"])
+        self.assertTrue(np.array_equal(results["TestingModel1d"]["time"], np.arange(0, 5)))
+        self.assertTrue(np.allclose(results["TestingModel1d"]["values"], np.arange(0, 5) + 1))
+
+        self.assertNotIn("interpolation", results["feature_interpolate"])
+        self.assertTrue(np.array_equal(results["feature_interpolate"]["time"], np.arange(0, 20)))
+        self.assertTrue(np.allclose(results["feature_interpolate"]["values"], np.arange(0, 20) + 1))
+
+        self.assertNotIn("interpolation", results["feature1d"])
+        self.assertTrue(np.array_equal(results["feature1d"]["values"], np.arange(0, 10)))
+
+
     def test_interpolation_1d_different_time_values(self):
         results = {"TestingModel1d": {"values": np.arange(0, 5),
                                       "time": [[1, 3], [3, 4]]}}
@@ -375,6 +450,22 @@ class TestParallel(unittest.TestCase):
             self.parallel.create_interpolations(results)
 
 
+    def test_run_batch(self):
+        self.parallel.model = TestingModel1dBatch()
+
+        results = self.parallel.run_batch([{"a": 0, "b": 1}, {"a": 1, "b": 2}])
+
+        self.assertEqual(len(results), 2)
+
+        self.assertTrue(np.array_equal(results[0]["TestingModel1dBatch"]["time"], np.arange(0, 10)))
+        self.assertTrue(np.array_equal(results[0]["TestingModel1dBatch"]["values"], np.arange(0, 10) + 1))
+        self.assertTrue(np.array_equal(results[1]["TestingModel1dBatch"]["values"], np.arange(0, 10) + 3))
+        self.assertEqual(results[1]["feature0d"]["values"], 1)
+        self.assertTrue(np.array_equal(results[1]["feature_interpolate"]["values"], np.arange(0, 10) + 3))
+        self.assertIsInstance(results[1]["feature_interpolate"]["interpolation"],
+                              scipy.interpolate.fitpack2.UnivariateSpline)
+
+
     def test_run(self):
         results = self.parallel.run(self.model_parameters)
 
@@ -397,6 +488,63 @@ class TestParallel(unittest.TestCase):
                               scipy.interpolate.fitpack2.UnivariateSpline)
 
 
+    def test_run_profile(self):
+        self.parallel.profile = True
+
+        results = self.parallel.run(self.model_parameters)
+
+        self.assertIn("__timings__", results)
+
+        timings = results.pop("__timings__")
+        self.assertEqual(sorted(timings.keys()),
+                         ["features.feature0d", "features.feature1d",
+                          "features.feature2d", "features.feature_interpolate",
+                          "features.feature_invalid", "features.preprocess",
+                          "finished", "interpolation", "model.postprocess",
+                          "model.run", "peak_rss", "pid"])
+        self.assertEqual(timings["pid"], os.getpid())
+
+        self.assertEqual(sorted(results.keys()),
+                         ["TestingModel1d", "feature0d", "feature1d", "feature2d",
+                          "feature_interpolate", "feature_invalid"])
+        self.assertTrue(np.array_equal(results["TestingModel1d"]["values"], np.arange(0, 10) + 1))
+        self.assertEqual(results["feature0d"]["values"], 1)
+
+
+    def test_run_profile_calculate_features_override(self):
+        class OverriddenFeatures(TestingFeatures):
+            def calculate_features(self, *model_results):
+                results = super(OverriddenFeatures, self).calculate_features(*model_results)
+                results["feature0d"]["values"] = 2
+
+                return results
+
+        self.parallel.features = OverriddenFeatures(features_to_run=["feature0d"])
+
+        results = self.parallel.run(self.model_parameters)
+
+        self.parallel.profile = True
+        profiled = self.parallel.run(self.model_parameters)
+
+        timings = profiled.pop("__timings__")
+
+        self.assertIn("features", timings)
+        self.assertNotIn("features.feature0d", timings)
+        self.assertEqual(profiled["feature0d"]["values"], 2)
+        self.assertEqual(profiled["feature0d"]["values"], results["feature0d"]["values"])
+
+
+    def test_run_batch_profile(self):
+        self.parallel.model = TestingModel1dBatch()
+        self.parallel.profile = True
+
+        results = self.parallel.run_batch([{"a": 0, "b": 1}, {"a": 1, "b": 2}])
+
+        self.assertEqual(results[0]["__timings__"]["model.run"],
+                         results[1]["__timings__"]["model.run"])
+        self.assertIn("features.preprocess", results[1]["__timings__"])
+
+
     def test_run_kwargs(self):
         def test_model(a=10, b=11, c=12):
             return a + b, c
@@ -0,0 +1,175 @@
+import unittest
+
+import numpy as np
+import chaospy as cp
+
+from uncertainpy.core.pce_fit import PCEFit, create_polynomial, fit_group
+from uncertainpy.core.pce_statistics import evaluate_basis
+
+
+class TestPCEFit(unittest.TestCase):
+    def setUp(self):
+        self.distribution = cp.J(cp.Uniform(1, 2), cp.Normal(0, 1))
+
+        self.P = cp.orth_ttr(3, self.distribution)
+
+        np.random.seed(10)
+        self.nodes = self.distribution.sample(2*len(self.P) + 2, "M")
+
+        random = np.random.RandomState(0)
+        self.evaluations = [self.nodes[0]*self.nodes[1],
+                            np.sin(self.nodes[0])[:, None]*random.uniform(0, 1, (1, 4)),
+                            self.nodes[1][:, None, None]**2*random.uniform(0, 1, (1, 2, 3))]
+
+
+    def test_create_polynomial(self):
+        coefficients = np.arange(len(self.P)*3).reshape(len(self.P), 3)
+
+        polynomial = create_polynomial(self.P, coefficients)
+        correct = cp.poly.sum(self.P*coefficients.T, -1)
+
+        self.assertEqual(polynomial.shape, (3,))
+        self.assertTrue(np.allclose(polynomial(*self.nodes), correct(*self.nodes)))
+
+
+    def test_create_polynomial_0d(self):
+        coefficients = np.arange(len(self.P), dtype=float)
+
+        polynomial = create_polynomial(self.P, coefficients)
+
+        self.assertEqual(polynomial.shape, ())
+        self.assertTrue(np.allclose(polynomial(*self.nodes),
+                                    np.dot(coefficients, self.P(*self.nodes))))
+
+
+    def test_coefficients_regression(self):
+        fit = PCEFit(evaluate_basis(self.P, self.nodes))
+
+        coefficients = fit.coefficients(self.evaluations)
+
+        self.assertEqual(len(coefficients), 3)
+
+        for coefficient, evaluation in zip(coefficients, self.evaluations):
+            correct = cp.fit_regression(self.P, self.nodes, evaluation, rule="T", retall=True)[1]
+
+            self.assertEqual(coefficient.shape, (len(self.P),) + evaluation.shape[1:])
+            self.assertTrue(np.allclose(coefficient.reshape(len(self.P), -1), correct))
+
+
+    def test_coefficients_quadrature(self):
+        nodes, weights = cp.generate_quadrature(5, self.distribution, rule="J", sparse=True)
+
+        evaluations = [nodes[0]*nodes[1], np.outer(nodes[0]**2, [1, 2, 3])]
+
+        fit = PCEFit(evaluate_basis(self.P, nodes), weights)
+        coefficients = fit.coefficients(evaluations)
+
+        for coefficient, evaluation in zip(coefficients, evaluations):
+            correct = cp.fit_quadrature(self.P, nodes, weights, evaluation, retall=True)[1]
+
+            self.assertTrue(np.allclose(coefficient, correct))
+
+
+    def test_coefficients_single_parameter(self):
+        distribution = cp.Uniform(1, 2)
+        P = cp.orth_ttr(3, distribution)
+        nodes = distribution.sample(10, "M")
+
+        fit = PCEFit(evaluate_basis(P, nodes))
+        polynomial = create_polynomial(P, fit.coefficients([nodes**2])[0])
+
+        correct = cp.fit_regression(P, nodes, nodes**2, rule="T")
+
+        self.assertTrue(np.allclose(polynomial(nodes), correct(nodes)))
+
+
+    def test_coefficients_few_nodes(self):
+        nodes = self.nodes[:, :len(self.P) - 3]
+        evaluation = nodes[0]*nodes[1]
+
+        fit = PCEFit(evaluate_basis(self.P, nodes))
+        coefficients = fit.coefficients([evaluation])[0]
+
+        correct = cp.fit_regression(self.P, nodes, evaluation, rule="T", retall=True)[1]
+
+        self.assertTrue(np.allclose(coefficients, correct.ravel()))
+
+
+    def test_coefficients_minimum_norm(self):
+        class Unregularized(PCEFit):
+            alphas = np.zeros(1)
+
+        nodes = self.nodes[:, :len(self.P) - 3]
+        basis_values = evaluate_basis(self.P, nodes)
+        evaluation = nodes[0]*nodes[1]
+
+        fit = Unregularized(basis_values)
+        coefficients = fit.coefficients([evaluation])[0]
+
+        correct = np.linalg.lstsq(basis_values.T, evaluation, rcond=None)[0]
+
+        self.assertTrue(np.allclose(coefficients, correct))
+        self.assertEqual(fit.leave_one_out([evaluation]), [np.inf])
+
+
+    def test_fit_group(self):
+        basis_values = evaluate_basis(self.P, self.nodes)
+
+        coefficients, errors = fit_group((basis_values, None, self.evaluations[:1], False))
+        correct = PCEFit(basis_values).coefficients(self.evaluations[:1])
+
+        self.assertTrue(np.array_equal(coefficients[0], correct[0]))
+        self.assertIsNone(errors)
+
+        coefficients, errors = fit_group((basis_values, None, self.evaluations[:1], True))
+
+        self.assertTrue(np.array_equal(coefficients[0], correct[0]))
+        self.assertEqual(errors, PCEFit(basis_values).leave_one_out(self.evaluations[:1]))
+
+
+    def test_leave_one_out(self):
+        basis_values = evaluate_basis(self.P, self.nodes)
+        fit = PCEFit(basis_values)
+
+        errors = fit.leave_one_out(self.evaluations)
+
+        self.assertEqual(len(errors), 3)
+
+        # nodes[0]*nodes[1] is in the span of the basis
+        self.assertLess(errors[0], 1e-10)
+
+        # Brute force, refitting without each node with the chosen damping
+        # parameter
+        evaluation = self.evaluations[1]
+        chosen = fit._solve_regression(evaluation, [evaluation.shape[1]])[1][0]
+        alpha = fit.alphas[chosen]
+
+        squared = 0
+        for i in range(self.nodes.shape[1]):
+            keep = np.arange(self.nodes.shape[1]) != i
+            coef_mat = basis_values[:, keep].T
+
+            coefficients = np.linalg.solve(np.dot(coef_mat.T, coef_mat) + alpha*np.eye(len(self.P)),
+                                           np.dot(coef_mat.T, evaluation[keep]))
+            squared += np.sum((np.dot(basis_values[:, i], coefficients) - evaluation[i])**2)
+
+        correct = squared/self.nodes.shape[1]/np.sum(np.var(evaluation, axis=0))
+
+        self.assertAlmostEqual(errors[1], correct)
+
+
+    def test_leave_one_out_constant(self):
+        fit = PCEFit(evaluate_basis(self.P, self.nodes))
+
+        errors = fit.leave_one_out([np.ones(self.nodes.shape[1])])
+
+        self.assertEqual(errors, [0])
+
+
+    def test_leave_one_out_quadrature(self):
+        nodes, weights = cp.generate_quadrature(5, self.distribution, rule="J", sparse=True)
+
+        fit = PCEFit(evaluate_basis(self.P, nodes), weights)
+
+        with self.assertRaises(ValueError):
+            fit.leave_one_out([nodes[0]])
@@ -0,0 +1,272 @@
+import unittest
+
+import numpy as np
+import chaospy as cp
+
+from uncertainpy.core import PCEStatistics
+from uncertainpy.core.pce_statistics import polynomial_coefficients, stochastic_dependent
+from uncertainpy.core.pce_statistics import evaluate_basis, recurrence_coefficients
+from uncertainpy.core.pce_statistics import basis_multi_indices, same_polynomial, percentiles
+from uncertainpy.core import pce_statistics
+
+
+class TestPCEStatistics(unittest.TestCase):
+    def setUp(self):
+        self.distribution = cp.J(cp.Uniform(1, 2), cp.Normal(0, 1), cp.Uniform(0, 3))
+
+        basis = cp.orth_ttr(3, self.distribution)
+
+        random = np.random.RandomState(0)
+        nodes = random.uniform(0, 1, (3, 60))
+        evaluations = random.uniform(0, 1, (60, 5))
+
+        self.U_hat = cp.fit_regression(basis, nodes, evaluations)
+
+        self.statistics = PCEStatistics.from_polynomial(self.U_hat, self.distribution)
+
+
+    def test_init(self):
+        statistics = PCEStatistics([[1, 2], [3, 4], [5, 6]], [[0, 0], [1, 0], [0, 1]], [1, 2, 0.5])
+
+        self.assertTrue(np.array_equal(statistics.mean, [1, 2]))
+        self.assertTrue(np.allclose(statistics.variance, [9*2 + 25*0.5, 16*2 + 36*0.5]))
+
+
+    def test_init_error(self):
+        with self.assertRaises(ValueError):
+            PCEStatistics([[1, 2], [3, 4]], [[0, 0], [1, 0], [0, 1]], [1, 2, 0.5])
+
+        with self.assertRaises(ValueError):
+            PCEStatistics([[1, 2], [3, 4]], [[1, 0], [0, 0]], [1, 2])
+
+
+    def test_polynomial_coefficients(self):
+        q0, q1 = cp.variable(2)
+
+        exponents, coefficients = polynomial_coefficients(cp.Poly([1 + 2*q0, 3*q0*q1**2]), 3)
+
+        polynomial = {tuple(exponent): coefficient for exponent, coefficient in zip(exponents, coefficients)}
+
+        self.assertEqual(exponents.shape, (3, 3))
+        self.assertTrue(np.array_equal(polynomial[(0, 0, 0)], [1, 0]))
+        self.assertTrue(np.array_equal(polynomial[(1, 0, 0)], [2, 0]))
+        self.assertTrue(np.array_equal(polynomial[(1, 2, 0)], [0, 3]))
+
+
+    def test_same_polynomial(self):
+        q0, q1 = cp.variable(2)
+
+        self.assertTrue(same_polynomial(cp.Poly([1 + 2*q0, q1]), cp.Poly([2*q0 + 1, q1 + 0*q0]), 2))
+        self.assertFalse(same_polynomial(cp.Poly([1 + 2*q0, q1]), cp.Poly([1 + 2*q0, 2*q1]), 2))
+        self.assertFalse(same_polynomial(cp.Poly([1 + 2*q0, q1]), cp.Poly(1 + 2*q0), 2))
+
+
+    def test_basis_multi_indices(self):
+        basis = cp.orth_ttr(2, cp.J(cp.Uniform(1, 2), cp.Normal(0, 1)))
+
+        multi_indices = basis_multi_indices(basis, 2)
+
+        self.assertEqual(sorted(map(tuple, multi_indices)),
+                         [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (2, 0)])
+
+
+    def test_stochastic_dependent(self):
+        self.assertFalse(stochastic_dependent(self.distribution))
+
+        uniform = cp.Uniform(1, 2)
+        self.assertTrue(stochastic_dependent(cp.J(uniform, cp.Normal(uniform, 1))))
+
+
+    def test_mean_variance(self):
+        self.assertTrue(np.allclose(self.statistics.mean, cp.E(self.U_hat, self.distribution)))
+        self.assertTrue(np.allclose(self.statistics.variance, cp.Var(self.U_hat, self.distribution)))
+
+
+    def test_sobol_first(self):
+        self.assertTrue(np.allclose(self.statistics.sobol_first(),
+                                    cp.Sens_m(self.U_hat, self.distribution)))
+
+
+    def test_sobol_total(self):
+        self.assertTrue(np.allclose(self.statistics.sobol_total(),
+                                    cp.Sens_t(self.U_hat, self.distribution)))
+
+
+    def test_sobol_second(self):
+        self.assertTrue(np.allclose(self.statistics.sobol_second(),
+                                    cp.Sens_m2(self.U_hat, self.distribution)))
+
+
+    def test_sobol_index(self):
+        sobol_first = self.statistics.sobol_first()
+        sobol_second = self.statistics.sobol_second()
+
+        self.assertTrue(np.allclose(self.statistics.sobol_index([1]), sobol_first[1]))
+        self.assertTrue(np.allclose(self.statistics.sobol_index([0, 2]), sobol_second[0, 2]))
+
+        # All Sobol indices sum to 1
+        total = 0
+        for parameters in [[0], [1], [2], [0, 1], [0, 2], [1, 2], [0, 1, 2]]:
+            total += self.statistics.sobol_index(parameters)
+
+        self.assertTrue(np.allclose(total, 1))
+
+
+    def test_zero_variance(self):
+        q0, q1 = cp.variable(2)
+        distribution = cp.J(cp.Uniform(), cp.Uniform())
+
+        statistics = PCEStatistics.from_polynomial(cp.Poly([2 + 0*q0, q0 + q1]), distribution)
+
+        self.assertTrue(np.allclose(statistics.mean, [2, 1]))
+        self.assertTrue(np.array_equal(statistics.sobol_first()[:, 0], [0, 0]))
+        self.assertTrue(np.allclose(statistics.sobol_first()[:, 1], [0.5, 0.5]))
+
+
+    def test_from_polynomial_basis(self):
+        basis, norms = cp.orth_ttr(4, self.distribution, retall=True)
+
+        statistics = PCEStatistics.from_polynomial(self.U_hat, self.distribution,
+                                                   basis=basis, norms=norms)
+
+        self.assertTrue(np.allclose(statistics.variance, self.statistics.variance))
+        self.assertTrue(np.allclose(statistics.sobol_total(), self.statistics.sobol_total()))
+
+        basis, norms = cp.orth_ttr(2, self.distribution, retall=True)
+
+        with self.assertRaises(ValueError):
+            PCEStatistics.from_polynomial(self.U_hat, self.distribution,
+                                          basis=basis, norms=norms)
+
+
+    def test_from_polynomial_dependent(self):
+        uniform = cp.Uniform(1, 2)
+
+        with self.assertRaises(ValueError):
+            PCEStatistics.from_polynomial(self.U_hat, cp.J(uniform, cp.Normal(uniform, 1)))
+
+
+    def test_evaluate_basis(self):
+        basis = cp.orth_ttr(3, self.distribution)
+        samples = self.distribution.sample(20, "M")
+
+        basis_values = evaluate_basis(basis, samples)
+
+        self.assertEqual(basis_values.shape, (len(basis), 20))
+        self.assertTrue(np.allclose(basis_values, basis(*samples)))
+
+
+    def test_evaluate_basis_single(self):
+        distribution = cp.Uniform(1, 2)
+        basis = cp.orth_ttr(3, distribution)
+        samples = distribution.sample(20, "M")
+
+        basis_values = evaluate_basis(basis, samples)
+
+        self.assertEqual(basis_values.shape, (4, 20))
+        self.assertTrue(np.allclose(basis_values, basis(samples)))
+
+
+    def test_evaluate(self):
+        basis = cp.orth_ttr(3, self.distribution)
+        samples = self.distribution.sample(20, "M")
+
+        values = self.statistics.evaluate(evaluate_basis(basis, samples))
+
+        self.assertEqual(values.shape, (5, 20))
+        self.assertTrue(np.allclose(values, self.U_hat(*samples)))
+
+
+    def test_percentile(self):
+        basis = cp.orth_ttr(3, self.distribution)
+        samples = self.distribution.sample(50, "M")
+
+        correct = np.percentile(self.U_hat(*samples), [5, 95], -1)
+
+        percentiles = self.statistics.percentile([5, 95], basis, samples)
+
+        self.assertEqual(percentiles.shape, (2, 5))
+        self.assertTrue(np.allclose(percentiles, correct))
+
+        # Only room for the values of 2 outputs at a time
+        percentiles = self.statistics.percentile([5, 95], basis, samples, memory_budget=2*8*50)
+        self.assertTrue(np.allclose(percentiles, correct))
+
+        # Only room for the basis values of 7 samples at a time
+        percentiles = self.statistics.percentile([5, 95], basis, samples, memory_budget=8*len(basis)*7)
+        self.assertTrue(np.allclose(percentiles, correct))
+
+        percentile = self.statistics.percentile(50, basis, samples, memory_budget=1)
+        self.assertEqual(percentile.shape, (5,))
+        self.assertTrue(np.allclose(percentile, np.percentile(self.U_hat(*samples), 50, -1)))
+
+
+    def test_percentile_single(self):
+        distribution = cp.Uniform(0, 1)
+        q0 = cp.variable()
+        U_hat = cp.Poly([q0, q0**2])
+
+        statistics = PCEStatistics.from_polynomial(U_hat, distribution)
+
+        basis = cp.orth_ttr(2, distribution)
+        samples = distribution.sample(30, "M")
+
+        percentiles = statistics.percentile([5, 95], basis, samples, memory_budget=8*len(basis)*4)
+        self.assertTrue(np.allclose(percentiles, np.percentile(U_hat(samples), [5, 95], -1)))
+
+
+    def test_percentiles(self):
+        basis = cp.orth_ttr(3, self.distribution)
+        samples = self.distribution.sample(50, "M")
+
+        q0, q1, q2 = cp.variable(3)
+        U_hat = cp.Poly(q0*q1 + q2**3)
+        statistics = PCEStatistics.from_polynomial(U_hat, self.distribution, basis=basis,
+                                                   norms=cp.orth_ttr(3, self.distribution, retall=True)[1])
+
+        # Count the evaluations of the basis
+        calls = []
+        def evaluate_basis_counted(basis, samples):
+            calls.append(samples.shape[-1])
+            return evaluate_basis(basis, samples)
+
+        pce_statistics.evaluate_basis = evaluate_basis_counted
+        try:
+            # Room for the values of all 6 outputs, and for the basis values
+            # of 7 samples at a time
+            results = percentiles([5, 95], [self.statistics, statistics], basis, samples,
+                                  memory_budget=max(8*6*50, 8*len(basis)*7))
+        finally:
+            pce_statistics.evaluate_basis = evaluate_basis
+
+        self.assertEqual(sum(calls), 50)
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0].shape, (2, 5))
+        self.assertEqual(results[1].shape, (2,))
+        self.assertTrue(np.allclose(results[0], np.percentile(self.U_hat(*samples), [5, 95], -1)))
+        self.assertTrue(np.allclose(results[1], np.percentile(U_hat(*samples), [5, 95], -1)))
+
+
+    def test_recurrence_coefficients(self):
+        basis = cp.orth_ttr(4, self.distribution)
+
+        alpha, beta = recurrence_coefficients(basis, 3)
+
+        self.assertEqual(alpha.shape, (3, 4))
+        self.assertEqual(beta.shape, (3, 4))
+
+        # Uniform(1, 2)
+        self.assertTrue(np.allclose(alpha[0], 1.5))
+        self.assertTrue(np.allclose(beta[0, 1:], [1/12., 1/15., 9/140.]))
+
+        # Normal(0, 1), the Hermite polynomials
+        self.assertTrue(np.allclose(alpha[1], 0))
+        self.assertTrue(np.allclose(beta[1, 1:], [1, 2, 3]))
+
+
+    def test_recurrence_coefficients_error(self):
+        q0, q1 = cp.variable(2)
+
+        with self.assertRaises(ValueError):
+            recurrence_coefficients(cp.Poly([1, q0, q0*q1]), 2)
@@ -0,0 +1,93 @@
+import unittest
+import os
+import time
+
+import numpy as np
+
+from uncertainpy.core import Profiler, Timings
+from uncertainpy.core.profiler import peak_rss, summarize
+
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = Profiler(3)
+
+        self.timings = Timings({"model.run": 2., "features.preprocess": 0.5})
+        self.timings.finish()
+
+
+    def test_timings_measure(self):
+        timings = Timings()
+
+        with timings.measure("model.run"):
+            time.sleep(0.01)
+
+        with timings.measure("model.run"):
+            time.sleep(0.01)
+
+        self.assertGreater(timings["model.run"], 0.02)
+
+
+    def test_timings_finish(self):
+        self.assertEqual(self.timings["pid"], os.getpid())
+        self.assertGreater(self.timings["peak_rss"], 0)
+        self.assertLessEqual(self.timings["finished"], time.time())
+
+
+    def test_peak_rss(self):
+        self.assertGreater(peak_rss(), 1024**2)
+
+
+    def test_init(self):
+        self.assertEqual(self.profiler.nr_evaluations, 3)
+        self.assertEqual(self.profiler.stages, [])
+        self.assertEqual(self.profiler.table(), {})
+
+
+    def test_add(self):
+        self.profiler.add(1, self.timings, received=self.timings["finished"] + 1)
+
+        self.assertEqual(sorted(self.profiler.stages), ["features.preprocess", "ipc", "model.run"])
+
+        table = self.profiler.table()
+        self.assertEqual(sorted(table.keys()),
+                         ["features.preprocess", "ipc", "model.run", "peak_rss", "pid"])
+
+        self.assertTrue(np.isnan(table["model.run"][0]))
+        self.assertEqual(table["model.run"][1], 2)
+        self.assertAlmostEqual(table["ipc"][1], 1)
+        self.assertEqual(table["pid"][1], os.getpid())
+
+
+    def test_add_not_received(self):
+        self.profiler.add(0, self.timings)
+
+        self.assertNotIn("ipc", self.profiler.table())
+
+
+    def test_summary(self):
+        self.profiler.add(0, self.timings)
+        self.profiler.add(2, Timings({"model.run": 4., "features.preprocess": 1.5}))
+
+        summary = self.profiler.summary()
+
+        self.assertEqual(len(summary), 2)
+        self.assertEqual(summary[0], ("model.run", 6, 3, 4, 0.75))
+        self.assertEqual(summary[1], ("features.preprocess", 2, 1, 1.5, 0.25))
+
+
+    def test_summarize_empty(self):
+        self.assertEqual(summarize({}), [])
+        self.assertEqual(summarize({"model.run": [np.nan]}), [])
+
+
+    def test_format_summary(self):
+        self.profiler.add(0, self.timings)
+
+        summary = self.profiler.format_summary(top=1)
+
+        self.assertIn("model.run", summary)
+        self.assertNotIn("features.preprocess", summary)
+        self.assertIn("Peak RSS", summary)
+        self.assertIn("over 1 worker processes", summary)
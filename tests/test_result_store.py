@@ -0,0 +1,199 @@
+import unittest
+
+import numpy as np
+
+from uncertainpy.core import ResultStore
+from uncertainpy.utils import SpikeMatrix
+
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.results = []
+        for i in range(3):
+            self.results.append({"model": {"values": np.arange(0, 10) + i,
+                                           "time": np.arange(0, 10)},
+                                 "feature0d": {"values": i,
+                                               "time": np.nan},
+                                 "feature_invalid": {"values": np.nan,
+                                                     "time": np.nan}})
+
+        self.store = ResultStore(3)
+
+
+    def add_results(self):
+        for index, result in enumerate(self.results):
+            self.store.add(index, result)
+
+
+    def test_init(self):
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.store.features, [])
+
+
+    def test_add(self):
+        self.add_results()
+
+        self.assertEqual(self.store.features, ["model", "feature0d", "feature_invalid"])
+        self.assertIn("model", self.store)
+        self.assertTrue(self.store.regular("model"))
+        self.assertTrue(self.store.common_time("model"))
+        self.assertFalse(self.store.interpolated("model"))
+        self.assertEqual(self.store.ndim("model"), 1)
+        self.assertEqual(self.store.ndim("feature0d"), 0)
+
+
+    def test_values(self):
+        self.add_results()
+
+        values = self.store.values("model")
+        self.assertIsInstance(values, np.ndarray)
+        self.assertEqual(values.shape, (3, 10))
+        self.assertTrue(np.array_equal(values[2], np.arange(0, 10) + 2))
+
+        self.assertTrue(np.array_equal(self.store.values("feature0d"), [0, 1, 2]))
+        self.assertTrue(np.array_equal(self.store.time("model"), np.arange(0, 10)))
+
+
+    def test_values_invalid(self):
+        self.results[0]["model"]["values"] = np.nan
+        self.results[2]["model"]["values"] = np.array([1, 2])
+        self.results[2]["model"]["values"] = np.nan
+
+        self.add_results()
+
+        values = self.store.values("model")
+        self.assertEqual(values.shape, (3, 10))
+        self.assertEqual(values.dtype, float)
+        self.assertTrue(np.all(np.isnan(values[0])))
+        self.assertTrue(np.array_equal(values[1], np.arange(0, 10) + 1))
+        self.assertTrue(np.all(np.isnan(values[2])))
+
+        values = self.store.values("feature_invalid")
+        self.assertIsInstance(values, list)
+        self.assertTrue(np.all(np.isnan(values)))
+
+
+    def test_values_out_of_order(self):
+        for index in [2, 0, 1]:
+            self.store.add(index, self.results[index])
+
+        values = self.store.values("model")
+        self.assertTrue(np.array_equal(values, [np.arange(0, 10),
+                                                np.arange(0, 10) + 1,
+                                                np.arange(0, 10) + 2]))
+
+
+    def test_values_upcast(self):
+        self.results[1]["model"]["values"] = np.arange(0, 10) + 0.5
+
+        self.add_results()
+
+        values = self.store.values("model")
+        self.assertTrue(np.array_equal(values[1], np.arange(0, 10) + 0.5))
+
+
+    def test_irregular(self):
+        self.results[1]["model"]["values"] = np.arange(0, 5)
+        self.results[1]["model"]["time"] = np.arange(0, 5)
+
+        self.add_results()
+
+        self.assertFalse(self.store.regular("model"))
+        self.assertFalse(self.store.common_time("model"))
+
+        values = self.store.values("model")
+        self.assertIsInstance(values, list)
+        self.assertTrue(np.array_equal(values[0], np.arange(0, 10)))
+        self.assertTrue(np.array_equal(values[1], np.arange(0, 5)))
+        self.assertTrue(np.array_equal(values[2], np.arange(0, 10) + 2))
+
+        times = self.store.times("model")
+        self.assertTrue(np.array_equal(times[0], np.arange(0, 10)))
+        self.assertTrue(np.array_equal(times[1], np.arange(0, 5)))
+
+
+    def test_ragged(self):
+        spiketrains = np.empty(2, dtype=object)
+        spiketrains[0] = []
+        spiketrains[1] = [1, 2]
+
+        self.store.add(0, {"spiketrains": {"values": spiketrains, "time": np.nan}})
+        self.store.add(1, {"spiketrains": {"values": [[1], [1, 2, 3]], "time": np.nan}})
+
+        self.assertEqual(self.store.ndim("spiketrains"), 2)
+
+        values = self.store.values("spiketrains")
+        self.assertIsInstance(values, list)
+        self.assertEqual(list(values[0][1]), [1, 2])
+        self.assertEqual(values[1], [[1], [1, 2, 3]])
+
+
+    def test_sparse(self):
+        spike_matrices = [SpikeMatrix.from_spiketrains([[i], [1, 2]], np.arange(0, 10)) for i in range(3)]
+
+        self.results[0]["model"]["values"] = np.nan
+        for i in [1, 2]:
+            self.results[i]["model"]["values"] = spike_matrices[i]
+
+        self.add_results()
+
+        self.assertTrue(self.store.regular("model"))
+        self.assertEqual(self.store.ndim("model"), 2)
+
+        values = self.store.values("model")
+        self.assertIsInstance(values, list)
+        self.assertTrue(np.isnan(values[0]))
+        self.assertIs(values[1], spike_matrices[1])
+        self.assertIs(values[2], spike_matrices[2])
+
+
+    def test_sparse_irregular(self):
+        for i in range(3):
+            self.results[i]["model"]["values"] = SpikeMatrix.from_spiketrains([[1]]*(i + 1), np.arange(0, 10))
+
+        self.add_results()
+
+        self.assertFalse(self.store.regular("model"))
+
+        values = self.store.values("model")
+        self.assertEqual([value.shape for value in values], [(1, 10), (2, 10), (3, 10)])
+
+
+    def test_sparse_dense(self):
+        self.results[0]["model"]["values"] = SpikeMatrix.from_spiketrains([[1]], np.arange(0, 10))
+
+        self.add_results()
+
+        self.assertFalse(self.store.regular("model"))
+
+        values = self.store.values("model")
+        self.assertIsInstance(values[0], SpikeMatrix)
+        self.assertTrue(np.array_equal(values[1], np.arange(0, 10) + 1))
+
+
+    def test_results(self):
+        self.results[1]["model"]["interpolation"] = "an interpolation"
+
+        self.add_results()
+
+        self.assertTrue(self.store.interpolated("model"))
+
+        results = self.store.results("model")
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(list(results[0].keys()), ["model"])
+        self.assertTrue(np.array_equal(results[2]["model"]["values"], np.arange(0, 10) + 2))
+        self.assertEqual(results[1]["model"]["interpolation"], "an interpolation")
+        self.assertNotIn("interpolation", results[0]["model"])
+
+
+    def test_time_first_valid(self):
+        self.results[0]["model"]["values"] = np.nan
+        self.results[0]["model"]["time"] = np.nan
+
+        for index in [2, 0, 1]:
+            self.store.add(index, self.results[index])
+
+        self.assertEqual(self.store.ndim("model"), 1)
+        self.assertTrue(np.array_equal(self.store.time("model"), np.arange(0, 10)))
@@ -0,0 +1,151 @@
+import unittest
+import os
+import shutil
+import pickle
+
+import numpy as np
+
+from uncertainpy.core import ResultTransport, ArrayDescriptor
+
+
+
+class TestResultTransport(unittest.TestCase):
+    def setUp(self):
+        self.output_test_dir = ".tests/"
+
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+        os.makedirs(self.output_test_dir)
+
+        self.folder = os.path.join(self.output_test_dir, "transport")
+
+        self.result = {"TestingModel1d": {"values": np.arange(0, 1000) + 1.,
+                                          "time": np.arange(0, 1000)},
+                       "feature0d": {"values": 1,
+                                     "time": np.nan},
+                       "feature2d": {"values": np.ones((10, 100), dtype=bool),
+                                     "time": np.arange(0, 10)}}
+
+
+    def tearDown(self):
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+
+
+    def test_init(self):
+        transport = ResultTransport(folder=self.folder, min_size=100, logger_level="error")
+
+        self.assertEqual(transport.folder, self.folder)
+        self.assertEqual(transport.min_size, 100)
+
+
+    def test_start(self):
+        transport = ResultTransport(folder=self.folder, logger_level="error")
+        transport.start()
+
+        self.assertTrue(os.path.isdir(self.folder))
+
+
+    def test_start_close_temporary(self):
+        transport = ResultTransport(logger_level="error")
+        transport.start()
+
+        folder = transport.folder
+        self.assertTrue(os.path.isdir(folder))
+
+        transport.close()
+
+        self.assertFalse(os.path.isdir(folder))
+        self.assertIsNone(transport.folder)
+
+
+    def test_start_temporary_shared_memory(self):
+        transport = ResultTransport(logger_level="error")
+        transport.start()
+
+        if os.access("/dev/shm", os.W_OK):
+            self.assertEqual(os.path.dirname(transport.folder), "/dev/shm")
+
+        transport.close()
+
+
+    def test_close(self):
+        transport = ResultTransport(folder=self.folder, min_size=100, logger_level="error")
+        transport.start()
+
+        transport.pack(self.result)
+        transport.close()
+
+        self.assertTrue(os.path.isdir(self.folder))
+        self.assertEqual(os.listdir(self.folder), [])
+
+
+    def test_pack(self):
+        transport = ResultTransport(folder=self.folder, min_size=500, logger_level="error")
+        transport.start()
+
+        result = transport.pack(self.result)
+
+        self.assertIsInstance(result["TestingModel1d"]["values"], ArrayDescriptor)
+        self.assertIsInstance(result["TestingModel1d"]["time"], ArrayDescriptor)
+        self.assertEqual(result["TestingModel1d"]["values"].shape, (1000,))
+        self.assertEqual(result["TestingModel1d"]["values"].nbytes, 8000)
+
+        self.assertEqual(result["feature0d"]["values"], 1)
+        self.assertTrue(np.isnan(result["feature0d"]["time"]))
+
+        self.assertIsInstance(result["feature2d"]["values"], ArrayDescriptor)
+        self.assertTrue(np.array_equal(result["feature2d"]["time"], np.arange(0, 10)))
+
+        self.assertEqual(len(os.listdir(self.folder)), 3)
+
+        # Only the descriptors are pickled
+        self.assertLess(len(pickle.dumps(result)), 2000)
+
+
+    def test_pack_object_array(self):
+        transport = ResultTransport(folder=self.folder, min_size=0, logger_level="error")
+        transport.start()
+
+        values = np.empty(2, dtype=object)
+        values[0] = [1, 2]
+        values[1] = [1, 2, 3]
+
+        result = transport.pack({"feature": {"values": values, "time": np.nan}})
+
+        self.assertIs(result["feature"]["values"], values)
+
+
+    def test_unpack(self):
+        transport = ResultTransport(folder=self.folder, min_size=500, logger_level="error")
+        transport.start()
+
+        result = transport.unpack(pickle.loads(pickle.dumps(transport.pack(self.result))))
+
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["values"], np.arange(0, 1000) + 1.))
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["time"], np.arange(0, 1000)))
+        self.assertEqual(result["feature0d"]["values"], 1)
+        self.assertEqual(result["feature2d"]["values"].dtype, bool)
+        self.assertTrue(np.array_equal(result["feature2d"]["values"], np.ones((10, 100), dtype=bool)))
+
+        self.assertEqual(os.listdir(self.folder), [])
+
+        # Unpacking a result that is not packed does nothing
+        result = transport.unpack(result)
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["values"], np.arange(0, 1000) + 1.))
+
+
+    def test_unpack_memory_mapped(self):
+        transport = ResultTransport(folder=self.folder, min_size=500, logger_level="error")
+        transport.start()
+
+        result = transport.unpack(transport.pack(self.result))
+        values = result["TestingModel1d"]["values"]
+
+        self.assertIs(type(values), np.ndarray)
+        self.assertIsInstance(values.base, np.memmap)
+
+        # Changing the array does not require the removed file
+        values[0] = 10
+        self.assertEqual(values[0], 10)
+        self.assertEqual(os.listdir(self.folder), [])
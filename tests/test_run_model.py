@@ -1,21 +1,32 @@
 import unittest
 import os
 import shutil
+import time
 import scipy.interpolate
 
 import numpy as np
 import multiprocess as mp
 
 from uncertainpy import Parameters
-from uncertainpy.core import RunModel
+from uncertainpy.core import RunModel, EvaluationCache, Checkpoint, ResultTransport
 from uncertainpy.models import Model
 from uncertainpy.features import Features, SpikingFeatures
 
 from .testing_classes import TestingFeatures, model_function
 from .testing_classes import TestingModel0d, TestingModel1d, TestingModel2d
+from .testing_classes import TestingModel1dBatch
 from .testing_classes import TestingModelAdaptive
 
 
+def unreliable_model(a=1, b=2):
+    if a == 1:
+        raise ValueError("a is 1")
+    elif a == 2:
+        time.sleep(60)
+
+    return np.arange(0, 10), np.arange(0, 10) + a + b
+
+
 
 
 class TestRunModel(unittest.TestCase):
@@ -337,6 +348,47 @@ class TestRunModel(unittest.TestCase):
 
 
 
+    def test_evaluate_nodes_parallel_context_manager(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        self.runmodel.CPUs = 2
+
+        with self.runmodel:
+            results_1 = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+            self.assertTrue(self.runmodel.worker_pool.running)
+
+            results_2 = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.assertFalse(self.runmodel.worker_pool.running)
+
+        self.assertTrue(np.array_equal(results_1[0]["TestingModel1d"]["values"],
+                                       results_2[0]["TestingModel1d"]["values"]))
+
+
+    def test_evaluate_nodes_parallel_closes_pool(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        self.runmodel.CPUs = 2
+
+        self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.assertFalse(self.runmodel.worker_pool.running)
+
+
+    def test_init_maxtasksperchild(self):
+        runmodel = RunModel(model=TestingModel1d(),
+                            parameters=self.parameters,
+                            logger_level="error",
+                            CPUs=2,
+                            maxtasksperchild=1)
+
+        self.assertEqual(runmodel.worker_pool.maxtasksperchild, 1)
+        self.assertEqual(runmodel.worker_pool.processes, 2)
+
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        results = runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.assertEqual(len(results), 3)
+
+
     def test_evaluate_nodes_no_multiproccess_model_1d(self):
         nodes = np.array([[0, 1, 2], [1, 2, 3]])
         self.runmodel.CPUs = None
@@ -1010,6 +1062,494 @@ class TestRunModel(unittest.TestCase):
                                     np.arange(0, 10) + 5.))
 
 
+    def test_apply_interpolation_resampled(self):
+        results = [{"TestingModel1d": {"values": np.arange(0, 10) + 1.,
+                                       "time": np.arange(0, 10)}},
+                   {"TestingModel1d": {"values": np.arange(0, 20) + 3.,
+                                       "time": np.arange(0, 20)}},
+                   {"TestingModel1d": {"values": np.arange(0, 10) + 5.,
+                                       "time": np.arange(0, 10)}},
+                   {"TestingModel1d": {"values": np.nan,
+                                       "time": np.arange(0, 20)}}]
+
+        time, interpolated_solves = self.runmodel.apply_interpolation(results, "TestingModel1d")
+
+        self.assertTrue(np.array_equal(time, np.arange(0, 20)))
+        self.assertTrue(np.allclose(interpolated_solves[0],
+                                    np.arange(0, 20) + 1))
+        self.assertTrue(np.allclose(interpolated_solves[1],
+                                    np.arange(0, 20) + 3.))
+        self.assertTrue(np.allclose(interpolated_solves[2],
+                                    np.arange(0, 20) + 5.))
+        self.assertTrue(np.isnan(interpolated_solves[3]))
+
+
+    def test_init_interpolation_method(self):
+        runmodel = RunModel(model=TestingModel1d(),
+                            parameters=self.parameters,
+                            logger_level="error",
+                            interpolation_method="linear")
+
+        self.assertEqual(runmodel.interpolation_method, "linear")
+        self.assertEqual(runmodel._parallel.interpolation_method, "linear")
+
+
+    def test_create_interpolation_time(self):
+        features = TestingFeatures(features_to_run=["feature1d",
+                                                    "feature_interpolate"],
+                                   interpolate="feature_interpolate")
+
+        self.runmodel = RunModel(model=TestingModelAdaptive(),
+                                 parameters=self.parameters,
+                                 features=features,
+                                 logger_level="error")
+
+        self.assertIsNone(self.runmodel.create_interpolation_time())
+
+        self.runmodel.interpolation_time = np.arange(0, 5)
+        interpolation_time = self.runmodel.create_interpolation_time()
+
+        self.assertEqual(sorted(interpolation_time.keys()),
+                         ["TestingModelAdaptive", "feature_interpolate"])
+        self.assertTrue(np.array_equal(interpolation_time["TestingModelAdaptive"], np.arange(0, 5)))
+        self.assertTrue(np.array_equal(interpolation_time["feature_interpolate"], np.arange(0, 5)))
+
+        self.runmodel.interpolation_time = {"TestingModelAdaptive": np.arange(0, 5)}
+        interpolation_time = self.runmodel.create_interpolation_time()
+
+        self.assertEqual(list(interpolation_time.keys()), ["TestingModelAdaptive"])
+
+        self.runmodel.interpolation_time = "auto"
+        result = {"TestingModelAdaptive": {"values": np.arange(0, 13) + 3,
+                                           "time": np.arange(0, 13)},
+                  "feature_interpolate": {"values": np.nan,
+                                          "time": np.nan},
+                  "feature1d": {"values": np.arange(0, 10),
+                                "time": np.arange(0, 10)}}
+
+        interpolation_time = self.runmodel.create_interpolation_time(result)
+
+        self.assertEqual(list(interpolation_time.keys()), ["TestingModelAdaptive"])
+        self.assertTrue(np.array_equal(interpolation_time["TestingModelAdaptive"], np.arange(0, 13)))
+
+        self.runmodel.interpolation_time = "unknown"
+        with self.assertRaises(ValueError):
+            self.runmodel.create_interpolation_time()
+
+
+    def test_run_interpolation_time_auto(self):
+        features = TestingFeatures(features_to_run=["feature0d",
+                                                    "feature_interpolate"],
+                                   interpolate="feature_interpolate")
+
+        for CPUs in [None, 2]:
+            self.runmodel = RunModel(model=TestingModelAdaptive(),
+                                     parameters=self.parameters,
+                                     features=features,
+                                     CPUs=CPUs,
+                                     logger_level="error",
+                                     interpolation_time="auto")
+
+            nodes = np.array([[0, 1, 2], [1, 2, 3]])
+            results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+            for result in results:
+                self.assertNotIn("interpolation", result["TestingModelAdaptive"])
+                self.assertTrue(np.array_equal(result["TestingModelAdaptive"]["time"],
+                                               np.arange(0, 11)))
+
+            self.assertIsNone(self.runmodel._parallel.interpolation_time)
+
+            data = self.runmodel.results_to_data(results)
+
+            self.assertTrue(np.array_equal(data["TestingModelAdaptive"].time,
+                                           np.arange(0, 11)))
+            self.assertTrue(np.allclose(data["TestingModelAdaptive"].evaluations[0],
+                                        np.arange(0, 11) + 1))
+            self.assertTrue(np.allclose(data["TestingModelAdaptive"].evaluations[1],
+                                        np.arange(0, 11) + 3))
+            self.assertTrue(np.allclose(data["TestingModelAdaptive"].evaluations[2],
+                                        np.arange(0, 11) + 5))
+
+            self.assertTrue(np.array_equal(data["feature_interpolate"].time,
+                                           np.arange(0, 11)))
+            self.assertTrue(np.allclose(data["feature_interpolate"].evaluations[2],
+                                        np.arange(0, 11) + 5))
+
+
+    def test_run_interpolation_time_linear(self):
+        self.runmodel = RunModel(model=TestingModelAdaptive(),
+                                 parameters=self.parameters,
+                                 CPUs=None,
+                                 logger_level="error",
+                                 interpolation_time=np.linspace(0, 14, 29),
+                                 interpolation_method="linear")
+
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        time = np.linspace(0, 14, 29)
+        self.assertTrue(np.array_equal(data["TestingModelAdaptive"].time, time))
+        self.assertTrue(np.allclose(data["TestingModelAdaptive"].evaluations[0], time + 1))
+        self.assertTrue(np.allclose(data["TestingModelAdaptive"].evaluations[2], time + 5))
+
+
+    def test_run_transport(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        folder = os.path.join(self.output_test_dir, "transport")
+
+        for CPUs in [None, 2]:
+            transport = ResultTransport(folder=folder, min_size=0, logger_level="error")
+
+            self.runmodel = RunModel(model=TestingModelAdaptive(),
+                                     parameters=self.parameters,
+                                     features=self.features,
+                                     CPUs=CPUs,
+                                     logger_level="error",
+                                     transport=transport)
+
+            self.assertIs(self.runmodel._parallel.transport, transport)
+
+            results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+            self.assertEqual(os.listdir(folder), [])
+
+            self.assertTrue(np.array_equal(results[1]["TestingModelAdaptive"]["values"],
+                                           np.arange(0, 13) + 3))
+            self.assertTrue(np.array_equal(results[1]["feature2d"]["values"],
+                                           np.array([np.arange(0, 10),
+                                                     np.arange(0, 10)])))
+
+            data = self.runmodel.results_to_data(results)
+
+            self.assertTrue(np.allclose(data["TestingModelAdaptive"].evaluations[2],
+                                        np.arange(0, 15) + 5))
+
+
+    def test_init_initializer(self):
+        def warm_up():
+            pass
+
+        runmodel = RunModel(model=TestingModel1d(),
+                            parameters=self.parameters,
+                            logger_level="error",
+                            initializer=warm_up)
+
+        self.assertEqual(runmodel.worker_pool.initializer,
+                         [warm_up, runmodel.model.initialize])
+
+        runmodel.model = TestingModel0d()
+        self.assertEqual(runmodel.worker_pool.initializer,
+                         [warm_up, runmodel.model.initialize])
+
+
+    def test_init_on_failure(self):
+        runmodel = RunModel(model=TestingModel1d(),
+                            parameters=self.parameters,
+                            logger_level="error",
+                            timeout=10,
+                            retries=2,
+                            on_failure="nan",
+                            speculative=True)
+
+        self.assertEqual(runmodel.timeout, 10)
+        self.assertEqual(runmodel.retries, 2)
+        self.assertEqual(runmodel.on_failure, "nan")
+        self.assertTrue(runmodel.speculative)
+
+        with self.assertRaises(ValueError):
+            runmodel.on_failure = "ignore"
+
+
+    def test_create_failed_result(self):
+        result = self.runmodel.create_failed_result()
+
+        self.assertEqual(sorted(result.keys()),
+                         ["TestingModel1d", "feature0d", "feature1d", "feature2d",
+                          "feature_interpolate", "feature_invalid"])
+
+        for feature in result:
+            self.assertTrue(np.isnan(result[feature]["values"]))
+            self.assertTrue(np.isnan(result[feature]["time"]))
+
+
+    def test_run_profile(self):
+        self.runmodel.profile = True
+        self.runmodel.CPUs = 2
+
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        self.assertIsNotNone(self.runmodel.profiler)
+
+        profiling = data.profiling
+        for stage in ["model.run", "model.postprocess", "features.preprocess",
+                      "features.feature1d", "interpolation", "ipc", "pid", "peak_rss"]:
+            self.assertIn(stage, profiling)
+            self.assertEqual(len(profiling[stage]), 3)
+            self.assertFalse(np.any(np.isnan(profiling[stage])))
+
+        self.assertNotIn(os.getpid(), profiling["pid"])
+        self.assertNotIn("__timings__", data)
+        self.assertTrue(np.array_equal(data["TestingModel1d"].evaluations[1], np.arange(0, 10) + 3))
+
+
+    def test_run_profile_cache(self):
+        cache = EvaluationCache(logger_level="error")
+
+        self.runmodel = RunModel(model=TestingModel1d(),
+                                 parameters=self.parameters,
+                                 features=self.features,
+                                 CPUs=None,
+                                 logger_level="error",
+                                 cache=cache,
+                                 profile=True)
+
+        nodes = np.array([[0, 1], [1, 2]])
+        self.runmodel.run(nodes, ["a", "b"])
+
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        # Only the evaluation that was not cached is profiled
+        self.assertTrue(np.all(np.isnan(data.profiling["model.run"][:2])))
+        self.assertFalse(np.isnan(data.profiling["model.run"][2]))
+        self.assertEqual(data.profiling["pid"][2], os.getpid())
+
+        # The cached results do not contain the timings
+        for key in cache._memory:
+            self.assertNotIn("__timings__", cache._memory[key])
+
+
+    def test_run_no_profile(self):
+        data = self.runmodel.run(np.array([[0, 1], [1, 2]]), ["a", "b"])
+
+        self.assertIsNone(self.runmodel.profiler)
+        self.assertEqual(data.profiling, {})
+
+
+    def test_run_on_failure_nan(self):
+        self.runmodel = RunModel(model=Model(run=unreliable_model, logger_level="error"),
+                                 parameters=self.parameters,
+                                 CPUs=None,
+                                 logger_level="error",
+                                 on_failure="nan")
+
+        nodes = np.array([[0, 1, 3], [1, 2, 3]])
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        self.assertEqual(data.failures, 1)
+        self.assertEqual(data.timeouts, 0)
+
+        evaluations = data["unreliable_model"].evaluations
+        self.assertTrue(np.array_equal(evaluations[0], np.arange(0, 10) + 1))
+        self.assertTrue(np.all(np.isnan(evaluations[1])))
+        self.assertTrue(np.array_equal(evaluations[2], np.arange(0, 10) + 6))
+
+
+    def test_run_on_failure_raise(self):
+        self.runmodel = RunModel(model=Model(run=unreliable_model, logger_level="error"),
+                                 parameters=self.parameters,
+                                 CPUs=2,
+                                 logger_level="error",
+                                 retries=1)
+
+        nodes = np.array([[0, 1, 3], [1, 2, 3]])
+
+        with self.assertRaises(ValueError):
+            self.runmodel.run(nodes, ["a", "b"])
+
+
+    def test_run_timeout(self):
+        cache = EvaluationCache(logger_level="error")
+
+        self.runmodel = RunModel(model=Model(run=unreliable_model, logger_level="error"),
+                                 parameters=self.parameters,
+                                 CPUs=2,
+                                 logger_level="error",
+                                 timeout=1,
+                                 on_failure="nan",
+                                 cache=cache)
+
+        nodes = np.array([[0, 1, 2, 3], [1, 2, 3, 4]])
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        self.assertEqual(data.failures, 1)
+        self.assertEqual(data.timeouts, 1)
+
+        evaluations = data["unreliable_model"].evaluations
+        self.assertTrue(np.array_equal(evaluations[0], np.arange(0, 10) + 1))
+        self.assertTrue(np.all(np.isnan(evaluations[1])))
+        self.assertTrue(np.all(np.isnan(evaluations[2])))
+        self.assertTrue(np.array_equal(evaluations[3], np.arange(0, 10) + 7))
+
+        # Failed evaluations are not cached
+        self.assertEqual(len(cache), 2)
+
+
+    def test_run_interpolation_time_auto_timeout(self):
+        # The first evaluation, that the time arrays are derived from, has
+        # the same timeout and failure handling as the rest
+        self.runmodel = RunModel(model=Model(run=unreliable_model, logger_level="error"),
+                                 parameters=self.parameters,
+                                 CPUs=2,
+                                 logger_level="error",
+                                 timeout=1,
+                                 on_failure="nan",
+                                 interpolation_time="auto")
+
+        nodes = np.array([[2, 0, 1], [1, 2, 3]])
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        self.assertEqual(data.timeouts, 1)
+        self.assertEqual(data.failures, 1)
+
+        evaluations = data["unreliable_model"].evaluations
+        self.assertTrue(np.all(np.isnan(evaluations[0])))
+        self.assertTrue(np.array_equal(evaluations[1], np.arange(0, 10) + 2))
+        self.assertTrue(np.all(np.isnan(evaluations[2])))
+
+
+    def test_run_interpolation_time_auto_on_failure(self):
+        self.runmodel = RunModel(model=Model(run=unreliable_model, logger_level="error"),
+                                 parameters=self.parameters,
+                                 CPUs=None,
+                                 logger_level="error",
+                                 on_failure="nan",
+                                 interpolation_time="auto")
+
+        nodes = np.array([[1, 0], [1, 2]])
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        self.assertEqual(data.failures, 1)
+
+        evaluations = data["unreliable_model"].evaluations
+        self.assertTrue(np.all(np.isnan(evaluations[0])))
+        self.assertTrue(np.array_equal(evaluations[1], np.arange(0, 10) + 2))
+
+
+    def test_init_feature_CPUs(self):
+        runmodel = RunModel(model=TestingModel1d(),
+                            parameters=self.parameters,
+                            logger_level="error",
+                            CPUs=2,
+                            feature_CPUs=3,
+                            queue_size=4)
+
+        self.assertEqual(runmodel.feature_CPUs, 3)
+        self.assertEqual(runmodel.feature_pool.processes, 3)
+        self.assertEqual(runmodel.queue_size, 4)
+        self.assertFalse(runmodel.keep_model_results)
+        self.assertIsNone(runmodel.model_results)
+
+        runmodel.feature_CPUs = "max"
+        self.assertEqual(runmodel.feature_CPUs, mp.cpu_count())
+
+
+    def test_use_pipeline(self):
+        self.runmodel.CPUs = 2
+        self.assertFalse(self.runmodel.use_pipeline())
+
+        self.runmodel.feature_CPUs = 1
+        self.assertTrue(self.runmodel.use_pipeline())
+
+        self.runmodel.CPUs = None
+        self.assertFalse(self.runmodel.use_pipeline())
+
+        self.runmodel.CPUs = 2
+        self.runmodel.timeout = 10
+        self.assertFalse(self.runmodel.use_pipeline())
+
+        self.runmodel.timeout = None
+        self.runmodel.model = TestingModel1dBatch()
+        self.assertFalse(self.runmodel.use_pipeline())
+
+
+    def test_run_pipeline(self):
+        self.runmodel = RunModel(model=TestingModel1d(),
+                                 parameters=self.parameters,
+                                 features=self.features,
+                                 CPUs=2,
+                                 feature_CPUs=1,
+                                 queue_size=1,
+                                 logger_level="error")
+
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        self.assertFalse(self.runmodel.worker_pool.running)
+        self.assertFalse(self.runmodel.feature_pool.running)
+
+        self.assert_testingmodel1d(data)
+        self.assert_feature_0d(data)
+        self.assert_feature_1d(data)
+        self.assert_feature_2d(data)
+        self.assertIn("feature_interpolate", data)
+
+
+    def test_run_pipeline_on_failure_nan(self):
+        self.runmodel = RunModel(model=Model(run=unreliable_model, logger_level="error"),
+                                 parameters=self.parameters,
+                                 CPUs=2,
+                                 feature_CPUs=1,
+                                 logger_level="error",
+                                 on_failure="nan")
+
+        nodes = np.array([[0, 1, 3], [1, 2, 3]])
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        self.assertEqual(data.failures, 1)
+
+        evaluations = data["unreliable_model"].evaluations
+        self.assertTrue(np.array_equal(evaluations[0], np.arange(0, 10) + 1))
+        self.assertTrue(np.all(np.isnan(evaluations[1])))
+        self.assertTrue(np.array_equal(evaluations[2], np.arange(0, 10) + 6))
+
+
+    def test_evaluate_features(self):
+        self.runmodel = RunModel(model=TestingModel1d(),
+                                 parameters=self.parameters,
+                                 features=self.features,
+                                 CPUs=2,
+                                 feature_CPUs=1,
+                                 keep_model_results=True,
+                                 logger_level="error")
+
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        model_results = self.runmodel.model_results
+        self.assertEqual(len(model_results), 3)
+        self.assertTrue(np.array_equal(model_results[1][0], np.arange(0, 10)))
+        self.assertTrue(np.array_equal(model_results[1][1], np.arange(0, 10) + 3))
+
+        self.runmodel.features = TestingFeatures(features_to_run=["feature0d", "feature1d"])
+
+        for CPUs, feature_CPUs in [(None, None), (2, None), (2, 1)]:
+            self.runmodel.CPUs = CPUs
+            self.runmodel.feature_CPUs = feature_CPUs
+
+            new_results = self.runmodel.evaluate_features(model_results)
+
+            self.assertEqual(len(new_results), 3)
+            for result, new_result in zip(results, new_results):
+                self.assertEqual(set(new_result.keys()),
+                                 set(["TestingModel1d", "feature0d", "feature1d"]))
+
+                for feature in new_result:
+                    self.assertTrue(np.array_equal(result[feature]["values"],
+                                                   new_result[feature]["values"]))
+
+
+    def test_evaluate_features_store(self):
+        model_results = [(np.arange(0, 10), np.arange(0, 10) + 1)]
+
+        results = self.runmodel.evaluate_features(model_results, store=True)
+
+        self.assertEqual(len(results), 1)
+        self.assertTrue(np.array_equal(results.values("TestingModel1d")[0], np.arange(0, 10) + 1))
+
+
     def test_run_two_uncertain_parameters(self):
         nodes = np.array([[0, 1, 2], [1, 2, 3]])
         features = TestingFeatures(features_to_run=["feature0d",
@@ -1037,6 +1577,193 @@ class TestRunModel(unittest.TestCase):
         self.assert_feature_2d(data)
 
 
+    def test_run_cache(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        uncertain_parameters = ["a", "b"]
+
+        self.runmodel.cache = EvaluationCache(logger_level="error")
+
+        data = self.runmodel.run(nodes, uncertain_parameters)
+
+        self.assertEqual(data.cache_hits, 0)
+        self.assertEqual(data.cache_misses, 3)
+
+        nodes = np.array([[0, 1, 5], [1, 2, 3]])
+        data_cached = self.runmodel.run(nodes, uncertain_parameters)
+
+        self.assertEqual(data_cached.cache_hits, 2)
+        self.assertEqual(data_cached.cache_misses, 1)
+
+        self.assertTrue(np.array_equal(data["TestingModel1d"].evaluations[:2],
+                                       data_cached["TestingModel1d"].evaluations[:2]))
+        self.assertTrue(np.array_equal(data_cached["TestingModel1d"].evaluations[2],
+                                       np.arange(0, 10) + 8))
+        self.assertTrue(np.array_equal(data["feature_interpolate"].evaluations[:2],
+                                       data_cached["feature_interpolate"].evaluations[:2]))
+
+
+    def test_run_cache_no_multiprocess(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        uncertain_parameters = ["a", "b"]
+
+        self.runmodel.CPUs = None
+        self.runmodel.cache = EvaluationCache(folder=os.path.join(self.output_test_dir, "cache"),
+                                              logger_level="error")
+
+        data = self.runmodel.run(nodes, uncertain_parameters)
+        data_cached = self.runmodel.run(nodes, uncertain_parameters)
+
+        self.assertEqual(data_cached.cache_hits, 3)
+        self.assertEqual(data_cached.cache_misses, 0)
+
+        for feature in ["TestingModel1d", "feature0d", "feature1d", "feature2d", "feature_interpolate"]:
+            self.assertTrue(np.array_equal(data[feature].evaluations,
+                                           data_cached[feature].evaluations))
+
+        self.assertTrue(np.all(np.isnan(data_cached["feature_invalid"].evaluations)))
+
+
+    def test_run_cache_settings(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        uncertain_parameters = ["a", "b"]
+
+        self.runmodel.cache = EvaluationCache(logger_level="error")
+
+        self.runmodel.run(nodes, uncertain_parameters)
+
+        self.runmodel.interpolation_method = "linear"
+        data = self.runmodel.run(nodes, uncertain_parameters)
+
+        self.assertEqual(data.cache_hits, 0)
+        self.assertEqual(data.cache_misses, 3)
+
+        self.runmodel.interpolation_time = np.linspace(0, 9, 5)
+        data = self.runmodel.run(nodes, uncertain_parameters)
+
+        self.assertEqual(data.cache_hits, 0)
+        self.assertEqual(data.cache_misses, 3)
+
+        self.runmodel.interpolation_time = np.linspace(0, 9, 7)
+        data = self.runmodel.run(nodes, uncertain_parameters)
+
+        self.assertEqual(data.cache_hits, 0)
+        self.assertEqual(data.cache_misses, 3)
+
+        data = self.runmodel.run(nodes, uncertain_parameters)
+
+        self.assertEqual(data.cache_hits, 3)
+        self.assertEqual(data.cache_misses, 0)
+
+
+    def test_evaluation_settings(self):
+        self.runmodel.CPUs = None
+
+        settings = self.runmodel.evaluation_settings()
+
+        nodes = np.array([[0, 1], [1, 2]])
+        self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.assertEqual(self.runmodel.evaluation_settings(), settings)
+
+        self.runmodel.features = SpikingFeatures(threshold=-30, logger_level="error")
+        settings = self.runmodel.evaluation_settings()
+
+        self.runmodel.features.threshold = -20
+        self.assertNotEqual(self.runmodel.evaluation_settings(), settings)
+
+        self.runmodel.features.threshold = -30
+        self.runmodel.features.features_to_run = ["nr_spikes"]
+        self.assertNotEqual(self.runmodel.evaluation_settings(), settings)
+
+
+    def test_run_checkpoint_resume(self):
+        nodes = np.array([[0, 1, 2, 3], [1, 2, 3, 4]])
+        uncertain_parameters = ["a", "b"]
+        filename = os.path.join(self.output_test_dir, "checkpoint.pkl")
+
+        evaluated = []
+        def model_interrupted(a, b):
+            if a == 2:
+                raise RuntimeError("Interrupted")
+
+            evaluated.append(a)
+            return np.arange(0, 10), np.arange(0, 10) + a + b
+
+        self.runmodel.CPUs = None
+        self.runmodel.model = model_interrupted
+        self.runmodel.features = None
+        self.runmodel.checkpoint = Checkpoint(filename, logger_level="error")
+
+        with self.assertRaises(RuntimeError):
+            self.runmodel.run(nodes, uncertain_parameters)
+
+        self.assertEqual(evaluated, [0, 1])
+
+        def model_interrupted(a, b):
+            evaluated.append(a)
+            return np.arange(0, 10), np.arange(0, 10) + a + b
+
+        self.runmodel.model = model_interrupted
+        self.runmodel.checkpoint = Checkpoint(filename, resume=True, logger_level="error")
+
+        data = self.runmodel.run(nodes, uncertain_parameters)
+
+        self.assertEqual(evaluated, [0, 1, 2, 3])
+        self.assertTrue(np.array_equal(data["model_interrupted"].evaluations,
+                                       [np.arange(0, 10) + 1, np.arange(0, 10) + 3,
+                                        np.arange(0, 10) + 5, np.arange(0, 10) + 7]))
+
+        # A node that differs from the stored node is evaluated again
+        nodes = np.array([[0, 1, 2, 5], [1, 2, 3, 4]])
+        data = self.runmodel.run(nodes, uncertain_parameters)
+
+        self.assertEqual(evaluated, [0, 1, 2, 3, 5])
+
+        # Evaluations calculated with other settings are not reused
+        self.runmodel.interpolation_method = "linear"
+        data = self.runmodel.run(nodes, uncertain_parameters)
+
+        self.assertEqual(evaluated, [0, 1, 2, 3, 5, 0, 1, 2, 5])
+
+
+    def test_create_batches(self):
+        model_parameters = [{"a": i} for i in range(5)]
+
+        self.runmodel.model = TestingModel1dBatch(batch_size=2)
+        batches = self.runmodel.create_batches(model_parameters)
+
+        self.assertEqual(batches, [[{"a": 0}, {"a": 1}], [{"a": 2}, {"a": 3}], [{"a": 4}]])
+
+        self.runmodel.model = TestingModel1dBatch()
+        self.runmodel.CPUs = 2
+        batches = self.runmodel.create_batches(model_parameters)
+
+        self.assertEqual(batches, [[{"a": 0}, {"a": 1}, {"a": 2}], [{"a": 3}, {"a": 4}]])
+
+
+    def test_run_batch(self):
+        nodes = np.array([[0, 1, 2, 3, 4], [1, 2, 3, 4, 5]])
+        uncertain_parameters = ["a", "b"]
+
+        data = self.runmodel.run(nodes, uncertain_parameters)
+
+        for batch_size in [None, 2]:
+            for CPUs in [None, 2]:
+                self.runmodel.model = TestingModel1dBatch(batch_size=batch_size)
+                self.runmodel.CPUs = CPUs
+
+                data_batch = self.runmodel.run(nodes, uncertain_parameters)
+
+                self.assertTrue(np.array_equal(data["TestingModel1d"].evaluations,
+                                               data_batch["TestingModel1dBatch"].evaluations))
+                self.assertTrue(np.array_equal(data["TestingModel1d"].time,
+                                               data_batch["TestingModel1dBatch"].time))
+                self.assertTrue(np.array_equal(data["feature1d"].evaluations,
+                                               data_batch["feature1d"].evaluations))
+                self.assertTrue(np.array_equal(data["feature_interpolate"].evaluations,
+                                               data_batch["feature_interpolate"].evaluations))
+
+
     def test_run_one_uncertain_parameter(self):
         nodes = np.array([0, 1, 2])
         self.runmodel = RunModel(model=TestingModel1d(),
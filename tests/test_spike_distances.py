@@ -0,0 +1,125 @@
+import unittest
+
+import numpy as np
+import quantities as pq
+import elephant
+
+from uncertainpy.features import Spiketrains
+from uncertainpy.features.spike_distances import van_rossum_distances, victor_purpura_distances
+from uncertainpy.features.spike_distances import _markage
+
+
+class TestSpikeDistances(unittest.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(10)
+
+        values = [np.sort(random.uniform(0, 100, random.randint(0, 12))) for i in range(12)]
+        values += [np.array([]), np.array([50.]), np.array([10., 20., 30.]), np.array([10., 20., 30.])]
+
+        self.spiketrains = Spiketrains(values, t_stop=100)
+
+
+    def test_markage(self):
+        times = np.array([0., 1., 3., 0., 2.])
+        neurons = np.array([0, 0, 0, 1, 1])
+
+        markage = _markage(times, neurons, 2.)
+
+        correct = [0,
+                   np.exp(-1/2.),
+                   np.exp(-2/2.) + np.exp(-3/2.),
+                   0,
+                   np.exp(-2/2.)]
+
+        self.assertTrue(np.allclose(markage, correct))
+
+
+    def test_markage_empty(self):
+        markage = _markage(np.zeros(0), np.zeros(0, dtype=int), 1.)
+
+        self.assertEqual(len(markage), 0)
+
+
+    def test_van_rossum_distances(self):
+        for tau in [0.5, 10, 1000]:
+            distances = van_rossum_distances(self.spiketrains, tau)
+
+            correct = elephant.spike_train_dissimilarity.van_rossum_dist(self.spiketrains.neo,
+                                                                         tau=tau*pq.ms)
+            # elephant gives small imaginary distances between equal spiketrains
+            correct = np.real(correct)
+
+            self.assertTrue(np.allclose(distances, correct, atol=1e-6))
+
+
+    def test_van_rossum_distances_normalization(self):
+        spiketrains = Spiketrains([np.array([]), np.array([1.])], t_stop=2)
+
+        distances = van_rossum_distances(spiketrains, 1.)
+
+        self.assertTrue(np.array_equal(distances, [[0, 1], [1, 0]]))
+
+
+    def test_van_rossum_distances_symmetric(self):
+        distances = van_rossum_distances(self.spiketrains, 10.)
+
+        self.assertTrue(np.array_equal(distances, distances.T))
+        self.assertTrue(np.all(np.diag(distances) == 0))
+        self.assertEqual(distances[-2, -1], 0)
+
+
+    def test_victor_purpura_distances(self):
+        for q in [0.001, 0.1, 5]:
+            distances = victor_purpura_distances(self.spiketrains, q)
+
+            correct = elephant.spike_train_dissimilarity.victor_purpura_dist(self.spiketrains.neo,
+                                                                             q=q/pq.ms)
+
+            self.assertTrue(np.allclose(distances, correct))
+
+
+    def test_victor_purpura_distances_simple(self):
+        spiketrains = Spiketrains([np.array([]), np.array([1.]), np.array([2.]), np.array([1., 2.])],
+                                  t_stop=3)
+
+        distances = victor_purpura_distances(spiketrains, 0.5)
+
+        correct = [[0, 1, 1, 2],
+                   [1, 0, 0.5, 1],
+                   [1, 0.5, 0, 1],
+                   [2, 1, 1, 0]]
+
+        self.assertTrue(np.array_equal(distances, correct))
+
+
+    def test_victor_purpura_distances_blocks(self):
+        distances = victor_purpura_distances(self.spiketrains, 0.1)
+        blocks = victor_purpura_distances(self.spiketrains, 0.1, max_elements=1)
+
+        self.assertTrue(np.array_equal(distances, blocks))
+
+
+    def test_threads(self):
+        distances = van_rossum_distances(self.spiketrains, 10.)
+        threads = van_rossum_distances(self.spiketrains, 10., nr_threads=3)
+
+        self.assertTrue(np.array_equal(distances, threads))
+
+        distances = victor_purpura_distances(self.spiketrains, 0.1)
+        threads = victor_purpura_distances(self.spiketrains, 0.1, nr_threads=3)
+
+        self.assertTrue(np.array_equal(distances, threads))
+
+
+    def test_no_spikes(self):
+        spiketrains = Spiketrains([np.array([]), np.array([])], t_stop=1)
+
+        self.assertTrue(np.array_equal(van_rossum_distances(spiketrains, 1.), np.zeros((2, 2))))
+        self.assertTrue(np.array_equal(victor_purpura_distances(spiketrains, 1.), np.zeros((2, 2))))
+
+
+    def test_no_spiketrains(self):
+        spiketrains = Spiketrains()
+
+        self.assertEqual(van_rossum_distances(spiketrains, 1.).shape, (0, 0))
+        self.assertEqual(victor_purpura_distances(spiketrains, 1.).shape, (0, 0))
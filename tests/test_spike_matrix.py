@@ -0,0 +1,131 @@
+import unittest
+import pickle
+
+import numpy as np
+
+from uncertainpy.utils import SpikeMatrix, spike_statistics, contains_nan
+
+
+class TestSpikeMatrix(unittest.TestCase):
+    def setUp(self):
+        self.time = np.arange(0, 4, 0.5)
+        self.spiketrains = [[0, 2, 3], [], [3.5, 0.5, 0.5, 1.25]]
+
+        self.spike_matrix = SpikeMatrix.from_spiketrains(self.spiketrains, self.time)
+
+
+    def dense(self, spiketrains, time):
+        values = []
+        for spiketrain in spiketrains:
+            binary_spike = np.zeros(len(time))
+            binary_spike[np.in1d(time, spiketrain)] = 1
+
+            values.append(binary_spike)
+
+        return np.array(values)
+
+
+    def test_init(self):
+        spike_matrix = SpikeMatrix([1, 0, 2], [0, 1, 1, 3], (3, 4))
+
+        self.assertEqual(spike_matrix.shape, (3, 4))
+        self.assertEqual(spike_matrix.ndim, 2)
+        self.assertEqual(spike_matrix.nnz, 3)
+        self.assertEqual(len(spike_matrix), 3)
+
+
+    def test_init_error(self):
+        with self.assertRaises(ValueError):
+            SpikeMatrix([1, 0, 2], [0, 1, 3], (3, 4))
+
+        with self.assertRaises(ValueError):
+            SpikeMatrix([1, 0, 2], [0, 1, 1, 2], (3, 4))
+
+
+    def test_from_spiketrains(self):
+        self.assertTrue(np.array_equal(self.spike_matrix.indices, [0, 4, 6, 1, 7]))
+        self.assertTrue(np.array_equal(self.spike_matrix.indptr, [0, 3, 3, 5]))
+        self.assertEqual(self.spike_matrix.shape, (3, 8))
+
+
+    def test_from_spiketrains_dense(self):
+        time = np.arange(0, 100, 0.1)
+
+        random = np.random.RandomState(1)
+        spiketrains = [time[np.sort(random.choice(len(time), random.randint(0, 50)))]
+                       for i in range(20)]
+        spiketrains.append([1000, -1, 0.05])
+
+        spike_matrix = SpikeMatrix.from_spiketrains(spiketrains, time)
+
+        self.assertTrue(np.array_equal(spike_matrix.toarray(), self.dense(spiketrains, time)))
+
+
+    def test_from_spiketrains_empty(self):
+        spike_matrix = SpikeMatrix.from_spiketrains([], self.time)
+        self.assertEqual(spike_matrix.shape, (0, 8))
+
+        spike_matrix = SpikeMatrix.from_spiketrains([[1]], [])
+        self.assertEqual(spike_matrix.shape, (1, 0))
+        self.assertEqual(spike_matrix.nnz, 0)
+
+
+    def test_toarray(self):
+        correct = self.dense(self.spiketrains, self.time)
+
+        self.assertTrue(np.array_equal(self.spike_matrix.toarray(), correct))
+        self.assertTrue(np.array_equal(np.asarray(self.spike_matrix), correct))
+        self.assertEqual(self.spike_matrix.toarray().dtype, np.float64)
+        self.assertEqual(self.spike_matrix.toarray(bool).dtype, bool)
+
+
+    def test_array_list(self):
+        values = np.array([self.spike_matrix, self.spike_matrix])
+
+        self.assertEqual(values.shape, (2, 3, 8))
+        self.assertTrue(np.array_equal(np.mean([self.spike_matrix, self.spike_matrix], 0),
+                                       self.spike_matrix.toarray()))
+
+
+    def test_getitem(self):
+        correct = self.dense(self.spiketrains, self.time)
+
+        self.assertTrue(np.array_equal(self.spike_matrix[0], correct[0]))
+        self.assertTrue(np.array_equal(self.spike_matrix[1], correct[1]))
+        self.assertTrue(np.array_equal(self.spike_matrix[-1], correct[-1]))
+        self.assertTrue(np.array_equal(self.spike_matrix[:, 1], correct[:, 1]))
+
+
+    def test_eq(self):
+        spike_matrix = SpikeMatrix.from_spiketrains(self.spiketrains, self.time)
+
+        self.assertEqual(self.spike_matrix, spike_matrix)
+        self.assertNotEqual(self.spike_matrix, SpikeMatrix.from_spiketrains([[0], [], []], self.time))
+
+
+    def test_pickle(self):
+        spike_matrix = pickle.loads(pickle.dumps(self.spike_matrix))
+
+        self.assertEqual(spike_matrix, self.spike_matrix)
+
+
+    def test_contains_nan(self):
+        self.assertFalse(contains_nan(self.spike_matrix))
+
+
+    def test_spike_statistics(self):
+        random = np.random.RandomState(2)
+
+        spike_matrices = []
+        for i in range(25):
+            spiketrains = [self.time[random.rand(len(self.time)) < 0.3] for j in range(4)]
+            spike_matrices.append(SpikeMatrix.from_spiketrains(spiketrains, self.time))
+
+        dense = np.array([spike_matrix.toarray() for spike_matrix in spike_matrices])
+
+        mean, variance, percentile_5, percentile_95 = spike_statistics(spike_matrices)
+
+        self.assertTrue(np.allclose(mean, np.mean(dense, 0)))
+        self.assertTrue(np.allclose(variance, np.var(dense, 0)))
+        self.assertTrue(np.allclose(percentile_5, np.percentile(dense, 5, 0)))
+        self.assertTrue(np.allclose(percentile_95, np.percentile(dense, 95, 0)))
@@ -9,9 +9,10 @@ import numpy as np
 # matplotlib.use("Agg")
 
 
-from uncertainpy.features.spikes import Spike, Spikes
+from uncertainpy.features.spikes import Spike, Spikes, SpikeTable
 
 from .testing_classes import TestCasePlot
+from .benchmark_spikes import find_spikes_loop, spike_train, same_spikes
 
 class TestSpikes(TestCasePlot):
     def setUp(self):
@@ -184,7 +185,181 @@ class TestSpikes(TestCasePlot):
 
 
 
+    def test_find_spikes_matches_loop(self):
+        folder = os.path.dirname(os.path.realpath(__file__))
+
+        traces = [(self.time, self.values),
+                  spike_train(nr_points=20000, nr_spikes=30, noise=5),
+                  (np.load(os.path.join(folder, "data/t_spike.npy")),
+                   np.load(os.path.join(folder, "data/V_spike.npy"))),
+                  (np.load(os.path.join(folder, "data/t_noise.npy")),
+                   np.load(os.path.join(folder, "data/V_noise.npy")))]
+
+        options = [{},
+                   {"threshold": "auto"},
+                   {"trim": False},
+                   {"end_threshold": 5},
+                   {"end_threshold": 0},
+                   {"min_amplitude": 60, "min_duration": 1},
+                   {"normalize": True, "threshold": 0.4, "end_threshold": -0.1}]
+
+        for time, values in traces:
+            for kwargs in options:
+                spikes = Spikes()
+                spikes.find_spikes(time, values, **kwargs)
+
+                self.assertTrue(same_spikes(spikes.spikes,
+                                            find_spikes_loop(time, values, **kwargs)))
+
+
+    def test_find_spikes_extended_matches_loop(self):
+        spikes = Spikes()
+        spikes.find_spikes(self.time, self.values, extended_spikes=True)
+
+        self.assertTrue(same_spikes(spikes.spikes,
+                                    find_spikes_loop(self.time, self.values, extended_spikes=True)))
+
+
+    def test_find_spikes_start_above(self):
+        time = np.arange(0, 10)
+        values = np.array([0, -70, 0, -70, -70, 0, 10, -70, 0, 0])
+
+        spikes = Spikes()
+        spikes.find_spikes(time, values)
+
+        self.assertEqual(spikes.nr_spikes, 2)
+        self.assertEqual([spike.global_index for spike in spikes], [2, 6])
+
+        # The last spike does not end before the voltage trace ends
+        self.assertTrue(same_spikes(spikes.spikes, find_spikes_loop(time, values)))
+
+
+    def test_threshold_crossings(self):
+        spikes = Spikes()
+
+        voltage = np.array([-70, -20, -35, -20, -50, -70, -20, -70])
+        crossings, terminations = spikes.threshold_crossings(voltage, -30, -10)
+
+        self.assertEqual(crossings.tolist(), [1, 6])
+        self.assertEqual(terminations.tolist(), [4, 7])
+
+        crossings, terminations = spikes.threshold_crossings(voltage, -30, 20)
+
+        self.assertEqual(crossings.tolist(), [1, 3, 6])
+        self.assertEqual(terminations.tolist(), [2, 4, 7])
+
+
+    def test_consecutive(self):
+        spikes = Spikes()
+
+        self.assertEqual(list(spikes.consecutive([2, 3, 4, 5, 12, 13, 14])), [2, 3, 4, 5])
+        self.assertEqual(list(spikes.consecutive([2, 3])), [2, 3])
+
+        with self.assertRaises(IndexError):
+            spikes.consecutive([])
+
+
 
 
 if __name__ == "__main__":
     unittest.main()
+
+
+    def test_spikes_lazy(self):
+        spikes = Spikes()
+        spikes.find_spikes(self.time, self.values)
+
+        self.assertIsNone(spikes._spikes)
+        self.assertEqual(len(spikes.table), spikes.nr_spikes)
+
+        spike = spikes[0]
+        self.assertIsInstance(spike, Spike)
+        self.assertIs(spikes[0], spike)
+        self.assertEqual(spike.global_index, spikes.table.peak[0])
+
+
+    def test_spikes_setter(self):
+        spike = Spike(np.arange(3), np.array([0, 1, 0]), 1, 1, 1)
+
+        spikes = Spikes()
+        spikes.spikes = [spike]
+
+        self.assertEqual(spikes.spikes, [spike])
+
+
+
+class TestSpikeTable(unittest.TestCase):
+    def setUp(self):
+        self.time = np.arange(0, 12)*0.5
+        self.V = np.array([-70, -60, 0, 20, 0, -60, -80, -60, 10, -20, -65, -70], dtype=float)
+
+        self.table = SpikeTable(self.time, self.V,
+                                start=[1, 7],
+                                end=[6, 11],
+                                peak=[3, 8])
+
+
+    def test_init(self):
+        self.assertEqual(len(self.table), 2)
+        self.assertEqual(self.table.start.dtype.kind, "i")
+
+
+    def test_init_empty(self):
+        table = SpikeTable([], [], [], [], [])
+
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.widths().tolist(), [])
+        self.assertEqual(table.AHP_minima().tolist(), [])
+        self.assertEqual(table.interspike_intervals().tolist(), [])
+
+
+    def test_peaks(self):
+        self.assertEqual(self.table.time_peak.tolist(), [1.5, 4])
+        self.assertEqual(self.table.V_peak.tolist(), [20, 10])
+
+
+    def test_durations(self):
+        self.assertEqual(self.table.durations.tolist(), [2, 1.5])
+        self.assertEqual(self.table.lengths.tolist(), [5, 4])
+
+
+    def test_spike(self):
+        spike = self.table.spike(1)
+
+        self.assertIsInstance(spike, Spike)
+        self.assertEqual(spike.V.tolist(), [-60, 10, -20, -65])
+        self.assertEqual(spike.time_spike, 4)
+        self.assertEqual(spike.V_spike, 10)
+        self.assertEqual(spike.global_index, 8)
+
+
+    def test_AHP_minima(self):
+        self.assertEqual(self.table.AHP_minima().tolist(), [-80])
+
+
+    def test_interspike_intervals(self):
+        self.assertEqual(self.table.interspike_intervals().tolist(), [2.5])
+
+
+    def test_widths(self):
+        widths = self.table.widths()
+
+        # Midpoint -20 crossed at 0.5 + 0.5*40/60 and 2 + 0.5*20/60
+        self.assertAlmostEqual(widths[0], 2 + 0.5*20/60. - 0.5 - 0.5*40/60.)
+
+        # Midpoint -25 crossed at 3.5 + 0.5*35/70 and 4.5 + 0.5*5/45
+        self.assertAlmostEqual(widths[1], 4.5 + 0.5*5/45. - 3.5 - 0.5*35/70.)
+
+
+    def test_widths_no_crossing(self):
+        table = SpikeTable(self.time, self.V, start=[1, 7], end=[5, 10], peak=[3, 8])
+
+        widths = table.widths()
+        self.assertTrue(np.isnan(widths[0]))
+        self.assertTrue(np.isnan(widths[1]))
+
+
+    def test_widths_short(self):
+        table = SpikeTable(self.time, self.V, start=[2], end=[4], peak=[3])
+
+        self.assertTrue(np.isnan(table.widths()[0]))
@@ -0,0 +1,131 @@
+import os
+import shutil
+import unittest
+
+import numpy as np
+import chaospy as cp
+
+from uncertainpy import Surrogate, Data
+from uncertainpy.core import UncertaintyCalculations
+
+
+class TestSurrogate(unittest.TestCase):
+    def setUp(self):
+        self.output_test_dir = ".tests/"
+
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+        os.makedirs(self.output_test_dir)
+
+        np.random.seed(10)
+
+        self.distribution = cp.J(cp.Uniform(1, 2), cp.Normal(0, 1))
+
+        q0, q1 = cp.variable(2)
+        self.U_hat = {"model": cp.Poly([q0, q0*q1**3 + q1, 2 - q0**2]),
+                      "feature0d": cp.Poly(q0 + q1**2)}
+
+        self.data = Data(logger_level="error")
+        self.data.uncertain_parameters = ["a", "b"]
+        self.data.model_name = "model"
+        self.data.add_features(["model", "feature0d"])
+
+        uncertainty_calculations = UncertaintyCalculations(model=None, logger_level="error")
+        self.data = uncertainty_calculations.analyse_PCE(self.U_hat,
+                                                         self.distribution,
+                                                         self.data,
+                                                         nr_samples=10)
+
+        self.surrogate = Surrogate(self.data)
+
+        self.nodes = self.distribution.sample(20, "M")
+
+
+    def tearDown(self):
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+
+
+    def test_init(self):
+        self.assertEqual(self.surrogate.uncertain_parameters, ["a", "b"])
+        self.assertEqual(self.surrogate.model_name, "model")
+        self.assertEqual(self.surrogate.features, ["feature0d", "model"])
+        self.assertEqual(self.surrogate.alpha.shape, (2, 4))
+
+
+    def test_init_error(self):
+        data = Data(logger_level="error")
+        data.add_features("model")
+
+        with self.assertRaises(ValueError):
+            Surrogate(data)
+
+
+    def test_predict(self):
+        values = self.surrogate.predict(self.nodes)
+
+        self.assertEqual(values.shape, (20, 3))
+        self.assertTrue(np.allclose(values, self.U_hat["model"](*self.nodes).T))
+
+        values = self.surrogate.predict(self.nodes, "feature0d")
+
+        self.assertEqual(values.shape, (20,))
+        self.assertTrue(np.allclose(values, self.U_hat["feature0d"](*self.nodes)))
+
+
+    def test_predict_dict(self):
+        values = self.surrogate.predict({"b": self.nodes[1], "a": self.nodes[0]})
+
+        self.assertTrue(np.allclose(values, self.U_hat["model"](*self.nodes).T))
+
+        values = self.surrogate.predict({"a": 1.5, "b": 0.5}, "feature0d")
+        self.assertTrue(np.allclose(values, 1.75))
+
+
+    def test_predict_single(self):
+        values = self.surrogate.predict([1.5, 0.5])
+
+        self.assertEqual(values.shape, (3,))
+        self.assertTrue(np.allclose(values, [1.5, 1.5*0.125 + 0.5, 2 - 1.5**2]))
+
+
+    def test_predict_error(self):
+        with self.assertRaises(ValueError):
+            self.surrogate.predict(self.nodes, "not_existing")
+
+        with self.assertRaises(ValueError):
+            self.surrogate.predict({"a": 1})
+
+        with self.assertRaises(ValueError):
+            self.surrogate.predict(np.ones((3, 10)))
+
+
+    def test_predict_single_parameter(self):
+        distribution = cp.Uniform(1, 2)
+        q0 = cp.variable()
+        U_hat = {"model": cp.Poly([q0**3, 1 - q0])}
+
+        data = Data(logger_level="error")
+        data.uncertain_parameters = ["a"]
+        data.model_name = "model"
+        data.add_features("model")
+
+        uncertainty_calculations = UncertaintyCalculations(model=None, logger_level="error")
+        data = uncertainty_calculations.analyse_PCE(U_hat, distribution, data, nr_samples=10)
+
+        surrogate = Surrogate(data)
+        nodes = distribution.sample(10, "M")
+
+        self.assertTrue(np.allclose(surrogate.predict(nodes), U_hat["model"](nodes).T))
+        self.assertTrue(np.allclose(surrogate.predict(1.5), [1.5**3, -0.5]))
+
+
+    def test_load(self):
+        filename = os.path.join(self.output_test_dir, "surrogate.h5")
+        self.data.save(filename)
+
+        surrogate = Surrogate.load(filename)
+
+        self.assertEqual(surrogate.features, ["feature0d", "model"])
+        self.assertTrue(np.allclose(surrogate.predict(self.nodes),
+                                    self.U_hat["model"](*self.nodes).T))
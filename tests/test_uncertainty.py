@@ -826,7 +826,8 @@ class TestUncertainty(TestCasePlot):
                                          nr_collocation_nodes=50,
                                          quadrature_order=3,
                                          nr_pc_mc_samples=10**3,
-                                         allow_incomplete=False)
+                                         allow_incomplete=False,
+                                         tolerance=1e-3)
 
 
         self.assertEqual(self.uncertainty.data.arguments["function"], "PC")
@@ -839,6 +840,7 @@ class TestUncertainty(TestCasePlot):
         self.assertEqual(self.uncertainty.data.arguments["nr_pc_mc_samples"],10**3)
         self.assertEqual(self.uncertainty.data.arguments["allow_incomplete"], False)
         self.assertEqual(self.uncertainty.data.arguments["seed"], self.seed)
+        self.assertEqual(self.uncertainty.data.arguments["tolerance"], 1e-3)
 
         self.assertEqual(data.arguments["function"], "PC")
         self.assertEqual(data.arguments["uncertain_parameters"], ["a", "b"])
@@ -1473,6 +1475,33 @@ class TestUncertainty(TestCasePlot):
         self.assertEqual(data.arguments["nr_samples"], self.nr_mc_samples)
 
 
+    def test_quantify_checkpoint_resume(self):
+        filename = os.path.join(self.output_test_dir, "checkpoint.pkl")
+
+        data = self.uncertainty.quantify(method="mc",
+                                         nr_mc_samples=self.nr_mc_samples,
+                                         plot=None,
+                                         save=False,
+                                         seed=self.seed,
+                                         checkpoint=filename)
+
+        self.assertTrue(os.path.isfile(filename))
+        self.assertIsNone(self.uncertainty.uncertainty_calculations.runmodel.checkpoint)
+
+        data_resumed = self.uncertainty.quantify(method="mc",
+                                                 nr_mc_samples=self.nr_mc_samples,
+                                                 plot=None,
+                                                 save=False,
+                                                 seed=self.seed,
+                                                 checkpoint=filename,
+                                                 resume=True)
+
+        for feature in data:
+            for statistical_metric in data[feature]:
+                np.testing.assert_array_equal(data[feature][statistical_metric],
+                                              data_resumed[feature][statistical_metric])
+
+
     def test_quantify_custom(self):
         self.set_up_test_calculations()
 
@@ -9,7 +9,9 @@ import numpy as np
 import chaospy as cp
 import multiprocess as mp
 
-from uncertainpy.core import UncertaintyCalculations
+from uncertainpy.core import UncertaintyCalculations, PCEStatistics
+from uncertainpy.core.pce_statistics import basis_multi_indices
+from uncertainpy.core.pce_fit import create_polynomial
 from uncertainpy.parameters import Parameters
 from uncertainpy.features import Features
 from uncertainpy import uniform, normal
@@ -94,6 +96,15 @@ class TestUncertaintyCalculations(unittest.TestCase):
 
         self.assertIsNone(uncertainty_calculations.runmodel.CPUs)
 
+
+    def test_init_memory_budget(self):
+        uncertainty_calculations = UncertaintyCalculations(model=self.model,
+                                                           parameters=self.parameters,
+                                                           logger_level="error",
+                                                           memory_budget=1024)
+
+        self.assertEqual(uncertainty_calculations.memory_budget, 1024)
+
     def test_intit_features(self):
         uncertainty_calculations = UncertaintyCalculations(model=self.model,
                                                            logger_level="error")
@@ -1069,7 +1080,7 @@ class TestUncertaintyCalculations(unittest.TestCase):
         # Test if all calculated properties actually exists
         data_types = ["values", "time", "mean", "variance", "percentile_5", "percentile_95",
                       "sobol_first", "sobol_first_average",
-                      "sobol_total", "sobol_total_average", "labels"]
+                      "sobol_total", "sobol_total_average", "sobol_second", "labels"]
 
         for data_type in data_types:
             if data_type not in ["values", "time", "labels"]:
@@ -1079,6 +1090,135 @@ class TestUncertaintyCalculations(unittest.TestCase):
 
 
 
+    def test_analyse_PCE_chaospy(self):
+        data = Data(logger_level="error")
+
+        q0, q1 = cp.variable(2)
+        distribution = cp.J(cp.Uniform(0, 1), cp.Normal(1, 2))
+
+        data.uncertain_parameters = ["a", "b"]
+        data.add_features(["TestingModel1d"])
+
+        U_hat = {"TestingModel1d": cp.Poly([q0, q1*q0 + q0**2, 2*q1 - q1**2*q0])}
+
+        data = self.uncertainty_calculations.analyse_PCE(U_hat, distribution, data)
+
+        self.assertTrue(np.allclose(data["TestingModel1d"].mean,
+                                    cp.E(U_hat["TestingModel1d"], distribution)))
+        self.assertTrue(np.allclose(data["TestingModel1d"].variance,
+                                    cp.Var(U_hat["TestingModel1d"], distribution)))
+        self.assertTrue(np.allclose(data["TestingModel1d"].sobol_first,
+                                    cp.Sens_m(U_hat["TestingModel1d"], distribution)))
+        self.assertTrue(np.allclose(data["TestingModel1d"].sobol_total,
+                                    cp.Sens_t(U_hat["TestingModel1d"], distribution)))
+        self.assertTrue(np.allclose(data["TestingModel1d"].sobol_second,
+                                    cp.Sens_m2(U_hat["TestingModel1d"], distribution)))
+
+
+    def test_analyse_PCE_percentiles(self):
+        q0, q1 = cp.variable(2)
+        distribution = cp.J(cp.Uniform(0, 1), cp.Normal(1, 2))
+
+        U_hat = {"TestingModel1d": cp.Poly([q0, q1*q0 + q0**2, 2*q1 - q1**2*q0]),
+                 "feature0d": cp.Poly(q0*q1)}
+
+        self.uncertainty_calculations.memory_budget = 8*100
+
+        data = Data(logger_level="error")
+        data.uncertain_parameters = ["a", "b"]
+        data.add_features(["TestingModel1d", "feature0d"])
+
+        np.random.seed(10)
+        data = self.uncertainty_calculations.analyse_PCE(U_hat, distribution, data, nr_samples=100)
+
+        np.random.seed(10)
+        samples = distribution.sample(100, "M")
+
+        for feature in U_hat:
+            U_mc = U_hat[feature](*samples)
+
+            self.assertTrue(np.allclose(data[feature].percentile_5,
+                                        np.percentile(U_mc, 5, -1)))
+            self.assertTrue(np.allclose(data[feature].percentile_95,
+                                        np.percentile(U_mc, 95, -1)))
+
+
+    def test_create_PCE_statistics(self):
+        q0, q1 = cp.variable(2)
+        U_hat = cp.Poly([q0, q1*q0, q1])
+
+        bases = {}
+        statistics = self.uncertainty_calculations.create_PCE_statistics(U_hat,
+                                                                         cp.J(cp.Uniform(), cp.Uniform()),
+                                                                         bases)
+
+        self.assertIsInstance(statistics, PCEStatistics)
+        self.assertEqual(list(bases.keys()), [2])
+
+        uniform = cp.Uniform(1, 2)
+        statistics = self.uncertainty_calculations.create_PCE_statistics(U_hat,
+                                                                         cp.J(uniform, cp.Normal(uniform, 1)))
+
+        self.assertIsNone(statistics)
+
+
+    def test_create_PCE_statistics_coefficients(self):
+        distribution = cp.J(cp.Uniform(), cp.Uniform())
+        P, norms = cp.orth_ttr(2, distribution, retall=True)
+
+        coefficients = np.arange(len(P)*3, dtype=float).reshape(len(P), 3)
+        U_hat = create_polynomial(P, coefficients)
+
+        statistics = self.uncertainty_calculations.create_PCE_statistics(U_hat,
+                                                                         distribution,
+                                                                         coefficients=coefficients)
+
+        self.assertTrue(np.array_equal(statistics.coefficients, coefficients))
+        self.assertTrue(np.array_equal(statistics.multi_indices, basis_multi_indices(P, 2)))
+        self.assertTrue(np.array_equal(statistics.norms, norms))
+
+        # Coefficients that do not belong to U_hat are not used
+        q0, q1 = cp.variable(2)
+        U_hat = cp.Poly([q0, q1*q0, q1])
+
+        statistics = self.uncertainty_calculations.create_PCE_statistics(U_hat,
+                                                                         distribution,
+                                                                         coefficients=coefficients)
+
+        self.assertTrue(np.allclose(statistics.mean, cp.E(U_hat, distribution)))
+
+
+    def test_analyse_PCE_high_order(self):
+        # The monomial coefficients of the basis are badly conditioned for a
+        # high order and a distribution far from the origin
+        distribution = cp.J(cp.Uniform(50, 150), cp.Normal(2, 0.5), cp.Uniform(-1, 3))
+        P, norms = cp.orth_ttr(6, distribution, retall=True)
+
+        nodes = distribution.sample(2*len(P) + 2, "M")
+
+        data = Data(logger_level="error")
+        data.uncertain_parameters = ["a", "b", "c"]
+        data.add_features(["TestingModel1d"])
+        data["TestingModel1d"].evaluations = nodes[0]*nodes[1] + nodes[2]**3 \
+                                             + (nodes[1] - 2)**6 + np.sin(nodes[0]/30.)
+
+        U_hat = self.uncertainty_calculations.fit_PCE(data, P, nodes)
+        coefficients = data["TestingModel1d"].pce_coefficients.copy()
+
+        data = self.uncertainty_calculations.analyse_PCE(U_hat, distribution, data)
+
+        correct = PCEStatistics(coefficients, basis_multi_indices(P, 3), norms)
+
+        self.assertTrue(np.allclose(data["TestingModel1d"].pce_coefficients, coefficients,
+                                    rtol=1e-12, atol=0))
+        self.assertTrue(np.allclose(data["TestingModel1d"].mean, correct.mean, rtol=1e-12))
+        self.assertTrue(np.allclose(data["TestingModel1d"].variance, correct.variance, rtol=1e-12))
+        self.assertTrue(np.allclose(data["TestingModel1d"].sobol_first, correct.sobol_first(),
+                                    rtol=1e-12))
+        self.assertTrue(np.allclose(data["TestingModel1d"].sobol_total, correct.sobol_total(),
+                                    rtol=1e-12))
+
+
     def test_polynomial_chaos_collocation(self):
         features = TestingFeatures(features_to_run=["feature0d_var",
                                                     "feature1d_var",
@@ -1721,6 +1861,189 @@ class TestUncertaintyCalculations(unittest.TestCase):
 
 
 
+    def test_fit_PCE(self):
+        np.random.seed(self.seed)
+
+        distribution = cp.J(cp.Uniform(0.5, 1.5), cp.Uniform(1, 3))
+        P = cp.orth_ttr(2, distribution)
+        nodes = distribution.sample(2*len(P) + 2, "M")
+
+        data = Data(logger_level="error")
+        data.add_features(["TestingModel1d", "feature0d", "feature1d", "feature_nan"])
+
+        data["TestingModel1d"].evaluations = np.outer(nodes[0]*nodes[1], np.arange(10))
+        data["feature0d"].evaluations = nodes[0]**2
+        data["feature1d"].evaluations = np.outer(nodes[1], [1, 2])
+
+        # Features with different missing values are fitted separately
+        feature_nan = list(nodes[0] + nodes[1])
+        feature_nan[0] = np.nan
+        data["feature_nan"].evaluations = feature_nan
+
+        for CPUs in [None, 2]:
+            self.uncertainty_calculations.runmodel.CPUs = CPUs
+
+            data.incomplete = []
+            U_hat = self.uncertainty_calculations.fit_PCE(data, P, nodes)
+
+            # The fits do not start the worker processes of the model
+            self.assertFalse(self.uncertainty_calculations.runmodel.worker_pool.running)
+
+            self.assertEqual(set(U_hat.keys()), set(data.data.keys()))
+            self.assertEqual(data.incomplete, ["feature_nan"])
+
+            for feature in ["TestingModel1d", "feature0d", "feature1d"]:
+                correct = cp.fit_regression(P, nodes, data[feature].evaluations, rule="T")
+
+                self.assertTrue(np.allclose(U_hat[feature](*nodes), correct(*nodes)))
+
+            correct = cp.fit_regression(P, nodes[:, 1:], feature_nan[1:], rule="T")
+            self.assertTrue(np.allclose(U_hat["feature_nan"](*nodes), correct(*nodes)))
+
+
+    def test_fit_PCE_spectral(self):
+        distribution = cp.J(cp.Uniform(0.5, 1.5), cp.Uniform(1, 3))
+        P = cp.orth_ttr(2, distribution)
+        nodes, weights = cp.generate_quadrature(4, distribution, rule="J", sparse=True)
+
+        data = Data(logger_level="error")
+        data.add_features(["TestingModel1d", "feature0d"])
+
+        data["TestingModel1d"].evaluations = np.outer(nodes[0]*nodes[1], np.arange(10))
+        data["feature0d"].evaluations = nodes[0]**2
+
+        U_hat = self.uncertainty_calculations.fit_PCE(data, P, nodes, weights=weights)
+
+        for feature in data:
+            correct = cp.fit_quadrature(P, nodes, weights, data[feature].evaluations)
+
+            self.assertTrue(np.allclose(U_hat[feature](*nodes), correct(*nodes)))
+
+
+    def test_fit_PCE_leave_one_out(self):
+        np.random.seed(self.seed)
+
+        distribution = cp.J(cp.Uniform(0.5, 1.5), cp.Uniform(1, 3))
+        P = cp.orth_ttr(2, distribution)
+        nodes = distribution.sample(2*len(P) + 2, "M")
+
+        data = Data(logger_level="error")
+        data.add_features(["TestingModel1d", "feature0d"])
+
+        data["TestingModel1d"].evaluations = np.outer(nodes[0]*nodes[1], np.arange(10))
+        data["feature0d"].evaluations = np.exp(nodes[0]*nodes[1])
+
+        U_hat, errors = self.uncertainty_calculations.fit_PCE(data, P, nodes, retall=True)
+
+        self.assertEqual(set(errors.keys()), set(U_hat.keys()))
+        self.assertLess(errors["TestingModel1d"], 1e-10)
+        self.assertGreater(errors["feature0d"], 1e-10)
+
+        weights = np.ones(nodes.shape[1])
+        with self.assertRaises(ValueError):
+            self.uncertainty_calculations.fit_PCE(data, P, nodes, weights=weights, retall=True)
+
+
+    def test_create_PCE_collocation_adaptive(self):
+        U_hat, distribution, data = \
+            self.uncertainty_calculations.create_PCE_collocation_adaptive(tolerance=1e-6)
+
+        self.assertEqual(data.uncertain_parameters, ["a", "b"])
+        self.assertEqual(set(U_hat.keys()),
+                         set(["TestingModel1d", "feature0d", "feature1d", "feature2d"]))
+
+        # The model is linear, and the features are constant
+        for feature in U_hat:
+            self.assertEqual(data[feature].pce_order, 1)
+            self.assertLess(data[feature].pce_error, 1e-6)
+
+        # 2*3 + 2 nodes for polynomial order 1
+        self.assertEqual(len(data["TestingModel1d"].evaluations), 8)
+        self.assertIn("adaptive point collocation", data.method)
+
+
+    def test_create_PCE_collocation_adaptive_order(self):
+        calls = []
+
+        def model_function(a, b):
+            calls.append((a, b))
+            return None, a**3 + b, {"a": a}
+
+        def kink(time, values, info):
+            return None, np.abs(info["a"] - 1)
+
+        model = Model(run=model_function, logger_level="error")
+
+        uncertainty_calculations = UncertaintyCalculations(model=model,
+                                                           parameters=self.parameters,
+                                                           features=[kink],
+                                                           logger_level="error",
+                                                           CPUs=None)
+
+        np.random.seed(self.seed)
+        U_hat, distribution, data = \
+            uncertainty_calculations.create_PCE_collocation_adaptive(polynomial_order=3,
+                                                                     tolerance=1e-8)
+
+        # A cubic polynomial is exact at order 3, which requires 2*10 + 2
+        # nodes. The nodes of order 1 and 2 are reused.
+        self.assertEqual(data["model_function"].pce_order, 3)
+        self.assertEqual(len(data["model_function"].evaluations), 22)
+        self.assertEqual(len(calls), 22)
+        self.assertEqual(len(set(calls)), 22)
+
+        self.assertLess(data["model_function"].pce_error, 1e-8)
+
+        nodes = distribution.sample(22, "H")
+        self.assertTrue(np.allclose(U_hat["model_function"](*nodes), nodes[0]**3 + nodes[1]))
+        self.assertTrue(np.allclose(data["model_function"].evaluations, nodes[0]**3 + nodes[1]))
+
+        # |a - 1| does not converge, and has the highest order
+        self.assertEqual(data["kink"].pce_order, 3)
+        self.assertGreater(data["kink"].pce_error, 1e-8)
+
+
+    def test_create_PCE_collocation_adaptive_features(self):
+        def model_function(a, b):
+            return None, a**2 + b
+
+        def constant(time, values):
+            return None, 1
+
+        model = Model(run=model_function, logger_level="error")
+
+        uncertainty_calculations = UncertaintyCalculations(model=model,
+                                                           parameters=self.parameters,
+                                                           features=[constant],
+                                                           logger_level="error",
+                                                           CPUs=None)
+
+        U_hat, distribution, data = \
+            uncertainty_calculations.create_PCE_collocation_adaptive(polynomial_order=4,
+                                                                     tolerance=1e-8)
+
+        # Each feature keeps the lowest order that is below the tolerance
+        self.assertEqual(data["constant"].pce_order, 1)
+        self.assertEqual(data["model_function"].pce_order, 2)
+        self.assertEqual(len(data["model_function"].evaluations), 2*6 + 2)
+
+
+    def test_polynomial_chaos_tolerance(self):
+        data = self.uncertainty_calculations.polynomial_chaos(method="collocation",
+                                                              tolerance=1e-6,
+                                                              seed=self.seed)
+
+        self.assertEqual(data["TestingModel1d"].pce_order, 1)
+        self.assertIn("mean", data["TestingModel1d"])
+        self.assertIn("sobol_first", data["TestingModel1d"])
+
+        with self.assertRaises(ValueError):
+            self.uncertainty_calculations.polynomial_chaos(method="spectral", tolerance=1e-6)
+
+        with self.assertRaises(ValueError):
+            self.uncertainty_calculations.polynomial_chaos(rosenblatt=True, tolerance=1e-6)
+
+
     def test_create_PCE_collocation_incomplete(self):
         np.random.seed(self.seed)
 
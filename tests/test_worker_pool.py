@@ -0,0 +1,295 @@
+import unittest
+import os
+import time
+
+from uncertainpy.core import WorkerPool
+from uncertainpy.core.worker_pool import imap_sequential
+
+
+def square(x):
+    return x**2
+
+
+def get_pid(x):
+    return os.getpid()
+
+
+def set_warm():
+    os.environ["UNCERTAINPY_TEST_WARM"] = "warm"
+
+
+def get_warm(x):
+    return os.environ.get("UNCERTAINPY_TEST_WARM", "cold")
+
+
+def unreliable(x):
+    if x == 1:
+        raise ValueError("x is 1")
+    elif x == 2:
+        time.sleep(60)
+    elif x == 3:
+        time.sleep(1)
+
+    return x**2
+
+
+def pair(x):
+    if x == 1:
+        raise ValueError("x is 1")
+
+    return x, os.getpid()
+
+
+def add_pid(x, pid):
+    return x**2, pid, os.getpid()
+
+
+def fail_once(x):
+    # Fails the first time it is called for each x
+    filename = os.path.join(".tests", "fail_once_{}".format(x))
+    if not os.path.isfile(filename):
+        open(filename, "w").close()
+        raise ValueError("first attempt")
+
+    return x**2
+
+
+def square_tuple(x):
+    return (x**2,)
+
+
+
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.worker_pool = WorkerPool(processes=2)
+
+
+    def tearDown(self):
+        self.worker_pool.terminate()
+
+
+    def test_init(self):
+        worker_pool = WorkerPool()
+
+        self.assertIsNone(worker_pool.processes)
+        self.assertEqual(worker_pool.initializer, [])
+        self.assertIsNone(worker_pool.maxtasksperchild)
+        self.assertFalse(worker_pool.running)
+
+
+    def test_initializer(self):
+        self.worker_pool.initializer = set_warm
+        self.assertEqual(self.worker_pool.initializer, [set_warm])
+
+        self.worker_pool.initializer = [set_warm, square]
+        self.assertEqual(self.worker_pool.initializer, [set_warm, square])
+
+        self.worker_pool.initializer = None
+        self.assertEqual(self.worker_pool.initializer, [])
+
+
+    def test_initializer_error(self):
+        with self.assertRaises(TypeError):
+            self.worker_pool.initializer = [set_warm, 2]
+
+
+    def test_imap(self):
+        result = list(self.worker_pool.imap(square, range(5)))
+
+        self.assertEqual(result, [0, 1, 4, 9, 16])
+        self.assertTrue(self.worker_pool.running)
+
+        self.worker_pool.close()
+        self.assertFalse(self.worker_pool.running)
+
+
+    def test_context_manager(self):
+        with self.worker_pool:
+            pids_1 = set(self.worker_pool.imap(get_pid, range(10)))
+            pids_2 = set(self.worker_pool.imap(get_pid, range(10)))
+
+            self.assertTrue(self.worker_pool.running)
+
+        self.assertFalse(self.worker_pool.running)
+        self.assertEqual(pids_1 | pids_2, pids_1)
+        self.assertNotIn(os.getpid(), pids_1)
+
+
+    def test_context_manager_nested(self):
+        with self.worker_pool:
+            with self.worker_pool:
+                list(self.worker_pool.imap(square, range(5)))
+
+            self.assertTrue(self.worker_pool.running)
+
+        self.assertFalse(self.worker_pool.running)
+
+
+    def test_context_manager_exception(self):
+        with self.assertRaises(ValueError):
+            with self.worker_pool:
+                list(self.worker_pool.imap(square, range(5)))
+                raise ValueError("error")
+
+        self.assertFalse(self.worker_pool.running)
+
+
+    def test_initializer_run(self):
+        self.worker_pool.initializer = set_warm
+
+        result = list(self.worker_pool.imap(get_warm, range(4)))
+
+        self.assertEqual(result, ["warm"]*4)
+
+
+    def test_maxtasksperchild(self):
+        self.worker_pool.processes = 1
+        self.worker_pool.maxtasksperchild = 1
+
+        with self.worker_pool:
+            pids = list(self.worker_pool.imap(get_pid, range(3)))
+
+        self.assertEqual(len(set(pids)), 3)
+
+
+    def test_imap_tasks(self):
+        with self.worker_pool:
+            outcomes = list(self.worker_pool.imap_tasks(unreliable, [0, 1, 2, 4], timeout=0.5))
+
+        self.assertEqual(outcomes[0], ("ok", 0))
+        self.assertEqual(outcomes[1][0], "failed")
+        self.assertIsInstance(outcomes[1][1], ValueError)
+        self.assertEqual(outcomes[2], ("timeout", None))
+        self.assertEqual(outcomes[3], ("ok", 16))
+
+        self.assertFalse(self.worker_pool.running)
+
+
+    def test_imap_tasks_lazy(self):
+        consumed = []
+
+        def elements():
+            for x in range(20):
+                consumed.append(x)
+                yield x
+
+        with self.worker_pool:
+            outcomes = self.worker_pool.imap_tasks(square, elements())
+
+            # Only one element for each worker process is given to the pool
+            self.assertEqual(next(outcomes), ("ok", 0))
+            self.assertLessEqual(len(consumed), 4)
+
+            self.assertEqual(list(outcomes), [("ok", x**2) for x in range(1, 20)])
+
+
+    def test_imap_tasks_timeout_many(self):
+        with self.worker_pool:
+            outcomes = list(self.worker_pool.imap_tasks(unreliable, [2, 2, 2, 0, 4], timeout=0.5))
+
+        self.assertEqual(outcomes, [("timeout", None)]*3 + [("ok", 0), ("ok", 16)])
+
+
+    def test_imap_tasks_pool_reused(self):
+        with self.worker_pool:
+            outcomes = list(self.worker_pool.imap_tasks(unreliable, [2, 0], timeout=0.5))
+            result = list(self.worker_pool.imap(square, range(5)))
+
+        self.assertEqual(outcomes, [("timeout", None), ("ok", 0)])
+        self.assertEqual(result, [0, 1, 4, 9, 16])
+
+
+    def test_imap_tasks_retries(self):
+        if not os.path.isdir(".tests"):
+            os.makedirs(".tests")
+
+        try:
+            with self.worker_pool:
+                outcomes = list(self.worker_pool.imap_tasks(fail_once, [5, 6], retries=1))
+        finally:
+            for x in [5, 6]:
+                os.remove(os.path.join(".tests", "fail_once_{}".format(x)))
+
+        self.assertEqual(outcomes, [("ok", 25), ("ok", 36)])
+
+
+    def test_imap_tasks_speculative(self):
+        self.worker_pool.processes = 3
+
+        with self.worker_pool:
+            outcomes = list(self.worker_pool.imap_tasks(unreliable, [0, 3, 4, 5],
+                                                        speculative=True))
+
+        self.assertEqual(outcomes, [("ok", 0), ("ok", 9), ("ok", 16), ("ok", 25)])
+
+
+    def test_imap_pipeline(self):
+        feature_pool = WorkerPool(processes=1)
+        received = []
+
+        def callback(index, result):
+            received.append((index, result[0]))
+
+        try:
+            with self.worker_pool, feature_pool:
+                outcomes = list(self.worker_pool.imap_pipeline(pair, [0, 1, 2, 3, 4],
+                                                               feature_pool, add_pid,
+                                                               queue_size=1,
+                                                               callback=callback))
+
+                self.assertTrue(feature_pool.running)
+        finally:
+            feature_pool.terminate()
+
+        self.assertEqual(outcomes[1][0], "failed")
+        self.assertIsInstance(outcomes[1][1], ValueError)
+
+        outcomes = outcomes[:1] + outcomes[2:]
+        self.assertEqual([outcome[0] for outcome in outcomes], ["ok"]*4)
+        self.assertEqual([outcome[1][0] for outcome in outcomes], [0, 4, 9, 16])
+
+        # The two stages are run in different processes
+        for status, (value, first_pid, second_pid) in outcomes:
+            self.assertNotEqual(first_pid, second_pid)
+            self.assertNotEqual(first_pid, os.getpid())
+
+        self.assertEqual(sorted(received), [(0, 0), (2, 2), (3, 3), (4, 4)])
+        self.assertFalse(self.worker_pool.running)
+
+
+    def test_imap_pipeline_retries(self):
+        if not os.path.isdir(".tests"):
+            os.makedirs(".tests")
+
+        feature_pool = WorkerPool(processes=1)
+        try:
+            with self.worker_pool, feature_pool:
+                outcomes = list(self.worker_pool.imap_pipeline(square_tuple, [7, 8],
+                                                               feature_pool, fail_once,
+                                                               retries=1))
+        finally:
+            feature_pool.terminate()
+            for x in [49, 64]:
+                os.remove(os.path.join(".tests", "fail_once_{}".format(x)))
+
+        self.assertEqual(outcomes, [("ok", 49**2), ("ok", 64**2)])
+
+
+    def test_imap_sequential(self):
+        outcomes = list(imap_sequential(unreliable, [0, 1, 4], retries=2))
+
+        self.assertEqual(outcomes[0], ("ok", 0))
+        self.assertEqual(outcomes[1][0], "failed")
+        self.assertEqual(outcomes[2], ("ok", 16))
+
+
+    def test_set_processes(self):
+        list(self.worker_pool.imap(square, range(5)))
+        self.assertTrue(self.worker_pool.running)
+
+        self.worker_pool.processes = 2
+        self.assertTrue(self.worker_pool.running)
+
+        self.worker_pool.processes = 3
+        self.assertFalse(self.worker_pool.running)
+        self.assertEqual(self.worker_pool.processes, 3)
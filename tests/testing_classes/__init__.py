@@ -1,4 +1,5 @@
 from .testing_models import TestingModel0d, TestingModel1d, TestingModel2d
+from .testing_models import TestingModel1dBatch
 from .testing_models import TestingModelNoTime, TestingModelNoTimeU
 from .testing_models import TestingModelAdaptive, TestingModelConstant
 from .testing_models import TestingModelIncomplete
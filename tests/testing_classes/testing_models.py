@@ -38,6 +38,25 @@ class TestingModel1d(Model):
 
 
 
+class TestingModel1dBatch(Model):
+    def __init__(self, batch_size=None):
+        super(TestingModel1dBatch, self).__init__(labels=["x", "y"],
+                                                  batch=True,
+                                                  batch_size=batch_size,
+                                                  logger_level=None)
+
+    def run(self, a=1, b=2):
+        a = np.asarray(a)
+        b = np.asarray(b)
+
+        time = np.arange(0, 10)
+        values = np.arange(0, 10) + a[:, np.newaxis] + b[:, np.newaxis]
+
+        return time, values
+
+
+
+
 class TestingModel2d(Model):
     def __init__(self):
         super(TestingModel2d, self).__init__(labels=["x", "y", "z"], logger_level=None)